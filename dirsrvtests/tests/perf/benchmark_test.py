@@ -0,0 +1,320 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+# A reproducible performance benchmark suite. The data is generated with
+# dbgen from a fixed seed and imported offline, the loads run at each of
+# PERF_THREADS worker threads, and the results are written as JSON with the
+# environment they ran in. Compare two results files with perf_compare.py.
+#
+# The suite is configured with environment variables:
+#   PERF_USERS, PERF_GROUPS, PERF_GROUP_SIZE: the size of the data
+#   PERF_THREADS: the comma separated nsslapd-threadnumber values
+#   PERF_DURATION, PERF_WARMUP: the seconds of each load, and of its warm up
+#   PERF_WORKERS, PERF_CONNECTIONS: the client processes, and their connections
+#   PERF_SEED: the seed of the data and of the loads
+#   PERF_RESULTS: the results file
+
+import ldap
+import os
+import random
+import time
+import logging
+import pytest
+from datetime import datetime
+from ldap.controls import SimplePagedResultsControl
+from lib389.dbgen import dbgen_users, get_index
+from lib389.loadgen import LatencyHistogram, LoadGenerator
+from lib389.perf import BenchmarkResults, get_environment
+from lib389.plugins import MemberOfPlugin
+from lib389._constants import DEFAULT_BENAME, DEFAULT_SUFFIX
+from lib389.topologies import topology_st as topo
+
+pytestmark = pytest.mark.tier3
+
+logging.basicConfig(level=logging.DEBUG)
+log = logging.getLogger(__name__)
+
+USERS = int(os.environ.get('PERF_USERS', '10000'))
+GROUPS = int(os.environ.get('PERF_GROUPS', '100'))
+GROUP_SIZE = int(os.environ.get('PERF_GROUP_SIZE', '100'))
+THREADS = [int(t) for t in os.environ.get('PERF_THREADS', '1,4,8,16').split(',')]
+DURATION = float(os.environ.get('PERF_DURATION', '10'))
+WARMUP = float(os.environ.get('PERF_WARMUP', '2'))
+WORKERS = int(os.environ.get('PERF_WORKERS', '4'))
+CONNECTIONS = int(os.environ.get('PERF_CONNECTIONS', '4'))
+SEED = int(os.environ.get('PERF_SEED', '1'))
+RESULTS = os.environ.get('PERF_RESULTS',
+                         'perf_results_%s.json' % datetime.now().strftime('%Y%m%d-%H%M%S'))
+
+PEOPLE = 'ou=people,%s' % DEFAULT_SUFFIX
+GROUPS_BASE = 'ou=groups,%s' % DEFAULT_SUFFIX
+REINDEX_ATTRS = ['uid', 'cn', 'member']
+# Not indexed by default
+UNINDEXED_FILTER = '(l=Sunnyvale)'
+PAGE_SIZE = 500
+
+
+def _ldif_file(inst):
+    return os.path.join(inst.get_ldif_dir(), 'perf_benchmark.ldif')
+
+
+def _write_ldif(inst, ldif_file):
+    """Write the users with dbgen, and groups of random users"""
+    random.seed(SEED)
+    dbgen_users(inst, USERS, ldif_file, DEFAULT_SUFFIX, generic=True, parent=PEOPLE)
+    rand = random.Random(SEED)
+    with open(ldif_file, 'a') as ldif:
+        for i in range(1, GROUPS + 1):
+            name = 'group' + get_index(i, GROUPS)
+            ldif.write('dn: cn=%s,%s\nobjectClass: top\nobjectClass: groupOfNames\ncn: %s\n' %
+                       (name, GROUPS_BASE, name))
+            for j in sorted(rand.sample(range(1, USERS + 1), min(GROUP_SIZE, USERS))):
+                ldif.write('member: uid=user%s,%s\n' % (get_index(j, USERS), PEOPLE))
+            ldif.write('\n')
+
+
+def _import(inst, ldif_file):
+    """Import the data offline, and return the seconds it took"""
+    inst.stop()
+    start = time.perf_counter()
+    assert inst.ldif2db(DEFAULT_BENAME, None, None, None, ldif_file) is True
+    elapsed = time.perf_counter() - start
+    inst.start()
+    return elapsed
+
+
+def _set_threads(inst, threads):
+    log.info('Configuring %d worker threads' % threads)
+    inst.config.set('nsslapd-threadnumber', str(threads))
+    inst.restart()
+
+
+def _run_load(inst, results, name, **kwargs):
+    """Run a LoadGenerator load at each thread count, after a warm up"""
+    for threads in THREADS:
+        _set_threads(inst, threads)
+        load = LoadGenerator(inst, PEOPLE, min=1, max=USERS, workers=WORKERS,
+                             connections=CONNECTIONS, seed=SEED, **kwargs)
+        if WARMUP > 0:
+            load.run(duration=WARMUP)
+        report = load.run(duration=DURATION)
+        log.info('%s with %d threads: %.0f operations/s, p99 %s' %
+                 (name, threads, report['rate'], {op: r['latency'].get('p99') for (op, r) in report['by_op'].items()}))
+        assert report['ops'] > 0
+        assert report['errors'] == 0
+        results.record(name, report, threads)
+
+
+def _paged_search(inst, filter):
+    """Read all the pages of a search, and return the number of entries"""
+    ctrl = SimplePagedResultsControl(True, size=PAGE_SIZE, cookie='')
+    entries = 0
+    while True:
+        msgid = inst.search_ext(DEFAULT_SUFFIX, ldap.SCOPE_SUBTREE, filter, ['uid'], serverctrls=[ctrl])
+        (rtype, rdata, rmsgid, rctrls) = inst.result3(msgid)
+        entries += len(rdata)
+        cookies = [c.cookie for c in rctrls if c.controlType == SimplePagedResultsControl.controlType]
+        if not cookies or not cookies[0]:
+            return entries
+        ctrl.cookie = cookies[0]
+
+
+@pytest.fixture(scope="module")
+def perf_results(topo, request):
+    """Import the benchmark data, and write the results at the end"""
+    inst = topo.standalone
+    threads = inst.config.get_attr_val_utf8('nsslapd-threadnumber')
+    ldif_file = _ldif_file(inst)
+    log.info('Generating %d users and %d groups in %s' % (USERS, GROUPS, ldif_file))
+    _write_ldif(inst, ldif_file)
+    _import(inst, ldif_file)
+
+    results = BenchmarkResults(get_environment(inst), {
+        'users': USERS,
+        'groups': GROUPS,
+        'group_size': GROUP_SIZE,
+        'threads': THREADS,
+        'duration': DURATION,
+        'warmup': WARMUP,
+        'workers': WORKERS,
+        'connections': CONNECTIONS,
+        'seed': SEED,
+    })
+
+    def fin():
+        results.save(RESULTS)
+        log.info('Benchmark results written to %s' % os.path.abspath(RESULTS))
+        inst.config.set('nsslapd-threadnumber', threads)
+        inst.restart()
+
+    request.addfinalizer(fin)
+    return results
+
+
+def test_import(topo, perf_results):
+    """Measure an offline import of the benchmark data
+
+    :id: 7877a851-0d7b-45f3-bc1f-083e72fe274a
+    :setup: Standalone instance, generated benchmark data
+    :steps:
+        1. Import the data with ldif2db
+        2. Search for the users and groups
+    :expectedresults:
+        1. Success
+        2. All the entries are imported
+    """
+    inst = topo.standalone
+    elapsed = _import(inst, _ldif_file(inst))
+    log.info('Imported %d entries in %.1f seconds' % (USERS + GROUPS, elapsed))
+    perf_results.record('import', {'elapsed': elapsed, 'entries': USERS + GROUPS})
+    assert len(inst.search_s(PEOPLE, ldap.SCOPE_ONELEVEL, '(uid=*)', ['1.1'])) == USERS
+    assert len(inst.search_s(GROUPS_BASE, ldap.SCOPE_ONELEVEL, '(cn=*)', ['1.1'])) == GROUPS
+
+
+def test_reindex(topo, perf_results):
+    """Measure an offline reindex of the attributes of the searches
+
+    :id: e320c947-5dcc-4f5e-9b8d-22960edbcd93
+    :setup: Standalone instance, benchmark data
+    :steps:
+        1. Reindex uid, cn and member with db2index
+    :expectedresults:
+        1. Success
+    """
+    inst = topo.standalone
+    inst.stop()
+    start = time.perf_counter()
+    assert inst.db2index(bename=DEFAULT_BENAME, attrs=REINDEX_ATTRS)
+    elapsed = time.perf_counter() - start
+    inst.start()
+    log.info('Reindexed %s in %.1f seconds' % (', '.join(REINDEX_ATTRS), elapsed))
+    perf_results.record('reindex', {'elapsed': elapsed, 'attrs': REINDEX_ATTRS})
+
+
+def test_search_eq(topo, perf_results):
+    """Measure indexed equality searches
+
+    :id: b9e29199-5732-4886-855f-b8d1070c4981
+    :setup: Standalone instance, benchmark data
+    :steps:
+        1. Search for random users by uid at each thread count
+    :expectedresults:
+        1. No search fails
+    """
+    _run_load(topo.standalone, perf_results, 'search_eq', mix={'search': 1}, filter='(uid={name})')
+
+
+def test_search_substring(topo, perf_results):
+    """Measure indexed substring searches
+
+    :id: 582bf72b-435b-4a1b-a03d-55d656832f62
+    :setup: Standalone instance, benchmark data
+    :steps:
+        1. Search for random users by the beginning of their cn at each
+           thread count
+    :expectedresults:
+        1. No search fails
+    """
+    _run_load(topo.standalone, perf_results, 'search_substring', mix={'search': 1}, filter='(cn={name}*)')
+
+
+def test_search_unindexed_paged(topo, perf_results):
+    """Measure unindexed searches read with the simple paged results control
+
+    :id: c19a66c5-86be-40d5-b884-73c9bbe9cbae
+    :setup: Standalone instance, benchmark data
+    :steps:
+        1. Read all the pages of an unindexed search, for the duration, at
+           each thread count
+    :expectedresults:
+        1. Every search returns the same entries
+    """
+    inst = topo.standalone
+    for threads in THREADS:
+        _set_threads(inst, threads)
+        expected = _paged_search(inst, UNINDEXED_FILTER)
+        assert expected > 0
+        hist = LatencyHistogram()
+        start = time.perf_counter()
+        while time.perf_counter() - start < DURATION:
+            op_start = time.perf_counter()
+            assert _paged_search(inst, UNINDEXED_FILTER) == expected
+            hist.record(time.perf_counter() - op_start)
+        seconds = time.perf_counter() - start
+        log.info('Paged unindexed search with %d threads: %.1f searches/s' % (threads, hist.count / seconds))
+        perf_results.record('search_unindexed_paged', {
+            'seconds': seconds,
+            'ops': hist.count,
+            'rate': hist.count / seconds,
+            'entries': expected,
+            'page_size': PAGE_SIZE,
+            'latency': hist.summary(),
+        }, threads)
+
+
+def test_bind(topo, perf_results):
+    """Measure simple binds
+
+    :id: 94968210-2ec6-4f9d-8828-ace3e8df81bb
+    :setup: Standalone instance, benchmark data
+    :steps:
+        1. Bind as random users at each thread count
+    :expectedresults:
+        1. No bind fails
+    """
+    _run_load(topo.standalone, perf_results, 'bind', mix={'bind': 1})
+
+
+def test_modify(topo, perf_results):
+    """Measure modifies
+
+    :id: c515fa6e-ca66-4d02-8292-050073224315
+    :setup: Standalone instance, benchmark data
+    :steps:
+        1. Replace the description of random users at each thread count
+    :expectedresults:
+        1. No modify fails
+    """
+    _run_load(topo.standalone, perf_results, 'modify', mix={'modify': 1})
+
+
+def test_memberof_fixup(topo, perf_results):
+    """Measure a memberOf fixup task over the groups
+
+    :id: efea8564-c3e0-4dcb-9dc8-22cbbd8b8991
+    :setup: Standalone instance, benchmark data
+    :steps:
+        1. Enable the memberOf plugin
+        2. Run a memberOf fixup task of the suffix
+        3. Check the memberOf values of the members
+    :expectedresults:
+        1. Success
+        2. The task succeeds
+        3. The members have a memberOf value per group
+    """
+    inst = topo.standalone
+    memberof = MemberOfPlugin(inst)
+    memberof.enable()
+    inst.restart()
+    try:
+        start = time.perf_counter()
+        task = memberof.fixup(DEFAULT_SUFFIX)
+        task.wait(timeout=None)
+        elapsed = time.perf_counter() - start
+        assert task.get_exit_code() == 0
+        log.info('Fixed up the memberOf of %d groups in %.1f seconds' % (GROUPS, elapsed))
+        perf_results.record('memberof_fixup', {'elapsed': elapsed, 'groups': GROUPS, 'group_size': GROUP_SIZE})
+
+        values = 0
+        for entry in inst.search_s(PEOPLE, ldap.SCOPE_ONELEVEL, '(memberOf=*)', ['memberOf']):
+            values += len(entry.getValues('memberOf'))
+        assert values == GROUPS * min(GROUP_SIZE, USERS)
+    finally:
+        memberof.disable()
+        inst.restart()
@@ -0,0 +1,114 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+# Benchmark of the memory held by the entries of a large result set, with
+# lib389.Entry and with lib389._entry.ReadOnlyEntry.
+
+import gc
+import time
+import logging
+import tracemalloc
+import pytest
+from lib389._entry import Entry, ReadOnlyEntry
+from lib389._ldifconn import LDIFConn
+from lib389._constants import DEFAULT_SUFFIX
+
+pytestmark = pytest.mark.tier3
+
+logging.basicConfig(level=logging.DEBUG)
+log = logging.getLogger(__name__)
+
+ENTRIES = 50000
+
+
+def _raw_results():
+    """Build search results the way python-ldap returns them"""
+    results = []
+    for i in range(0, ENTRIES):
+        uid = 'user%d' % i
+        results.append(('uid=%s,ou=people,%s' % (uid, DEFAULT_SUFFIX), {
+            'objectClass': [b'top', b'nsPerson', b'nsAccount', b'nsOrgPerson', b'posixAccount'],
+            'uid': [uid.encode()],
+            'cn': [uid.encode()],
+            'displayName': [uid.encode()],
+            'uidNumber': [str(i).encode()],
+            'gidNumber': [str(i).encode()],
+            'homeDirectory': [('/home/%s' % uid).encode()],
+        }))
+    return results
+
+
+def _measure(build):
+    """Return the memory held by what build returns, and the seconds it took"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = build()
+    seconds = time.perf_counter() - start
+    (size, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return size, seconds
+
+
+def _wrap(entry_class, results):
+    entries = [entry_class(r) for r in results]
+    # Read each entry in another case than the server, like the getters do
+    for e in entries:
+        e.getValue('objectclass')
+    return entries
+
+
+def _write_ldif(path, results):
+    with open(path, 'w') as f:
+        for (dn, attrs) in results:
+            f.write('dn: %s\n' % dn)
+            for (attr, vals) in attrs.items():
+                for v in vals:
+                    f.write('%s: %s\n' % (attr, v.decode()))
+            f.write('\n')
+
+
+def test_entry_memory(tmpdir):
+    """Compare the memory held by Entry and ReadOnlyEntry for a large result set
+
+    :id: 0c7e8f3a-2b1d-4f6e-9a85-3d4c5b6e7f81
+    :setup: None
+    :steps:
+        1. Measure the python-ldap results alone
+        2. Wrap the results in Entry, then in ReadOnlyEntry objects
+        3. Parse the same entries from an LDIF file with LDIFConn, with both classes
+    :expectedresults:
+        1. Success
+        2. ReadOnlyEntry adds less memory than Entry
+        3. ReadOnlyEntry holds less memory than Entry
+    """
+
+    results = _raw_results()
+    (raw_size, _) = _measure(_raw_results)
+    (entry_size, entry_s) = _measure(lambda: _wrap(Entry, results))
+    (ro_size, ro_s) = _measure(lambda: _wrap(ReadOnlyEntry, results))
+
+    path = str(tmpdir.join('entries.ldif'))
+    _write_ldif(path, results)
+    del results
+    (ldif_entry_size, ldif_entry_s) = _measure(lambda: LDIFConn(path, entry_class=Entry))
+    (ldif_ro_size, ldif_ro_s) = _measure(lambda: LDIFConn(path))
+
+    log.info("%d entries: results %.1fMB, Entry +%.1fMB in %.2fs, ReadOnlyEntry +%.1fMB in %.2fs" % (
+        ENTRIES, raw_size / 2**20, entry_size / 2**20, entry_s, ro_size / 2**20, ro_s))
+    log.info("LDIFConn: Entry %.1fMB in %.2fs, ReadOnlyEntry %.1fMB in %.2fs" % (
+        ldif_entry_size / 2**20, ldif_entry_s, ldif_ro_size / 2**20, ldif_ro_s))
+    print("category,raw,entry,readonly")
+    print("wrap_bytes_per_entry,%d,%d,%d" % (raw_size // ENTRIES, entry_size // ENTRIES, ro_size // ENTRIES))
+    print("ldif_bytes_per_entry,,%d,%d" % (ldif_entry_size // ENTRIES, ldif_ro_size // ENTRIES))
+    print("wrap_us_per_entry,,%.2f,%.2f" % (entry_s * 1e6 / ENTRIES, ro_s * 1e6 / ENTRIES))
+
+    assert ro_size < entry_size
+    assert ldif_ro_size < ldif_entry_size
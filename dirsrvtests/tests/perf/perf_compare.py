@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+# Compare two results files of benchmark_test.py, and exit with 1 if the
+# throughput or the latency of a benchmark regressed beyond the threshold:
+#
+#   python3 perf_compare.py [--threshold 10] [--json] baseline.json current.json
+
+import argparse
+import json
+import sys
+from lib389.perf import BenchmarkResults, PERF_THRESHOLD, compare_results, format_comparison
+
+# The environment values that make two results hard to compare when they differ
+COMPARED_ENVIRONMENT = ('hostname', 'cpus', 'memory', 'ds_version', 'db_lib')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark results files")
+    parser.add_argument('baseline', help="The results to compare against")
+    parser.add_argument('current', help="The results to check for regressions")
+    parser.add_argument('--threshold', type=float, default=PERF_THRESHOLD,
+                        help="The change, in percent, beyond which a metric regressed (default %s)" % PERF_THRESHOLD)
+    parser.add_argument('--json', action='store_true', default=False, help="Write the comparison as JSON")
+    args = parser.parse_args(argv)
+
+    baseline = BenchmarkResults.load(args.baseline)
+    current = BenchmarkResults.load(args.current)
+    comparisons = compare_results(baseline, current, args.threshold)
+    regressions = [c for c in comparisons if c['regression']]
+
+    if args.json:
+        print(json.dumps({'threshold': args.threshold, 'comparisons': comparisons}, indent=4))
+    else:
+        for key in COMPARED_ENVIRONMENT:
+            if baseline.environment.get(key) != current.environment.get(key):
+                print("Warning: the %s differs: %s -> %s" %
+                      (key, baseline.environment.get(key), current.environment.get(key)))
+        if baseline.parameters != current.parameters:
+            print("Warning: the benchmarks ran with different parameters")
+        format_comparison(comparisons)
+        print("%d regressions beyond %s%%" % (len(regressions), args.threshold))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
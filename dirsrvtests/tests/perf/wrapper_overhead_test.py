@@ -0,0 +1,68 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+# Micro-benchmark of the per call cost that the DirSrv method wrapper adds
+# on top of plain python-ldap.
+
+import ldap
+import time
+import logging
+import pytest
+from lib389._constants import DEFAULT_SUFFIX, DN_DM, PASSWORD
+from lib389.topologies import topology_st as topo
+
+pytestmark = pytest.mark.tier3
+
+logging.basicConfig(level=logging.DEBUG)
+log = logging.getLogger(__name__)
+
+OPS = 2000
+
+
+def _time_searches(search_s, **kwargs):
+    start = time.perf_counter()
+    for i in range(0, OPS):
+        search_s(DEFAULT_SUFFIX, ldap.SCOPE_BASE, '(objectClass=*)', ['dc'], **kwargs)
+    return (time.perf_counter() - start) / OPS
+
+
+def test_wrapper_overhead(topo):
+    """Measure the overhead of the DirSrv method wrapper on search_s
+
+    :id: 6a1d0b3e-5f7c-4a25-9b6e-2c3f8d9e4a10
+    :setup: Standalone instance
+    :steps:
+        1. Time base searches on a raw python-ldap connection
+        2. Time the same searches through DirSrv with the escapehatch
+        3. Time the same searches through DirSrv without the escapehatch
+    :expectedresults:
+        1. Success
+        2. Success
+        3. Success
+    """
+
+    inst = topo.standalone
+    raw = ldap.initialize(inst.toLDAPURL())
+    raw.simple_bind_s(DN_DM, PASSWORD)
+
+    # Warm up both connections first
+    _time_searches(raw.search_s)
+    _time_searches(inst.search_s, escapehatch='i am sure')
+
+    raw_op = _time_searches(raw.search_s)
+    hatch_op = _time_searches(inst.search_s, escapehatch='i am sure')
+    deprecated_op = _time_searches(inst.search_s)
+    raw.unbind_s()
+
+    log.info("per op: raw %.1fus, wrapped %.1fus (+%.1fus), wrapped without escapehatch %.1fus (+%.1fus)" % (
+        raw_op * 1e6,
+        hatch_op * 1e6, (hatch_op - raw_op) * 1e6,
+        deprecated_op * 1e6, (deprecated_op - raw_op) * 1e6))
+    print("category,raw,wrapped,deprecated")
+    print("search_s_us,%.1f,%.1f,%.1f" % (raw_op * 1e6, hatch_op * 1e6, deprecated_op * 1e6))
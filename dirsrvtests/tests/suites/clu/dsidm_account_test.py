@@ -14,7 +14,7 @@ import os
 
 from lib389 import DEFAULT_SUFFIX
 from lib389.cli_idm.account import list, get_dn, lock, unlock, delete, modify, rename, entry_status, \
-    subtree_status, reset_password, change_password
+    subtree_status, reset_password, change_password, bulk_modify
 from lib389.topologies import topology_st
 from lib389.cli_base import FakeArgs
 from lib389.utils import ds_is_older
@@ -103,6 +103,69 @@ def test_dsidm_account_entry_status_with_lock(topology_st, create_test_user):
     check_value_in_log_and_reset(topology_st, content_list=entry_list, check_value=state_unlock)
 
 
+def test_dsidm_account_bulk_lock(topology_st, tmpdir):
+    """ Test dsidm account lock and unlock with --bulk, and bulk-modify
+
+    :id: 8f4e2a6c-1d3b-4c59-a7e0-5b9d2c6f3e18
+    :setup: Standalone instance
+    :steps:
+         1. Create user accounts
+         2. Run dsidm account lock --bulk with a filter and a checkpoint file
+         3. Run the same command again
+         4. Run dsidm account unlock --bulk, twice
+         5. Run dsidm account bulk-modify with a dn file
+    :expectedresults:
+         1. Success
+         2. All the accounts matching the filter are locked
+         3. All the accounts are skipped from the checkpoint
+         4. All the accounts are unlocked, and the second run leaves them unchanged
+         5. All the listed accounts are modified
+    """
+
+    standalone = topology_st.standalone
+    users = nsUserAccounts(standalone, DEFAULT_SUFFIX)
+    test_users = [users.create_test_user(uid=3000 + i) for i in range(0, 50)]
+
+    args = FakeArgs()
+    args.bulk = True
+    args.filter = '(uid=test_user_3*)'
+    args.dn_file = None
+    args.connections = 2
+    args.window = 8
+    args.checkpoint = str(tmpdir.join('lock.ckpt'))
+    args.cont = False
+
+    log.info('Test dsidm account lock --bulk')
+    lock(standalone, DEFAULT_SUFFIX, topology_st.logcap.log, args)
+    check_value_in_log_and_reset(topology_st, check_value='Modified 50 entries')
+    assert all(u.get_attr_val_utf8_l('nsAccountLock') == 'true' for u in test_users)
+
+    log.info('Test dsidm account lock --bulk resumed from the checkpoint')
+    lock(standalone, DEFAULT_SUFFIX, topology_st.logcap.log, args)
+    check_value_in_log_and_reset(topology_st, check_value='50 skipped from the checkpoint')
+
+    log.info('Test dsidm account unlock --bulk')
+    args.checkpoint = None
+    unlock(standalone, DEFAULT_SUFFIX, topology_st.logcap.log, args)
+    check_value_in_log_and_reset(topology_st, check_value='Modified 50 entries (0 already up to date')
+    unlock(standalone, DEFAULT_SUFFIX, topology_st.logcap.log, args)
+    check_value_in_log_and_reset(topology_st, check_value='Modified 50 entries (50 already up to date')
+    assert not any(u.present('nsAccountLock') for u in test_users)
+
+    log.info('Test dsidm account bulk-modify')
+    dn_file = str(tmpdir.join('dns'))
+    with open(dn_file, 'w') as f:
+        f.write('\n'.join(u.dn for u in test_users[:10]))
+    args.dn_file = dn_file
+    args.changes = ['replace:description:bulk']
+    bulk_modify(standalone, DEFAULT_SUFFIX, topology_st.logcap.log, args)
+    check_value_in_log_and_reset(topology_st, check_value='Modified 10 entries')
+    assert all(u.get_attr_val_utf8('description') == 'bulk' for u in test_users[:10])
+
+    for u in test_users:
+        u.delete()
+
+
 if __name__ == '__main__':
     # Run isolated
     # -s for DEBUG mode
@@ -7,6 +7,8 @@
 # --- END COPYRIGHT BLOCK ---
 #
 
+import json
+import ldap
 import pytest
 import os
 from lib389.backend import Backends
@@ -17,6 +19,7 @@ from lib389._constants import *
 from lib389.cli_base import FakeArgs
 from lib389.topologies import topology_st, topology_no_sample, topology_m2
 from lib389.cli_ctl.health import health_check_run
+from lib389._mapped_object_lint import DSLintReadCache
 from lib389.paths import Paths
 
 CMD_OUTPUT = 'No issues found.'
@@ -119,6 +122,73 @@ def test_healthcheck_standalone(topology_st):
     run_healthcheck_and_flush_log(topology_st, standalone, JSON_OUTPUT, json=True)
 
 
+def test_healthcheck_timings(topology_st):
+    """Check that HealthCheck reports how long each check ran
+
+    :id: 9c4e1b7a-3d52-4f08-a6e1-5b2d8c7f0e34
+    :setup: Standalone instance
+    :steps:
+        1. Create DS instance
+        2. Use HealthCheck with --json and --timings options
+        3. Check the report and the timing of every check
+    :expectedresults:
+        1. Success
+        2. Success
+        3. Every check ran, with no issue found
+    """
+
+    standalone = topology_st.standalone
+
+    args = FakeArgs()
+    args.instance = standalone.serverid
+    args.verbose = standalone.verbose
+    args.list_errors = False
+    args.list_checks = False
+    args.check = ['config', 'backends', 'logs']
+    args.dry_run = False
+    args.json = True
+    args.timings = True
+    health_check_run(standalone, topology_st.logcap.log, args)
+
+    output = json.loads(topology_st.logcap.outputs[-1].getMessage())
+    assert output['report'] == []
+    checks = [check['check'] for check in output['checks']]
+    assert 'backends:userroot:search' in checks
+    assert 'logs:notes' in checks
+    for check in output['checks']:
+        assert check['status'] == 'ok'
+        assert check['seconds'] <= output['seconds']
+    topology_st.logcap.flush()
+
+
+def test_healthcheck_read_cache(topology_st):
+    """Check that the searches of the lint checks are shared through the read cache
+
+    :id: 3f7b2c91-6e0d-4a58-b1c4-8d2e9f0a6b17
+    :setup: Standalone instance
+    :steps:
+        1. List the backends twice in a read cache
+        2. Search the same entry twice in a read cache
+        3. List the backends after the read cache
+    :expectedresults:
+        1. The second list is answered from the cache
+        2. The second search is answered from the cache
+        3. The list is made on the server again
+    """
+
+    standalone = topology_st.standalone
+    with DSLintReadCache(standalone) as cache:
+        first = [be.dn for be in Backends(standalone).list()]
+        assert (cache.misses, cache.hits) == (1, 0)
+        assert [be.dn for be in Backends(standalone).list()] == first
+        assert (cache.misses, cache.hits) == (1, 1)
+        standalone.search_s(DEFAULT_SUFFIX, ldap.SCOPE_BASE)
+        standalone.search_s(DEFAULT_SUFFIX, ldap.SCOPE_BASE)
+        assert (cache.misses, cache.hits) == (2, 2)
+    assert [be.dn for be in Backends(standalone).list()] == first
+    assert (cache.misses, cache.hits) == (2, 2)
+
+
 @pytest.mark.ds50746
 @pytest.mark.bz1816851
 @pytest.mark.xfail(ds_is_older("1.4.2"), reason="Not implemented")
@@ -152,7 +222,8 @@ def test_healthcheck_list_checks(topology_st):
                    'replication:conflicts',
                    'dseldif:nsstate',
                    'tls:certificate_expiration',
-                   'logs:notes']
+                   'logs:notes',
+                   'cache:sizing']
 
     standalone = topology_st.standalone
 
@@ -180,6 +251,8 @@ def test_healthcheck_list_errors(topology_st):
     output_list = ['DSBLE0001 :: Possibly incorrect mapping tree',
                    'DSBLE0002 :: Unable to query backend',
                    'DSBLE0003 :: Uninitialized backend database',
+                   'DSCACHELE0001 :: Backend caches too small',
+                   'DSCACHELE0002 :: Database cache too small',
                    'DSCERTLE0001 :: Certificate about to expire',
                    'DSCERTLE0002 :: Certificate expired',
                    'DSCLE0001 :: Different log timestamp format',
@@ -241,7 +314,8 @@ def test_healthcheck_check_option(topology_st):
                    'replication:conflicts',
                    'dseldif:nsstate',
                    'tls:certificate_expiration',
-                   'logs:notes']
+                   'logs:notes',
+                   'cache:sizing']
 
     standalone = topology_st.standalone
 
@@ -1,3 +1,4 @@
+import ldap
 import logging
 import pytest
 import os
@@ -146,6 +147,45 @@ def test_monitor_backend(topo):
         assert False
 
 
+def test_monitor_sampler(topo):
+    """Check that the monitor sampler computes rates between samples
+
+    :id: 0d3f5a2c-8b4e-4c61-9e7a-5f2b1c9d8e40
+    :setup: Single instance
+    :steps:
+        1. Take a sample of the monitors
+        2. Run some searches and take another sample
+        3. Get the rates and deltas of the interval
+    :expectedresults:
+        1. Success
+        2. Success
+        3. The search counters increased, and the entry cache hit ratio
+           of the interval is computed for the backend
+    """
+
+    sampler = MonitorSampler(topo.standalone, history=2)
+    first = sampler.sample()
+    assert first.values['server.opscompleted'] > 0
+    assert 'backend.userroot.entrycachehits' in first.values
+    assert 'snmp.searchops' in first.values
+
+    for i in range(0, 10):
+        topo.standalone.search_s(DEFAULT_SUFFIX, ldap.SCOPE_SUBTREE, '(objectClass=*)')
+    sampler.sample()
+    deltas = sampler.get_deltas()
+    assert deltas['snmp.searchops'] >= 10
+    rates = sampler.get_rates()
+    assert rates['server.opscompleted'] > 0
+    assert rates['backend.userroot.entrycachehitratio'] is not None
+    # Gauges are not turned into rates
+    assert rates['server.threads'] == sampler.samples[-1].values['server.threads']
+
+    # Only the last samples are kept
+    sampler.sample()
+    assert len(sampler.samples) == 2
+    assert first not in sampler.samples
+
+
 @pytest.mark.bz1843550
 @pytest.mark.ds4153
 @pytest.mark.bz1903539
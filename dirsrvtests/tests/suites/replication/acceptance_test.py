@@ -329,6 +329,42 @@ def test_new_suffix(topo_m4, new_suffix):
     repl.remove_master(m1)
     repl.remove_master(m2)
 
+
+def test_new_suffix_join_masters(topo_m4, new_suffix):
+    """Check that several masters can be joined at once on a new suffix
+
+    :id: afbd9854-f095-4dff-a1e4-75410de91f5a
+    :setup: Four masters replication setup, a new suffix
+    :steps:
+        1. Enable replication on the new suffix on master1
+        2. Join the three other masters to master1 at once
+        3. Mesh the agreements, and check if replication works
+        4. Disable replication on the new suffix
+    :expectedresults:
+        1. Replication on the new suffix should be enabled
+        2. The masters should be initialized, with distinct replica ids
+        3. Replication should work between all the masters
+        4. Replication on the new suffix should be disabled
+    """
+    ms = [topo_m4.ms["master{}".format(num)] for num in range(1, 5)]
+
+    repl = ReplicationManager(NEW_SUFFIX)
+
+    repl.create_first_master(ms[0])
+
+    repl.join_masters(ms[0], ms[1:])
+    assert len(set(repl.get_rid(m) for m in ms)) == len(ms)
+
+    for mo in ms:
+        for mi in ms:
+            if mo is not mi:
+                repl.ensure_agreement(mo, mi)
+    repl.test_replication_topology(ms)
+
+    for m in ms:
+        repl.remove_master(m)
+
+
 def test_many_attrs(topo_m4, create_entry):
     """Check a replication with many attributes (add and delete)
 
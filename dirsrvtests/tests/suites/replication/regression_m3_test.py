@@ -7,6 +7,7 @@
 # --- END COPYRIGHT BLOCK ---
 #
 import os
+import json
 import time
 import logging
 import ldap
@@ -14,7 +15,7 @@ import pytest
 from lib389.idm.user import TEST_USER_PROPERTIES, UserAccounts
 from lib389.utils import *
 from lib389._constants import *
-from lib389.replica import Changelog5
+from lib389.replica import Changelog5, Replicas, ReplicationManager
 from lib389.dseldif import *
 from lib389.topologies import topology_m3 as topo_m3
 
@@ -165,6 +166,39 @@ def test_cleanallruv_repl(topo_m3):
     assert set(expected_m2_users).issubset(current_m2_users)
 
 
+def test_agmts_status_batched(topo_m3):
+    """Test that the status of all the agreements of a replica, read in one
+    batch, matches the status of each agreement read on its own
+
+    :id: 5e7a9c1d-2b4f-4e63-8f0a-d1c3b6a9e572
+    :setup: 3 Masters
+    :steps:
+        1. Wait for the replication from M1 to M2 and M3
+        2. Get the status of all the agreements of M1 at once
+        3. Get the status of each agreement of M1 on its own
+    :expectedresults:
+        1. Replication should be in sync
+        2. There should be a status for both agreements, in sync
+        3. The status should be the same as in the batch
+    """
+
+    m1 = topo_m3.ms["master1"]
+    repl = ReplicationManager(DEFAULT_SUFFIX)
+    repl.wait_for_convergence(m1, [topo_m3.ms["master2"], topo_m3.ms["master3"]])
+
+    replica = Replicas(m1).get(DEFAULT_SUFFIX)
+    agmts = replica.get_agreements().list()
+    batch = [json.loads(status) for status in replica.get_agmts_status(use_json=True)]
+    assert len(batch) == len(agmts) == 2
+
+    for (agmt, status) in zip(agmts, batch):
+        single = json.loads(agmt.status(use_json=True))
+        assert status['agmt-name'] == single['agmt-name']
+        assert status['replica'] == single['replica']
+        assert status['replication-status'] == single['replication-status'] == ['In Synchronization']
+        assert status['replication-lag-time'] == ['00:00:00']
+
+
 if __name__ == '__main__':
     # Run isolated
     # -s for DEBUG mode
@@ -27,7 +27,6 @@ import pwd
 import grp
 import os.path
 import socket
-import ldif
 import re
 import ldap
 import ldapurl
@@ -47,7 +46,6 @@ from shutil import copy2
 
 # Deprecation
 import warnings
-import inspect
 
 from ldap.ldapobject import SimpleLDAPObject
 # file in this package
@@ -97,56 +95,69 @@ DEBUGGING = os.getenv('DEBUGGING', default=False)
 logger = logging.getLogger(__name__)
 
 
+# Raw ldap functions that are deprecated unless called with the escapehatch
+DEPRECATED_LDAP_FUNCTIONS = frozenset([
+    'add_s',
+    'bind_s',
+    'delete_s',
+    'modify_s',
+    'modrdn_s',
+    'rename_s',
+    'sasl_interactive_bind_s',
+    'search_s',
+    'search_ext_s',
+    'simple_bind_s',
+    'unbind_s',
+    'getEntry',
+])
+
+# The (function, filename, lineno) call sites we already warned about
+_deprecated_call_sites = set()
+
+
+def _warn_deprecated_call(name):
+    """Warn about a raw ldap function call, once per call site.
+
+    Frame 0 is this function, 1 is the wrapper and 2 is its caller. Calls made
+    by python-ldap itself (search_s calling search_ext_s and so on) are not
+    the caller's fault, so they are not reported.
+    """
+    frame = sys._getframe(2)
+    if frame.f_globals.get('__name__', '').startswith('ldap.'):
+        return
+    site = (name, frame.f_code.co_filename, frame.f_lineno)
+    if site in _deprecated_call_sites:
+        return
+    _deprecated_call_sites.add(site)
+    warnings.warn(DeprecationWarning("Use of raw ldap function %s. This will be removed in a future release. "
+                                     "Found in: %s:%s" % (name, site[1], site[2])))
+    # Later, we will add a sleep here to make it even more painful.
+    # Finally, it will raise an exception.
+
+
 # Initiate the paths object here. Should this be part of the DirSrv class
 # for submodules?
 def wrapper(f, name):
     """
     Wrapper of all superclass methods using lib389.Entry.
-        @param f - DirSrv method inherited from SimpleLDAPObject
+        @param f - DirSrv function inherited from SimpleLDAPObject (unbound)
         @param name - method to call
 
-    This seems to need to be an unbound method, that's why it's outside of
-    DirSrv.  Perhaps there is some way to do this with the new classmethod
-    or staticmethod of 2.4.
-
-    We replace every call to a method in SimpleLDAPObject (the superclass
-    of DirSrv) with a call to inner.  The f argument to wrapper is the bound
-    method of DirSrv (which is inherited from the superclass).  Bound means
-    that it will implicitly be called with the self argument, it is not in
-    the args list.  name is the name of the method to call.  If name is a
-    method that returns entry objects (e.g. result), we wrap the data returned
-    by an Entry class.  If name is a method that takes an entry argument, we
-    extract the raw data from the entry object to pass in.
+    We replace every method of SimpleLDAPObject (the superclass of DirSrv) on
+    the DirSrv class with the function returned here. This is done once per
+    class (see DirSrv._wrap_ldap_methods), so a call only pays for the work
+    its name needs. If name is a method that returns entry objects (e.g.
+    result), we wrap the data returned by an Entry class. If name is a method
+    that takes an entry argument, we extract the raw data from the entry
+    object to pass in.
     """
-    def inner(*args, **kwargs):
-        if name in [
-            'add_s',
-            'bind_s',
-            'delete_s',
-            'modify_s',
-            'modrdn_s',
-            'rename_s',
-            'sasl_interactive_bind_s',
-            'search_s',
-            'search_ext_s',
-            'simple_bind_s',
-            'unbind_s',
-            'getEntry',
-        ] and not ('escapehatch' in kwargs and kwargs['escapehatch'] == 'i am sure'):
-            c_stack = inspect.stack()
-            frame = c_stack[1]
-
-            warnings.warn(DeprecationWarning("Use of raw ldap function %s. This will be removed in a future release. "
-                                             "Found in: %s:%s" % (name, frame.filename, frame.lineno)))
-            # Later, we will add a sleep here to make it even more painful.
-            # Finally, it will raise an exception.
-        elif 'escapehatch' in kwargs:
-            kwargs.pop('escapehatch')
-
-        if name == 'result':
-            objtype, data = f(*args, **kwargs)
+    deprecated = name in DEPRECATED_LDAP_FUNCTIONS
+
+    if name == 'result':
+        def inner(self, *args, **kwargs):
+            kwargs.pop('escapehatch', None)
+            objtype, data = f(self, *args, **kwargs)
             # data is either a 2-tuple or a list of 2-tuples
-            # print data
             if data:
                 if isinstance(data, tuple):
                     return objtype, Entry(data)
@@ -165,18 +176,32 @@ def wrapper(f, name):
                                     type(data))
             else:
                 return objtype, data
-        elif name.startswith('add'):
-            # the first arg is self
-            # the second and third arg are the dn and the data to send
+    elif name.startswith('add'):
+        def inner(self, *args, **kwargs):
+            if kwargs.pop('escapehatch', None) != 'i am sure' and deprecated:
+                _warn_deprecated_call(name)
+            # the first arg is the entry (or the dn, followed by the data) to send
             # We need to convert the Entry into the format used by
             # python-ldap
             ent = args[0]
             if isinstance(ent, Entry):
-                return f(ent.dn, ent.toTupleList(), *args[2:])
+                return f(self, ent.dn, ent.toTupleList(), *args[2:], **kwargs)
             else:
-                return f(*args, **kwargs)
-        else:
-            return f(*args, **kwargs)
+                return f(self, *args, **kwargs)
+    elif deprecated:
+        def inner(self, *args, **kwargs):
+            if kwargs.pop('escapehatch', None) != 'i am sure':
+                _warn_deprecated_call(name)
+            return f(self, *args, **kwargs)
+    else:
+        def inner(self, *args, **kwargs):
+            if 'escapehatch' in kwargs:
+                kwargs.pop('escapehatch')
+            return f(self, *args, **kwargs)
+
+    inner.__name__ = name
+    inner.__doc__ = f.__doc__
+    inner._lib389_wrapped = True
     return inner
 
 
@@ -408,6 +433,8 @@ class DirSrv(SimpleLDAPObject, object):
         # Set the default systemd status. This MAY be overidden in the setup utils
         # as required, generally for containers.
         self.systemd_override = None
+        # The parsed schema of the server, see lib389.schema.Schema.get_cache
+        self._schema_cache = None
 
         # Reset the args (py.test reuses the args_instance for each test case)
         # We allocate a "default" prefix here which allows an un-allocate or
@@ -417,7 +444,7 @@ class DirSrv(SimpleLDAPObject, object):
         #  ds.list(all=True)
         # self.ds_paths.prefix = args_instance[SER_DEPLOYED_DIR]
 
-        self.__wrapmethods()
+        self._wrap_ldap_methods()
 
     def __str__(self):
         """XXX and in SSL case?"""
@@ -847,6 +874,62 @@ class DirSrv(SimpleLDAPObject, object):
         # Now the instance is created but DirSrv is not yet connected to it
         self.state = DIRSRV_STATE_OFFLINE
 
+    def snapshot(self, path):
+        """
+            Keeps a snapshot of the instance under path, to create other
+            instances from it with clone_from_snapshot(). The instance is
+            stopped while it is copied, and started again if it was running.
+
+            @param path - the directory of the snapshot, it must not exist
+
+            @return - None
+
+            @raise ValueError - if path already exists
+        """
+        from lib389.instance.snapshot import snapshot_ds_instance
+        snapshot_ds_instance(self, path)
+
+    def clone_from_snapshot(self, path):
+        """
+            Creates an instance with the parameters sets in dirsrv from a
+            snapshot made by snapshot(), rather than running the setup.
+            The instance keeps the root DN, password, suffixes and entries
+            of the snapshot.
+            The state change from  DIRSRV_STATE_ALLOCATED ->
+                                   DIRSRV_STATE_OFFLINE
+
+            @param path - the directory of the snapshot
+
+            @return - None
+
+            @raise ValueError - if 'serverid' is missing, if it exist an
+                                instance with the same 'serverid', or if
+                                there is no snapshot under path
+        """
+        if self.state != DIRSRV_STATE_ALLOCATED:
+            raise ValueError("invalid state for calling clone: %s" %
+                             self.state)
+
+        if self.exists():
+            raise ValueError("Error it already exists the instance (%s)" %
+                             self.list()[0][CONF_INST_DIR])
+
+        if not self.serverid:
+            raise ValueError("SER_SERVERID_PROP is missing, " +
+                             "it is required to create an instance")
+
+        from lib389.instance.snapshot import clone_ds_instance
+        clone_ds_instance(self, path)
+
+        self.use_ldap_uri()
+
+        # Retrieve sroot from the sys/priv config file
+        assert(self.exists())
+        self.sroot = self.list()[0][CONF_SERVER_DIR]
+
+        # Now the instance is created but DirSrv is not yet connected to it
+        self.state = DIRSRV_STATE_OFFLINE
+
     def _deleteDirsrv(self):
         '''
             Deletes the instance with the parameters sets in dirsrv
@@ -908,7 +991,7 @@ class DirSrv(SimpleLDAPObject, object):
         self.state = DIRSRV_STATE_ALLOCATED
 
     def open(self, uri=None, saslmethod=None, sasltoken=None, certdir=None, starttls=False, connOnly=False, reqcert=None,
-                usercert=None, userkey=None):
+                usercert=None, userkey=None, timeout=None):
         '''
             It opens a ldap bound connection to dirsrv so that online
             administrative tasks are possible.  It binds with the binddn
@@ -921,6 +1004,8 @@ class DirSrv(SimpleLDAPObject, object):
             @param saslmethod - None, or GSSAPI
             @param sasltoken - The ldap.sasl token type to bind with.
             @param certdir - Certificate directory for TLS
+            @param timeout - Seconds to wait to connect, and for the result
+                             of each synchronous operation (None waits forever)
             @return None
 
             @raise LDAPError
@@ -929,6 +1014,8 @@ class DirSrv(SimpleLDAPObject, object):
         # Force our state offline to prevent paths from trying to search
         # cn=config while we startup.
         self.state = DIRSRV_STATE_OFFLINE
+        # The server may have been restarted with other schema files
+        self._schema_cache = None
 
         if not uri:
             uri = self.toLDAPURL()
@@ -939,6 +1026,10 @@ class DirSrv(SimpleLDAPObject, object):
         else:
             super(DirSrv, self).__init__(uri, trace_level=TRACE_LEVEL)
 
+        if timeout is not None:
+            self.set_option(ldap.OPT_NETWORK_TIMEOUT, timeout)
+            self.set_option(ldap.OPT_TIMEOUT, timeout)
+
         if certdir is None and self.isLocal:
             certdir = self.get_cert_dir()
             self.log.debug("Using dirsrv ca certificate %s", certdir)
@@ -1067,6 +1158,8 @@ class DirSrv(SimpleLDAPObject, object):
 
             @raise ValueError
         '''
+        # The configuration may have been changed while the server was down
+        self.ds_paths.invalidate_online()
         if not self.isLocal:
             self.log.error("This is a remote instance!")
             input('Press Enter when the instance has started ...')
@@ -1720,45 +1813,40 @@ class DirSrv(SimpleLDAPObject, object):
             raise MissingEntryError("Entry %s was added successfully, but "
                                     "I cannot search it", dn)
 
-    def __wrapmethods(self):
+    @classmethod
+    def _wrap_ldap_methods(cls):
         """This wraps all methods of SimpleLDAPObject, so that we can intercept
         the methods that deal with entries.  Instead of using a raw list of
         tuples of lists of hashes of arrays as the entry object, we want to
-        wrap entries in an Entry class that provides some useful methods"""
-        for name in dir(self.__class__.__bases__[0]):
-            attr = getattr(self, name)
-            if isinstance(attr, Callable):
-                setattr(self, name, wrapper(attr, name))
+        wrap entries in an Entry class that provides some useful methods.
 
-    def addLDIF(self, input_file, cont=False):
-        class LDIFAdder(ldif.LDIFParser):
-            def __init__(self, input_file, conn, cont=False,
-                         ignored_attr_types=None, max_entries=0,
-                         process_url_schemes=None
-                         ):
-                myfile = input_file
-                if isinstance(input_file, str):
-                    myfile = open(input_file, "r")
-                self.conn = conn
-                self.cont = cont
-                ldif.LDIFParser.__init__(self, myfile, ignored_attr_types,
-                                         max_entries, process_url_schemes)
-                self.parse()
-                if isinstance(input_file, str):
-                    myfile.close()
-
-            def handle(self, dn, entry):
-                if not dn:
-                    dn = ''
-                newentry = Entry((dn, entry))
-                try:
-                    self.conn.add_s(newentry)
-                except ldap.LDAPError as e:
-                    if not self.cont:
-                        raise e
-                    self.log.exception("Error: could not add entry %s", dn)
+        The wrappers are installed on the class, once, rather than being
+        rebuilt as bound closures for every instance.
+        """
+        if cls.__dict__.get('_ldap_methods_wrapped', False):
+            return
+        for name in dir(SimpleLDAPObject):
+            if name.startswith('_'):
+                continue
+            attr = getattr(cls, name)
+            if isinstance(attr, Callable) and not getattr(attr, '_lib389_wrapped', False):
+                setattr(cls, name, wrapper(attr, name))
+        cls._ldap_methods_wrapped = True
 
-        LDIFAdder(input_file, self, cont)
+    def addLDIF(self, input_file, cont=False):
+        """Add the entries of an LDIF file, one at a time. Use
+        lib389.bulkload.LDIFBulkLoader directly to load many entries faster.
+
+        :param input_file: The path of the LDIF file, or a file object
+        :type input_file: str or file
+        :param cont: Continue past the entries that fail to be added
+        :type cont: bool
+        :returns: See LDIFBulkLoader.load
+        """
+        from lib389.bulkload import LDIFBulkLoader
+        # A window of one keeps the adds strictly in the order of the file
+        loader = LDIFBulkLoader(self, window=1, cont=cont, logger=self.log)
+        return loader.load(input_file)
 
     def getDBStats(self, suffix, bename=''):
         if bename:
@@ -98,7 +98,7 @@ class Entry(object):
         # We could make this "strict" by forcing this to pull back all
         # the attributes of the DN, and the nsUniqueID.
         # Guard from accidents
-        if not isinstance(other, Entry):
+        if not isinstance(other, (Entry, ReadOnlyEntry)):
             return False
         # Check that our DN is the same.
         if self.dn != other.dn:
@@ -390,6 +390,206 @@ class Entry(object):
         return self.acis
 
 
+# Lowercase name -> real name maps of the attribute names of ReadOnlyEntry
+# objects, shared by all the entries that have the same attribute names.
+_ENTRY_KEY_MAPS = {}
+# How many distinct sets of attribute names to keep a map for
+ENTRY_KEY_MAPS_MAX = 1024
+
+
+def _get_key_map(keys):
+    """Return the shared lowercase name -> name map of a tuple of attribute names"""
+    key_map = _ENTRY_KEY_MAPS.get(keys)
+    if key_map is None:
+        if len(_ENTRY_KEY_MAPS) >= ENTRY_KEY_MAPS_MAX:
+            _ENTRY_KEY_MAPS.clear()
+        key_map = {sys.intern(k.lower()): k for k in keys}
+        _ENTRY_KEY_MAPS[keys] = key_map
+    return key_map
+
+
+class ReadOnlyEntry(object):
+    """A lightweight, read only LDAP entry for large result sets, like
+    DSLdapObjects.list() or an LDIF file.
+
+        Unlike Entry, the attributes are not copied in a cidict: the entry
+        keeps the dict returned by python-ldap, and shares its value lists.
+        Attribute names are still matched case insensitively, through a
+        lowercase name map that is only built on the first lookup that
+        doesn't match the case of the server, and that is shared by all the
+        entries with the same attribute names.
+
+        The getters are the same as the ones of Entry. Use toEntry() to get
+        an Entry that can be modified.
+
+        Instance variables:
+          dn - string - the string DN of the entry
+          ref - the continuation reference, if this is not an entry
+    """
+    __slots__ = ('dn', 'ref', '_attrs', '_keys')
+
+    def __init__(self, entrydata):
+        """entrydata is the raw data returned from the python-ldap
+        result method, which is:
+            * a search result entry     -> (dn, {dict...} )
+            * or a reference            -> (None, reference)
+            * or None.
+        """
+        self.dn = None
+        self.ref = None
+        self._attrs = {}
+        self._keys = None
+        if entrydata:
+            if entrydata[0] is None:
+                self.ref = entrydata[1]  # continuation reference
+            else:
+                self.dn = entrydata[0]
+                self._attrs = entrydata[1]
+
+    def _key(self, name):
+        """Return the name of the attribute name in any case as held by the
+        entry, or None if the entry doesn't have it.
+        """
+        name = ensure_str(name)
+        if name in self._attrs:
+            return name
+        if self._keys is None:
+            self._keys = _get_key_map(tuple(self._attrs))
+        return self._keys.get(name.lower())
+
+    @property
+    def data(self):
+        """A cidict copy of the attributes, for the callers written for Entry"""
+        return cidict(self._attrs)
+
+    def __bool__(self):
+        return len(self._attrs) > 0
+
+    def __eq__(self, other):
+        """Compare with an Entry or a ReadOnlyEntry, see Entry.__eq__"""
+        if not isinstance(other, (Entry, ReadOnlyEntry)):
+            return False
+        if self.dn != other.dn:
+            return False
+        if set(a.lower() for a in self.getAttrs()) != set(a.lower() for a in other.getAttrs()):
+            return False
+        for key in self.getAttrs():
+            if set(self.getValues(key)) != set(other.getValues(key)):
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def hasAttr(self, name):
+        """Return True if this entry has an attribute named name, False otherwise"""
+        return self._key(name) is not None
+
+    def __getitem__(self, name):
+        return self.getValue(name)
+
+    def __getattr__(self, name):
+        """Return the first value of the attribute name, like Entry"""
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return self.getValue(name)
+
+    def getValuesSet(self, keys):
+        """returns a set of values based on keys"""
+        return {k: self.getValues(k) for k in keys}
+
+    def getValues(self, name):
+        """Get the list (array) of values for the attribute named name"""
+        key = self._key(name)
+        if key is None:
+            return []
+        return self._attrs[key]
+
+    def getValue(self, name):
+        """Get the first value for the attribute named name"""
+        key = self._key(name)
+        if key is None or not self._attrs[key]:
+            return None
+        return self._attrs[key][0]
+
+    def hasValue(self, name, val=None):
+        """True if the given attribute is present and has the given value"""
+        key = self._key(name)
+        if key is None:
+            return False
+        if not val:
+            return True
+        if isinstance(val, list):
+            return val == self._attrs[key]
+        if isinstance(val, tuple):
+            return list(val) == self._attrs[key]
+        return ensure_bytes(val) in self._attrs[key]
+
+    def hasValueCase(self, name, val):
+        """True if the given attribute is present and has the given value -
+        case insensitive value match
+        """
+        key = self._key(name)
+        if key is None:
+            return False
+        return val.lower() in [x.lower() for x in self._attrs[key]]
+
+    def getAttrs(self):
+        return list(self._attrs.keys())
+
+    def iterAttrs(self, attrsOnly=False):
+        if attrsOnly:
+            return self._attrs.keys()
+        else:
+            return self._attrs.items()
+
+    def toTupleList(self):
+        """Convert the attrs and values to a list of 2-tuples, see Entry.toTupleList"""
+        return [(k, ensure_list_bytes(v)) for (k, v) in self._attrs.items()]
+
+    def toEntry(self):
+        """Return a copy of this entry as an Entry, that can be modified"""
+        if self.dn is None:
+            return Entry((None, self.ref)) if self.ref is not None else Entry(None)
+        return Entry((self.dn, {k: list(v) for (k, v) in self._attrs.items()}))
+
+    def getref(self):
+        return self.ref
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        """Convert the entry to its LDIF representation"""
+        sio = io.StringIO()
+        newdata = {}
+        for k, v in self._attrs.items():
+            newdata[k] = ensure_list_bytes(v)
+        ldif.LDIFWriter(sio, Entry.base64_attrs, 1000).unparse(self.dn, newdata)
+        return sio.getvalue()
+
+    def getJSONEntry(self):
+        """Return a JSON dictionary representation of the entry, see
+        Entry.getJSONEntry. The binary values are base64 encoded in the
+        returned dictionary, the entry itself is left unchanged.
+        """
+        attrs = {}
+        for attr, vals in self._attrs.items():
+            attr_vals = []
+            for val in vals:
+                try:
+                    val.decode('ascii')
+                    attr_vals.append(val)
+                except:
+                    # We have a binary value we need to convert
+                    attr_vals.append(binascii.b2a_base64(val, newline=False))
+            attrs[attr] = attr_vals
+        return {'dn': self.dn, 'attrs': attrs}
+
+    def getAcis(self):
+        return [EntryAci(self, a, verbose=False) for a in self.getValues('aci')]
+
+
 class EntryAci(object):
     """Breaks down an aci attribute string from 389, into a dictionary
     of terms and values. These values can then be manipulated, and
@@ -7,7 +7,7 @@
 # --- END COPYRIGHT BLOCK ---
 
 import ldif
-from lib389._entry import Entry
+from lib389._entry import ReadOnlyEntry
 from lib389.utils import normalizeDN
 
 __all__ = ['LDIFConn']
@@ -17,7 +17,8 @@ class LDIFConn(ldif.LDIFParser):
     def __init__(
         self,
         input_file,
-        ignored_attr_types=None, max_entries=0, process_url_schemes=None
+        ignored_attr_types=None, max_entries=0, process_url_schemes=None,
+        entry_class=ReadOnlyEntry
     ):
         """
         See LDIFParser.__init__()
@@ -25,9 +26,13 @@ class LDIFConn(ldif.LDIFParser):
         Additional Parameters:
         all_records
         List instance for storing parsed records
+        entry_class
+        The class of the parsed records, lib389._entry.ReadOnlyEntry by
+        default, or lib389._entry.Entry for records that can be modified
         """
-        self.dndict = {}  # maps dn to Entry
+        self.dndict = {}  # maps dn to entry
         self.dnlist = []  # contains entries in order read
+        self._entry_class = entry_class
         myfile = input_file
         if isinstance(input_file, str):
             myfile = open(input_file, "r")
@@ -43,10 +48,10 @@ class LDIFConn(ldif.LDIFParser):
         """
         if not dn:
             dn = ''
-        newentry = Entry((dn, entry))
+        newentry = self._entry_class((dn, entry))
         self.dndict[normalizeDN(dn)] = newentry
         self.dnlist.append(newentry)
 
     def get(self, dn):
         ndn = normalizeDN(dn)
-        return self.dndict.get(ndn, Entry(None))
+        return self.dndict.get(ndn, self._entry_class(None))
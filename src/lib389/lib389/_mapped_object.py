@@ -11,10 +11,11 @@ import ldap
 import ldap.dn
 from ldap.controls import SimplePagedResultsControl
 from ldap import filter as ldap_filter
+from ldap.cidict import cidict
 import logging
 import json
 from functools import partial
-from lib389._entry import Entry
+from lib389._entry import Entry, ReadOnlyEntry
 from lib389._constants import DIRSRV_STATE_ONLINE
 from lib389._mapped_object_lint import DSLint, DSLints
 from lib389.utils import (
@@ -112,6 +113,11 @@ class DSLdapObject(DSLogging, DSLint):
         self._server_controls = None
         self._client_controls = None
         self._object_filter = '(objectClass=*)'
+        # Entry snapshot mode. When enabled, getters are served from a locally
+        # held copy of the entry rather than one base search per call.
+        self._snapshot_attrlist = ['*', '+']
+        self._snapshot_mode = False
+        self._snapshot_entry = None
 
     def __unicode__(self):
         val = self._dn
@@ -133,6 +139,67 @@ class DSLdapObject(DSLogging, DSLint):
                                            serverctrls=self._server_controls, clientctrls=self._client_controls,
                                            escapehatch='i am sure')[0]
 
+    def snapshot(self, entry=None):
+        """Enable snapshot mode on this object. While enabled, the attribute
+        getters are served from a locally held copy of the entry instead of
+        issuing a base search per call. The copy is dropped after any write
+        made through this object, and fetched again on the next read.
+
+        Attributes that are not returned for the snapshot attrlist (by default
+        all user and operational attributes) are reported as absent.
+
+        :param entry: An entry already read from the server to seed the
+                      snapshot with, or None to fetch it on first use.
+        :type entry: lib389._entry.Entry or lib389._entry.ReadOnlyEntry
+        """
+
+        self._snapshot_mode = True
+        self._snapshot_entry = entry
+
+    def release_snapshot(self):
+        """Disable snapshot mode, so that every getter reads from the server again.
+        """
+
+        self._snapshot_mode = False
+        self._snapshot_entry = None
+
+    def refresh(self):
+        """Re-read the entry snapshot from the server. This enables snapshot
+        mode if it was not already.
+        """
+
+        self._log.debug("%s refresh" % (self._dn))
+        if self._instance.state != DIRSRV_STATE_ONLINE:
+            raise ValueError("Invalid state. Cannot get properties on instance that is not ONLINE")
+        self._snapshot_mode = True
+        self._snapshot_entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
+                                                           attrlist=self._snapshot_attrlist,
+                                                           serverctrls=self._server_controls,
+                                                           clientctrls=self._client_controls,
+                                                           escapehatch='i am sure')[0]
+
+    def _invalidate_snapshot(self):
+        # The next read in snapshot mode will fetch the entry again.
+        self._snapshot_entry = None
+
+    def _invalidate_paths(self, attrs):
+        # The instance paths cache the online values of some cn=config attributes.
+        ds_paths = getattr(self._instance, 'ds_paths', None)
+        if ds_paths is not None:
+            ds_paths.invalidate_online(self._dn, attrs)
+
+    def _get_snapshot(self):
+        """Get the entry snapshot, fetching it if it was invalidated.
+
+        :returns: Entry object, or None if snapshot mode is not enabled
+        """
+
+        if not self._snapshot_mode:
+            return None
+        if self._snapshot_entry is None:
+            self.refresh()
+        return self._snapshot_entry
+
     def exists(self):
         """Check if the entry exists
 
@@ -245,9 +312,10 @@ class DSLdapObject(DSLogging, DSLint):
             raise ValueError("Invalid state. Cannot get presence on instance that is not ONLINE")
         self._log.debug("%s present(%r) %s" % (self._dn, attr, value))
 
-        self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter, attrlist=[attr, ],
-                                        serverctrls=self._server_controls, clientctrls=self._client_controls,
-                                        escapehatch='i am sure')[0]
+        if not self._snapshot_mode:
+            self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter, attrlist=[attr, ],
+                                            serverctrls=self._server_controls, clientctrls=self._client_controls,
+                                            escapehatch='i am sure')[0]
         values = self.get_attr_vals_bytes(attr)
         self._log.debug("%s contains %s" % (self._dn, values))
 
@@ -300,6 +368,7 @@ class DSLdapObject(DSLogging, DSLint):
             else:
                 value = [ensure_bytes(arg[1])]
             mods.append((ldap.MOD_REPLACE, ensure_str(arg[0]), value))
+        self._invalidate_snapshot()
         return self._instance.modify_ext_s(self._dn, mods, serverctrls=self._server_controls,
                                            clientctrls=self._client_controls, escapehatch='i am sure')
 
@@ -444,6 +513,8 @@ class DSLdapObject(DSLogging, DSLint):
         elif value is not None:
             value = [ensure_bytes(value)]
 
+        self._invalidate_snapshot()
+        self._invalidate_paths([key])
         return self._instance.modify_ext_s(self._dn, [(action, key, value)],
                                            serverctrls=self._server_controls, clientctrls=self._client_controls,
                                            escapehatch='i am sure')
@@ -484,6 +555,8 @@ class DSLdapObject(DSLogging, DSLint):
             else:
                 # Error too many items
                 raise ValueError('Too many arguments in the mod op')
+        self._invalidate_snapshot()
+        self._invalidate_paths([mod[1] for mod in mod_list])
         return self._instance.modify_ext_s(self._dn, mod_list, serverctrls=self._server_controls, clientctrls=self._client_controls, escapehatch='i am sure')
 
     def _unsafe_compare_attribute(self, other):
@@ -579,6 +652,10 @@ class DSLdapObject(DSLogging, DSLint):
         if self._instance.state != DIRSRV_STATE_ONLINE:
             raise ValueError("Invalid state. Cannot get properties on instance that is not ONLINE")
         else:
+            attrs_entry = self._get_snapshot()
+            if attrs_entry is not None:
+                # Hand out a copy so callers can't alter the snapshot.
+                return cidict(attrs_entry.data)
             # retrieving real(*) and operational attributes(+)
             attrs_entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
                                                       attrlist=["*", "+"], serverctrls=self._server_controls,
@@ -599,13 +676,15 @@ class DSLdapObject(DSLogging, DSLint):
         if self._instance.state != DIRSRV_STATE_ONLINE:
             raise ValueError("Invalid state. Cannot get properties on instance that is not ONLINE")
         else:
-            # retrieving real(*) and operational attributes(+)
-            attrs_entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
-                                                      attrlist=["*", "+"], serverctrls=self._server_controls,
-                                                      clientctrls=self._client_controls, escapehatch='i am sure')[0]
+            attrs_entry = self._get_snapshot()
+            if attrs_entry is None:
+                # retrieving real(*) and operational attributes(+)
+                attrs_entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
+                                                          attrlist=["*", "+"], serverctrls=self._server_controls,
+                                                          clientctrls=self._client_controls, escapehatch='i am sure')[0]
             # getting dict from 'entry' object
             r = {}
-            for (k, vo) in attrs_entry.data.items():
+            for (k, vo) in attrs_entry.iterAttrs():
                 r[k] = ensure_list_str(vo)
             return r
 
@@ -614,18 +693,22 @@ class DSLdapObject(DSLogging, DSLint):
         if self._instance.state != DIRSRV_STATE_ONLINE:
             raise ValueError("Invalid state. Cannot get properties on instance that is not ONLINE")
         else:
-            entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
-                                                attrlist=keys, serverctrls=self._server_controls,
-                                                clientctrls=self._client_controls, escapehatch='i am sure')[0]
+            entry = self._get_snapshot()
+            if entry is None:
+                entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
+                                                    attrlist=keys, serverctrls=self._server_controls,
+                                                    clientctrls=self._client_controls, escapehatch='i am sure')[0]
             return entry.getValuesSet(keys)
 
     def get_attrs_vals_utf8(self, keys, use_json=False):
         self._log.debug("%s get_attrs_vals_utf8(%r)" % (self._dn, keys))
         if self._instance.state != DIRSRV_STATE_ONLINE:
             raise ValueError("Invalid state. Cannot get properties on instance that is not ONLINE")
-        entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter, attrlist=keys,
-                                            serverctrls=self._server_controls, clientctrls=self._client_controls,
-                                            escapehatch='i am sure')[0]
+        entry = self._get_snapshot()
+        if entry is None:
+            entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter, attrlist=keys,
+                                                serverctrls=self._server_controls, clientctrls=self._client_controls,
+                                                escapehatch='i am sure')[0]
         vset = entry.getValuesSet(keys)
         r = {}
         for (k, vo) in vset.items():
@@ -642,9 +725,11 @@ class DSLdapObject(DSLogging, DSLint):
         else:
             # It would be good to prevent the entry code intercepting this ....
             # We have to do this in this method, because else we ignore the scope base.
-            entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
-                                                attrlist=[key], serverctrls=self._server_controls,
-                                                clientctrls=self._client_controls, escapehatch='i am sure')[0]
+            entry = self._get_snapshot()
+            if entry is None:
+                entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
+                                                    attrlist=[key], serverctrls=self._server_controls,
+                                                    clientctrls=self._client_controls, escapehatch='i am sure')[0]
             vals = entry.getValues(key)
             if use_json:
                 result = {key: []}
@@ -662,9 +747,11 @@ class DSLdapObject(DSLogging, DSLint):
             # In the future, I plan to add a mode where if local == true, we
             # can use get on dse.ldif to get values offline.
         else:
-            entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
-                                                attrlist=[key], serverctrls=self._server_controls,
-                                                clientctrls=self._client_controls, escapehatch='i am sure')[0]
+            entry = self._get_snapshot()
+            if entry is None:
+                entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
+                                                    attrlist=[key], serverctrls=self._server_controls,
+                                                    clientctrls=self._client_controls, escapehatch='i am sure')[0]
             return entry.getValue(key)
 
     def get_attr_val_bytes(self, key, use_json=False):
@@ -796,6 +883,7 @@ class DSLdapObject(DSLogging, DSLint):
         self._instance.rename_s(self._dn, new_rdn, newsuperior,
                                 serverctrls=self._server_controls, clientctrls=self._client_controls,
                                 delold=deloldrdn, escapehatch='i am sure')
+        self._invalidate_snapshot()
         if newsuperior is not None:
             # Well, the new DN should be rdn + newsuperior.
             self._dn = '%s,%s' % (new_rdn, newsuperior)
@@ -815,6 +903,7 @@ class DSLdapObject(DSLogging, DSLint):
 
         self._log.debug("%s delete" % (self._dn))
         if not self._protected:
+            self._invalidate_snapshot()
             # Is there a way to mark this as offline and kill it
             if recursive:
                 filterstr = "(|(objectclass=*)(objectclass=ldapsubentry))"
@@ -933,6 +1022,7 @@ class DSLdapObject(DSLogging, DSLint):
             mods = []
             for k, v in list(valid_props.items()):
                 mods.append((ldap.MOD_REPLACE, k, v))
+            self._invalidate_snapshot()
             self._instance.modify_ext_s(self._dn, mods, serverctrls=self._server_controls, clientctrls=self._client_controls, escapehatch='i am sure')
         elif not exists:
             # This case is reached in two cases. One is we are in ensure mode, and we KNOW the entry
@@ -950,6 +1040,7 @@ class DSLdapObject(DSLogging, DSLint):
             # we may not have a self reference yet (just created), it may have changed (someone
             # set dn, but validate altered it).
             self._dn = dn
+            self._invalidate_snapshot()
         else:
             # This case can't be reached now that we only check existance on ensure.
             # However, it's good to keep it for "complete" behaviour, exhausting all states.
@@ -1005,6 +1096,8 @@ class DSLdapObjects(DSLogging, DSLints):
         self._objectclasses = []
         self._filterattrs = []
         self._list_attrlist = ['dn']
+        # What list(snapshot=True) reads to seed the child entry snapshots
+        self._snapshot_attrlist = ['*', '+']
         # Copy this from the child if we need.
         self._basedn = basedn
         self._scope = ldap.SCOPE_SUBTREE
@@ -1033,11 +1126,14 @@ class DSLdapObjects(DSLogging, DSLints):
         # functions with very little work on the behalf of the overloader
         return self._childobject(instance=self._instance, dn=dn)
 
-    def list(self, paged_search=None, paged_critical=True):
+    def list(self, paged_search=None, paged_critical=True, snapshot=False):
         """Get a list of children entries (DSLdapObject, Replica, etc.) using a base DN
         and objectClasses of our object (DSLdapObjects, Replicas, etc.)
 
         :param paged_search: None for no paged search, or an int of page size to use.
+        :param snapshot: If True, read the children's attributes in the list search
+                         and return them in snapshot mode (see DSLdapObject.snapshot)
+        :type snapshot: bool
         :returns: A list of children entries
         """
 
@@ -1046,66 +1142,125 @@ class DSLdapObjects(DSLogging, DSLints):
         # This will yield and & filter for objectClass with as many terms as needed.
         filterstr = self._get_objectclass_filter()
         self._log.debug('list filter = %s' % filterstr)
+        if snapshot:
+            attrlist = self._list_attrlist + self._snapshot_attrlist
+        else:
+            attrlist = self._list_attrlist
 
         if type(paged_search) == int:
             self._log.debug('listing with paged search -> %d', paged_search)
-            # If paged_search ->
-            results = []
-            pages = 0
-            pctrls = []
-            req_pr_ctrl = SimplePagedResultsControl(paged_critical, size=paged_search, cookie='')
-            if self._server_controls is not None:
-                controls = [req_pr_ctrl] + self._server_controls
-            else:
-                controls = [req_pr_ctrl]
-            while True:
-                msgid = self._instance.search_ext(
-                        base=self._basedn,
-                        scope=self._scope,
-                        filterstr=filterstr,
-                        attrlist=self._list_attrlist,
-                        serverctrls=controls,
-                        clientctrls=self._client_controls,
-                        escapehatch='i am sure'
-                    )
-                self._log.info('Getting page %d' % (pages,))
-                rtype, rdata, rmsgid, rctrls = self._instance.result3(msgid, escapehatch='i am sure')
-                results.extend(rdata)
-                pages += 1
-                self._log.debug("%s" % rctrls)
-                pctrls = [ c for c in rctrls
-                    if c.controlType == SimplePagedResultsControl.controlType]
-                if pctrls and pctrls[0].cookie:
-                    req_pr_ctrl.cookie = pctrls[0].cookie
-                    if self._server_controls is not None:
-                        controls = [req_pr_ctrl] + self._server_controls
-                    else:
-                        controls = [req_pr_ctrl]
-                else:
-                    break
-                #End while
-            # Result3 doesn't map through Entry, so we have to do it manually.
-            results = [Entry(r) for r in results]
-            insts = [self._entry_to_instance(dn=r.dn, entry=r) for r in results]
+            insts = [inst for inst in self.iter(paged_search, paged_critical, snapshot)]
             # End paged search
         else:
             # If not paged
             try:
-                results = self._instance.search_ext_s(
+                msgid = self._instance.search_ext(
                     base=self._basedn,
                     scope=self._scope,
                     filterstr=filterstr,
-                    attrlist=self._list_attrlist,
+                    attrlist=attrlist,
                     serverctrls=self._server_controls, clientctrls=self._client_controls,
                     escapehatch='i am sure'
                 )
+                rdata = self._instance.result3(msgid, all=1, escapehatch='i am sure')[1]
+                # Result3 doesn't map through Entry: the results are only read, so they
+                # can share the data of python-ldap rather than be copied in an Entry.
+                results = [ReadOnlyEntry(r) for r in rdata if r[0] is not None]
                 # def __init__(self, instance, dn=None):
                 insts = [self._entry_to_instance(dn=r.dn, entry=r) for r in results]
+                if snapshot:
+                    self._snapshot_insts(insts, results)
             except ldap.NO_SUCH_OBJECT:
                 # There are no objects to select from, se we return an empty array
                 insts = []
         return insts
 
+    def iter(self, paged_search=None, paged_critical=True, snapshot=False):
+        """Iterate over the children entries (DSLdapObject, Replica, etc.) in the same
+        way as list(), but yield each one as the server returns it. Only the current
+        entry (or the current page with paged_search) is held in memory, so this
+        suits very large result sets.
+
+        :param paged_search: None for no paged search, or an int of page size to use.
+        :param snapshot: If True, read the children's attributes in the search
+                         and yield them in snapshot mode (see DSLdapObject.snapshot)
+        :type snapshot: bool
+        :returns: A generator of children entries
+        """
+
+        filterstr = self._get_objectclass_filter()
+        self._log.debug('iter filter = %s' % filterstr)
+        if snapshot:
+            attrlist = self._list_attrlist + self._snapshot_attrlist
+        else:
+            attrlist = self._list_attrlist
+
+        req_pr_ctrl = None
+        controls = self._server_controls
+        if type(paged_search) == int:
+            self._log.debug('iterating with paged search -> %d', paged_search)
+            req_pr_ctrl = SimplePagedResultsControl(paged_critical, size=paged_search, cookie='')
+        pages = 0
+        while True:
+            if req_pr_ctrl is not None:
+                if self._server_controls is not None:
+                    controls = [req_pr_ctrl] + self._server_controls
+                else:
+                    controls = [req_pr_ctrl]
+            msgid = self._instance.search_ext(
+                base=self._basedn,
+                scope=self._scope,
+                filterstr=filterstr,
+                attrlist=attrlist,
+                serverctrls=controls,
+                clientctrls=self._client_controls,
+                escapehatch='i am sure'
+            )
+            self._log.debug('Getting page %d' % (pages,))
+            rctrls = []
+            rtype = None
+            try:
+                while rtype != ldap.RES_SEARCH_RESULT:
+                    # Take the results one message at a time, rather than waiting for them all.
+                    try:
+                        rtype, rdata, rmsgid, rctrls = self._instance.result3(msgid, all=0, escapehatch='i am sure')
+                    except ldap.NO_SUCH_OBJECT:
+                        # There are no objects to select from
+                        return
+                    for r in rdata:
+                        if r[0] is None:
+                            # Skip search continuation references
+                            continue
+                        # Result3 doesn't map through Entry, and the entry is only read.
+                        entry = ReadOnlyEntry(r)
+                        inst = self._entry_to_instance(dn=entry.dn, entry=entry)
+                        if snapshot:
+                            self._snapshot_insts([inst], [entry])
+                        yield inst
+            except GeneratorExit:
+                # The caller stopped early, so don't leave the search running on the server.
+                if rtype != ldap.RES_SEARCH_RESULT:
+                    self._instance.abandon(msgid)
+                raise
+            pages += 1
+            if req_pr_ctrl is None:
+                break
+            pctrls = [c for c in rctrls
+                      if c.controlType == SimplePagedResultsControl.controlType]
+            if pctrls and pctrls[0].cookie:
+                req_pr_ctrl.cookie = pctrls[0].cookie
+            else:
+                break
+
+    def _snapshot_insts(self, insts, entries):
+        for (inst, entry) in zip(insts, entries):
+            # The list search ran with our filter and controls, so only seed the child
+            # if it would have read the same thing, else let it fetch on first use.
+            if inst._snapshot_attrlist == self._snapshot_attrlist:
+                inst.snapshot(entry)
+            else:
+                inst.snapshot()
+
     def exists(self, selector=[], dn=None):
         """Check if a child entry exists
 
@@ -1,3 +1,9 @@
+import itertools
+import ldap
+import logging
+import queue
+import threading
+import time
 from abc import ABC, abstractmethod
 from functools import partial
 from inspect import signature
@@ -19,6 +25,11 @@ DSLintClassSpec = Generator[DSLintSpec, None, None]
 DSLintMethodSpec = Union[str, None, Type[List]]
 DSLintResults = Generator[Any, None, None]
 
+# How many lint checks a DSLintRunner runs at the same time
+DSLINT_WORKERS = 8
+# Seconds a single lint check may run before it is reported as timed out
+DSLINT_CHECK_TIMEOUT = 300
+
 
 class DSLint():
     """In a super-class, create a method with name beginning with `_lint_`
@@ -160,3 +171,226 @@ class DSLints():
                 check_name = spec
             for obj in self.list():
                 yield from obj.lint(check_name)
+
+
+class DSLintReadCache():
+    """Share the searches of an instance between the lint checks of a run.
+
+    Inside the with block, search_ext_s (and so search_s and the DSLdapObject
+    reads), and the search_ext and result3 of DSLdapObjects.list(), are
+    answered from the cache when the same search was already made, so checks
+    that look at the same entries (the backends, their indexes, the
+    replicas, ...) only fetch them once. Lint checks only read, so the
+    results don't go stale during a run. Concurrent callers of the same
+    search wait for the first one to get it. Searches with controls are
+    never cached.
+
+    :param instance: An instance
+    :type instance: lib389.DirSrv
+    """
+
+    def __init__(self, instance):
+        self._instance = instance
+        self._search_ext_s = type(instance).search_ext_s
+        self._search_ext = type(instance).search_ext
+        self._result3 = type(instance).result3
+        self._lock = threading.Lock()
+        # search key -> (entries, error)
+        self._results = {}
+        # search key -> lock held while the search is made
+        self._fetching = {}
+        # The cached results of search_ext, by the msgid returned for them.
+        # They are below RES_ANY, so they never clash with the ones of the server.
+        self._pending = {}
+        self._msgids = itertools.count(-2, -1)
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        self._instance.search_ext_s = self._search
+        self._instance.search_ext = self._search_async
+        self._instance.result3 = self._result
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        del self._instance.search_ext_s
+        del self._instance.search_ext
+        del self._instance.result3
+
+    def _get(self, key, fetch):
+        """Return the (result, error) of a search, made with fetch only
+        if it was not already
+        """
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                fetching = self._fetching.setdefault(key, threading.Lock())
+            else:
+                self.hits += 1
+        if result is None:
+            with fetching:
+                result = self._results.get(key)
+                if result is None:
+                    try:
+                        result = (fetch(), None)
+                    except ldap.LDAPError as e:
+                        result = (None, e)
+                    with self._lock:
+                        self._results[key] = result
+                        self.misses += 1
+                else:
+                    with self._lock:
+                        self.hits += 1
+        return result
+
+    def _search(self, base, scope, filterstr='(objectClass=*)', attrlist=None, attrsonly=0,
+                serverctrls=None, clientctrls=None, timeout=-1, sizelimit=0, **kwargs):
+        fetch = partial(self._search_ext_s, self._instance, base, scope, filterstr, attrlist, attrsonly,
+                        serverctrls, clientctrls, timeout, sizelimit, escapehatch='i am sure')
+        if serverctrls or clientctrls:
+            return fetch()
+
+        key = (base.lower(), scope, filterstr, tuple(attrlist) if attrlist else None, attrsonly, sizelimit)
+        (entries, error) = self._get(key, fetch)
+        if error is not None:
+            raise error
+        return list(entries)
+
+    def _search_async(self, base, scope, filterstr='(objectClass=*)', attrlist=None, attrsonly=0,
+                      serverctrls=None, clientctrls=None, timeout=-1, sizelimit=0, **kwargs):
+        if serverctrls or clientctrls:
+            return self._search_ext(self._instance, base, scope, filterstr, attrlist, attrsonly,
+                                    serverctrls, clientctrls, timeout, sizelimit, escapehatch='i am sure')
+
+        def _fetch():
+            msgid = self._search_ext(self._instance, base, scope, filterstr, attrlist, attrsonly,
+                                     None, None, timeout, sizelimit, escapehatch='i am sure')
+            return self._result3(self._instance, msgid, all=1, escapehatch='i am sure')[1]
+
+        # result3 returns the raw data of python-ldap, unlike search_ext_s,
+        # so it is cached on its own
+        key = ('raw', base.lower(), scope, filterstr, tuple(attrlist) if attrlist else None, attrsonly, sizelimit)
+        result = self._get(key, _fetch)
+        with self._lock:
+            msgid = next(self._msgids)
+            self._pending[msgid] = result
+        return msgid
+
+    def _result(self, msgid=ldap.RES_ANY, all=1, timeout=None, *args, **kwargs):
+        with self._lock:
+            result = self._pending.pop(msgid, None)
+        if result is None:
+            kwargs.setdefault('escapehatch', 'i am sure')
+            return self._result3(self._instance, msgid, all, timeout, *args, **kwargs)
+        (rdata, error) = result
+        if error is not None:
+            raise error
+        return (ldap.RES_SEARCH_RESULT, list(rdata), msgid, [])
+
+
+class DSLintRunner():
+    """Run lint checks in a pool of worker threads. The checks of a
+    healthcheck mostly wait on the server, on files or on helper commands,
+    so they can overlap. A check that runs longer than the timeout is
+    reported as timed out, and its worker is replaced so the other checks
+    go on. Every check is timed.
+
+    :param workers: How many checks run at the same time
+    :type workers: int
+    :param timeout: Seconds a check may run, or None to wait for every check
+    :type timeout: float
+    :param logger: A logging interface
+    :type logger: python logging
+    """
+
+    def __init__(self, workers=DSLINT_WORKERS, timeout=DSLINT_CHECK_TIMEOUT, logger=None):
+        if workers < 1:
+            raise ValueError("At least one worker is needed")
+        self._workers = workers
+        self._timeout = timeout
+        if logger is not None:
+            self._log = logger
+        else:
+            self._log = logging.getLogger(__name__)
+
+    def run(self, checks):
+        """Run the checks, and wait for all of them to complete or time out
+
+        :param checks: (name, check) pairs, where check is a callable that
+                       returns the lint results, like the ones lint_list yields
+        :type checks: iterable
+        :returns: A list of dict, one per check in the order they were given,
+                  with the 'check' name, its 'status' ('ok', 'failed' or
+                  'timeout'), the 'seconds' it ran, the 'error' for a failed
+                  check and its 'results'
+        """
+        checks = list(checks)
+        todo = queue.Queue()
+        for (idx, (name, check)) in enumerate(checks):
+            todo.put((idx, name, check))
+        done = queue.Queue()
+        # idx -> monotonic start time, of the checks running now
+        running = {}
+        lock = threading.Lock()
+
+        def _worker():
+            while True:
+                try:
+                    (idx, name, check) = todo.get_nowait()
+                except queue.Empty:
+                    return
+                start = time.monotonic()
+                with lock:
+                    running[idx] = start
+                self._log.debug(f"Running check {name}")
+                try:
+                    result = {'status': 'ok', 'error': None, 'results': list(check() or [])}
+                except Exception as e:
+                    result = {'status': 'failed', 'error': str(e), 'results': []}
+                result['check'] = name
+                result['seconds'] = time.monotonic() - start
+                done.put((idx, result))
+
+        def _start_worker():
+            thread = threading.Thread(target=_worker, daemon=True)
+            thread.start()
+
+        for i in range(0, min(self._workers, len(checks))):
+            _start_worker()
+
+        results = [None] * len(checks)
+        remaining = len(checks)
+        while remaining > 0:
+            wait = None
+            if self._timeout is not None:
+                with lock:
+                    starts = list(running.values())
+                wait = self._timeout
+                if starts:
+                    wait = max(min(starts) + self._timeout - time.monotonic(), 0.01)
+            try:
+                (idx, result) = done.get(timeout=wait)
+                with lock:
+                    running.pop(idx, None)
+                if results[idx] is None:
+                    results[idx] = result
+                    remaining -= 1
+                continue
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            with lock:
+                expired = [(idx, start) for (idx, start) in running.items() if now - start >= self._timeout]
+                for (idx, start) in expired:
+                    del running[idx]
+            for (idx, start) in expired:
+                name = checks[idx][0]
+                self._log.debug(f"Check {name} timed out after {now - start:.1f} seconds")
+                results[idx] = {'check': name, 'status': 'timeout', 'seconds': now - start,
+                                'error': f'timed out after {self._timeout} seconds', 'results': []}
+                remaining -= 1
+                # The stuck thread is left behind, keep the pool size
+                _start_worker()
+
+        return results
@@ -19,6 +19,44 @@ from lib389 import Entry, DirSrv, NoSuchEntryError, InvalidArgumentError
 from lib389._mapped_object import DSLdapObject, DSLdapObjects
 
 
+def _find_agmt_maxcsn(agmt_name, maxcsns):
+    """Find the maxcsn of an agreement in the nsds5agmtmaxcsn values of the
+    supplier database RUV. They look like:
+
+        <suffix>;<agmt name>;<host>;<port>;<consumer rid>;<maxcsn>
+
+    or, if the consumer is not reachable:
+
+        <suffix>;<agmt name>;<host>;<port>;unavailable
+
+    :returns: CSN string if found, otherwise None is returned
+    """
+    for csn in maxcsns:
+        comps = csn.split(';')
+        if agmt_name == comps[1]:
+            # same replica, get maxcsn
+            if len(comps) < 6:
+                return None
+            else:
+                return comps[5]
+    return None
+
+
+def _find_consumer_maxcsn(rid, ruv):
+    """Find the maxcsn of a supplier replica in the nsds50ruv values of a
+    consumer database RUV
+
+    :returns: CSN string if found, otherwise "Unavailable" is returned
+    """
+    for element in ruv:
+        if ('replica %s ' % rid) in element:
+            ruv_parts = element.split()
+            if len(ruv_parts) == 5:
+                return ruv_parts[4]
+            break
+    return "Unavailable"
+
+
 class Agreement(DSLdapObject):
     """A replication agreement from this server instance to
     another instance of directory server.
@@ -122,33 +160,48 @@ class Agreement(DSLdapObject):
             self._log.debug('get_agmt_maxcsn - Failed to get agmt maxcsn from RUV')
             return None
 
-        for csn in maxcsns:
-            comps = csn.split(';')
-            if agmt_name == comps[1]:
-                # same replica, get maxcsn
-                if len(comps) < 6:
-                    return None
-                else:
-                    return comps[5]
+        agmt_maxcsn = _find_agmt_maxcsn(agmt_name, maxcsns)
+        if agmt_maxcsn is None:
+            self._log.debug('get_agmt_maxcsn - did not find matching agmt maxcsn from RUV')
+        return agmt_maxcsn
 
-        self._log.debug('get_agmt_maxcsn - did not find matching agmt maxcsn from RUV')
-        return None
-
-    def get_consumer_maxcsn(self, binddn=None, bindpw=None):
+    def get_consumer_maxcsn(self, binddn=None, bindpw=None, conn_pool=None):
         """Attempt to get the consumer's maxcsn from its database RUV entry
         :param binddn: Specifies a specific bind DN to use when contacting the remote consumer
         :type binddn: str
         :param bindpw: Password for the bind DN
         :type bindpw: str
+        :param conn_pool: Reuse the consumer connection from this pool, instead of opening a new one
+        :type conn_pool: lib389.replica.ReplicationConnectionPool
         :returns: CSN string if found, otherwise "Unavailable" is returned
         """
+        # Get the replica id from supplier to compare to the consumer's rid
+        from lib389.replica import Replicas
+        replicas = Replicas(self._instance)
+        replica = replicas.get(self.get_attr_val_utf8(REPL_ROOT))
+        rid = replica.get_attr_val_utf8(REPL_ID)
+
+        ruv = self._read_consumer_ruv(binddn=binddn, bindpw=bindpw, conn_pool=conn_pool)
+        if ruv is None:
+            return "Unavailable"
+        return _find_consumer_maxcsn(rid, ruv)
+
+    def _read_consumer_ruv(self, binddn=None, bindpw=None, conn_pool=None):
+        """Read the database RUV of the consumer of this agreement
+        :param binddn: Specifies a specific bind DN to use when contacting the remote consumer
+        :type binddn: str
+        :param bindpw: Password for the bind DN
+        :type bindpw: str
+        :param conn_pool: Reuse the consumer connection from this pool, instead of opening a new one
+        :type conn_pool: lib389.replica.ReplicationConnectionPool
+        :returns: The list of nsds50ruv values, or None if they can't be read
+        :raises: ldap.INVALID_CREDENTIALS - if the bind to the consumer fails
+        """
         host = self.get_attr_val_utf8(AGMT_HOST)
         port = self.get_attr_val_utf8(AGMT_PORT)
         suffix = self.get_attr_val_utf8(REPL_ROOT)
         protocol = self.get_attr_val_utf8('nsds5replicatransportinfo').lower()
 
-        result_msg = "Unavailable"
-
         # If we are using LDAPI we need to provide the credentials, otherwise
         # use the existing credentials
         if binddn is None:
@@ -156,136 +209,138 @@ class Agreement(DSLdapObject):
         if bindpw is None:
             bindpw = self._instance.bindpw
 
-        # Get the replica id from supplier to compare to the consumer's rid
-        from lib389.replica import Replicas
-        replicas = Replicas(self._instance)
-        replica = replicas.get(suffix)
-        rid = replica.get_attr_val_utf8(REPL_ID)
-
         # Open a connection to the consumer
-        consumer = DirSrv(verbose=self._instance.verbose)
-        args_instance[SER_HOST] = host
-        if protocol == "ssl" or protocol == "ldaps":
-            args_instance[SER_SECURE_PORT] = int(port)
-        else:
-            args_instance[SER_PORT] = int(port)
-        args_instance[SER_ROOT_DN] = binddn
-        args_instance[SER_ROOT_PW] = bindpw
-        args_standalone = args_instance.copy()
-        consumer.allocate(args_standalone)
         try:
-            consumer.open()
+            if conn_pool is not None:
+                consumer = conn_pool.get(host, port, protocol, binddn, bindpw)
+            else:
+                consumer = DirSrv(verbose=self._instance.verbose)
+                args_instance[SER_HOST] = host
+                if protocol == "ssl" or protocol == "ldaps":
+                    args_instance[SER_SECURE_PORT] = int(port)
+                else:
+                    args_instance[SER_PORT] = int(port)
+                args_instance[SER_ROOT_DN] = binddn
+                args_instance[SER_ROOT_PW] = bindpw
+                args_standalone = args_instance.copy()
+                consumer.allocate(args_standalone)
+                consumer.open()
         except ldap.INVALID_CREDENTIALS as e:
             raise(e)
         except ldap.LDAPError as e:
             self._log.debug('Connection to consumer ({}:{}) failed, error: {}'.format(host, port, e))
-            return result_msg
+            return None
 
         # Search for the tombstone RUV entry
+        ruv = None
         try:
             entry = consumer.search_s(suffix, ldap.SCOPE_SUBTREE,
                                       REPLICA_RUV_FILTER, ['nsds50ruv'])
             if not entry:
                 self._log.debug("Failed to retrieve database RUV entry from consumer")
             else:
-                elements = ensure_list_str(entry[0].getValues('nsds50ruv'))
-                for ruv in elements:
-                    if ('replica %s ' % rid) in ruv:
-                        ruv_parts = ruv.split()
-                        if len(ruv_parts) == 5:
-                            result_msg = ruv_parts[4]
-                        break
+                ruv = ensure_list_str(entry[0].getValues('nsds50ruv'))
         except ldap.INVALID_CREDENTIALS as e:
             raise(e)
         except ldap.LDAPError as e:
             self._log.debug('Failed to search for the suffix ' +
                                      '({}) consumer ({}:{}) failed, error: {}'.format(
                                          suffix, host, port, e))
-        consumer.close()
-        return result_msg
+        if conn_pool is None:
+            consumer.close()
+        return ruv
+
+    def _get_maxcsns(self, binddn=None, bindpw=None, conn_pool=None):
+        """Get the agreement maxcsn, and the consumer maxcsn when there is one
+        :returns: A tuple of the agreement maxcsn, or None, and the consumer
+                  maxcsn, or None if it was not read
+        :raises: ldap.LDAPError - if the supplier RUV can't be read
+        """
+        agmt_maxcsn = self.get_agmt_maxcsn()
+        con_maxcsn = None
+        if agmt_maxcsn is not None:
+            con_maxcsn = self.get_consumer_maxcsn(binddn=binddn, bindpw=bindpw, conn_pool=conn_pool)
+        return (agmt_maxcsn, con_maxcsn)
+
+    def _format_agmt_status(self, agmt_maxcsn, con_maxcsn, return_json=False):
+        """Build the status message from the agreement and consumer maxcsns
+        :param agmt_maxcsn: The agreement maxcsn, or None
+        :type agmt_maxcsn: str
+        :param con_maxcsn: The consumer maxcsn, or None
+        :type con_maxcsn: str
+        :returns: A status message about the replication agreement
+        """
+        agmt_status = json.loads(self.get_attr_val_utf8_l(AGMT_UPDATE_STATUS_JSON))
+        if agmt_maxcsn is None:
+            agmt_maxcsn = "Unknown"
+        if not con_maxcsn:
+            con_maxcsn = "Unknown"
+        elif agmt_maxcsn == con_maxcsn:
+            if return_json:
+                return json.dumps({
+                    'msg': "In Synchronization",
+                    'agmt_maxcsn': agmt_maxcsn,
+                    'con_maxcsn': con_maxcsn,
+                    'state': agmt_status['state'],
+                    'reason': agmt_status['message']
+                }, indent=4)
+            else:
+                return "In Synchronization"
+
+        # Not in sync - attempt to discover the cause
+        repl_msg = agmt_status['message']
+        if self.get_attr_val_utf8_l(AGMT_UPDATE_IN_PROGRESS) == 'true':
+            # Replication is on going - this is normal
+            repl_msg = "Replication still in progress"
+        elif "can't contact ldap" in agmt_status['message']:
+                # Consumer is down
+                repl_msg = "Consumer can not be contacted"
+
+        if return_json:
+            return json.dumps({
+                'msg': "Not in Synchronization",
+                'agmt_maxcsn': agmt_maxcsn,
+                'con_maxcsn': con_maxcsn,
+                'state': agmt_status['state'],
+                'reason': repl_msg
+            }, indent=4)
+        else:
+            return ("Not in Synchronization: supplier " +
+                    "(%s) consumer (%s) State (%s) Reason (%s)" %
+                    (agmt_maxcsn, con_maxcsn, agmt_status['state'], repl_msg))
 
-    def get_agmt_status(self, binddn=None, bindpw=None, return_json=False):
+    def get_agmt_status(self, binddn=None, bindpw=None, return_json=False, conn_pool=None):
         """Return the status message
         :param binddn: Specifies a specific bind DN to use when contacting the remote consumer
         :type binddn: str
         :param bindpw: Password for the bind DN
         :type bindpw: str
+        :param conn_pool: Reuse the consumer connection from this pool, instead of opening a new one
+        :type conn_pool: lib389.replica.ReplicationConnectionPool
         :returns: A status message about the replication agreement
         """
-        con_maxcsn = "Unknown"
         try:
             agmt_maxcsn = self.get_agmt_maxcsn()
-            agmt_status = json.loads(self.get_attr_val_utf8_l(AGMT_UPDATE_STATUS_JSON))
+            con_maxcsn = None
             if agmt_maxcsn is not None:
                 try:
-                    con_maxcsn = self.get_consumer_maxcsn(binddn=binddn, bindpw=bindpw)
-                    if con_maxcsn:
-                        if agmt_maxcsn == con_maxcsn:
-                            if return_json:
-                                return json.dumps({
-                                    'msg': "In Synchronization",
-                                    'agmt_maxcsn': agmt_maxcsn,
-                                    'con_maxcsn': con_maxcsn,
-                                    'state': agmt_status['state'],
-                                    'reason': agmt_status['message']
-                                }, indent=4)
-                            else:
-                                return "In Synchronization"
+                    con_maxcsn = self.get_consumer_maxcsn(binddn=binddn, bindpw=bindpw, conn_pool=conn_pool)
                 except:
                     pass
-            else:
-                agmt_maxcsn = "Unknown"
-
-            # Not in sync - attempt to discover the cause
-            repl_msg = agmt_status['message']
-            if self.get_attr_val_utf8_l(AGMT_UPDATE_IN_PROGRESS) == 'true':
-                # Replication is on going - this is normal
-                repl_msg = "Replication still in progress"
-            elif "can't contact ldap" in agmt_status['message']:
-                    # Consumer is down
-                    repl_msg = "Consumer can not be contacted"
-
-            if return_json:
-                return json.dumps({
-                    'msg': "Not in Synchronization",
-                    'agmt_maxcsn': agmt_maxcsn,
-                    'con_maxcsn': con_maxcsn,
-                    'state': agmt_status['state'],
-                    'reason': repl_msg
-                }, indent=4)
-            else:
-                return ("Not in Synchronization: supplier " +
-                        "(%s) consumer (%s) State (%s) Reason (%s)" %
-                        (agmt_maxcsn, con_maxcsn, agmt_status['state'], repl_msg))
+            return self._format_agmt_status(agmt_maxcsn, con_maxcsn, return_json=return_json)
         except ldap.INVALID_CREDENTIALS as e:
             raise(e)
         except ldap.LDAPError as e:
             raise ValueError(str(e))
 
-    def get_lag_time(self, suffix, agmt_name, binddn=None, bindpw=None):
-        """Get the lag time between the supplier and the consumer
-        :param suffix: The replication suffix
-        :type suffix: str
-        :param agmt_name: The name of the agreement
-        :type agmt_name: str
-        :param binddn: Specifies a specific bind DN to use when contacting the remote consumer
-        :type binddn: str
-        :param bindpw: Password for the bind DN
-        :type bindpw: str
-        :returns: A time-formated string of the the replication lag (HH:MM:SS).
-        :raises: ValueError - if unable to get consumer's maxcsn
+    @staticmethod
+    def _format_lag_time(agmt_maxcsn, con_maxcsn):
+        """Compute the lag between the agreement and the consumer maxcsns
+        :returns: A time-formated string of the the replication lag (HH:MM:SS),
+                  or "Unavailable"
         """
-
-        try:
-            agmt_maxcsn = self.get_agmt_maxcsn()
-            con_maxcsn = self.get_consumer_maxcsn(binddn=binddn, bindpw=bindpw)
-        except ldap.LDAPError as e:
-            raise ValueError("Unable to get lag time: " + str(e))
-
-        if con_maxcsn is None:
-            raise ValueError("Unable to get consumer's max csn")
-        if con_maxcsn.lower() == "unavailable":
-            return con_maxcsn
+        if agmt_maxcsn is None or con_maxcsn is None or con_maxcsn.lower() == "unavailable":
+            return "Unavailable"
 
         # Extract the csn timstamps and compare them
         agmt_time = 0
@@ -305,7 +360,30 @@ class Agreement(DSLdapObject):
         # Return a nice formated timestamp
         return "{:0>8}".format(str(lag))
 
-    def status(self, winsync=False, just_status=False, use_json=False, binddn=None, bindpw=None):
+    def get_lag_time(self, suffix, agmt_name, binddn=None, bindpw=None, conn_pool=None):
+        """Get the lag time between the supplier and the consumer
+        :param suffix: The replication suffix
+        :type suffix: str
+        :param agmt_name: The name of the agreement
+        :type agmt_name: str
+        :param binddn: Specifies a specific bind DN to use when contacting the remote consumer
+        :type binddn: str
+        :param bindpw: Password for the bind DN
+        :type bindpw: str
+        :param conn_pool: Reuse the consumer connection from this pool, instead of opening a new one
+        :type conn_pool: lib389.replica.ReplicationConnectionPool
+        :returns: A time-formated string of the the replication lag (HH:MM:SS).
+        :raises: ValueError - if unable to get consumer's maxcsn
+        """
+
+        try:
+            (agmt_maxcsn, con_maxcsn) = self._get_maxcsns(binddn=binddn, bindpw=bindpw, conn_pool=conn_pool)
+        except ldap.LDAPError as e:
+            raise ValueError("Unable to get lag time: " + str(e))
+
+        return self._format_lag_time(agmt_maxcsn, con_maxcsn)
+
+    def status(self, winsync=False, just_status=False, use_json=False, binddn=None, bindpw=None, conn_pool=None):
         """Get the status of a replication agreement
         :param winsync: Specifies if the the agreement is a winsync replication agreement
         :type winsync: boolean
@@ -317,23 +395,38 @@ class Agreement(DSLdapObject):
         :type binddn: str
         :param bindpw: Password for the bind DN
         :type bindpw: str
+        :param conn_pool: Reuse the consumer connection from this pool, instead of opening a new one
+        :type conn_pool: lib389.replica.ReplicationConnectionPool
         :returns: A status message
         :raises: ValueError - if failing to get agmt status
         """
-        status_attrs_dict = self.get_all_attrs()
-        status_attrs_dict = dict((k.lower(), v) for k, v in list(status_attrs_dict.items()))
-
-        # We need a bind DN and passwd so we can query the consumer.  If this is an LDAPI
-        # connection, and the consumer does not allow anonymous access to the tombstone
-        # RUV entry under the suffix, then we can't get the status.  So in this case we
-        # need to provide a DN and password.
+        maxcsns = None
         if not winsync:
+            # We need a bind DN and passwd so we can query the consumer.  If this is an LDAPI
+            # connection, and the consumer does not allow anonymous access to the tombstone
+            # RUV entry under the suffix, then we can't get the status.  So in this case we
+            # need to provide a DN and password.
             try:
-                status = self.get_agmt_status(binddn=binddn, bindpw=bindpw)
+                maxcsns = self._get_maxcsns(binddn=binddn, bindpw=bindpw, conn_pool=conn_pool)
             except ldap.INVALID_CREDENTIALS as e:
                 raise(e)
-            except ValueError as e:
-                status = str(e)
+            except ldap.LDAPError as e:
+                if just_status:
+                    return json.dumps(str(e), indent=4) if use_json else str(e)
+                raise ValueError("Unable to get lag time: " + str(e))
+        return self._status(maxcsns, winsync=winsync, just_status=just_status, use_json=use_json)
+
+    def _status(self, maxcsns, winsync=False, just_status=False, use_json=False):
+        """Build the status of the agreement, see status
+        :param maxcsns: The agreement and consumer maxcsns, as returned by _get_maxcsns
+        :type maxcsns: tuple
+        """
+        status_attrs_dict = self.get_all_attrs()
+        status_attrs_dict = dict((k.lower(), v) for k, v in list(status_attrs_dict.items()))
+
+        if not winsync:
+            (agmt_maxcsn, con_maxcsn) = maxcsns
+            status = self._format_agmt_status(agmt_maxcsn, con_maxcsn)
             if just_status:
                 if use_json:
                     return (json.dumps(status, indent=4))
@@ -341,9 +434,7 @@ class Agreement(DSLdapObject):
                     return status
 
             # Get the lag time
-            suffix = ensure_str(status_attrs_dict['nsds5replicaroot'][0])
-            agmt_name = ensure_str(status_attrs_dict['cn'][0])
-            lag_time = self.get_lag_time(suffix, agmt_name, binddn=binddn, bindpw=bindpw)
+            lag_time = self._format_lag_time(agmt_maxcsn, con_maxcsn)
         else:
             lag_time = "Not available for Winsync agreements"
             status = "Not available for Winsync agreements"
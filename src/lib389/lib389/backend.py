@@ -479,15 +479,17 @@ class Backend(DSLdapObject):
             suffix.get_attr_val('objectclass')
         except ldap.NO_SUCH_OBJECT:
             # backend root entry not created yet
-            DSBLE0003['items'] = [dn, ]
-            DSBLE0003['check'] = f'backends:{bename}:search'
-            yield DSBLE0003
+            report = copy.deepcopy(DSBLE0003)
+            report['items'] = [dn, ]
+            report['check'] = f'backends:{bename}:search'
+            yield report
         except ldap.LDAPError as e:
             # Some other error
-            DSBLE0002['detail'] = DSBLE0002['detail'].replace('ERROR', str(e))
-            DSBLE0002['check'] = f'backends:{bename}:search'
-            DSBLE0002['items'] = [dn, ]
-            yield DSBLE0002
+            report = copy.deepcopy(DSBLE0002)
+            report['detail'] = report['detail'].replace('ERROR', str(e))
+            report['check'] = f'backends:{bename}:search'
+            report['items'] = [dn, ]
+            yield report
 
     def _lint_mappingtree(self):
         """Backend lint
@@ -504,7 +506,7 @@ class Backend(DSLdapObject):
             if mt.get_attr_val_utf8('nsslapd-backend') != bename and mt.get_attr_val_utf8('nsslapd-state') != 'backend':
                 raise ldap.NO_SUCH_OBJECT("We have a matching suffix, but not a backend or correct database name.")
         except ldap.NO_SUCH_OBJECT:
-            result = DSBLE0001
+            result = copy.deepcopy(DSBLE0001)
             result['check'] = f'backends:{bename}:mappingtree'
             result['items'] = [bename, ]
             yield result
@@ -836,22 +838,10 @@ class Backend(DSLdapObject):
         """Return a list of Backend's
         returns: a List of subsuffix entries
         """
-        subsuffixes = []
-        top_be_suffix = self.get_attr_val_utf8_l('nsslapd-suffix').lower()
-        mts = self._mts.list()
-        for mt in mts:
-            parent_suffix = mt.get_attr_val_utf8_l('nsslapd-parent-suffix')
-            if parent_suffix is None:
-                continue
-            if parent_suffix.lower() == top_be_suffix:
-                child_suffix = mt.get_attr_val_utf8_l('cn').lower()
-                be_insts = Backends(self._instance).list()
-                for be in be_insts:
-                    be_suffix = ensure_str(be.get_attr_val_utf8_l('nsslapd-suffix')).lower()
-                    if child_suffix == be_suffix:
-                        subsuffixes.append(be)
-                        break
-        return subsuffixes
+        tree = SuffixTree(self._instance)
+        return [Backend(self._instance, node.backend_dn)
+                for node in tree.get_children(self.get_attr_val_utf8_l('nsslapd-suffix'))
+                if node.backend_dn is not None]
 
     def get_cos_indirect_defs(self):
         return CosIndirectDefinitions(self._instance, self._dn).list()
@@ -980,6 +970,164 @@ class Backends(DSLdapObjects):
             be.delete()
 
 
+def _suffix_key(suffix):
+    """Return the normalised form of a suffix, to compare it"""
+    suffix = suffix.strip('"')
+    try:
+        return normalizeDN(suffix)
+    except ldap.DECODING_ERROR:
+        return suffix.lower()
+
+
+class SuffixNode(object):
+    """A suffix of a SuffixTree
+
+    :param suffix: The suffix, in lower case
+    :type suffix: str
+    :param parent: The parent suffix, in lower case, or None for a root suffix
+    :type parent: str
+    :param be_name: The backend of the mapping tree entry, or of the ldbm
+                    instance when there is no mapping tree entry
+    :type be_name: str
+    :param backend_dn: The dn of the ldbm instance, or None
+    :type backend_dn: str
+    :param link: The suffix is served by a chaining link
+    :type link: bool
+    :param replicated: The suffix has a replica
+    :type replicated: bool
+    """
+
+    __slots__ = ('suffix', 'parent', 'be_name', 'backend_dn', 'link', 'replicated')
+
+    def __init__(self, suffix, parent=None, be_name=None, backend_dn=None, link=False, replicated=False):
+        self.suffix = suffix
+        self.parent = parent
+        self.be_name = be_name
+        self.backend_dn = backend_dn
+        self.link = link
+        self.replicated = replicated
+
+    def __repr__(self):
+        return "SuffixNode(%r, parent=%r, be_name=%r)" % (self.suffix, self.parent, self.be_name)
+
+
+class SuffixTree(object):
+    """A snapshot of the suffixes of an instance. It is loaded with a subtree
+    search of the mapping tree (including the replicas), one of the ldbm
+    instances and one of the chaining links, and indexed by suffix and by
+    parent suffix, so walking the tree needs no further searches. Build a
+    new one to see later changes.
+
+    :param instance: An instance
+    :type instance: lib389.DirSrv
+    """
+
+    def __init__(self, instance):
+        self._instance = instance
+        # suffix key -> SuffixNode
+        self._nodes = {}
+        # parent suffix key -> [SuffixNode], in the order of the mapping tree
+        self._children = {}
+        # Suffix keys of the ldbm backends, in the order they are listed
+        self._backends = []
+        self._load()
+
+    def _search(self, basedn, filterstr, attrlist):
+        try:
+            return self._instance.search_ext_s(basedn, ldap.SCOPE_SUBTREE, filterstr, attrlist=attrlist,
+                                               escapehatch='i am sure')
+        except ldap.NO_SUCH_OBJECT:
+            # No chaining plugin, for example
+            return []
+
+    def _load(self):
+        mt_entries = self._search(DN_MAPPING_TREE,
+                                  '(|(objectClass=nsMappingTree)(objectClass=%s))' % REPLICA_OBJECTCLASS_VALUE,
+                                  ['objectClass', 'cn', 'nsslapd-backend', 'nsslapd-parent-suffix', REPL_ROOT])
+        be_entries = self._search(DN_LDBM, '(objectClass=%s)' % BACKEND_OBJECTCLASS_VALUE,
+                                  ['cn', 'nsslapd-suffix'])
+        link_entries = self._search(DN_CHAIN, '(objectClass=%s)' % BACKEND_OBJECTCLASS_VALUE, ['cn'])
+
+        link_names = set(ensure_str(entry.getValue('cn')).lower() for entry in link_entries)
+        replica_roots = set()
+        mappings = []
+        for entry in mt_entries:
+            if 'nsmappingtree' in [ensure_str(oc).lower() for oc in entry.getValues('objectClass')]:
+                mappings.append(entry)
+            elif entry.hasAttr(REPL_ROOT):
+                replica_roots.add(_suffix_key(ensure_str(entry.getValue(REPL_ROOT))))
+
+        for entry in mappings:
+            suffix = ensure_str(entry.getValue('cn')).lower()
+            parent = entry.getValue('nsslapd-parent-suffix')
+            if parent is not None:
+                parent = ensure_str(parent).lower()
+            be_name = entry.getValue('nsslapd-backend')
+            if be_name is not None:
+                be_name = ensure_str(be_name)
+            node = SuffixNode(suffix, parent=parent, be_name=be_name,
+                              link=be_name is not None and be_name.lower() in link_names,
+                              replicated=_suffix_key(suffix) in replica_roots)
+            self._nodes[_suffix_key(suffix)] = node
+            if parent is not None:
+                self._children.setdefault(_suffix_key(parent), []).append(node)
+
+        for entry in be_entries:
+            suffix = ensure_str(entry.getValue('nsslapd-suffix')).lower()
+            key = _suffix_key(suffix)
+            node = self._nodes.get(key)
+            if node is None:
+                node = SuffixNode(suffix, replicated=key in replica_roots)
+                self._nodes[key] = node
+            node.be_name = ensure_str(entry.getValue('cn'))
+            node.backend_dn = entry.dn
+            self._backends.append(key)
+
+    def get(self, suffix):
+        """Return the node of a suffix
+
+        :param suffix: The suffix
+        :type suffix: str
+        :returns: SuffixNode or None
+        """
+        return self._nodes.get(_suffix_key(suffix))
+
+    def get_children(self, suffix):
+        """Return the sub-suffixes directly under a suffix
+
+        :param suffix: The parent suffix
+        :type suffix: str
+        :returns: list of SuffixNode
+        """
+        return list(self._children.get(_suffix_key(suffix), []))
+
+    def get_roots(self):
+        """Return the nodes of the ldbm backends that are not a sub-suffix
+
+        :returns: list of SuffixNode
+        """
+        return [self._nodes[key] for key in self._backends if self._nodes[key].parent is None]
+
+    def walk(self, suffix):
+        """Iterate over all the sub-suffixes under a suffix, depth first
+
+        :param suffix: The top suffix, which is not returned
+        :type suffix: str
+        :returns: iterator of (depth, SuffixNode), depth 1 for the children of suffix
+        """
+        seen = set([_suffix_key(suffix)])
+        stack = [(1, node) for node in reversed(self.get_children(suffix))]
+        while stack:
+            (depth, node) = stack.pop()
+            key = _suffix_key(node.suffix)
+            if key in seen:
+                # A loop in the parent suffixes
+                continue
+            seen.add(key)
+            yield (depth, node)
+            stack.extend((depth + 1, child) for child in reversed(self.get_children(node.suffix)))
+
+
 class DatabaseConfig(DSLdapObject):
     """Backend Database configuration
 
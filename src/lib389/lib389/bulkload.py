@@ -0,0 +1,508 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+
+import os
+import ldap
+import ldap.modlist
+import ldif
+import hashlib
+import logging
+import select
+import time
+from ldap.controls import SimplePagedResultsControl
+from lib389._constants import SER_ROOT_DN, SER_ROOT_PW
+from lib389._entry import Entry, ReadOnlyEntry
+from lib389.utils import ensure_bytes, ensure_list_bytes, ldap_error_desc
+
+# How many adds may be waiting for their result on one connection
+LOAD_WINDOW = 64
+# Seconds between two progress messages
+LOAD_PROGRESS_INTERVAL = 10
+# Seconds to wait for a result before checking all the connections again
+LOAD_POLL_TIMEOUT = 1
+# Page size of the search for the entries to modify
+MODIFY_PAGE_SIZE = 1000
+# First line of a bulk modify checkpoint file, followed by a digest of the mods
+MODIFY_CHECKPOINT_HEADER = '# lib389 bulk modify checkpoint'
+
+
+class _LoadStopped(Exception):
+    """Raised from the entry source to stop the load after a failed add"""
+    pass
+
+
+class _LDIFStreamer(ldif.LDIFParser):
+    """Hand each record of an LDIF file to the loader as soon as it is parsed"""
+
+    def __init__(self, input_file, loader):
+        ldif.LDIFParser.__init__(self, input_file)
+        self._loader = loader
+
+    def handle(self, dn, entry):
+        self._loader._submit(dn or '', entry)
+
+
+def _dn_keys(dn):
+    """Return the normalised dn and parent dn of an entry"""
+    rdns = ldap.explode_dn(dn.lower())
+    return ",".join(rdns), ",".join(rdns[1:])
+
+
+class _BulkOperations(object):
+    """Send operations asynchronously over one or several connections, with
+    up to window of them waiting for their result on each connection.
+    Subclasses queue the operations with _send, from the feed function
+    given to _run.
+    """
+
+    # Key of the count of successful operations in the result, and words of the messages
+    _result_key = 'done'
+    _verb = 'Processed'
+    _operation = 'process'
+
+    def __init__(self, instance, window=LOAD_WINDOW, connections=1, cont=False,
+                 progress_interval=LOAD_PROGRESS_INTERVAL, open_args=None, logger=None):
+        if window < 1:
+            raise ValueError("The window must be at least 1")
+        if connections < 1:
+            raise ValueError("At least one connection is needed")
+        self._instance = instance
+        self._window = window
+        self._connections = connections
+        self._cont = cont
+        self._progress_interval = progress_interval
+        self._open_args = open_args or {}
+        if logger is not None:
+            self._log = logger
+        else:
+            self._log = logging.getLogger(__name__)
+        self._conns = []
+
+    def _run(self, feed):
+        self._done = 0
+        self._errors = {}
+        self._error = None
+        self._next_conn = 0
+        self._start = time.monotonic()
+        self._last_progress = self._start
+        self._open()
+        try:
+            feed()
+        except _LoadStopped:
+            pass
+        finally:
+            try:
+                # Whatever happened, wait for what was sent
+                while any(self._pending):
+                    self._collect(block=True)
+            finally:
+                self._close()
+
+        seconds = time.monotonic() - self._start
+        result = {
+            self._result_key: self._done,
+            'failed': len(self._errors),
+            'errors': self._errors,
+            'seconds': seconds,
+            'rate': self._done / seconds if seconds > 0 else 0,
+        }
+        self._log.info("%s %d entries in %.1f seconds (%.0f entries/s), %d failed" %
+                       (self._verb, self._done, seconds, result['rate'], result['failed']))
+        if self._error is not None and not self._cont:
+            raise self._error
+        return result
+
+    def _open(self):
+        self._conns = [self._instance]
+        try:
+            for i in range(1, self._connections):
+                conn = self._instance.clone({SER_ROOT_DN: self._instance.binddn,
+                                             SER_ROOT_PW: self._instance.bindpw})
+                conn.open(connOnly=True, **self._open_args)
+                self._conns.append(conn)
+        except:
+            self._close()
+            raise
+        # msgid -> (dn, normalised dn) of the operations in flight, per connection
+        self._pending = [{} for conn in self._conns]
+
+    def _close(self):
+        for conn in self._conns[1:]:
+            try:
+                conn.close()
+            except Exception as e:
+                self._log.debug("Failed to close connection: %s" % e)
+        self._conns = []
+
+    def _send(self, dn, key, operation):
+        """Call operation(conn) on the next connection with room in its
+        window. It must send an asynchronous operation and return its msgid.
+        """
+        conn_i = self._get_free_conn()
+        if self._error is not None and not self._cont:
+            raise _LoadStopped()
+
+        msgid = operation(self._conns[conn_i])
+        self._pending[conn_i][msgid] = (dn, key)
+        self._report_progress()
+
+    def _get_free_conn(self):
+        """Return the next connection, in turn, that has room in its window"""
+        while True:
+            for i in range(0, len(self._conns)):
+                conn_i = (self._next_conn + i) % len(self._conns)
+                if len(self._pending[conn_i]) < self._window:
+                    self._next_conn = (conn_i + 1) % len(self._conns)
+                    return conn_i
+            self._collect(block=True)
+
+    def _collect(self, block=False):
+        """Process the results that are ready. If block is True and none is,
+        wait until one of the connections receives some.
+        """
+        got = False
+        for conn_i in range(0, len(self._conns)):
+            while self._pending[conn_i] and self._read_result(conn_i, 0):
+                got = True
+        if got or not block:
+            return
+
+        busy = [conn_i for conn_i in range(0, len(self._conns)) if self._pending[conn_i]]
+        if len(busy) == 1:
+            self._read_result(busy[0], LOAD_POLL_TIMEOUT)
+        elif busy:
+            select.select([self._conns[conn_i].fileno() for conn_i in busy], [], [], LOAD_POLL_TIMEOUT)
+
+    def _read_result(self, conn_i, timeout):
+        """Process one result of a connection, return False if none came
+        within timeout seconds.
+        """
+        try:
+            (rtype, rdata, msgid, rctrls) = self._conns[conn_i].result3(ldap.RES_ANY, 1, timeout)
+        except ldap.TIMEOUT:
+            return False
+        except ldap.LDAPError as e:
+            msgid = e.args[0].get('msgid') if e.args and isinstance(e.args[0], dict) else None
+            if msgid not in self._pending[conn_i]:
+                raise
+            self._complete(conn_i, msgid, e)
+            return True
+        if rtype is None:
+            return False
+        self._complete(conn_i, msgid, None)
+        return True
+
+    def _complete(self, conn_i, msgid, error):
+        (dn, key) = self._pending[conn_i].pop(msgid)
+        error = self._completed(dn, key, error)
+        if error is None:
+            self._done += 1
+            return
+        desc = ldap_error_desc(error)
+        if error.args and isinstance(error.args[0], dict) and error.args[0].get('info'):
+            desc = "%s (%s)" % (desc, error.args[0]['info'])
+        self._errors[dn] = desc
+        self._log.error("Failed to %s %s: %s" % (self._operation, dn, desc))
+        if self._error is None:
+            self._error = error
+
+    def _completed(self, dn, key, error):
+        """Called with the result of each operation, return the error to
+        report, or None if it succeeded.
+        """
+        return error
+
+    def _report_progress(self):
+        if self._progress_interval is None:
+            return
+        now = time.monotonic()
+        if now - self._last_progress < self._progress_interval:
+            return
+        self._last_progress = now
+        self._log.info("%s %d entries (%.0f entries/s), %d failed, %d in flight" %
+                       (self._verb, self._done, self._done / (now - self._start), len(self._errors),
+                        sum(len(p) for p in self._pending)))
+
+
+class LDIFBulkLoader(_BulkOperations):
+    """Add many entries to an online instance. The adds are sent
+    asynchronously, with up to window of them waiting for their result on
+    each connection, so the load is not bound by the round trip time to the
+    server. An entry is only sent once the add of its parent, when the parent
+    is part of the same load, has completed.
+
+    Example:
+        loader = LDIFBulkLoader(inst, window=128, connections=4, cont=True)
+        result = loader.load('/tmp/users.ldif')
+        for (dn, error) in result['errors'].items():
+            ...
+
+    :param instance: An instance
+    :type instance: lib389.DirSrv
+    :param window: How many adds may be in flight on each connection
+    :type window: int
+    :param connections: How many connections to spread the adds over. The
+                        first one is the connection of the instance.
+    :type connections: int
+    :param cont: Continue past failed adds instead of stopping at the first one
+    :type cont: bool
+    :param progress_interval: Seconds between two progress messages, or None
+    :type progress_interval: int
+    :param open_args: Extra arguments to DirSrv.open for the additional
+                      connections, like reqcert
+    :type open_args: dict
+    :param logger: A logging interface
+    :type logger: python logging
+    """
+
+    _result_key = 'added'
+    _verb = 'Added'
+    _operation = 'add'
+
+    def load(self, input_file):
+        """Add the entries of an LDIF file
+
+        :param input_file: The path of the LDIF file, or a file object
+        :type input_file: str or file
+        :returns: dict with the 'added' and 'failed' entry counts, the 'errors'
+                  by dn, the elapsed 'seconds' and the 'rate' in entries/s
+        :raises: ldap.LDAPError - the first failed add, if cont is False
+        """
+
+        def _feed():
+            if isinstance(input_file, str):
+                with open(input_file, 'r') as f:
+                    _LDIFStreamer(f, self).parse()
+            else:
+                _LDIFStreamer(input_file, self).parse()
+
+        return self._run(_feed)
+
+    def add_entries(self, entries):
+        """Add entries from an iterable, for example a generator, so they
+        don't have to be written to an LDIF file first
+
+        :param entries: lib389.Entry or ReadOnlyEntry objects, or (dn, attributes)
+                        tuples, the values of the attributes are lists of str or bytes
+        :type entries: iterable
+        :returns: See load
+        :raises: ldap.LDAPError - the first failed add, if cont is False
+        """
+
+        def _feed():
+            for entry in entries:
+                if isinstance(entry, (Entry, ReadOnlyEntry)):
+                    (dn, attrs) = (entry.dn, entry.iterAttrs())
+                else:
+                    (dn, attrs) = (entry[0], entry[1].items())
+                self._submit(dn, dict((attr, [ensure_bytes(v) for v in vals]) for (attr, vals) in attrs))
+
+        return self._run(_feed)
+
+    def _run(self, feed):
+        # normalised dn -> count of the adds in flight
+        self._inflight = {}
+        return super(LDIFBulkLoader, self)._run(feed)
+
+    def _submit(self, dn, entry):
+        (key, parent_key) = _dn_keys(dn)
+        while parent_key in self._inflight:
+            self._collect(block=True)
+        modlist = ldap.modlist.addModlist(entry)
+        self._send(dn, key, lambda conn: conn.add_ext(dn, modlist))
+        self._inflight[key] = self._inflight.get(key, 0) + 1
+
+    def _completed(self, dn, key, error):
+        if self._inflight[key] == 1:
+            del self._inflight[key]
+        else:
+            self._inflight[key] -= 1
+        return error
+
+
+class BulkModifier(_BulkOperations):
+    """Apply the same modifications to many entries of an online instance.
+    The modifies are pipelined like the adds of LDIFBulkLoader. The entries
+    are given as a stream of dns, or found by a paged search.
+
+    With a checkpoint file, the dn of each modified entry is recorded, and
+    a later run with the same file and mods skips them, so an interrupted
+    run can be resumed.
+
+    Example:
+        modifier = BulkModifier(inst, [(ldap.MOD_REPLACE, 'nsAccountLock', 'true')],
+                                connections=4, checkpoint='/tmp/lock.ckpt')
+        result = modifier.modify_filter(DEFAULT_SUFFIX, '(objectClass=nsAccount)')
+
+    :param instance: An instance
+    :type instance: lib389.DirSrv
+    :param mods: [(action, key, value),] or [(ldap.MOD_DELETE, key),], see
+                 DSLdapObject.apply_mods
+    :type mods: list of tuples
+    :param ensure: Count the modifies that fail because a value to add is
+                   already present, or an attribute to delete is absent, as
+                   done instead of failed, like ensure_present and
+                   ensure_removed do. This is exact when mods has one mod.
+    :type ensure: bool
+    :param checkpoint: The path of the checkpoint file, or None
+    :type checkpoint: str
+    :param window: How many modifies may be in flight on each connection
+    :type window: int
+    :param connections: How many connections to spread the modifies over
+    :type connections: int
+    :param cont: Continue past failed modifies instead of stopping at the first one
+    :type cont: bool
+    :param progress_interval: Seconds between two progress messages, or None
+    :type progress_interval: int
+    :param open_args: Extra arguments to DirSrv.open for the additional connections
+    :type open_args: dict
+    :param logger: A logging interface
+    :type logger: python logging
+    """
+
+    _result_key = 'modified'
+    _verb = 'Modified'
+    _operation = 'modify'
+
+    def __init__(self, instance, mods, ensure=False, checkpoint=None, **kwargs):
+        super(BulkModifier, self).__init__(instance, **kwargs)
+        self._mods = []
+        for mod in mods:
+            if len(mod) == 2 and mod[0] == ldap.MOD_DELETE:
+                self._mods.append((mod[0], mod[1], None))
+            elif len(mod) == 3 and mod[0] in (ldap.MOD_ADD, ldap.MOD_DELETE, ldap.MOD_REPLACE):
+                value = mod[2] if isinstance(mod[2], list) else [mod[2]]
+                self._mods.append((mod[0], mod[1], ensure_list_bytes(value)))
+            else:
+                raise ValueError('Invalid mod %s' % str(mod))
+        self._ensure = ensure
+        self._checkpoint_path = checkpoint
+        self._checkpoint = None
+
+    def modify_dns(self, dns):
+        """Modify the entries of a stream of dns
+
+        :param dns: The dns of the entries, for example the lines of a file
+        :type dns: iterable of str
+        :returns: dict with the 'modified' and 'failed' entry counts, with
+                  'unchanged' the modified entries that already had the
+                  changes (see ensure) and 'skipped' the ones found in the
+                  checkpoint, the 'errors' by dn, the elapsed 'seconds' and
+                  the 'rate' in entries/s
+        :raises: ldap.LDAPError - the first failed modify, if cont is False
+        """
+
+        def _feed():
+            for dn in dns:
+                self._submit(dn)
+
+        return self._run(_feed)
+
+    def modify_filter(self, basedn, filterstr, scope=ldap.SCOPE_SUBTREE, page_size=MODIFY_PAGE_SIZE):
+        """Modify the entries that match a filter. They are searched one page
+        at a time, so only a page of dns is held in memory.
+
+        :param basedn: The base of the search
+        :type basedn: str
+        :param filterstr: The filter of the search
+        :type filterstr: str
+        :param scope: The scope of the search
+        :type scope: int
+        :param page_size: How many dns to read per page
+        :type page_size: int
+        :returns: See modify_dns
+        :raises: ldap.LDAPError - the first failed modify, if cont is False
+        """
+
+        def _feed():
+            req_pr_ctrl = SimplePagedResultsControl(True, size=page_size, cookie='')
+            while True:
+                # The search results are read by msgid, so the modify
+                # results in flight on the same connection are left alone.
+                msgid = self._instance.search_ext(basedn, scope, filterstr, attrlist=['1.1'],
+                                                  serverctrls=[req_pr_ctrl], escapehatch='i am sure')
+                try:
+                    (rtype, rdata, rmsgid, rctrls) = self._instance.result3(msgid, all=1,
+                                                                            escapehatch='i am sure')
+                except ldap.NO_SUCH_OBJECT:
+                    return
+                for (dn, attrs) in rdata:
+                    if dn is not None:
+                        self._submit(dn)
+                pctrls = [c for c in rctrls if c.controlType == SimplePagedResultsControl.controlType]
+                if not pctrls or not pctrls[0].cookie:
+                    return
+                req_pr_ctrl.cookie = pctrls[0].cookie
+
+        return self._run(_feed)
+
+    def _run(self, feed):
+        self._skipped = 0
+        self._unchanged = 0
+        self._open_checkpoint()
+        try:
+            result = super(BulkModifier, self)._run(feed)
+        except:
+            self._close_checkpoint()
+            raise
+        self._close_checkpoint()
+        result['skipped'] = self._skipped
+        result['unchanged'] = self._unchanged
+        return result
+
+    def _mods_digest(self):
+        return hashlib.sha256(repr(self._mods).encode()).hexdigest()
+
+    def _open_checkpoint(self):
+        self._done_keys = set()
+        if self._checkpoint_path is None:
+            return
+        header = '%s %s' % (MODIFY_CHECKPOINT_HEADER, self._mods_digest())
+        if os.path.exists(self._checkpoint_path):
+            with open(self._checkpoint_path, 'r') as f:
+                if f.readline().rstrip('\n') != header:
+                    raise ValueError("The checkpoint file %s was written for other modifications" %
+                                     self._checkpoint_path)
+                for line in f:
+                    self._done_keys.add(line.rstrip('\n'))
+            self._checkpoint = open(self._checkpoint_path, 'a')
+        else:
+            self._checkpoint = open(self._checkpoint_path, 'w')
+            self._checkpoint.write(header + '\n')
+        if self._done_keys:
+            self._log.info("Resuming: %d entries were already modified" % len(self._done_keys))
+
+    def _close_checkpoint(self):
+        if self._checkpoint is not None:
+            self._checkpoint.close()
+            self._checkpoint = None
+
+    def _submit(self, dn):
+        dn = dn.strip()
+        if not dn:
+            return
+        (key, parent_key) = _dn_keys(dn)
+        if key in self._done_keys:
+            self._skipped += 1
+            return
+        self._send(dn, key, lambda conn: conn.modify_ext(dn, self._mods))
+
+    def _completed(self, dn, key, error):
+        if self._ensure and isinstance(error, (ldap.TYPE_OR_VALUE_EXISTS, ldap.NO_SUCH_ATTRIBUTE)):
+            self._unchanged += 1
+            error = None
+        if error is None and self._checkpoint is not None:
+            self._checkpoint.write(key + '\n')
+        return error
+
+    def _report_progress(self):
+        last_progress = self._last_progress
+        super(BulkModifier, self)._report_progress()
+        if self._checkpoint is not None and self._last_progress != last_progress:
+            # Write the checkpoint out as often as the progress
+            self._checkpoint.flush()
@@ -0,0 +1,276 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+"""Recommend the sizes of the entry, DN and database caches from the
+statistics of the monitors.
+"""
+
+import copy
+from lib389._constants import DN_CONFIG_LDBM_BDB
+from lib389._mapped_object_lint import DSLint
+from lib389.backend import Backends, DatabaseConfig
+from lib389.monitor import MonitorSampler
+from lib389.lint import DSCACHELE0001, DSCACHELE0002
+from lib389.utils import get_total_memory
+
+# The hit ratio, in percent, under which a full cache is too small
+CACHE_TARGET_HIT_RATIO = 95.0
+# How much of a cache must be used for it to be considered full
+CACHE_FULL_RATIO = 0.9
+# The room left in the recommended sizes for the working set to grow
+CACHE_HEADROOM = 1.25
+# The largest factor a working set is estimated above what the cache holds
+CACHE_MAX_GROWTH = 4
+# The share of the RAM that the recommended caches may use in total
+CACHE_MEMORY_RATIO = 0.5
+# The smallest cache size the server accepts
+CACHE_MIN_SIZE = 512000
+# The backend caches: name -> (configuration attribute, monitor prefix)
+CACHE_BACKEND_CACHES = {
+    'entry': ('nsslapd-cachememsize', 'entry'),
+    'dn': ('nsslapd-dncachememsize', 'dn'),
+}
+# The configuration attribute of the database cache
+CACHE_DB_ATTR = 'nsslapd-dbcachesize'
+
+
+def estimate_cache(used, count, configured, hits, tries):
+    """Estimate the working set of a cache, and the size it needs
+
+    Until a cache is full, or while its hit ratio is at least
+    CACHE_TARGET_HIT_RATIO, the working set fits in it. Otherwise the
+    working set is estimated to be as many times larger than what the cache
+    holds as the hit ratio is below 100%, which holds for uniformly spread
+    reads, and at most CACHE_MAX_GROWTH times larger. The recommended size
+    is never below the configured one.
+
+    :param used: The bytes used in the cache
+    :type used: int
+    :param count: The number of items in the cache
+    :type count: int
+    :param configured: The maximum size of the cache
+    :type configured: int
+    :param hits: The number of hits over the sampled window
+    :type hits: int
+    :param tries: The number of tries over the sampled window
+    :type tries: int
+    :returns: A dict with the 'used', 'count' and 'configured' values, and
+              the 'avg_size', 'hit_ratio' (None without any try),
+              'working_set' and 'recommended' size
+    """
+
+    avg_size = used / count if count else 0
+    hit_ratio = 100.0 * hits / tries if tries else None
+    working_set = count
+    recommended = configured
+    if hit_ratio is not None and hit_ratio < CACHE_TARGET_HIT_RATIO and used >= CACHE_FULL_RATIO * configured:
+        working_set = count / max(hit_ratio / 100.0, 1.0 / CACHE_MAX_GROWTH)
+        recommended = max(int(working_set * avg_size * CACHE_HEADROOM), configured, CACHE_MIN_SIZE)
+    return {
+        'used': used,
+        'count': count,
+        'configured': configured,
+        'avg_size': int(avg_size),
+        'hit_ratio': hit_ratio,
+        'working_set': int(working_set),
+        'recommended': recommended,
+    }
+
+
+def scale_caches(caches, budget):
+    """Scale down the growth of the recommended cache sizes, so that the
+    caches fit in budget. Only what a cache grows above its configured size
+    is scaled, so a recommendation never goes below the configured size.
+
+    :param caches: The estimates of the caches, see estimate_cache()
+    :type caches: list of dict
+    :param budget: The bytes the caches may use in total
+    :type budget: int
+    :returns: True if the recommended sizes were scaled down
+    """
+
+    total = sum(c['recommended'] for c in caches)
+    if total <= budget:
+        return False
+    growth = sum(c['recommended'] - c['configured'] for c in caches if c['recommended'] > c['configured'])
+    if growth == 0:
+        return False
+    available = max(budget - sum(c['configured'] for c in caches), 0)
+    for c in caches:
+        if c['recommended'] > c['configured']:
+            extra = (c['recommended'] - c['configured']) * available / growth
+            c['recommended'] = max(c['configured'], c['configured'] + int(extra))
+    return True
+
+
+class CacheAdvisor(DSLint):
+    """Recommend the entry and DN cache sizes of each backend, and the size
+    of the database cache, from the monitor statistics.
+
+    The hit ratios are computed over a window of time, or since the server
+    started. The average entry and DN sizes come from what the caches hold,
+    and the working sets are estimated from how full the caches are and
+    from their hit ratios, see estimate_cache(). When the instance is local,
+    the growth of the caches is scaled down to fit in CACHE_MEMORY_RATIO of
+    the RAM. The recommendations never shrink a cache.
+
+    :param instance: An instance
+    :type instance: lib389.DirSrv
+    """
+
+    def __init__(self, instance):
+        self._instance = instance
+
+    @classmethod
+    def lint_uid(cls):
+        return 'cache'
+
+    def _sample(self, window):
+        """Return the monitor values, and the counters over the window, or
+        since the server started with a window of 0
+        """
+        sampler = MonitorSampler(self._instance)
+        if window > 0:
+            for (sample, rates) in sampler.watch(interval=window, count=1):
+                pass
+            return (sample.values, sampler.get_deltas())
+        sample = sampler.sample()
+        return (sample.values, sample.values)
+
+    def advise(self, window=0):
+        """Sample the monitors and return the recommended cache sizes
+
+        The report is a dict with:
+            - 'backends': by backend name, the 'entry' and 'dn' cache
+              estimates, see estimate_cache()
+            - 'dbcache': the database cache estimate, None with LMDB
+            - 'autosize': the nsslapd-cache-autosize percentage, the server
+              overrides the configured sizes when it is not 0
+            - 'memory': the RAM of the host, None if it is not local
+            - 'scaled': if the growth of the recommended sizes was scaled
+              down to fit in CACHE_MEMORY_RATIO of the RAM, see
+              scale_caches()
+
+        :param window: The seconds to sample the monitors over, 0 to use the
+                       statistics since the server started
+        :type window: float
+        :returns: A dict
+        """
+
+        (values, counters) = self._sample(window)
+        report = {'backends': {}, 'dbcache': None, 'autosize': 0, 'memory': None, 'scaled': False}
+
+        for be in Backends(self._instance).list():
+            name = be.rdn
+            section = 'backend.%s.' % name.lower()
+            caches = {}
+            for (cache, (attr, prefix)) in CACHE_BACKEND_CACHES.items():
+                caches[cache] = estimate_cache(
+                    used=values.get('%scurrent%scachesize' % (section, prefix), 0),
+                    count=values.get('%scurrent%scachecount' % (section, prefix), 0),
+                    configured=be.get_attr_val_int(attr) or values.get('%smax%scachesize' % (section, prefix), 0),
+                    hits=counters.get('%s%scachehits' % (section, prefix), 0),
+                    tries=counters.get('%s%scachetries' % (section, prefix), 0))
+            report['backends'][name] = caches
+
+        db_config = DatabaseConfig(self._instance)
+        config = db_config.get()
+        autosize = config.get('nsslapd-cache-autosize')
+        report['autosize'] = int(autosize[0]) if autosize else 0
+        if db_config.get_db_lib() == 'bdb':
+            configured = values.get('database.nsslapd-db-cache-size-bytes') or int(config[CACHE_DB_ATTR][0])
+            # The database cache is always full, and holds pages
+            dbcache = estimate_cache(configured, configured, configured,
+                                     counters.get('ldbm.dbcachehits', 0), counters.get('ldbm.dbcachetries', 0))
+            for key in ('used', 'count', 'avg_size', 'working_set'):
+                del dbcache[key]
+            report['dbcache'] = dbcache
+
+        if self._instance.isLocal:
+            report['memory'] = get_total_memory()
+        if report['memory']:
+            caches = [c for be_caches in report['backends'].values() for c in be_caches.values()]
+            if report['dbcache'] is not None:
+                caches.append(report['dbcache'])
+            report['scaled'] = scale_caches(caches, report['memory'] * CACHE_MEMORY_RATIO)
+        return report
+
+    def get_changes(self, report):
+        """Return the configuration changes of a report
+
+        :param report: A report returned by advise()
+        :type report: dict
+        :returns: A list of (dn, attribute, value) of the caches to grow,
+                  the database cache is only changed after a restart
+        """
+
+        changes = []
+        backends = Backends(self._instance)
+        for (name, caches) in report['backends'].items():
+            dn = backends.get(name).dn
+            for (cache, (attr, _)) in CACHE_BACKEND_CACHES.items():
+                if caches[cache]['recommended'] > caches[cache]['configured']:
+                    changes.append((dn, attr, str(caches[cache]['recommended'])))
+        if report['dbcache'] is not None and report['dbcache']['recommended'] > report['dbcache']['configured']:
+            changes.append((DN_CONFIG_LDBM_BDB, CACHE_DB_ATTR, str(report['dbcache']['recommended'])))
+        if changes and report['autosize']:
+            # Otherwise the server sizes the caches again when it starts
+            changes.append((DN_CONFIG_LDBM_BDB, 'nsslapd-cache-autosize', '0'))
+        return changes
+
+    def apply(self, report):
+        """Set the recommended cache sizes of a report
+
+        :param report: A report returned by advise()
+        :type report: dict
+        :returns: The list of (dn, attribute, value) that were changed
+        """
+
+        changes = self.get_changes(report)
+        backends = Backends(self._instance)
+        db_config = DatabaseConfig(self._instance)
+        for (dn, attr, value) in changes:
+            if dn == DN_CONFIG_LDBM_BDB:
+                db_config.set([(attr, value)])
+            else:
+                backends.get(dn=dn).replace(attr, value)
+        return changes
+
+    def _lint_sizing(self):
+        """Check for the caches whose hit ratio suffers from their size"""
+        report = self.advise()
+        for (name, caches) in report['backends'].items():
+            for (cache, estimate) in caches.items():
+                if estimate['hit_ratio'] is None or estimate['hit_ratio'] >= CACHE_TARGET_HIT_RATIO or \
+                   estimate['recommended'] <= estimate['configured']:
+                    continue
+                result = copy.deepcopy(DSCACHELE0001)
+                result['items'].append(name)
+                for (key, value) in (('CACHE', '%s cache' % cache), ('BACKEND', name),
+                                     ('RATIO', '%.1f' % estimate['hit_ratio']),
+                                     ('WORKSET', str(estimate['working_set'])),
+                                     ('SIZE', str(estimate['avg_size'])),
+                                     ('RECOMMENDED', str(estimate['recommended'])),
+                                     ('CONFIGURED', str(estimate['configured']))):
+                    result['detail'] = result['detail'].replace(key, value)
+                result['fix'] = result['fix'].replace('YOUR_INSTANCE', self._instance.serverid)
+                result['check'] = 'cache:sizing'
+                yield result
+
+        estimate = report['dbcache']
+        if estimate is not None and estimate['hit_ratio'] is not None and \
+           estimate['hit_ratio'] < CACHE_TARGET_HIT_RATIO and estimate['recommended'] > estimate['configured']:
+            result = copy.deepcopy(DSCACHELE0002)
+            for (key, value) in (('RATIO', '%.1f' % estimate['hit_ratio']),
+                                 ('RECOMMENDED', str(estimate['recommended'])),
+                                 ('CONFIGURED', str(estimate['configured']))):
+                result['detail'] = result['detail'].replace(key, value)
+            result['fix'] = result['fix'].replace('YOUR_INSTANCE', self._instance.serverid)
+            result['check'] = 'cache:sizing'
+            yield result
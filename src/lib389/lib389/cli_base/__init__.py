@@ -11,6 +11,7 @@ import ast
 import logging
 import sys
 import json
+import textwrap
 import ldap
 from ldap.dn import is_dn
 
@@ -177,26 +178,46 @@ def _format_status(log, mtype, json=False):
                 log.info('{}: {}'.format(k, vi))
 
 
+def _json_list_lines(items):
+    """Yield the text of json.dumps({"type": "list", "items": items}, indent=4)
+    piece by piece, consuming items lazily. This lets a large listing be printed
+    while it is still being read from the server.
+
+    :param items: An iterable of json serialisable values
+    :type items: iterable
+    :returns: A generator of lines (a multi-line item is a single piece)
+    """
+    yield '{'
+    yield '    "type": "list",'
+    pending = None
+    for item in items:
+        if pending is None:
+            yield '    "items": ['
+        else:
+            yield pending + ','
+        pending = textwrap.indent(json.dumps(item, indent=4), ' ' * 8)
+    if pending is None:
+        yield '    "items": []'
+    else:
+        yield pending
+        yield '    ]'
+    yield '}'
+
+
 def _generic_list(inst, basedn, log, manager_class, args=None):
     mc = manager_class(inst, basedn)
-    ol = mc.list()
-    if len(ol) == 0:
-        if args and args.json:
-            print(json.dumps({"type": "list", "items": []}, indent=4))
-        else:
+    # Stream the entries, snapshotting each one so displaying it doesn't need another search
+    ol = (o.__unicode__() for o in mc.iter(snapshot=True))
+    if args and args.json:
+        for line in _json_list_lines(ol):
+            print(line)
+    else:
+        empty = True
+        for o_str in ol:
+            empty = False
+            print(o_str)
+        if empty:
             log.info("No objects to display")
-    elif len(ol) > 0:
-        # We might sort this in the future
-        if args and args.json:
-            json_result = {"type": "list", "items": []}
-        for o in ol:
-            o_str = o.__unicode__()
-            if args and args.json:
-                json_result['items'].append(o_str)
-            else:
-                print(o_str)
-        if args and args.json:
-            print(json.dumps(json_result, indent=4))
 
 
 # Display these entries better!
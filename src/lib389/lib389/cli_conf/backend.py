@@ -7,7 +7,7 @@
 # See LICENSE for details.
 # --- END COPYRIGHT BLOCK ---
 
-from lib389.backend import Backend, Backends, DatabaseConfig
+from lib389.backend import Backend, Backends, DatabaseConfig, SuffixTree
 from lib389.configurations.sample import (
     create_base_domain,
     create_base_org,
@@ -15,9 +15,8 @@ from lib389.configurations.sample import (
     create_base_cn,
     create_base_c,
     )
-from lib389.chaining import (ChainingLinks)
 from lib389.monitor import MonitorLDBM
-from lib389.replica import Replicas
+from lib389.cache_advisor import CacheAdvisor
 from lib389.utils import ensure_str, is_a_dn, is_dn_parent
 from lib389._constants import *
 from lib389.cli_base import (
@@ -205,16 +204,12 @@ def backend_create(inst, basedn, log, args):
 
 
 def _recursively_del_backends(be):
-    sub_backends = be.get_sub_suffixes()
-    if len(sub_backends) == 0:
-        return
-
-    for sub in sub_backends:
-        has_subs = sub.get_sub_suffixes()
-        if len(has_subs) > 0:
-            _recursively_del_backends(sub)
-        else:
-            sub.delete()
+    tree = SuffixTree(be._instance)
+    subs = [node for (depth, node) in tree.walk(be.get_attr_val_utf8_l('nsslapd-suffix'))
+            if node.backend_dn is not None]
+    # Delete the deepest sub-suffixes first
+    for node in reversed(subs):
+        Backend(be._instance, node.backend_dn).delete()
 
 
 def backend_delete(inst, basedn, log, args, warn=True):
@@ -282,57 +277,33 @@ def backend_export(inst, basedn, log, args):
         raise ValueError("Export task failed\n-------------------------\n{}".format(ensure_str(task.get_task_log())))
 
 
-def is_db_link(inst, rdn):
-    links = ChainingLinks(inst).list()
-    for link in links:
-        cn = link.get_attr_val_utf8('cn').lower()
-        if cn == rdn.lower():
-            return True
-    return False
-
-
-def is_db_replicated(inst, suffix):
-    replicas = Replicas(inst)
-    try:
-        replicas.get(suffix)
-        return True
-    except:
-        return False
-
-
 def backend_get_subsuffixes(inst, basedn, log, args):
     subsuffixes = []
-    be_insts = MANY(inst).list()
-    for be in be_insts:
-        be_suffix = ensure_str(be.get_attr_val_utf8_l('nsslapd-suffix')).lower()
-        if be_suffix == args.be_name.lower():
-            # We have our parent, now find the children
-            mts = be._mts.list()
-            for mt in mts:
-                db_type = "suffix"
-                sub = mt.get_attr_val_utf8_l('nsslapd-parent-suffix')
-                sub_be = mt.get_attr_val_utf8_l('nsslapd-backend')
-                if sub == be_suffix:
-                    # We have a subsuffix (maybe a db link?)
-                    if is_db_link(inst, sub_be):
-                        db_type = "link"
-
-                    if args.suffix:
-                        subsuffixes.append(mt.get_attr_val_utf8_l('cn'))
-                    else:
-                        if args.json:
-                            val = {"suffix": mt.get_attr_val_utf8_l('cn'),
-                                   "backend": mt.get_attr_val_utf8_l('nsslapd-backend'),
-                                   "type": db_type}
-                        else:
-                            val = ("{} ({}) Database Type: {}".format(
-                                mt.get_attr_val_utf8_l('cn'),
-                                mt.get_attr_val_utf8_l('nsslapd-backend'),
-                                db_type))
-                        subsuffixes.append(val)
-            break
+    tree = SuffixTree(inst)
+    node = tree.get(args.be_name)
+    if node is not None and node.backend_dn is not None:
+        for sub in tree.get_children(node.suffix):
+            # We have a subsuffix (maybe a db link?)
+            db_type = "suffix"
+            if sub.link:
+                db_type = "link"
+
+            if args.suffix:
+                subsuffixes.append(sub.suffix)
+            else:
+                be_name = sub.be_name.lower() if sub.be_name is not None else None
+                if args.json:
+                    val = {"suffix": sub.suffix,
+                           "backend": be_name,
+                           "type": db_type}
+                else:
+                    val = ("{} ({}) Database Type: {}".format(sub.suffix, be_name, db_type))
+                subsuffixes.append(val)
     if len(subsuffixes) > 0:
-        subsuffixes.sort()
+        if args.json and not args.suffix:
+            subsuffixes.sort(key=lambda val: (val['suffix'], val['backend'] or '', val['type']))
+        else:
+            subsuffixes.sort()
         if args.json:
             log.info(json.dumps({"type": "list", "items": subsuffixes}, indent=4))
         else:
@@ -369,39 +340,20 @@ def build_node(suffix, be_name, subsuf=False, link=False, replicated=False):
     }
 
 
-def backend_build_tree(inst, be_insts, nodes):
+def backend_build_tree(tree, nodes):
     """Recursively build the tree
     """
-    if len(nodes) == 0:
-        # Done
-        return
-
     for node in nodes:
-        node_suffix = node['id']
-        # Get sub suffixes and chaining of node
-        for be in be_insts:
-            be_suffix = be.get_attr_val_utf8_l('nsslapd-suffix')
-            if be_suffix == node_suffix.lower():
-                # We have our parent, now find the children
-                mts = be._mts.list()
-
-                for mt in mts:
-                    sub_parent = mt.get_attr_val_utf8_l('nsslapd-parent-suffix')
-                    sub_be = mt.get_attr_val_utf8_l('nsslapd-backend')
-                    sub_suffix = mt.get_attr_val_utf8_l('cn')
-                    if sub_parent == be_suffix:
-                        # We have a subsuffix (maybe a db link?)
-                        link = is_db_link(inst, sub_be)
-                        replicated = is_db_replicated(inst, sub_suffix)
-                        node['nodes'].append(build_node(sub_suffix,
-                                                        sub_be,
-                                                        subsuf=True,
-                                                        link=link,
-                                                        replicated=replicated))
-
-                # Recurse over the new subsuffixes
-                backend_build_tree(inst, be_insts, node['nodes'])
-                break
+        for sub in tree.get_children(node['id']):
+            be_name = sub.be_name.lower() if sub.be_name is not None else None
+            node['nodes'].append(build_node(sub.suffix,
+                                            be_name,
+                                            subsuf=True,
+                                            link=sub.link,
+                                            replicated=sub.replicated))
+
+        # Recurse over the new subsuffixes
+        backend_build_tree(tree, node['nodes'])
 
 
 def print_suffix_tree(nodes, level, log):
@@ -420,17 +372,12 @@ def backend_get_tree(inst, basedn, log, args):
     """
     nodes = []
 
+    # Load the mapping tree, backends and links once, then walk that
+    tree = SuffixTree(inst)
+
     # Get the top suffixes
-    be_insts = MANY(inst).list()
-    for be in be_insts:
-        suffix = be.get_attr_val_utf8_l('nsslapd-suffix')
-        be_name = be.get_attr_val_utf8('cn')
-        mt = be._mts.get(suffix)
-        sub = mt.get_attr_val_utf8_l('nsslapd-parent-suffix')
-        if sub is not None:
-            continue
-        replicated = is_db_replicated(inst, suffix)
-        nodes.append(build_node(suffix, be_name, replicated=replicated))
+    for root in tree.get_roots():
+        nodes.append(build_node(root.suffix, root.be_name, replicated=root.replicated))
 
     # No suffixes, return empty list
     if len(nodes) == 0:
@@ -440,8 +387,7 @@ def backend_get_tree(inst, basedn, log, args):
             log.info("There are no suffixes defined")
     else:
         # Build the tree
-        be_insts = Backends(inst).list()
-        backend_build_tree(inst, be_insts, nodes)
+        backend_build_tree(tree, nodes)
 
         # Done
         if args.json:
@@ -512,6 +458,44 @@ def db_config_set(inst, basedn, log, args):
     log.info("Successfully updated database configuration")
 
 
+def db_config_tune(inst, basedn, log, args):
+    advisor = CacheAdvisor(inst)
+    report = advisor.advise(window=args.window)
+    if args.dry_run:
+        changes = advisor.get_changes(report)
+    else:
+        changes = advisor.apply(report)
+    if args.json:
+        log.info(json.dumps({"type": "result", "report": report,
+                             "changes": [{"dn": dn, "attr": attr, "value": value} for (dn, attr, value) in changes]},
+                            indent=4))
+        return
+
+    def _ratio(estimate):
+        return "n/a" if estimate['hit_ratio'] is None else "%.1f%%" % estimate['hit_ratio']
+
+    for (name, caches) in report['backends'].items():
+        for (cache, estimate) in caches.items():
+            log.info("%s %s cache: hit ratio %s, %d items of %d bytes on average, working set %d items, "
+                     "configured %d bytes, recommended %d bytes" %
+                     (name, cache, _ratio(estimate), estimate['count'], estimate['avg_size'], estimate['working_set'],
+                      estimate['configured'], estimate['recommended']))
+    if report['dbcache'] is not None:
+        log.info("Database cache: hit ratio %s, configured %d bytes, recommended %d bytes" %
+                 (_ratio(report['dbcache']), report['dbcache']['configured'], report['dbcache']['recommended']))
+    if report['scaled']:
+        log.info("The growth of the recommended sizes was scaled down to fit in the memory of the host (%d bytes)" % report['memory'])
+    if len(changes) == 0:
+        log.info("The cache sizes do not need to be changed")
+        return
+    for (dn, attr, value) in changes:
+        log.info("%s: %s: %s" % (dn, attr, value))
+    if args.dry_run:
+        log.info("Dry run, nothing was changed")
+    else:
+        log.info("Successfully tuned the cache sizes, the database cache size is changed once the server is restarted")
+
+
 def get_monitor(inst, basedn, log, args):
     if args.suffix is not None:
         # Get a suffix/backend monitor entry
@@ -976,6 +960,16 @@ def create_parser(subparsers):
     get_db_config_parser = db_subcommands.add_parser('get', help='Get the global database configuration')
     get_db_config_parser.set_defaults(func=db_config_get)
 
+    # Tune the cache sizes
+    tune_db_config_parser = db_subcommands.add_parser('tune', help='Set the entry, DN and database cache sizes that are '
+                                                      'recommended from the monitor statistics')
+    tune_db_config_parser.set_defaults(func=db_config_tune)
+    tune_db_config_parser.add_argument('--dry-run', action='store_true', default=False,
+                                       help='Only display the recommended cache sizes')
+    tune_db_config_parser.add_argument('--window', type=float, default=0,
+                                       help='The seconds to sample the cache statistics over, by default the '
+                                            'statistics since the server started are used')
+
     # Update the global database configuration
     set_db_config_parser = db_subcommands.add_parser('set', help='Set the global database configuration')
     set_db_config_parser.set_defaults(func=db_config_set)
@@ -7,9 +7,11 @@
 # See LICENSE for details.
 # --- END COPYRIGHT BLOCK ---
 
+import csv
 import datetime
 import json
-from lib389.monitor import (Monitor, MonitorLDBM, MonitorSNMP, MonitorDiskSpace)
+import sys
+from lib389.monitor import (Monitor, MonitorLDBM, MonitorSNMP, MonitorDiskSpace, MonitorSampler)
 from lib389.chaining import (ChainingLinks)
 from lib389.backend import Backends
 from lib389.utils import convert_bytes
@@ -21,6 +23,62 @@ def monitor(inst, basedn, log, args):
     _format_status(log, monitor, args.json)
 
 
+# The values printed for each interval by "monitor --watch": (label, name)
+WATCH_SUMMARY = [
+    ('ops/s', 'server.opscompleted'),
+    ('searches/s', 'snmp.searchops'),
+    ('entries/s', 'server.entriessent'),
+    ('conns', 'server.currentconnections'),
+    ('readwaiters', 'server.readwaiters'),
+    ('dbcache hit%', 'ldbm.dbcachehitratio'),
+]
+
+
+def _format_rate(val):
+    if val is None:
+        return '-'
+    if isinstance(val, float):
+        return '{:.1f}'.format(val)
+    return str(val)
+
+
+def monitor_watch(inst, basedn, log, args):
+    if args.interval <= 0:
+        raise ValueError("The interval must be a positive number of seconds")
+    sampler = MonitorSampler(inst)
+    count = args.count if args.watch else 1
+    writer = csv.writer(sys.stdout) if args.csv and not args.json else None
+    columns = None
+    try:
+        for (sample, rates) in sampler.watch(args.interval, count=count):
+            if args.metrics:
+                rates = {name: val for (name, val) in rates.items()
+                         if any(name == m or name.startswith(m + '.') for m in args.metrics)}
+            timestamp = datetime.datetime.fromtimestamp(sample.timestamp).strftime("%Y-%m-%dT%H:%M:%S")
+            if args.json:
+                # One compact line per interval
+                print(json.dumps({'time': timestamp, **rates}, separators=(',', ':')), flush=True)
+            elif writer is not None:
+                if columns is None:
+                    # The columns are set by the first interval
+                    columns = sorted(rates.keys())
+                    writer.writerow(['time'] + columns)
+                writer.writerow([timestamp] + ['' if rates.get(c) is None else _format_rate(rates[c])
+                                               for c in columns])
+                sys.stdout.flush()
+            elif args.metrics:
+                log.info(timestamp + '  ' + '  '.join('{}={}'.format(name, _format_rate(rates[name]))
+                                                      for name in sorted(rates.keys())))
+            else:
+                summary = ['{} {}'.format(label, _format_rate(rates.get(name))) for (label, name) in WATCH_SUMMARY]
+                for name in sorted(rates.keys()):
+                    if name.startswith('backend.') and name.endswith('.entrycachehitratio'):
+                        summary.append('{} entrycache hit% {}'.format(name.split('.')[1], _format_rate(rates[name])))
+                log.info(timestamp + '  ' + '  '.join(summary))
+    except KeyboardInterrupt:
+        pass
+
+
 def backend_monitor(inst, basedn, log, args):
     bes = Backends(inst)
     if args.backend:
@@ -288,6 +346,17 @@ def db_monitor(inst, basedn, log, args):
 
 def create_parser(subparsers):
     monitor_parser = subparsers.add_parser('monitor', help="Monitor the state of the instance")
+    monitor_parser.set_defaults(func=monitor_watch)
+    monitor_parser.add_argument('--watch', action='store_true', default=False,
+                                help="Without an action, print the rates of the server, database and backend monitors "
+                                     "every interval until interrupted, instead of for a single interval")
+    monitor_parser.add_argument('--interval', type=float, default=5,
+                                help="Seconds between two samples of the monitors (default 5)")
+    monitor_parser.add_argument('--count', type=int, help="With --watch, stop after this many intervals")
+    monitor_parser.add_argument('--csv', action='store_true', default=False,
+                                help="Print all the values as CSV, with a header line (use --json for JSON lines)")
+    monitor_parser.add_argument('--metrics', nargs='*',
+                                help="Only print these values or sections, like server.opscompleted or backend.userroot")
     subcommands = monitor_parser.add_subparsers(help='action')
 
     server_parser = subcommands.add_parser('server', help="Monitor the server statistics, connections and operations")
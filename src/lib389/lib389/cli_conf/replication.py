@@ -1140,20 +1140,27 @@ def dump_def_cl(inst, basedn, log, args):
         raise ValueError("Failed to export replication changelog")
 
 def dump_cl(inst, basedn, log, args):
+    filters = {
+        'min_csn': getattr(args, 'min_csn', None),
+        'max_csn': getattr(args, 'max_csn', None),
+        'rids': getattr(args, 'rid', None),
+        'workers': getattr(args, 'workers', None) or 1,
+    }
     if not args.changelog_ldif:
         replicas = Replicas(inst)
         replicas.process_and_dump_changelog(replica_root=args.replica_root,
                                             output_file=args.output_file,
                                             csn_only=args.csn_only,
                                             preserve_ldif_done=args.preserve_ldif_done,
-                                            decode=args.decode)
+                                            decode=args.decode,
+                                            **filters)
     else:
         # Modify an existing LDIF file
         try:
             assert os.path.exists(args.changelog_ldif)
         except AssertionError:
             raise FileNotFoundError(f"File {args.changelog_ldif} was not found")
-        cl_ldif = ChangelogLDIF(args.changelog_ldif, output_file=args.output_file)
+        cl_ldif = ChangelogLDIF(args.changelog_ldif, output_file=args.output_file, **filters)
         if args.csn_only:
             cl_ldif.grep_csn()
         else:
@@ -1316,6 +1323,12 @@ def create_parser(subparsers):
                                 help="If you already have a changelog LDIF file, but the changes in that file are encoded,"
                                      " you may use this option to decode the changes in that LDIF file.")
     repl_export_cl.add_argument('-o', '--output-file', required=True, help="Path name for the final result.")
+    repl_export_cl.add_argument('--min-csn', help="Only export the changes from this CSN")
+    repl_export_cl.add_argument('--max-csn', help="Only export the changes up to this CSN")
+    repl_export_cl.add_argument('--rid', type=int, action='append',
+                                help="Only export the changes made on this replica ID.  This option can be repeated")
+    repl_export_cl.add_argument('--workers', type=int, default=1,
+                                help="The number of processes to split the processing of a large changelog over")
     repl_export_cl.add_argument('-r', '--replica-root', required=True,
                                 help="Specify replica root whose changelog you want to export.")
 
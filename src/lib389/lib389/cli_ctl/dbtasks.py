@@ -7,7 +7,9 @@
 # See LICENSE for details.
 # --- END COPYRIGHT BLOCK ---
 
+import json
 from lib389._constants import TaskWarning
+from lib389.index_analysis import IndexAnalyzer, INDEX_TOP_KEYS, INDEX_LIMIT_RATIO
 
 def dbtasks_db2index(inst, log, args):
     if not inst.db2index(bename=args.backend):
@@ -92,6 +94,33 @@ def dbtasks_verify(inst, log, args):
         log.info("dbverify successful")
 
 
+def dbtasks_index_analyze(inst, log, args):
+    analyzer = IndexAnalyzer(inst, args.backend, backup=args.backup, db_dir=args.db_dir,
+                             top=args.top, limit=args.limit, ratio=args.ratio)
+    report = analyzer.analyze(args.index)
+    if args.json:
+        print(json.dumps({"type": "result", "report": report}, indent=4))
+        return
+
+    log.info("Indexes of %s in %s (ID list scan limit %d):" %
+             (report['backend'], report['db_dir'], report['idlistscanlimit']))
+    for (attr, stats) in sorted(report['indexes'].items(), key=lambda i: i[1]['ids'], reverse=True):
+        types = ", ".join("%s %d keys/%d ids" % (t, s['keys'], s['ids']) for (t, s) in sorted(stats['types'].items()))
+        log.info("  %-30s %10d bytes %8d keys %10d ids  largest %d  (%s)" %
+                 (attr, stats['file_size'], stats['keys'], stats['ids'], stats['largest'], types))
+    log.info("Heaviest keys:")
+    for key in report['top']:
+        log.info("  %-30s %-40s %d" % (key['index'], key['key'], key['ids']))
+    if report['near_limit']:
+        log.info("Keys approaching the ID list scan limit:")
+        for key in report['near_limit']:
+            log.info("  %-30s %-40s %d" % (key['index'], key['key'], key['ids']))
+    if report['allids']:
+        log.info("Keys that reached allids:")
+        for key in report['allids']:
+            log.info("  %-30s %s" % (key['index'], key['key']))
+
+
 def create_parser(subcommands):
     db2index_parser = subcommands.add_parser('db2index', help="Initialise a reindex of the server database. The server must be stopped for this to proceed.")
     # db2index_parser.add_argument('suffix', help="The suffix to reindex. IE dc=example,dc=com.")
@@ -114,6 +143,18 @@ def create_parser(subcommands):
     db2ldif_parser.add_argument('--encrypted', help="Export encrypted attributes", default=False, action='store_true')
     db2ldif_parser.set_defaults(func=dbtasks_db2ldif)
 
+    index_analyze_parser = subcommands.add_parser('index-analyze', help="Report the size of the indexes of a backend, and their heaviest keys. "
+                                                  "Unless a backup is read, the server is stopped while the indexes are read.")
+    index_analyze_parser.add_argument('backend', help="The backend to analyze. IE userRoot")
+    index_analyze_parser.add_argument('--index', action='append', help="Only analyze this attribute index, can be repeated")
+    index_analyze_parser.add_argument('--backup', help="The name of a backup, in the server's backup directory, to read instead of the server's databases")
+    index_analyze_parser.add_argument('--db-dir', help="A directory holding a copy of the backend's database files to read")
+    index_analyze_parser.add_argument('--top', type=int, default=INDEX_TOP_KEYS, help="The number of the heaviest keys to report")
+    index_analyze_parser.add_argument('--limit', type=int, help="The ID list scan limit to compare the keys with, by default the server's nsslapd-idlistscanlimit")
+    index_analyze_parser.add_argument('--ratio', type=float, default=INDEX_LIMIT_RATIO,
+                                      help="Report the keys whose ID list is at least this ratio of the limit")
+    index_analyze_parser.set_defaults(func=dbtasks_index_analyze)
+
     dbverify_parser = subcommands.add_parser('dbverify', help="Perform a db verification. You should only do this at direction of support")
     dbverify_parser.add_argument('backend', help="The backend to verify. IE userRoot")
     dbverify_parser.set_defaults(func=dbtasks_verify)
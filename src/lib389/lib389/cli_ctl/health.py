@@ -8,8 +8,15 @@
 
 import json
 import re
+import time
 from lib389._mapped_object import DSLdapObjects
-from lib389._mapped_object_lint import DSLint
+from lib389._mapped_object_lint import (
+    DSLint,
+    DSLintReadCache,
+    DSLintRunner,
+    DSLINT_CHECK_TIMEOUT,
+    DSLINT_WORKERS,
+    )
 from lib389.cli_base import connect_instance, disconnect_instance
 from lib389.cli_base.dsrc import dsrc_to_ldap, dsrc_arg_concat
 from lib389.backend import Backends
@@ -19,6 +26,7 @@ from lib389.replica import Replica
 from lib389.nss_ssl import NssSsl
 from lib389.dseldif import FSChecks, DSEldif
 from lib389.dirsrv_log import DirsrvAccessLog
+from lib389.cache_advisor import CacheAdvisor
 from lib389 import lint
 from lib389 import plugins
 from lib389._constants import DSRC_HOME
@@ -38,6 +46,7 @@ CHECK_OBJECTS = [
     DSEldif,
     NssSsl,
     DirsrvAccessLog,
+    CacheAdvisor,
 ]
 
 
@@ -89,22 +98,53 @@ def _print_checks(inst, log, specs: Iterable[str]) -> None:
     for o, s in _list_checks(inst, specs):
         log.info(f'{o.lint_uid()}:{s[0]}')
 
+
+def _format_timings(log, results):
+    log.info("\n\nCheck timings:")
+    log.info("-" * 80)
+    for result in sorted(results, key=lambda r: r['seconds'], reverse=True):
+        log.info(f"{result['seconds']:8.2f}s  {result['status']:<8} {result['check']}")
+
+
 def _run(inst, log, args, checks):
     if not args.json:
         log.info("Beginning lint report, this could take a while ...")
 
+    checks = [(f'{o.lint_uid()}:{s[0]}', s[1]) for o, s in checks]
+    if not args.json:
+        for (name, check) in checks:
+            log.info(f"Checking {name} ...")
+    runner = DSLintRunner(workers=getattr(args, 'workers', DSLINT_WORKERS),
+                          timeout=getattr(args, 'timeout', DSLINT_CHECK_TIMEOUT),
+                          logger=log.getChild('runner'))
+    start = time.monotonic()
+    with DSLintReadCache(inst) as cache:
+        results = runner.run(checks)
+    seconds = time.monotonic() - start
+    log.debug(f"Healthcheck ran {len(results)} checks in {seconds:.2f} seconds, "
+              f"{cache.misses} searches, {cache.hits} answered from the cache")
+
     report = []
-    for o, s in checks:
-        if not args.json:
-            log.info(f"Checking {o.lint_uid()}:{s[0]} ...")
-        try:
-            report += o.lint(s[0]) or []
-        except:
-            continue
+    for result in results:
+        report += result['results']
+        if not args.json and result['status'] != 'ok':
+            log.warning(f"Check {result['check']} {result['status']}: {result['error']}")
 
     if not args.json:
         log.info("Healthcheck complete.")
 
+    timings = getattr(args, 'timings', False)
+    if args.json and timings:
+        log.info(json.dumps({
+            'report': report,
+            'seconds': seconds,
+            'checks': [{'check': result['check'],
+                        'status': result['status'],
+                        'seconds': result['seconds'],
+                        'error': result['error']} for result in results],
+        }, indent=4))
+        return
+
     count = len(report)
     if count == 0:
         if not args.json:
@@ -125,6 +165,9 @@ def _run(inst, log, args, checks):
         else:
             log.info(json.dumps(report, indent=4))
 
+    if timings:
+        _format_timings(log, results)
+
 
 def health_check_run(inst, log, args):
     """Connect to the local server using LDAPI, and perform various health checks
@@ -172,3 +215,10 @@ def create_parser(subparsers):
     run_healthcheck_parser.add_argument('--check', nargs='+', default=None,
                                         help='Areas to check. These can be obtained by --list-checks. Every element on the left of the colon (:)'
                                              ' may be replaced by an asterisk if multiple options on the right are available.')
+    run_healthcheck_parser.add_argument('--workers', type=int, default=DSLINT_WORKERS,
+                                        help='How many checks to run at the same time (default: %(default)s)')
+    run_healthcheck_parser.add_argument('--timeout', type=float, default=DSLINT_CHECK_TIMEOUT,
+                                        help='Seconds a single check may run before it is reported as timed out (default: %(default)s)')
+    run_healthcheck_parser.add_argument('--timings', action='store_true',
+                                        help='Report how long each check ran. With --json, the report is an object with '
+                                             'the "report" list and the "checks" that ran')
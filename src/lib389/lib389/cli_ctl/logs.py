@@ -0,0 +1,59 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+
+import json
+from lib389.dirsrv_log import AccessLogStats
+
+
+def access_log_stats(inst, log, args):
+    """Report the statistics of the access logs, like logconv"""
+    if args.file:
+        stats = AccessLogStats(args.file, workers=args.workers, top=args.top).report()
+    else:
+        stats = inst.ds_access_log.stats(archive=args.archive, workers=args.workers, top=args.top)
+    if args.json:
+        log.info(json.dumps(stats, indent=4))
+        return
+
+    log.info("Lines:            %d (%s - %s)" % (stats['lines'], stats['start'], stats['end']))
+    log.info("Connections:      %d" % stats['connections'])
+    log.info("Results:          %d" % stats['results'])
+    for (op, count) in sorted(stats['ops'].items()):
+        log.info("  %-15s %d" % (op, count))
+    etime = stats['etime']
+    if etime['count'] > 0:
+        log.info("Etime:            avg %.6f  p50 %.6f  p90 %.6f  p95 %.6f  p99 %.6f  max %.6f" %
+                 (etime['avg'], etime['p50'], etime['p90'], etime['p95'], etime['p99'], etime['max']))
+    for (op, etime) in sorted(stats['etime_by_op'].items()):
+        log.info("  %-15s avg %.6f  p95 %.6f  max %.6f" % (op, etime['avg'], etime['p95'], etime['max']))
+    log.info("Result codes:")
+    for (err, count) in stats['errors'].items():
+        log.info("  err=%-11s %d" % (err, count))
+    log.info("Unindexed searches: %d" % stats['unindexed']['count'])
+    for (flt, count) in stats['unindexed']['filters']:
+        log.info("  %8d  %s" % (count, flt))
+    log.info("Most used filters:")
+    for (flt, count) in stats['top_filters']:
+        log.info("  %8d  %s" % (count, flt))
+    log.info("Connections by client:")
+    for (ip, count) in stats['top_ips']:
+        log.info("  %8d  %s" % (count, ip))
+
+
+def create_parser(subparsers):
+    stats_parser = subparsers.add_parser('access-log-stats', help="Report the statistics of the access logs: the etimes, "
+                                         "the operations, the most used filters and unindexed searches, and the connections by client")
+    stats_parser.add_argument('--archive', default=False, action='store_true',
+                              help="Also read the rotated access logs, compressed or not")
+    stats_parser.add_argument('--file', action='append',
+                              help="An access log file to read instead of the instance's logs, can be repeated (oldest first)")
+    stats_parser.add_argument('--workers', type=int, default=1,
+                              help="The number of processes reading the log files")
+    stats_parser.add_argument('--top', type=int, default=20,
+                              help="The number of filters and clients to report")
+    stats_parser.set_defaults(func=access_log_stats)
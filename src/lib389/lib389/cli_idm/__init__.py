@@ -8,8 +8,13 @@
 # --- END COPYRIGHT BLOCK ---
 
 import ldap
+import sys
 from getpass import getpass
-import json
+from lib389.bulkload import BulkModifier, LOAD_WINDOW
+from lib389.cli_base import _json_list_lines
+
+# Default number of connections of the --bulk modifications
+BULK_CONNECTIONS = 4
 
 
 def _get_arg(args, msg=None):
@@ -64,28 +69,20 @@ def _warn(data, msg=None):
 
 def _generic_list(inst, basedn, log, manager_class, args=None):
     mc = manager_class(inst, basedn)
-    ol = mc.list()
-    if len(ol) == 0:
-        if args and args.json:
-            print(json.dumps({"type": "list", "items": []}, indent=4))
+    # Stream the entries, snapshotting each one so displaying it doesn't need another search
+    ol = (o.__unicode__() for o in mc.iter(snapshot=True))
+    if args and args.json:
+        for line in _json_list_lines(ol):
+            print(line)
             # Print to log for test purposes
-            log.info(json.dumps({"type": "list", "items": []}, indent=4))
-        else:
+            log.info(line)
+    else:
+        empty = True
+        for o_str in ol:
+            empty = False
+            log.info(o_str)
+        if empty:
             log.info("No objects to display")
-    elif len(ol) > 0:
-        # We might sort this in the future
-        if args and args.json:
-            json_result = {"type": "list", "items": []}
-        for o in ol:
-            o_str = o.__unicode__()
-            if args and args.json:
-                json_result['items'].append(o_str)
-            else:
-                log.info(o_str)
-        if args and args.json:
-            print(json.dumps(json_result, indent=4))
-            # Print to log for test purposes
-            log.info(json.dumps(json_result, indent=4))
 
 
 # Display these entries better!
@@ -173,4 +170,52 @@ def _generic_rename_dn(inst, basedn, log, manager_class, dn, args=None):
         arguments['deloldrdn'] = False
     _generic_rename_inner(log, o, **arguments)
 
+def _add_bulk_arguments(parser, flag=True):
+    prefix = ''
+    if flag:
+        parser.add_argument('--bulk', action='store_true',
+                            help="Apply the change to many entries: the ones under the base DN, "
+                                 "or the ones listed in --dn-file")
+        prefix = 'With --bulk, '
+    parser.add_argument('--filter', help=prefix + "only change the entries that also match this filter")
+    parser.add_argument('--dn-file', help=prefix + "change the entries listed in this file, one DN per line. "
+                                                   "Use - to read the standard input")
+    parser.add_argument('--connections', type=int, default=BULK_CONNECTIONS,
+                        help=prefix + "the number of connections to send the changes over")
+    parser.add_argument('--window', type=int, default=LOAD_WINDOW,
+                        help=prefix + "the number of changes that can wait for their result on each connection")
+    parser.add_argument('--checkpoint', help=prefix + "a file to record the changed entries in, so that an "
+                                                      "interrupted run can be resumed by running it again with the same file")
+    parser.add_argument('--continue', dest='cont', action='store_true',
+                        help=prefix + "continue past the entries that could not be changed")
+
+
+def _read_dn_file(path):
+    f = sys.stdin if path == '-' else open(path, 'r')
+    try:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _generic_bulk_modify(inst, basedn, log, manager_class, mods, args, ensure=False):
+    modifier = BulkModifier(inst, mods, ensure=ensure, checkpoint=args.checkpoint,
+                            window=args.window, connections=args.connections, cont=args.cont, logger=log)
+    if args.dn_file:
+        result = modifier.modify_dns(_read_dn_file(args.dn_file))
+    else:
+        mc = manager_class(inst, basedn)
+        filterstr = mc._get_objectclass_filter()
+        if args.filter:
+            filterstr = "(&%s%s)" % (filterstr, args.filter)
+        result = modifier.modify_filter(mc._basedn, filterstr, mc._scope)
+    log.info("Modified %d entries (%d already up to date, %d skipped from the checkpoint), %d failed" %
+             (result['modified'], result['unchanged'], result['skipped'], result['failed']))
+    return result
+
+
 # vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
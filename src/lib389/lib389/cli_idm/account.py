@@ -16,11 +16,12 @@ from lib389.cli_base import (
     _generic_list,
     _generic_delete,
     _generic_modify_dn,
+    _generic_modify_change_to_mod,
     _get_arg,
     _get_dn_arg,
     _warn,
     )
-from lib389.cli_idm import _generic_rename_dn
+from lib389.cli_idm import _generic_rename_dn, _generic_bulk_modify, _add_bulk_arguments
 
 MANY = Accounts
 SINGULAR = Account
@@ -47,6 +48,11 @@ def modify(inst, basedn, log, args, warn=True):
     _generic_modify_dn(inst, basedn, log.getChild('_generic_modify_dn'), MANY, dn, args)
 
 
+def bulk_modify(inst, basedn, log, args):
+    mods = [_generic_modify_change_to_mod(x) for x in args.changes]
+    _generic_bulk_modify(inst, basedn, log.getChild('_generic_bulk_modify'), MANY, mods, args)
+
+
 def rename(inst, basedn, log, args, warn=True):
     dn = _get_dn_arg(args.dn, msg="Enter dn to modify")
     _generic_rename_dn(inst, basedn, log.getChild('_generic_rename_dn'), MANY, dn, args)
@@ -102,6 +108,10 @@ def subtree_status(inst, basedn, log, args):
 
 
 def lock(inst, basedn, log, args):
+    if getattr(args, 'bulk', False):
+        _generic_bulk_modify(inst, basedn, log.getChild('_generic_bulk_modify'), MANY,
+                             [(ldap.MOD_REPLACE, 'nsAccountLock', 'true')], args)
+        return
     dn = _get_dn_arg(args.dn, msg="Enter dn to lock")
     accounts = Accounts(inst, basedn)
     acct = accounts.get(dn=dn)
@@ -110,6 +120,11 @@ def lock(inst, basedn, log, args):
 
 
 def unlock(inst, basedn, log, args):
+    if getattr(args, 'bulk', False):
+        # The accounts that are not locked are left as they are
+        _generic_bulk_modify(inst, basedn, log.getChild('_generic_bulk_modify'), MANY,
+                             [(ldap.MOD_DELETE, 'nsAccountLock')], args, ensure=True)
+        return
     dn = _get_dn_arg(args.dn, msg="Enter dn to unlock")
     accounts = Accounts(inst, basedn)
     acct = accounts.get(dn=dn)
@@ -154,6 +169,13 @@ like modify, locking and unlocking. To create an account, see "user" subcommand
     modify_dn_parser.add_argument('dn', nargs=1, help='The dn to get and display')
     modify_dn_parser.add_argument('changes', nargs='+', help="A list of changes to apply in format: <add|delete|replace>:<attribute>:<value>")
 
+    bulk_modify_parser = subcommands.add_parser('bulk-modify', help='bulk-modify <add|delete|replace>:<attribute>:<value> ... '
+                                                                    'Apply the changes to the accounts under the base DN, '
+                                                                    'or to the ones listed in --dn-file')
+    bulk_modify_parser.set_defaults(func=bulk_modify)
+    bulk_modify_parser.add_argument('changes', nargs='+', help="A list of changes to apply in format: <add|delete|replace>:<attribute>:<value>")
+    _add_bulk_arguments(bulk_modify_parser, flag=False)
+
     rename_dn_parser = subcommands.add_parser('rename-by-dn', help='rename the object')
     rename_dn_parser.set_defaults(func=rename)
     rename_dn_parser.add_argument('dn', help='The dn to rename')
@@ -167,10 +189,12 @@ like modify, locking and unlocking. To create an account, see "user" subcommand
     lock_parser = subcommands.add_parser('lock', help='lock')
     lock_parser.set_defaults(func=lock)
     lock_parser.add_argument('dn', nargs='?', help='The dn to lock')
+    _add_bulk_arguments(lock_parser)
 
     unlock_parser = subcommands.add_parser('unlock', help='unlock')
     unlock_parser.set_defaults(func=unlock)
     unlock_parser.add_argument('dn', nargs='?', help='The dn to unlock')
+    _add_bulk_arguments(unlock_parser)
 
     status_parser = subcommands.add_parser('entry-status', help='status of a single entry')
     status_parser.set_defaults(func=entry_status)
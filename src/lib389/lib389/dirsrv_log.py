@@ -12,15 +12,24 @@
 import copy
 import re
 import gzip
+import math
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from dateutil.parser import parse as dt_parse
 from glob import glob
-from lib389.utils import ensure_bytes
+from lib389.utils import ensure_str
 from lib389._mapped_object_lint import DSLint
 from lib389.lint import (
     DSLOGNOTES0001,  # Unindexed search
     DSLOGNOTES0002,  # Unknown attr in search filter
 )
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # Because many of these settings can change live, we need to check for certain
 # attributes all the time.
 
@@ -39,6 +48,24 @@ MONTH_LOOKUP = {
     'Dec': 12,
 }
 
+# The size of the blocks the access logs are read in by AccessLogStats
+ACCESS_LOG_CHUNK_SIZE = 4 * 1024 * 1024
+# The etime percentiles reported by AccessLogStats
+ACCESS_LOG_PERCENTILES = (50, 90, 95, 99)
+# The operations counted by AccessLogStats, as they are logged
+ACCESS_LOG_OPS = (b'ADD', b'BIND', b'CMP', b'DEL', b'MOD', b'MODRDN', b'SRCH', b'EXT', b'ABANDON', b'UNBIND')
+# The operations, by the tag of their result
+ACCESS_LOG_RESULT_TAGS = {
+    97: 'BIND',
+    101: 'SRCH',
+    103: 'MOD',
+    105: 'ADD',
+    107: 'DEL',
+    109: 'MODRDN',
+    111: 'CMP',
+    120: 'EXT',
+}
+
 
 class DirsrvLog(DSLint):
     """Class of functions to working with the various DIrectory Server logs
@@ -57,8 +84,35 @@ class DirsrvLog(DSLint):
         raise Exception("Log type not defined.")
 
     def _get_all_log_paths(self):
-        """Return all the log paths"""
-        return glob("%s.*-*" % self._get_log_path()) + [self._get_log_path()]
+        """Return all the log paths, oldest rotated log first"""
+        return sorted(glob("%s.*-*" % self._get_log_path())) + [self._get_log_path()]
+
+    def _open_log(self, log):
+        """Open a log file for reading text, transparently handling gzip
+        @param log - the log file path
+        @return - a file object
+        """
+        if ensure_str(log).endswith('.gz'):
+            return gzip.open(log, 'rt')
+        return open(log, 'r')
+
+    def iterlines(self, archive=False):
+        """Yield the lines of the log one at a time, so that a log of any size
+        can be processed in a single pass with bounded memory.
+        @param archive - also read the rotated and compressed logs (gzip),
+                         oldest first, before the current log
+        @return - a generator of the lines
+        """
+        if archive:
+            logs = self._get_all_log_paths()
+        else:
+            logs = [self._get_log_path()]
+        for log in logs:
+            if log is None:
+                continue
+            with self._open_log(log) as lf:
+                for line in lf:
+                    yield line
 
     def readlines_archive(self):
         """
@@ -68,16 +122,7 @@ class DirsrvLog(DSLint):
 
         @return - an array of all the lines in all logs
         """
-        lines = []
-        for log in self._get_all_log_paths():
-            # Open the log
-            if log.endswith(ensure_bytes('.gz')):
-                with gzip.open(log, 'r') as lf:
-                    lines += lf.readlines()
-            else:
-                with open(log, 'r') as lf:
-                    lines += lf.readlines()
-        return lines
+        return list(self.iterlines(archive=True))
 
     def readlines(self):
         """Returns an array of all the lines in the log.
@@ -98,22 +143,8 @@ class DirsrvLog(DSLint):
         @param pattern - a regex pattern
         @return - results of the pattern matching
         """
-        results = []
         prog = re.compile(pattern)
-        for log in self._get_all_log_paths():
-            if log.endswith(ensure_bytes('.gz')):
-                with gzip.open(log, 'r') as lf:
-                    for line in lf:
-                        mres = prog.match(line)
-                        if mres:
-                            results.append(line)
-            else:
-                with open(log, 'r') as lf:
-                    for line in lf:
-                        mres = prog.match(line)
-                        if mres:
-                            results.append(line)
-        return results
+        return [line for line in self.iterlines(archive=True) if prog.match(line)]
 
     def match(self, pattern):
         """Search the current log file for the pattern
@@ -194,73 +225,117 @@ class DirsrvAccessLog(DirsrvLog):
         self.full_regexs = [self.prog_m1, self.prog_con, self.prog_discon]
         self.result_regexs = [self.prog_notes, self.prog_repl,
                               self.prog_result]
+    # The most searches listed in each notes lint report
+    lint_max_searches = 100
+
     @classmethod
     def lint_uid(cls):
         return 'logs'
 
-    def _log_get_search_stats(self, conn, op):
-        lines = self.match(f".* conn={conn} op={op} SRCH base=.*")
-        if len(lines) != 1:
-            return None
-
-        quoted_vals = re.findall('"([^"]*)"', lines[0])
-        return {
-            'base': quoted_vals[0],
-            'filter': quoted_vals[1],
-            'timestamp': re.findall('[(.*)]', lines[0])[0],
-            'scope': lines[0].split(' scope=', 1)[1].split(' ',1)[0]
-        }
+    def find_notes_searches(self, notes=('A', 'F'), archive=False):
+        """Find the searches that were logged with any of the given notes, in a
+        single pass over the log. Each SRCH line is remembered by conn/op until
+        its RESULT (or the connection closing) is seen, so memory use is bound
+        by the number of outstanding operations, not by the size of the log.
+        @param notes - the notes flags to report, IE 'A' for unindexed searches
+        @param archive - also scan the rotated and compressed logs
+        @return - a generator of dicts with the note, conn, op, etime and the
+                  timestamp, base, scope and filter of the search
+        """
+        # conn -> op -> search stats
+        pending = {}
+        for line in self.iterlines(archive=archive):
+            if ' conn=' not in line:
+                continue
+            conn = line.split(' conn=', 1)[1].split(' ', 1)[0]
+            if ' SRCH base=' in line:
+                op = line.split(' op=', 1)[1].split(' ', 1)[0]
+                quoted_vals = re.findall('"([^"]*)"', line)
+                if len(quoted_vals) < 2:
+                    continue
+                pending.setdefault(conn, {})[op] = {
+                    'base': quoted_vals[0],
+                    'filter': quoted_vals[1],
+                    'timestamp': line[line.find('[') + 1:line.find(']')],
+                    'scope': line.split(' scope=', 1)[1].split(' ', 1)[0],
+                }
+            elif ' RESULT err=' in line:
+                op = line.split(' op=', 1)[1].split(' ', 1)[0]
+                stats = pending.get(conn, {}).pop(op, None)
+                if stats is None or ' notes=' not in line:
+                    continue
+                line_notes = line.split(' notes=', 1)[1].split(' ', 1)[0].strip().split(',')
+                for note in notes:
+                    if note in line_notes:
+                        stats.update({
+                            'note': note,
+                            'conn': conn,
+                            'op': op,
+                            'etime': line.split(' etime=', 1)[1].split(' ', 1)[0],
+                        })
+                        yield stats
+                        break
+            elif ' closed - ' in line:
+                # The connection is gone, forget any operations without a result.
+                pending.pop(conn, None)
 
     def _lint_notes(self):
         """
         Check for notes=A (fully unindexed searches), and
         notes=F (unknown attribute in filter)
         """
-        for pattern, lint_report in [(".* notes=A", DSLOGNOTES0001), (".* notes=F", DSLOGNOTES0002)]:
-            lines = self.match(pattern)
-            if len(lines) > 0:
-                count = 0
-                searches = []
-                for line in lines:
-                    if ' RESULT err=' in line:
-                        # Looks like a valid notes=A/F
-                        conn = line.split(' conn=', 1)[1].split(' ',1)[0]
-                        op = line.split(' op=', 1)[1].split(' ',1)[0]
-                        etime = line.split(' etime=', 1)[1].split(' ',1)[0]
-                        stats = self._log_get_search_stats(conn, op)
-                        if stats is not None:
-                            timestamp = stats['timestamp']
-                            base = stats['base']
-                            scope = stats['scope']
-                            srch_filter = stats['filter']
-                            count += 1
-                            if lint_report == DSLOGNOTES0001:
-                                searches.append(f'\n  [{count}] Unindexed Search\n'
-                                                f'      - date:    {timestamp}\n'
-                                                f'      - conn/op: {conn}/{op}\n'
-                                                f'      - base:    {base}\n'
-                                                f'      - scope:   {scope}\n'
-                                                f'      - filter:  {srch_filter}\n'
-                                                f'      - etime:   {etime}\n')
-                            else:
-                                searches.append(f'\n  [{count}] Invalid Attribute in Filter\n'
-                                                f'      - date:    {timestamp}\n'
-                                                f'      - conn/op: {conn}/{op}\n'
-                                                f'      - filter:  {srch_filter}\n')
-                if len(searches) > 0:
-                    report = copy.deepcopy(lint_report)
-                    report['items'].append(self._get_log_path())
-                    report['detail'] = report['detail'].replace('NUMBER', str(count))
-                    for srch in searches:
-                        report['detail'] += srch
-                    report['check'] = f'logs:notes'
-                    yield report
-
+        counts = {'A': 0, 'F': 0}
+        searches = {'A': [], 'F': []}
+        for stats in self.find_notes_searches():
+            note = stats['note']
+            counts[note] += 1
+            count = counts[note]
+            if count > self.lint_max_searches:
+                # Count the rest, but don't keep them all in the report.
+                continue
+            if note == 'A':
+                searches[note].append(f'\n  [{count}] Unindexed Search\n'
+                                      f'      - date:    {stats["timestamp"]}\n'
+                                      f'      - conn/op: {stats["conn"]}/{stats["op"]}\n'
+                                      f'      - base:    {stats["base"]}\n'
+                                      f'      - scope:   {stats["scope"]}\n'
+                                      f'      - filter:  {stats["filter"]}\n'
+                                      f'      - etime:   {stats["etime"]}\n')
+            else:
+                searches[note].append(f'\n  [{count}] Invalid Attribute in Filter\n'
+                                      f'      - date:    {stats["timestamp"]}\n'
+                                      f'      - conn/op: {stats["conn"]}/{stats["op"]}\n'
+                                      f'      - filter:  {stats["filter"]}\n')
+
+        for note, lint_report in [('A', DSLOGNOTES0001), ('F', DSLOGNOTES0002)]:
+            if counts[note] > 0:
+                report = copy.deepcopy(lint_report)
+                report['items'].append(self._get_log_path())
+                report['detail'] = report['detail'].replace('NUMBER', str(counts[note]))
+                for srch in searches[note]:
+                    report['detail'] += srch
+                if counts[note] > self.lint_max_searches:
+                    report['detail'] += f'\n  ... and {counts[note] - self.lint_max_searches} more\n'
+                report['check'] = f'logs:notes'
+                yield report
 
     def _get_log_path(self):
         """Return the current log file location"""
         return self.dirsrv.ds_paths.access_log
 
+    def stats(self, archive=False, workers=1, top=20):
+        """Compute the statistics of the log, see AccessLogStats
+        @param archive - also read the rotated and compressed logs
+        @param workers - the number of processes reading the logs
+        @param top - the number of filters and addresses to report
+        @return - a dictionary of the statistics
+        """
+        if archive:
+            logs = self._get_all_log_paths()
+        else:
+            logs = [self._get_log_path()]
+        return AccessLogStats([log for log in logs if log is not None], workers=workers, top=top).report()
+
     def parse_line(self, line):
         """
         This knows how to break up an access log line into the specific fields.
@@ -334,3 +409,261 @@ class DirsrvErrorLog(DirsrvLog):
         @return - A dictionary of the log parts for each line
         """
         return map(self.parse_line, lines)
+
+
+def _access_log_read(path, chunk_size=ACCESS_LOG_CHUNK_SIZE):
+    """Yield the lines of an access log, as bytes, reading it in blocks of
+    chunk_size bytes and transparently handling gzip
+    """
+    opener = gzip.open if ensure_str(path).endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        pending = b''
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            yield from lines
+        if pending:
+            yield pending
+
+
+def _access_log_value(line, name):
+    """Return the value following name in a line, up to the next space, or None"""
+    start = line.find(name)
+    if start < 0:
+        return None
+    start += len(name)
+    end = line.find(b' ', start)
+    return line[start:end] if end >= 0 else line[start:]
+
+
+def _access_log_filter(line):
+    """Return the filter of a SRCH line, or None"""
+    start = line.find(b' filter="')
+    if start < 0:
+        return None
+    start += 9
+    end = line.find(b'" attrs=', start)
+    if end < 0:
+        end = line.rfind(b'"')
+    return line[start:end]
+
+
+class AccessLogColumns(object):
+    """The columns and counters built from access logs by AccessLogStats
+
+    The etime and the tag of each result are kept in arrays, everything
+    else is counted as the lines are read. The values are bytes, as they
+    are logged.
+    """
+
+    def __init__(self):
+        self.etime = array('d')
+        self.tag = array('B')
+        self.lines = 0
+        self.connections = 0
+        self.ops = Counter()
+        self.errors = Counter()
+        self.notes = Counter()
+        self.filters = Counter()
+        self.unindexed = Counter()
+        self.ips = Counter()
+        self.start = None
+        self.end = None
+
+    def merge(self, other):
+        """Add the columns and counters of the logs following these ones
+        @param other - an AccessLogColumns
+        """
+        self.etime.extend(other.etime)
+        self.tag.extend(other.tag)
+        self.lines += other.lines
+        self.connections += other.connections
+        for name in ('ops', 'errors', 'notes', 'filters', 'unindexed', 'ips'):
+            getattr(self, name).update(getattr(other, name))
+        if self.start is None:
+            self.start = other.start
+        if other.end is not None:
+            self.end = other.end
+
+
+def _access_log_scan(path, chunk_size=ACCESS_LOG_CHUNK_SIZE):
+    """Build the columns of an access log, in a worker process
+
+    The lines are split on spaces rather than matched with the regexes of
+    DirsrvAccessLog.parse_line, and only the fields the statistics need are
+    extracted.
+    @param path - the log file path
+    @return - an AccessLogColumns
+    """
+    cols = AccessLogColumns()
+    # conn -> op -> filter of the searches waiting for their result
+    pending = {}
+    ops = frozenset(ACCESS_LOG_OPS)
+    last = None
+    for line in _access_log_read(path, chunk_size):
+        cols.lines += 1
+        pos = line.find(b'] conn=')
+        if pos < 0:
+            continue
+        last = line
+        if cols.start is None:
+            cols.start = line[1:pos]
+        parts = line[pos + 7:].split(b' ', 3)
+        if len(parts) < 3:
+            continue
+        (conn, op, verb) = parts[:3]
+        if verb == b'RESULT':
+            flt = pending.get(conn, {}).pop(op, None)
+            err = _access_log_value(line, b' err=')
+            if err is not None:
+                cols.errors[err] += 1
+            try:
+                etime = float(_access_log_value(line, b' etime='))
+                tag = int(_access_log_value(line, b' tag='))
+            except (TypeError, ValueError):
+                continue
+            cols.etime.append(etime)
+            cols.tag.append(tag if tag < 256 else 0)
+            notes = _access_log_value(line, b' notes=')
+            if notes is not None:
+                notes = notes.split(b',')
+                cols.notes.update(notes)
+                if flt is not None and (b'A' in notes or b'U' in notes):
+                    cols.unindexed[flt] += 1
+        elif verb in ops:
+            cols.ops[verb] += 1
+            if verb == b'SRCH':
+                flt = _access_log_filter(line)
+                if flt is not None:
+                    cols.filters[flt] += 1
+                    pending.setdefault(conn, {})[op] = flt
+        elif op.startswith(b'fd='):
+            ip = _access_log_value(line, b' connection from ')
+            if ip is not None:
+                cols.connections += 1
+                cols.ips[ip] += 1
+        elif verb.startswith(b'fd=') and b' closed' in line:
+            # Forget the searches of the connection without a result
+            pending.pop(conn, None)
+    if last is not None:
+        cols.end = last[1:last.find(b'] conn=')]
+    return cols
+
+
+def _percentile(values, percent):
+    """Return the nearest rank percentile of sorted values"""
+    rank = int(math.ceil(percent / 100.0 * len(values))) - 1
+    return float(values[max(rank, 0)])
+
+
+def _etime_stats(values):
+    """Return the count, average, maximum and percentiles of etimes
+    @param values - a list, or a numpy array, of etimes
+    @return - a dictionary
+    """
+    if numpy is not None:
+        values = numpy.sort(numpy.asarray(values, dtype=numpy.float64))
+        total = float(values.sum())
+    else:
+        values = sorted(values)
+        total = math.fsum(values)
+    stats = {'count': len(values)}
+    if len(values) == 0:
+        return stats
+    stats['avg'] = total / len(values)
+    stats['max'] = float(values[-1])
+    for percent in ACCESS_LOG_PERCENTILES:
+        stats['p%d' % percent] = _percentile(values, percent)
+    return stats
+
+
+def _counts(counter, top=None):
+    """Return a counter of bytes keys as a list of (str, count), the most common first"""
+    return [(ensure_str(key), count) for (key, count) in counter.most_common(top)]
+
+
+class AccessLogStats(object):
+    """logconv style statistics of access logs: the etime percentiles,
+    overall and by operation, the operations by type, the result codes and
+    notes, the most used filters and unindexed searches, and the connections
+    by client address.
+
+    The logs are read in large blocks and the lines are tokenised on spaces,
+    into array backed columns that are summarised with numpy when it is
+    available. With workers above 1, the log files (IE the rotated ones) are
+    read by as many processes. A search whose result is logged in the next
+    file is not counted as unindexed.
+
+    :param paths: The log files, oldest first, gzip compressed or not
+    :type paths: list of str
+    :param workers: The number of processes reading the files
+    :type workers: int
+    :param top: The number of filters and addresses to report
+    :type top: int
+    :param chunk_size: The size of the blocks the files are read in
+    :type chunk_size: int
+    """
+
+    def __init__(self, paths, workers=1, top=20, chunk_size=ACCESS_LOG_CHUNK_SIZE):
+        self.paths = [ensure_str(path) for path in paths]
+        self.workers = workers
+        self.top = top
+        self.chunk_size = chunk_size
+
+    def columns(self):
+        """Read the logs
+
+        :returns: An AccessLogColumns of all the logs
+        """
+        workers = min(self.workers, len(self.paths))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parts = list(executor.map(_access_log_scan, self.paths,
+                                          [self.chunk_size] * len(self.paths)))
+        else:
+            parts = [_access_log_scan(path, self.chunk_size) for path in self.paths]
+        cols = AccessLogColumns()
+        for part in parts:
+            cols.merge(part)
+        return cols
+
+    def report(self):
+        """Read the logs and compute their statistics
+
+        :returns: A dictionary of the statistics, that can be dumped as JSON
+        """
+        cols = self.columns()
+        if numpy is not None:
+            etimes = numpy.asarray(cols.etime, dtype=numpy.float64)
+            tags = numpy.asarray(cols.tag, dtype=numpy.uint8)
+            by_tag = {tag: etimes[tags == tag] for tag in ACCESS_LOG_RESULT_TAGS}
+        else:
+            etimes = cols.etime
+            by_tag = {tag: [] for tag in ACCESS_LOG_RESULT_TAGS}
+            for (etime, tag) in zip(cols.etime, cols.tag):
+                if tag in by_tag:
+                    by_tag[tag].append(etime)
+
+        return {
+            'files': self.paths,
+            'lines': cols.lines,
+            'start': ensure_str(cols.start) if cols.start is not None else None,
+            'end': ensure_str(cols.end) if cols.end is not None else None,
+            'connections': cols.connections,
+            'ops': dict(_counts(cols.ops)),
+            'results': len(cols.etime),
+            'etime': _etime_stats(etimes),
+            'etime_by_op': {ACCESS_LOG_RESULT_TAGS[tag]: _etime_stats(values)
+                            for (tag, values) in by_tag.items() if len(values) > 0},
+            'errors': dict(_counts(cols.errors)),
+            'notes': dict(_counts(cols.notes)),
+            'top_filters': _counts(cols.filters, self.top),
+            'unindexed': {
+                'count': cols.notes[b'A'] + cols.notes[b'U'],
+                'filters': _counts(cols.unindexed, self.top),
+            },
+            'top_ips': _counts(cols.ips, self.top),
+        }
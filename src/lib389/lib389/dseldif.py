@@ -10,10 +10,12 @@
 import copy
 import os
 import base64
+import tempfile
 import time
+from contextlib import contextmanager
 from struct import pack, unpack
 from datetime import timedelta
-from stat import ST_MODE
+from stat import ST_MODE, S_IMODE
 # from lib389.utils import print_nice_time
 from lib389.paths import Paths
 from lib389._mapped_object_lint import DSLint
@@ -25,17 +27,112 @@ from lib389.lint import (
     DSSKEWLE0003
 )
 
+# Parsed dse.ldif files by path: (file key, header lines, entries). They are
+# reused by later DSEldif objects for as long as the file is not modified.
+_dse_cache = {}
+
+
+def _dse_file_key(path):
+    """Return what identifies a version of a file: any rewrite of dse.ldif,
+    by the server or by us, changes its inode, size or mtime.
+    """
+    st = os.stat(path)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class _DSEEntry(object):
+    """An entry of dse.ldif. The attributes keep the order of the file and
+    are indexed by their lower case name; each value is a (value, is_base64)
+    tuple, where value is kept exactly as written in the file. The comments,
+    and any other line without an attribute, are kept in lines, and written
+    back after the attributes.
+    """
+    __slots__ = ('dn', 'attrs', 'lines')
+
+    def __init__(self, dn):
+        self.dn = dn
+        self.attrs = {}
+        self.lines = []
+
+    def add(self, attr, value, is_base64=False):
+        key = attr.lower()
+        if key not in self.attrs:
+            self.attrs[key] = (attr, [])
+        self.attrs[key][1].append((value, is_base64))
+
+    def copy(self):
+        entry = _DSEEntry(self.dn)
+        entry.attrs = dict((key, (name, list(vals))) for (key, (name, vals)) in self.attrs.items())
+        entry.lines = list(self.lines)
+        return entry
+
+
+def _parse_dse(path):
+    """Parse an ldif file into its header lines and an ordered dict of
+    entries indexed by their lower case dn.
+    """
+    header = []
+    entries = {}
+    entry = None
+
+    def _process(line):
+        nonlocal entry
+        if line == "\n":
+            entry = None
+            return
+        if line.startswith('#') or ':' not in line:
+            if entry is None:
+                header.append(line)
+            else:
+                entry.lines.append(line)
+            return
+        attr, value = line[:-1].split(':', 1)
+        is_base64 = value.startswith(':')
+        if is_base64:
+            value = value[1:]
+        value = value.lstrip(' ')
+        if attr.lower() == 'dn':
+            if is_base64:
+                value = base64.b64decode(value).decode('utf-8')
+            entry = _DSEEntry(value)
+            entries[value.lower()] = entry
+        elif entry is None:
+            header.append(line)
+        else:
+            entry.add(attr, value, is_base64)
+
+    with open(path, 'r') as file_dse:
+        processed_line = ""
+        for line in file_dse:
+            if not line.endswith('\n'):
+                line += '\n'
+            if line.startswith(' '):
+                # Unfold the continuation lines
+                processed_line = processed_line[:-1] + line[1:]
+                continue
+            if processed_line:
+                _process(processed_line)
+            processed_line = line
+        if processed_line:
+            _process(processed_line)
+    return header, entries
+
 
 class DSEldif(DSLint):
     """A class for working with dse.ldif file
 
+    The file is parsed once into entries indexed by dn. Every change is
+    written back to the file straight away, unless it is made inside
+    a batch() block, and the file is always replaced atomically.
+
     :param instance: An instance
     :type instance: lib389.DirSrv
     """
 
     def __init__(self, instance, serverid=None):
         self._instance = instance
-        self._contents = []
+        self._batch_depth = 0
+        self._dirty = False
 
         if serverid:
             # Get the dse.ldif from the instance name
@@ -47,19 +144,23 @@ class DSEldif(DSLint):
             ds_paths = Paths(self._instance.serverid, self._instance)
             self.path = os.path.join(ds_paths.config_dir, 'dse.ldif')
 
-        with open(self.path, 'r') as file_dse:
-            processed_line = ""
-            for line in file_dse.readlines():
-                if not line.startswith(' '):
-                    if processed_line:
-                        self._contents.append(processed_line)
+        self._load()
 
-                    if line.startswith('dn:'):
-                        processed_line = line.lower()
-                    else:
-                        processed_line = line
-                else:
-                    processed_line = processed_line[:-1] + line[1:]
+    def _load(self):
+        """Load the entries, reusing the already parsed ones if the file
+        did not change since.
+        """
+        key = _dse_file_key(self.path)
+        cached = _dse_cache.get(self.path)
+        if cached is not None and cached[0] == key:
+            (_, self._header, entries) = cached
+        else:
+            (self._header, entries) = _parse_dse(self.path)
+            _dse_cache[self.path] = (key, self._header, entries)
+        # The entries are shared with the cache until they are changed,
+        # see _get_entry_for_update.
+        self._entries = dict(entries)
+        self._owned = set()
 
     @classmethod
     def lint_uid(cls):
@@ -88,41 +189,109 @@ class DSEldif(DSLint):
                 report['check'] = f'dseldif:nsstate'
                 yield report
 
-    def _update(self):
-        """Update the dse.ldif with a new contents"""
+    def _format(self):
+        """Return the contents of the dse.ldif for the current entries"""
 
-        with open(self.path, "w") as file_dse:
-            file_dse.write("".join(self._contents))
+        lines = list(self._header)
+        for entry in self._entries.values():
+            lines.append("dn: {}\n".format(entry.dn))
+            for (name, vals) in entry.attrs.values():
+                for (value, is_base64) in vals:
+                    lines.append("{}:{} {}\n".format(name, ':' if is_base64 else '', value))
+            lines.extend(entry.lines)
+            lines.append("\n")
+        return "".join(lines)
 
-    def _find_attr(self, entry_dn, attr):
-        """Find all attribute values and indexes under a given entry
+    def _update(self):
+        """Update the dse.ldif with a new contents
 
-        Returns entry dn index and attribute data dict:
-        relative attribute indexes and the attribute value
+        The new contents is written to a temporary file that then replaces
+        dse.ldif, so the file is never seen half written. Inside a batch,
+        the update is delayed until the end of the batch.
         """
 
-        entry_dn_i = self._contents.index("dn: {}\n".format(entry_dn.lower()))
-        attr_data = {}
+        if self._batch_depth > 0:
+            self._dirty = True
+            return
+
+        contents = self._format()
+        st = os.stat(self.path)
+        try:
+            (fd, tmp_path) = tempfile.mkstemp(prefix='.dse.ldif.', dir=os.path.dirname(self.path))
+        except PermissionError:
+            # We can write to the file, but not to its directory
+            with open(self.path, "w") as file_dse:
+                file_dse.write(contents)
+        else:
+            try:
+                with os.fdopen(fd, "w") as file_dse:
+                    file_dse.write(contents)
+                    file_dse.flush()
+                    os.fsync(file_dse.fileno())
+                os.chmod(tmp_path, S_IMODE(st.st_mode))
+                try:
+                    os.chown(tmp_path, st.st_uid, st.st_gid)
+                except PermissionError:
+                    pass
+                os.replace(tmp_path, self.path)
+            except:
+                os.unlink(tmp_path)
+                raise
+
+        self._dirty = False
+        # What we wrote is now the parsed version of the file
+        _dse_cache[self.path] = (_dse_file_key(self.path), self._header, dict(self._entries))
+        self._owned = set()
+
+    @contextmanager
+    def batch(self):
+        """Group several changes into a single update of the dse.ldif
+
+        The file is written once, when the outermost batch ends. If an
+        exception is raised in the batch, the changes are dropped and
+        nothing is written.
+
+        Example:
+            with dse_ldif.batch():
+                dse_ldif.replace(DN_CONFIG, 'nsslapd-port', '3389')
+                dse_ldif.replace(DN_CONFIG, 'nsslapd-secureport', '3636')
+        """
 
-        # Find where the entry ends
+        self._batch_depth += 1
         try:
-            dn_end_i = self._contents[entry_dn_i:].index("\n")
-        except ValueError:
-            # We are in the end of the list
-            dn_end_i = len(self._contents)
+            yield self
+        except:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._dirty = False
+                self._load()
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._dirty:
+            self._update()
+
+    def _get_entry(self, entry_dn):
+        """Return the entry with a given dn, or raise ValueError"""
 
-        entry_slice = self._contents[entry_dn_i:entry_dn_i + dn_end_i]
+        try:
+            return self._entries[entry_dn.lower()]
+        except KeyError:
+            raise ValueError("Entry {} wasn't found".format(entry_dn.lower()))
 
-        # Find the attribute
-        for line in entry_slice:
-            if line.startswith("{}:".format(attr)):
-                attr_value = line.split(" ", 1)[1][:-1]
-                attr_data.update({entry_slice.index(line): attr_value})
+    def _get_entry_for_update(self, entry_dn):
+        """Return the entry with a given dn, to be modified
 
-        if not attr_data:
-            raise ValueError("Attribute {} wasn't found under dn: {}".format(attr, entry_dn.lower()))
+        The parsed entries are shared with the cache, so an entry is copied
+        the first time it is modified.
+        """
 
-        return entry_dn_i, attr_data
+        key = entry_dn.lower()
+        entry = self._get_entry(key)
+        if key not in self._owned:
+            entry = entry.copy()
+            self._entries[key] = entry
+            self._owned.add(key)
+        return entry
 
     def get(self, entry_dn, attr, single=False):
         """Return attribute values under a given entry
@@ -136,14 +305,13 @@ class DSEldif(DSLint):
         """
 
         try:
-            _, attr_data = self._find_attr(entry_dn, attr)
-        except ValueError:
+            (_, vals) = self._get_entry(entry_dn).attrs[attr.lower()]
+        except (ValueError, KeyError):
             return None
 
-        vals = list(attr_data.values())
         if single:
-            return vals[0] if len(vals) > 0 else None
-        return vals
+            return vals[0][0] if len(vals) > 0 else None
+        return [value for (value, _) in vals]
 
     def add(self, entry_dn, attr, value):
         """Add an attribute under a given entry
@@ -156,8 +324,7 @@ class DSEldif(DSLint):
         :type value: str
         """
 
-        entry_dn_i = self._contents.index("dn: {}\n".format(entry_dn.lower()))
-        self._contents.insert(entry_dn_i+1, "{}: {}\n".format(attr, value))
+        self._get_entry_for_update(entry_dn).add(attr, value)
         self._update()
 
     def delete(self, entry_dn, attr, value=None):
@@ -171,15 +338,17 @@ class DSEldif(DSLint):
         :type value: str
         """
 
-        entry_dn_i, attr_data = self._find_attr(entry_dn, attr)
+        if attr.lower() not in self._get_entry(entry_dn).attrs:
+            raise ValueError("Attribute {} wasn't found under dn: {}".format(attr, entry_dn.lower()))
 
+        entry = self._get_entry_for_update(entry_dn)
         if value is not None:
-            for attr_i, attr_value in attr_data.items():
-                if attr_value == value:
-                    del self._contents[entry_dn_i + attr_i]
+            (_, vals) = entry.attrs[attr.lower()]
+            vals[:] = [v for v in vals if v[0] != value]
+            if not vals:
+                del entry.attrs[attr.lower()]
         else:
-            for attr_i in sorted(attr_data.keys(), reverse=True):
-                del self._contents[entry_dn_i + attr_i]
+            del entry.attrs[attr.lower()]
         self._update()
 
     def replace(self, entry_dn, attr, value):
@@ -193,11 +362,13 @@ class DSEldif(DSLint):
         :type value: str
         """
 
-        try:
-            self.delete(entry_dn, attr)
-        except ValueError as e:
-            self._instance.log.debug("During replace operation: {}".format(e))
-        self.add(entry_dn, attr, value)
+        entry = self._get_entry_for_update(entry_dn)
+        key = attr.lower()
+        if key in entry.attrs:
+            # Keep the attribute where it was in the entry
+            entry.attrs[key] = (entry.attrs[key][0], [(value, False)])
+        else:
+            entry.add(attr, value)
         self._update()
 
     # Read NsState helper functions
@@ -281,39 +452,20 @@ class DSEldif(DSLint):
         :param suffix: specific suffix to read nsState from
         :type suffix: str
         """
-        found_replica = False
-        found_suffix = False
-        replica_suffix = ""
-        nsstate = ""
         states = []
 
-        for line in self._contents:
-            if line.startswith("dn: "):
-                dn = line[4:].strip()
-                if dn.startswith("cn=replica"):
-                    found_replica = True
-                else:
-                    found_replica = False
-            else:
-                if line.lower().startswith("nsstate:: ") and dn.startswith("cn=replica"):
-                    b64val = line[10:].strip()
-                    nsstate = base64.decodebytes(b64val.encode())
-                elif line.lower().startswith("nsds5replicaroot"):
-                    found_suffix = True
-                    replica_suffix = line.lower().split(':')[1].strip()
-
-            if found_replica and found_suffix and nsstate != "":
-                # We have everything we need to proceed
-                if suffix is not None and suffix == replica_suffix:
-                    states.append(self._getGenState(dn, replica_suffix, nsstate, flip))
-                    break
-                else:
-                    states.append(self._getGenState(dn, replica_suffix, nsstate, flip))
-                    # reset flags for next round...
-                    found_replica = False
-                    found_suffix = False
-                    replica_suffix = ""
-                    nsstate = ""
+        for (key, entry) in self._entries.items():
+            if not key.startswith("cn=replica"):
+                continue
+            nsstate = entry.attrs.get('nsstate')
+            replica_root = entry.attrs.get('nsds5replicaroot')
+            if nsstate is None or replica_root is None:
+                continue
+            replica_suffix = replica_root[1][0][0].lower().strip()
+            if suffix is not None and suffix.lower() != replica_suffix:
+                continue
+            nsstate = base64.decodebytes(nsstate[1][0][0].encode())
+            states.append(self._getGenState(entry.dn, replica_suffix, nsstate, flip))
 
         return states
 
@@ -349,9 +501,9 @@ class DSEldif(DSLint):
         newNsState = newNsState.decode('utf-8')
         self._instance.log.debug(f'newNsState is {newNsState}')
         # Lets replace the value.
-        (entry_dn_i, attr_data) = self._find_attr(nsState['dn'], 'nsState')
-        attr_i = next(iter(attr_data))
-        self._contents[entry_dn_i + attr_i] = f"nsState:: {newNsState}"
+        entry = self._get_entry_for_update(nsState['dn'])
+        (name, _) = entry.attrs['nsstate']
+        entry.attrs['nsstate'] = (name, [(newNsState, True)])
         self._update()
 
 
@@ -0,0 +1,259 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+"""Offline analysis of the attribute indexes of a backend.
+
+The index files are read with dbscan, whose output is parsed line by line
+as it is produced, so that only the statistics are kept in memory however
+large the indexes are. The files can be read from a backup, in which case
+the server keeps running.
+"""
+
+import os
+import heapq
+import logging
+import subprocess
+from lib389._constants import DBSCAN, DN_CONFIG_LDBM
+from lib389.dseldif import DSEldif
+
+# The width the keys are truncated to by dbscan. The keys are printed
+# left-justified on 40 columns followed by the size of their ID list, so
+# a key is always followed by a space when it is shorter than that.
+DBSCAN_KEY_WIDTH = 40
+# What dbscan prints instead of the size of an ID list for allids keys
+DBSCAN_ALLIDS = '(allids)'
+# The default number of the heaviest keys to report
+INDEX_TOP_KEYS = 20
+# The ratio of the ID list scan limit from which a key is reported as
+# approaching it
+INDEX_LIMIT_RATIO = 0.8
+# The server default of nsslapd-idlistscanlimit
+DEFAULT_IDLISTSCANLIMIT = 4000
+# The index types, by the first character of their keys
+INDEX_KEY_TYPES = {
+    '=': 'eq',
+    '*': 'sub',
+    '+': 'pres',
+    '~': 'approx',
+    ':': 'matchingrule',
+    '\\': 'indirect',
+}
+# The database files of a backend that are not attribute indexes, or that
+# dbscan does not print as ones
+INDEX_SKIPPED_FILES = ('id2entry', 'entryrdn', 'replication_changelog')
+
+log = logging.getLogger(__name__)
+
+
+def parse_dbscan_line(line):
+    """Parse a line of the output of "dbscan -n" for an index file
+
+    :param line: A line, without its line feed
+    :type line: str
+    :returns: A tuple (key, size), size is None for an allids key, or None
+              if the line is not an index key
+    """
+
+    parts = line.rsplit(None, 1)
+    if len(parts) != 2:
+        return None
+    (key, size) = parts
+    if size == DBSCAN_ALLIDS:
+        return (key, None)
+    if not size.isdigit():
+        return None
+    return (key, int(size))
+
+
+def scan_index(path, dbscan=DBSCAN, width=DBSCAN_KEY_WIDTH):
+    """Yield the keys of an index file, and the sizes of their ID list, as
+    dbscan prints them.
+
+    :param path: The path of the index file
+    :type path: str
+    :param dbscan: The path of the dbscan binary
+    :type dbscan: str
+    :param width: The width the keys are truncated to
+    :type width: int
+    :returns: A generator of tuples (key, size), size is None for allids
+    :raises: subprocess.CalledProcessError - if dbscan fails
+    """
+
+    cmd = [dbscan, '-n', '-t', str(width), '-f', path]
+    log.debug('Running script: %s', cmd)
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE) as proc:
+        try:
+            for line in proc.stdout:
+                item = parse_dbscan_line(line.decode('utf-8', 'replace').rstrip('\n'))
+                if item is None:
+                    log.debug('Ignoring dbscan output: %s', line)
+                    continue
+                yield item
+        except GeneratorExit:
+            # Don't leave dbscan blocked on a full pipe when the caller
+            # stopped early
+            proc.kill()
+            raise
+        proc.wait()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+
+class IndexAnalyzer(object):
+    """Report the size of the attribute indexes of a backend, and the keys
+    with the largest ID lists.
+
+    The searches using a key whose ID list is larger than the ID list scan
+    limit are unindexed, so the keys approaching it, and the keys that
+    already reached allids, are reported too.
+
+    By default the files of the server are read, and the server is stopped
+    while they are. With a backup, or a directory holding a copy of the
+    files, the server is not stopped.
+
+    :param instance: An instance
+    :type instance: lib389.DirSrv
+    :param bename: The backend name
+    :type bename: str
+    :param backup: The name of a backup of the backup directory to read
+    :type backup: str
+    :param db_dir: A directory holding the files of the backend to read
+    :type db_dir: str
+    :param top: The number of the heaviest keys to report
+    :type top: int
+    :param limit: The ID list scan limit, by default the one of the server
+    :type limit: int
+    :param ratio: The ratio of the limit from which a key is reported
+    :type ratio: float
+    """
+
+    def __init__(self, instance, bename, backup=None, db_dir=None, top=INDEX_TOP_KEYS,
+                 limit=None, ratio=INDEX_LIMIT_RATIO):
+        self._instance = instance
+        self._bename = bename
+        self._live = backup is None and db_dir is None
+        if db_dir is not None:
+            self._db_dir = db_dir
+        elif backup is not None:
+            self._db_dir = os.path.join(instance.get_bak_dir(), backup, bename)
+        else:
+            self._db_dir = os.path.join(instance.dbdir, bename)
+        self._top = top
+        self._limit = limit
+        self._ratio = ratio
+
+    def _get_limit(self):
+        if self._limit is not None:
+            return self._limit
+        try:
+            limit = DSEldif(self._instance).get(DN_CONFIG_LDBM, 'nsslapd-idlistscanlimit', single=True)
+        except OSError as e:
+            log.debug('Unable to read the ID list scan limit: %s', e)
+            limit = None
+        return int(limit) if limit is not None else DEFAULT_IDLISTSCANLIMIT
+
+    def index_files(self, indexes=None):
+        """Return the index files of the backend, by attribute
+
+        :param indexes: Only return the files of these attributes
+        :type indexes: list of str
+        :returns: A dict of the attribute names to the file paths
+        :raises: ValueError - if the directory does not exist
+        """
+
+        if not os.path.isdir(self._db_dir):
+            raise ValueError("The directory %s of the backend %s does not exist" % (self._db_dir, self._bename))
+        wanted = set(i.lower() for i in indexes) if indexes else None
+        files = {}
+        for name in sorted(os.listdir(self._db_dir)):
+            (attr, ext) = os.path.splitext(name)
+            if not ext.startswith('.db') or attr in INDEX_SKIPPED_FILES or attr.startswith('vlv#'):
+                continue
+            if wanted is not None and attr.lower() not in wanted:
+                continue
+            files[attr] = os.path.join(self._db_dir, name)
+        return files
+
+    def analyze(self, indexes=None):
+        """Read the index files and return their statistics
+
+        The report is a dict with:
+            - 'indexes': for each attribute, the size of its file, the number
+              of keys and of IDs, by index type too, and its largest ID list
+            - 'top': the heaviest keys, as dicts with 'index', 'key' and 'ids'
+            - 'near_limit': the keys whose ID list is at least the ratio of
+              the ID list scan limit, the heaviest first
+            - 'allids': the keys that reached allids, as dicts with 'index'
+              and 'key'
+
+        Keys longer than DBSCAN_KEY_WIDTH are truncated and end with " ...".
+
+        :param indexes: Only read the files of these attributes
+        :type indexes: list of str
+        :returns: A dict
+        """
+
+        limit = self._get_limit()
+        near = limit * self._ratio
+        dbscan = os.path.join(self._instance.ds_paths.bin_dir, DBSCAN)
+        files = self.index_files(indexes)
+        report = {
+            'backend': self._bename,
+            'db_dir': self._db_dir,
+            'idlistscanlimit': limit,
+            'indexes': {},
+            'top': [],
+            'near_limit': [],
+            'allids': [],
+        }
+        # A min heap of the heaviest keys, the counter breaks the ties
+        heaviest = []
+        seq = 0
+
+        restart = self._live and self._instance.status()
+        if restart:
+            self._instance.stop(timeout=10)
+        try:
+            for (attr, path) in files.items():
+                stats = {
+                    'file_size': os.path.getsize(path),
+                    'keys': 0,
+                    'ids': 0,
+                    'largest': 0,
+                    'allids': 0,
+                    'types': {},
+                }
+                for (key, size) in scan_index(path, dbscan):
+                    ktype = INDEX_KEY_TYPES.get(key[:1], 'other')
+                    type_stats = stats['types'].setdefault(ktype, {'keys': 0, 'ids': 0})
+                    stats['keys'] += 1
+                    type_stats['keys'] += 1
+                    if size is None:
+                        stats['allids'] += 1
+                        report['allids'].append({'index': attr, 'key': key})
+                        continue
+                    stats['ids'] += size
+                    type_stats['ids'] += size
+                    stats['largest'] = max(stats['largest'], size)
+                    if size >= near:
+                        report['near_limit'].append({'index': attr, 'key': key, 'ids': size})
+                    seq += 1
+                    if len(heaviest) < self._top:
+                        heapq.heappush(heaviest, (size, seq, attr, key))
+                    elif size > heaviest[0][0]:
+                        heapq.heapreplace(heaviest, (size, seq, attr, key))
+                report['indexes'][attr] = stats
+        finally:
+            if restart:
+                self._instance.start(timeout=10)
+
+        report['top'] = [{'index': attr, 'key': key, 'ids': size}
+                         for (size, _, attr, key) in sorted(heaviest, reverse=True)]
+        report['near_limit'].sort(key=lambda k: k['ids'], reverse=True)
+        return report
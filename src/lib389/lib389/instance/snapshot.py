@@ -0,0 +1,201 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+
+"""Snapshots of a configured instance, to create new instances from them
+without running the setup.
+"""
+
+import os
+import re
+import glob
+import json
+import subprocess
+from lib389._constants import DN_CONFIG
+from lib389.dseldif import DSEldif
+from lib389.utils import (
+    selinux_label_port,
+    selinux_restorecon,
+    ensure_str,
+    ensure_list_str)
+
+# The file describing a snapshot, at the root of the snapshot
+SNAPSHOT_MANIFEST = 'snapshot.json'
+# The instance directories that are copied in a snapshot. The schema, the
+# certificates, the databases, the backups and the ldif files are in them.
+SNAPSHOT_DIRS = ('config_dir', 'inst_dir')
+# The instance directories that are created empty in a clone
+SNAPSHOT_EMPTY_DIRS = ('log_dir', 'lock_dir', 'db_home_dir')
+# The files of the snapshot directories that are not kept: the database
+# environment is created again when a clone starts
+SNAPSHOT_SKIPPED_FILES = ('__db.*', '*.pid')
+# The entry of the unique id generator state, that is created again when a
+# clone starts, so that two clones never generate the same unique ids
+SNAPSHOT_UNIQUEID_DN = 'cn=uniqueid generator,cn=config'
+
+
+def _copy_tree(src, dst):
+    """Copy a directory with its owners and modes. The files share their
+    blocks with the source when the filesystem supports reflinks.
+    """
+    subprocess.run(['cp', '-a', '--reflink=auto', src, dst],
+                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+
+
+def _rewrite_dse(contents, src_serverid, dst_serverid):
+    """Return the contents of a dse.ldif with the paths of the instance
+    renamed, and without the unique id generator state.
+    """
+    contents = contents.replace('slapd-%s' % src_serverid, 'slapd-%s' % dst_serverid)
+    entries = contents.split('\n\n')
+    entries = [e for e in entries
+               if not re.match(r'dn: %s\s*$' % re.escape(SNAPSHOT_UNIQUEID_DN), e.strip().split('\n')[0], re.I)]
+    return '\n\n'.join(entries)
+
+
+def snapshot_ds_instance(dirsrv, path):
+    """Keep a snapshot of an instance, to create clones of it with
+    clone_ds_instance. This must be a local instance. It is stopped while
+    it is copied, and started again if it was running.
+
+    The files are copied with reflinks where the filesystem supports them,
+    so a snapshot takes little space and time.
+
+    :param dirsrv: A directory server instance
+    :type dirsrv: DirSrv
+    :param path: The directory of the snapshot, that must not exist
+    :type path: str
+    :raises: ValueError - if path exists, or if a directory of the instance
+             is not named after it
+    """
+    _log = dirsrv.log.getChild('snapshot_ds')
+    if os.path.exists(path):
+        raise ValueError("Error the snapshot %s already exists" % path)
+
+    marker = 'slapd-%s' % dirsrv.serverid
+    dirs = {}
+    for key in SNAPSHOT_DIRS + SNAPSHOT_EMPTY_DIRS:
+        dirs[key] = getattr(dirsrv.ds_paths, key)
+        if marker not in dirs[key]:
+            raise ValueError("Error the %s of the instance is not named after it (%s)" % (key, dirs[key]))
+
+    tmpfiles_d = None
+    tmpfiles_d_path = dirsrv.ds_paths.tmpfiles_d + "/dirsrv-" + dirsrv.serverid + ".conf"
+    if dirsrv.ds_paths.with_systemd and os.path.exists(tmpfiles_d_path):
+        with open(tmpfiles_d_path, 'r') as f:
+            tmpfiles_d = f.read()
+
+    running = dirsrv.status()
+    if running:
+        _log.debug("Stopping instance %s" % dirsrv.serverid)
+        dirsrv.stop()
+    try:
+        os.makedirs(path, mode=0o770)
+        for key in SNAPSHOT_DIRS:
+            _log.debug("Copying %s to the snapshot %s" % (dirs[key], path))
+            _copy_tree(dirs[key], os.path.join(path, key))
+            for pattern in SNAPSHOT_SKIPPED_FILES:
+                for name in glob.glob(os.path.join(path, key, '**', pattern), recursive=True):
+                    os.remove(name)
+    finally:
+        if running:
+            dirsrv.start()
+
+    manifest = {
+        'serverid': dirsrv.serverid,
+        'version': dirsrv.ds_paths.version,
+        'dirs': dirs,
+        'tmpfiles_d': tmpfiles_d,
+    }
+    with open(os.path.join(path, SNAPSHOT_MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=4)
+    _log.debug("Snapshot of %s complete" % dirsrv.serverid)
+
+
+def read_ds_snapshot(path):
+    """Return the description of a snapshot, or None if there is none
+
+    :param path: The directory of the snapshot
+    :type path: str
+    :returns: A dict with the 'serverid' and 'version' of the instance the
+              snapshot was made of, and its 'dirs'
+    """
+    try:
+        with open(os.path.join(path, SNAPSHOT_MANIFEST), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def clone_ds_instance(dirsrv, path):
+    """Create an instance from a snapshot made by snapshot_ds_instance. The
+    directories of the snapshot are copied with the name of the instance,
+    and the paths, the port and the secure port of the instance are set in
+    its dse.ldif. The clone keeps the root DN, password, suffixes, entries
+    and certificates of the snapshot.
+
+    :param dirsrv: An allocated directory server instance, that does not exist
+    :type dirsrv: DirSrv
+    :param path: The directory of the snapshot
+    :type path: str
+    :raises: ValueError - if there is no snapshot in path
+    """
+    _log = dirsrv.log.getChild('clone_ds')
+    manifest = read_ds_snapshot(path)
+    if manifest is None:
+        raise ValueError("Error there is no snapshot in %s" % path)
+
+    src_marker = 'slapd-%s' % manifest['serverid']
+    dst_marker = 'slapd-%s' % dirsrv.serverid
+    dirs = dict((key, d.replace(src_marker, dst_marker)) for (key, d) in manifest['dirs'].items())
+    _log.debug("Cloning %s from the snapshot %s" % (dirsrv.serverid, path))
+
+    config_dir = dirs['config_dir']
+    for key in SNAPSHOT_DIRS:
+        os.makedirs(os.path.dirname(dirs[key]), exist_ok=True)
+        _copy_tree(os.path.join(path, key), dirs[key])
+    st = os.stat(config_dir)
+    for key in SNAPSHOT_EMPTY_DIRS:
+        if not os.path.exists(dirs[key]):
+            os.makedirs(dirs[key], mode=0o770)
+            os.chown(dirs[key], st.st_uid, st.st_gid)
+
+    # Every dse.ldif has the paths of the snapshot, including the backups
+    for name in glob.glob(os.path.join(config_dir, 'dse.ldif*')):
+        with open(name, 'r') as f:
+            contents = _rewrite_dse(f.read(), manifest['serverid'], dirsrv.serverid)
+        with open(name, 'w') as f:
+            f.write(contents)
+
+    dse_ldif = DSEldif(dirsrv)
+    with dse_ldif.batch():
+        dse_ldif.replace(DN_CONFIG, 'nsslapd-port', str(dirsrv.port))
+        if dirsrv.sslport is not None:
+            dse_ldif.replace(DN_CONFIG, 'nsslapd-secureport', str(dirsrv.sslport))
+
+    # We can not assume we have systemd ...
+    if dirsrv.ds_paths.with_systemd:
+        result = subprocess.run(["systemctl", "enable", "dirsrv@%s" % dirsrv.serverid],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        args = ' '.join(ensure_list_str(result.args))
+        stdout = ensure_str(result.stdout)
+        stderr = ensure_str(result.stderr)
+        _log.debug(f"CMD: {args} ; STDOUT: {stdout} ; STDERR: {stderr}".encode("utf-8"))
+        if manifest['tmpfiles_d'] is not None:
+            tmpfiles_d_path = dirsrv.ds_paths.tmpfiles_d + "/dirsrv-" + dirsrv.serverid + ".conf"
+            with open(tmpfiles_d_path, "w") as f:
+                f.write(manifest['tmpfiles_d'].replace(src_marker, dst_marker))
+
+    # Nor can we assume we have selinux.
+    if dirsrv.ds_paths.with_selinux:
+        for d in dirs.values():
+            selinux_restorecon(d)
+        selinux_label_port(dirsrv.port)
+        if dirsrv.sslport is not None:
+            selinux_label_port(dirsrv.sslport)
+
+    _log.debug("Clone of %s complete" % dirsrv.serverid)
@@ -440,3 +440,38 @@ unknown attribute in the search filter.\n""",
     'fix': """Stop using this these unknown attributes in the filter, or add the schema
 to the server and make sure it's properly indexed."""
 }
+
+# Cache sizing checks
+DSCACHELE0001 = {
+    'dsle': 'DSCACHELE0001',
+    'severity': 'Medium',
+    'description': 'Backend caches too small.',
+    'items': ['Performance'],
+    'detail': """The CACHE of the backend BACKEND is full and its hit ratio is RATIO%.
+Its working set is estimated at WORKSET entries of SIZE bytes on average, which
+needs a cache of RECOMMENDED bytes, but it is set to CONFIGURED bytes.  The entries
+that miss the cache have to be read and decoded from the database, which makes
+the searches slower.""",
+    'fix': """Review the recommended cache sizes, and apply them, with:
+
+    # dsconf slapd-YOUR_INSTANCE backend config tune --dry-run
+    # dsconf slapd-YOUR_INSTANCE backend config tune
+
+The cache sizes that are automatically set by the server are replaced by these."""
+}
+
+DSCACHELE0002 = {
+    'dsle': 'DSCACHELE0002',
+    'severity': 'Medium',
+    'description': 'Database cache too small.',
+    'items': ['Performance'],
+    'detail': """The database cache hit ratio is RATIO%.  The database cache is set to
+CONFIGURED bytes, and RECOMMENDED bytes are estimated to be needed for the pages
+that are read.  The pages that miss the cache are read from the disk.""",
+    'fix': """Review the recommended cache sizes, and apply them, with:
+
+    # dsconf slapd-YOUR_INSTANCE backend config tune --dry-run
+    # dsconf slapd-YOUR_INSTANCE backend config tune
+
+The database cache size is only changed after a restart of the server."""
+}
@@ -0,0 +1,450 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+
+"""A load generator for the directory server, in python.
+
+Unlike ldclt, it runs a mix of operations, and reports the latency
+percentiles and the errors of each type of operation.
+"""
+
+import bisect
+import ldap
+import logging
+import random
+import select
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from lib389.dbgen import get_index
+from lib389.utils import ensure_bytes, ldap_error_desc
+
+# The operations of a load, and their default weights
+LOAD_MIX = {'search': 80, 'bind': 10, 'modify': 5, 'add': 5}
+# How many operations may be waiting for their result on one connection
+LOAD_WINDOW = 8
+# Seconds to wait for a result before checking all the connections again
+LOAD_POLL_TIMEOUT = 1
+# The percentiles of the latencies that are reported
+LOAD_PERCENTILES = (50, 90, 99, 99.9)
+# The bits of the exact part of the latency histogram buckets: the
+# latencies are recorded in microseconds, within 1 / 2**(HIST_SUB_BITS - 1)
+HIST_SUB_BITS = 8
+# The object classes of the added entries
+LOAD_ADD_OBJECTCLASSES = [b'top', b'person', b'organizationalPerson', b'inetOrgPerson']
+
+
+class LatencyHistogram(object):
+    """A histogram of latencies with log-linear buckets, like HdrHistogram.
+
+    The latencies are counted in microseconds. Below 2**HIST_SUB_BITS they
+    are exact, above they are within 1 / 2**(HIST_SUB_BITS - 1), whatever
+    their magnitude, with a few thousands buckets at most. Histograms are
+    merged by adding their counts.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def _bucket(value):
+        if value < (1 << HIST_SUB_BITS):
+            return value
+        shift = value.bit_length() - HIST_SUB_BITS
+        half = 1 << (HIST_SUB_BITS - 1)
+        return (1 << HIST_SUB_BITS) + (shift - 1) * half + (value >> shift) - half
+
+    @staticmethod
+    def _highest_value(bucket):
+        """Return the highest latency counted in a bucket"""
+        if bucket < (1 << HIST_SUB_BITS):
+            return bucket
+        half = 1 << (HIST_SUB_BITS - 1)
+        (shift, sub) = divmod(bucket - (1 << HIST_SUB_BITS), half)
+        shift += 1
+        return ((sub + half + 1) << shift) - 1
+
+    def record(self, seconds):
+        """Count a latency
+
+        :param seconds: The latency
+        :type seconds: float
+        """
+        value = int(seconds * 1000000)
+        self.counts[self._bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add the latencies of another histogram"""
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, percent):
+        """Return the latency, in seconds, that percent of the latencies are
+        at most, or None if none was recorded. Like HdrHistogram, it is the
+        highest value of its bucket, and never above the highest latency.
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, int(percent * self.count / 100.0 + 0.5))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self._highest_value(bucket), self.max) / 1000000.0
+        return self.max / 1000000.0
+
+    def summary(self):
+        """Return a dict with the 'count', and the 'min', 'mean', 'max' and
+        percentile latencies in seconds, like 'p50' and 'p999' for 99.9%
+        """
+        summary = {'count': self.count}
+        if self.count == 0:
+            return summary
+        summary['min'] = self.min / 1000000.0
+        summary['mean'] = self.total / self.count / 1000000.0
+        for p in LOAD_PERCENTILES:
+            summary['p%s' % str(p).replace('.', '')] = self.percentile(p)
+        summary['max'] = self.max / 1000000.0
+        return summary
+
+
+def _load_connect(config):
+    """Open a connection of a load worker, bound as the configured user"""
+    conn = ldap.initialize(config['uri'])
+    conn.set_option(ldap.OPT_PROTOCOL_VERSION, 3)
+    if config['reqcert'] is not None:
+        conn.set_option(ldap.OPT_X_TLS_REQUIRE_CERT, config['reqcert'])
+        conn.set_option(ldap.OPT_X_TLS_NEWCTX, 0)
+    conn.simple_bind_s(config['binddn'], config['bindpw'])
+    return conn
+
+
+class _LoadWorker(object):
+    """The operations of one process of a LoadGenerator. The operations are
+    sent asynchronously over the connections, and timed from when they are
+    sent until their result is read. A bind is only sent on a connection
+    of its own that has nothing else in flight.
+    """
+
+    def __init__(self, config, worker):
+        self._config = config
+        self._worker = worker
+        self._rand = random.Random(config['seed'] + worker)
+        (self._ops, weights) = zip(*sorted(config['mix'].items()))
+        self._cum_weights = []
+        total = 0
+        for w in weights:
+            total += w
+            self._cum_weights.append(total)
+        self._added = 0
+        self.histograms = dict((op, LatencyHistogram()) for op in self._ops)
+        self.errors = dict((op, Counter()) for op in self._ops)
+
+    def _name(self, index):
+        return '%s%s' % (self._config['prefix'], get_index(index, self._config['max']))
+
+    def _random_name(self):
+        return self._name(self._rand.randint(self._config['min'], self._config['max']))
+
+    def _dn(self, name):
+        return 'uid=%s,%s' % (name, self._config['basedn'])
+
+    def _send(self, op, conn):
+        """Send an operation, and return its msgid"""
+        config = self._config
+        if op == 'search':
+            name = self._random_name()
+            return conn.search_ext(config['basedn'], ldap.SCOPE_SUBTREE,
+                                   config['filter'].format(name=name), config['attrs'])
+        if op == 'bind':
+            name = self._random_name()
+            return conn.simple_bind(self._dn(name), config['password'].format(name=name))
+        if op == 'modify':
+            value = ensure_bytes('%s %d' % (config['prefix'], self._rand.randint(0, 1 << 30)))
+            return conn.modify_ext(self._dn(self._random_name()), [(ldap.MOD_REPLACE, 'description', [value])])
+        if op == 'add':
+            # Unique across the workers, and the runs
+            name = '%s_%s_%d_%d' % (config['prefix'], config['tag'], self._worker, self._added)
+            self._added += 1
+            return conn.add_ext(self._dn(name), [
+                ('objectClass', LOAD_ADD_OBJECTCLASSES),
+                ('uid', [ensure_bytes(name)]),
+                ('cn', [ensure_bytes(name)]),
+                ('sn', [ensure_bytes(name)]),
+                ('userPassword', [ensure_bytes(config['password'].format(name=name))]),
+            ])
+        raise ValueError("Unknown operation %s" % op)
+
+    def run(self):
+        config = self._config
+        conns = [_load_connect(config) for i in range(0, config['connections'])]
+        # The connections the binds are sent on
+        bind_conns = []
+        if 'bind' in self._ops:
+            bind_conns = [_load_connect(config) for i in range(0, config['connections'])]
+        all_conns = conns + bind_conns
+        # msgid -> (op, start) of the operations in flight, per connection
+        pending = [{} for conn in all_conns]
+        start = time.monotonic()
+        sent = 0
+
+        def _read(conn_i, timeout):
+            try:
+                (rtype, rdata, msgid, rctrls) = all_conns[conn_i].result3(ldap.RES_ANY, 1, timeout)
+                error = None
+            except ldap.TIMEOUT:
+                return False
+            except ldap.LDAPError as e:
+                msgid = e.args[0].get('msgid') if e.args and isinstance(e.args[0], dict) else None
+                if msgid not in pending[conn_i]:
+                    raise
+                rtype = True
+                error = e
+            if rtype is None:
+                return False
+            (op, sent_at) = pending[conn_i].pop(msgid)
+            self.histograms[op].record(time.perf_counter() - sent_at)
+            if error is not None:
+                self.errors[op][ldap_error_desc(error)] += 1
+            return True
+
+        def _collect():
+            """Read the results that are ready, or wait for one"""
+            got = False
+            for conn_i in range(0, len(all_conns)):
+                while pending[conn_i] and _read(conn_i, 0):
+                    got = True
+            if got:
+                return
+            busy = [conn_i for conn_i in range(0, len(all_conns)) if pending[conn_i]]
+            if busy:
+                select.select([all_conns[conn_i].fileno() for conn_i in busy], [], [], LOAD_POLL_TIMEOUT)
+
+        def _free_conn(op):
+            if op == 'bind':
+                (first, window) = (len(conns), 1)
+            else:
+                (first, window) = (0, config['window'])
+            for conn_i in range(first, first + config['connections']):
+                if len(pending[conn_i]) < window:
+                    return conn_i
+            return None
+
+        try:
+            while True:
+                if config['count'] is not None and sent >= config['count']:
+                    break
+                if config['duration'] is not None and time.monotonic() - start >= config['duration']:
+                    break
+                op = self._ops[bisect.bisect(self._cum_weights, self._rand.random() * self._cum_weights[-1])]
+                conn_i = _free_conn(op)
+                while conn_i is None:
+                    _collect()
+                    conn_i = _free_conn(op)
+                pending[conn_i][self._send(op, all_conns[conn_i])] = (op, time.perf_counter())
+                sent += 1
+            # Wait for what was sent
+            while any(pending):
+                _collect()
+        finally:
+            for conn in all_conns:
+                try:
+                    conn.unbind_s()
+                except ldap.LDAPError:
+                    pass
+        return (self.histograms, self.errors, time.monotonic() - start)
+
+
+def _load_worker(config, worker):
+    """Run the operations of a worker process of a LoadGenerator"""
+    return _LoadWorker(config, worker).run()
+
+
+class LoadGenerator(object):
+    """Run a mix of operations against an online instance from several
+    processes, and report the rate, latencies and errors of each type of
+    operation. The operations are sent asynchronously, with up to window of
+    them in flight on each connection.
+
+    The entries are named like the ones of ldclt and dbgen_users, with
+    generic=True: uid=<prefix><index>,<basedn>, where the index goes from
+    min to max, and is padded with zeroes to the digits of max. The
+    operations are:
+        - 'search': a subtree search of basedn with filter, where {name}
+          is replaced with the uid of a random entry
+        - 'bind': a simple bind as a random entry, with password, where
+          {name} is replaced with the uid of the entry
+        - 'modify': a replace of the description of a random entry
+        - 'add': an add of a new person entry under basedn
+
+    Example:
+        load = LoadGenerator(inst, 'ou=people,%s' % DEFAULT_SUFFIX, min=1, max=10000,
+                             mix={'search': 90, 'bind': 10}, workers=4)
+        report = load.run(duration=30)
+        print(report['by_op']['search']['latency']['p99'])
+
+    :param instance: An instance, the workers bind with its bind dn and password
+    :type instance: lib389.DirSrv
+    :param basedn: The parent of the entries
+    :type basedn: str
+    :param min: The lowest index of the entries
+    :type min: int
+    :param max: The highest index of the entries
+    :type max: int
+    :param mix: The weight of each operation, see LOAD_MIX
+    :type mix: dict
+    :param workers: How many processes send the operations
+    :type workers: int
+    :param connections: How many connections each worker sends operations
+                        on, and as many for the binds
+    :type connections: int
+    :param window: How many operations may be in flight on each connection
+    :type window: int
+    :param prefix: The prefix of the uid of the entries
+    :type prefix: str
+    :param filter: The filter of the searches
+    :type filter: str
+    :param attrs: The attributes returned by the searches, None for all
+    :type attrs: list of str
+    :param password: The password of the entries
+    :type password: str
+    :param seed: The seed of the random choices, for repeatable loads
+    :type seed: int
+    :param reqcert: The ldap.OPT_X_TLS_REQUIRE_CERT option of the workers'
+                    connections, for ldaps
+    :type reqcert: int
+    :param logger: A logging interface
+    :type logger: python logging
+    """
+
+    def __init__(self, instance, basedn, min=1, max=10000, mix=None, workers=1, connections=1,
+                 window=LOAD_WINDOW, prefix='user', filter='(uid={name})', attrs=None,
+                 password='{name}', seed=None, reqcert=None, logger=None):
+        if mix is None:
+            mix = LOAD_MIX
+        unknown = set(mix) - set(LOAD_MIX)
+        if unknown:
+            raise ValueError("Unknown operations %s, use %s" % (', '.join(sorted(unknown)), ', '.join(LOAD_MIX)))
+        mix = dict((op, weight) for (op, weight) in mix.items() if weight > 0)
+        if not mix:
+            raise ValueError("At least one operation needs a weight")
+        if workers < 1 or connections < 1 or window < 1:
+            raise ValueError("The workers, connections and window must be at least 1")
+        if min > max:
+            raise ValueError("The lowest index is above the highest one")
+        self._instance = instance
+        self._workers = workers
+        self._config = {
+            'uri': instance.toLDAPURL(),
+            'binddn': instance.binddn,
+            'bindpw': instance.bindpw,
+            'reqcert': reqcert,
+            'basedn': basedn,
+            'min': min,
+            'max': max,
+            'mix': mix,
+            'connections': connections,
+            'window': window,
+            'prefix': prefix,
+            'filter': filter,
+            'attrs': attrs,
+            'password': password,
+            'seed': seed if seed is not None else random.randint(0, 1 << 30),
+        }
+        if logger is not None:
+            self._log = logger
+        else:
+            self._log = logging.getLogger(__name__)
+
+    def run(self, duration=10, count=None):
+        """Run the load
+
+        The report is a dict with:
+            - 'workers', 'connections', 'window', 'mix' and 'seed': the
+              settings of the load
+            - 'seconds': how long the load ran
+            - 'ops', 'errors' and 'rate': the operations, failed operations
+              and operations per second of all the types
+            - 'by_op': by operation, the 'ops', 'errors' and 'rate', the
+              'failures' count of each error, and the 'latency' summary, see
+              LatencyHistogram.summary
+
+        :param duration: How many seconds to send operations for, or None
+        :type duration: float
+        :param count: How many operations each worker sends, or None
+        :type count: int
+        :returns: A dict, that can be written as JSON
+        """
+
+        if duration is None and count is None:
+            raise ValueError("A duration or a count is needed")
+        config = dict(self._config)
+        config['duration'] = duration
+        config['count'] = count
+        config['tag'] = '%x' % int(time.time() * 1000)
+        self._log.info("Running %s with %d workers for %s" %
+                       (', '.join('%s:%d' % i for i in sorted(config['mix'].items())), self._workers,
+                        '%ss' % duration if count is None else '%d operations per worker' % count))
+
+        if self._workers == 1:
+            results = [_load_worker(config, 0)]
+        else:
+            with ProcessPoolExecutor(max_workers=self._workers) as executor:
+                results = list(executor.map(_load_worker, [config] * self._workers, range(0, self._workers)))
+
+        histograms = dict((op, LatencyHistogram()) for op in config['mix'])
+        errors = dict((op, Counter()) for op in config['mix'])
+        seconds = 0
+        for (w_histograms, w_errors, w_seconds) in results:
+            for op in config['mix']:
+                histograms[op].merge(w_histograms[op])
+                errors[op].update(w_errors[op])
+            seconds = max(seconds, w_seconds)
+
+        report = {
+            'workers': self._workers,
+            'connections': config['connections'],
+            'window': config['window'],
+            'mix': config['mix'],
+            'seed': config['seed'],
+            'seconds': seconds,
+            'ops': 0,
+            'errors': 0,
+            'rate': 0,
+            'by_op': {},
+        }
+        for op in sorted(config['mix']):
+            ops = histograms[op].count
+            failed = sum(errors[op].values())
+            report['by_op'][op] = {
+                'ops': ops,
+                'errors': failed,
+                'rate': ops / seconds if seconds > 0 else 0,
+                'failures': dict(errors[op].most_common()),
+                'latency': histograms[op].summary(),
+            }
+            report['ops'] += ops
+            report['errors'] += failed
+        report['rate'] = report['ops'] / seconds if seconds > 0 else 0
+        self._log.info("Ran %d operations in %.1f seconds (%.0f operations/s), %d failed" %
+                       (report['ops'], seconds, report['rate'], report['errors']))
+        return report
@@ -8,6 +8,7 @@
 #
 
 from lib389.schema import Schema, Resolver
+from ldap.schema.models import AttributeType, ObjectClass
 from lib389.backend import Backends
 from lib389.migrate.openldap.config import olOverlayType
 from lib389.plugins import MemberOfPlugin, ReferentialIntegrityPlugin, AttributeUniquenessPlugins
@@ -509,9 +510,8 @@ class Migration(object):
 
     def _gen_schema_plan(self):
         # Get the server schema so that we can query it repeatedly.
-        schema = Schema(self.inst)
-        schema_attrs = schema.get_attributetypes()
-        schema_objects = schema.get_objectclasses()
+        schema_cache = Schema(self.inst).get_cache()
+        schema_attrs = [ ds_attr for (_, ds_attr) in schema_cache.get_definitions(AttributeType)]
 
         resolver = Resolver(schema_attrs)
 
@@ -525,7 +525,7 @@ class Migration(object):
                 continue
             # For the attr, find if anything has a name overlap in any capacity.
             # overlaps = [ (names, ds_attr) for (names, ds_attr) in schema_attr_names if len(names.intersection(attr.name_set)) > 0]
-            overlaps = [ ds_attr for ds_attr in schema_attrs if ds_attr.oid == attr.oid]
+            overlaps = schema_cache.get_by_oid(attr.oid, AttributeType)
             if len(overlaps) == 0:
                 # We need to add attr
                 self.plan.append(SchemaAttributeCreate(attr))
@@ -548,7 +548,7 @@ class Migration(object):
                 self.plan.append(SchemaClassUnsupported(obj))
                 continue
             # For the attr, find if anything has a name overlap in any capacity.
-            overlaps = [ ds_obj for ds_obj in schema_objects if ds_obj.oid == obj.oid]
+            overlaps = schema_cache.get_by_oid(obj.oid, ObjectClass)
             if len(overlaps) == 0:
                 # We need to add attr
                 self.plan.append(SchemaClassCreate(obj))
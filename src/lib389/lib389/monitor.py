@@ -7,9 +7,12 @@
 # --- END COPYRIGHT BLOCK ---
 
 import copy
+import ldap
+import time
+from collections import deque
 from lib389._constants import *
 from lib389._mapped_object import DSLdapObject
-from lib389.utils import (ds_is_older)
+from lib389.utils import (ds_is_older, ensure_str)
 from lib389.lint import DSDSLE0001
 
 
@@ -380,3 +383,226 @@ class MonitorDiskSpace(DSLdapObject):
         """Get an information about partitions which contains a Directory Server data"""
 
         return self.get_attr_vals_utf8_l("dsDisk")
+
+
+# How many samples a MonitorSampler keeps
+MONITOR_HISTORY = 60
+
+# The monitor attributes that count events since the server started, for
+# which a rate is computed. The other numeric attributes are gauges.
+MONITOR_COUNTERS = frozenset([
+    # cn=monitor
+    'totalconnections', 'maxthreadsperconnhits', 'opsinitiated', 'opscompleted',
+    'entriessent', 'bytessent',
+    # cn=snmp,cn=monitor
+    'anonymousbinds', 'unauthbinds', 'simpleauthbinds', 'strongauthbinds',
+    'bindsecurityerrors', 'inops', 'readops', 'compareops', 'addentryops',
+    'removeentryops', 'modifyentryops', 'modifyrdnops', 'listops', 'searchops',
+    'onelevelsearchops', 'wholesubtreesearchops', 'referrals', 'chainings',
+    'securityerrors', 'errors', 'connectionseq', 'bytesrecv', 'entriesreturned',
+    'referralsreturned', 'cachehits', 'slavehits',
+    # ldbm and backends
+    'dbcachehits', 'dbcachetries', 'dbcachepagein', 'dbcachepageout',
+    'dbcacheroevict', 'dbcacherwevict', 'normalizeddncachetries',
+    'normalizeddncachehits', 'normalizeddncachemisses', 'normalizeddncacheevictions',
+    'entrycachehits', 'entrycachetries', 'dncachehits', 'dncachetries',
+    # chaining
+    'nsaddcount', 'nsdeletecount', 'nsmodifycount', 'nsrenamecount',
+    'nssearchbasecount', 'nssearchonelevelcount', 'nssearchsubtreecount',
+    'nsabandoncount', 'nsbindcount', 'nsunbindcount', 'nscomparecount',
+])
+MONITOR_COUNTER_PREFIXES = ('dbfilecachehit-', 'dbfilecachemiss-', 'dbfilepagein-', 'dbfilepageout-')
+
+# Hit ratios that are computed again over each interval: ratio -> (hits, tries)
+MONITOR_HIT_RATIOS = {
+    'entrycachehitratio': ('entrycachehits', 'entrycachetries'),
+    'dncachehitratio': ('dncachehits', 'dncachetries'),
+    'dbcachehitratio': ('dbcachehits', 'dbcachetries'),
+    'normalizeddncachehitratio': ('normalizeddncachehits', 'normalizeddncachetries'),
+}
+
+
+def _monitor_section(dn):
+    """Name the monitor entry of a dn, or return None if it is not one"""
+    rdns = [rdn.lower() for rdn in ldap.explode_dn(dn)]
+    if rdns == ['cn=monitor']:
+        return 'server'
+    if len(rdns) == 2 and rdns[1] == 'cn=monitor':
+        return rdns[0].split('=', 1)[1]
+    if rdns[-2:] != ['cn=plugins', 'cn=config']:
+        return None
+    if rdns == ['cn=monitor', 'cn=ldbm database', 'cn=plugins', 'cn=config']:
+        return 'ldbm'
+    if rdns == ['cn=database', 'cn=monitor', 'cn=ldbm database', 'cn=plugins', 'cn=config']:
+        return 'database'
+    if len(rdns) == 5 and rdns[0] == 'cn=monitor':
+        name = rdns[1].split('=', 1)[1]
+        if rdns[2] == 'cn=ldbm database':
+            return 'backend.' + name
+        if rdns[2] == 'cn=chaining database':
+            return 'chaining.' + name
+    return None
+
+
+def _is_counter(attr):
+    return attr in MONITOR_COUNTERS or attr.startswith(MONITOR_COUNTER_PREFIXES)
+
+
+class MonitorSample(object):
+    """The numeric values of all the monitor entries at one point in time.
+    The values are named '<section>.<attribute>', where the section is
+    'server', 'snmp', 'ldbm', 'database', 'backend.<name>' or
+    'chaining.<name>', like 'backend.userroot.entrycachehits'.
+
+    :param values: The values by name
+    :type values: dict
+    :param timestamp: The time of the sample, in seconds since the epoch
+    :type timestamp: float
+    :param monotonic: The time of the sample, from time.monotonic()
+    :type monotonic: float
+    """
+
+    __slots__ = ('values', 'timestamp', 'monotonic')
+
+    def __init__(self, values, timestamp=None, monotonic=None):
+        self.values = values
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.monotonic = monotonic if monotonic is not None else time.monotonic()
+
+
+class MonitorSampler(object):
+    """Take samples of the server, snmp, ldbm, database, backend and chaining
+    monitors, and compute the rates between them. Each sample is read with
+    one subtree search of cn=monitor and one of cn=plugins,cn=config, and
+    the last samples are kept in a ring buffer.
+
+    Example:
+        sampler = MonitorSampler(inst)
+        for (sample, rates) in sampler.watch(interval=5):
+            print(rates['server.opscompleted'])
+
+    :param instance: An instance
+    :type instance: lib389.DirSrv
+    :param history: How many samples to keep
+    :type history: int
+    """
+
+    def __init__(self, instance, history=MONITOR_HISTORY):
+        self._instance = instance
+        self.samples = deque(maxlen=history)
+
+    def _read_values(self):
+        values = {}
+        for (base, filterstr) in ((DN_MONITOR, '(objectClass=*)'),
+                                  (DN_PLUGIN, '(|(cn=monitor)(cn=database))')):
+            entries = self._instance.search_ext_s(base, ldap.SCOPE_SUBTREE, filterstr,
+                                                  attrlist=['*'], escapehatch='i am sure')
+            for entry in entries:
+                section = _monitor_section(entry.dn)
+                if section is None:
+                    continue
+                for (attr, vals) in entry.data.items():
+                    if len(vals) != 1:
+                        continue
+                    val = ensure_str(vals[0])
+                    try:
+                        val = int(val)
+                    except ValueError:
+                        try:
+                            val = float(val)
+                        except ValueError:
+                            continue
+                    values['%s.%s' % (section, attr.lower())] = val
+        return values
+
+    def sample(self):
+        """Read all the monitors, and add the sample to the history
+
+        :returns: MonitorSample
+        """
+        sample = MonitorSample(self._read_values())
+        self.samples.append(sample)
+        return sample
+
+    def get_deltas(self, prev=None, cur=None):
+        """Return how much each counter increased between two samples, by
+        default the last two. A counter that went down, because the server
+        was restarted, is left out.
+
+        :param prev: The older sample
+        :type prev: MonitorSample
+        :param cur: The newer sample
+        :type cur: MonitorSample
+        :returns: dict of the counter increases by name
+        """
+        (prev, cur) = self._get_pair(prev, cur)
+        deltas = {}
+        for (name, val) in cur.values.items():
+            if not _is_counter(name.rsplit('.', 1)[1]):
+                continue
+            prev_val = prev.values.get(name)
+            if prev_val is not None and val >= prev_val:
+                deltas[name] = val - prev_val
+        return deltas
+
+    def get_rates(self, prev=None, cur=None):
+        """Return the values over the interval between two samples, by
+        default the last two. Counters become rates per second, hit ratios
+        are computed from the hits and tries of the interval (None if there
+        was no try), and gauges keep the value of the newer sample.
+
+        :param prev: The older sample
+        :type prev: MonitorSample
+        :param cur: The newer sample
+        :type cur: MonitorSample
+        :returns: dict of the values by name
+        """
+        (prev, cur) = self._get_pair(prev, cur)
+        elapsed = cur.monotonic - prev.monotonic
+        deltas = self.get_deltas(prev, cur)
+        rates = {}
+        for (name, val) in cur.values.items():
+            (section, attr) = name.rsplit('.', 1)
+            if _is_counter(attr):
+                if name in deltas and elapsed > 0:
+                    rates[name] = deltas[name] / elapsed
+            elif attr in MONITOR_HIT_RATIOS:
+                (hits, tries) = MONITOR_HIT_RATIOS[attr]
+                tries = deltas.get('%s.%s' % (section, tries))
+                hits = deltas.get('%s.%s' % (section, hits))
+                if tries and hits is not None:
+                    rates[name] = 100.0 * hits / tries
+                else:
+                    rates[name] = None
+            else:
+                rates[name] = val
+        return rates
+
+    def _get_pair(self, prev, cur):
+        if prev is None or cur is None:
+            if len(self.samples) < 2:
+                raise ValueError("At least two samples are needed")
+            return (self.samples[-2], self.samples[-1])
+        return (prev, cur)
+
+    def watch(self, interval, count=None):
+        """Take a sample every interval seconds, and yield it with the rates
+        since the previous one. The first sample is taken straight away, the
+        first rates one interval later.
+
+        :param interval: Seconds between two samples
+        :type interval: float
+        :param count: How many rates to yield, or None to go on forever
+        :type count: int
+        :returns: generator of (MonitorSample, rates dict)
+        """
+        self.sample()
+        next_tick = time.monotonic()
+        done = 0
+        while count is None or done < count:
+            # Keep the ticks regular, whatever the time spent sampling
+            next_tick += interval
+            time.sleep(max(0, next_tick - time.monotonic()))
+            sample = self.sample()
+            yield (sample, self.get_rates())
+            done += 1
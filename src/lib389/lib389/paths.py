@@ -87,6 +87,12 @@ CONFIG_MAP = {
     'version': ('', 'vendorVersion'),
 }
 
+# The mapped attributes of each entry of CONFIG_MAP, by lowercase dn, so
+# they can all be read in one search of the entry.
+_CONFIG_MAP_ENTRIES = {}
+for (_dn, _attr) in CONFIG_MAP.values():
+    _CONFIG_MAP_ENTRIES.setdefault(_dn.lower(), set()).add(_attr.lower())
+
 SECTION = 'slapd'
 
 
@@ -117,6 +123,10 @@ class Paths(object):
         self._serverid = serverid
         self._instance = instance
         self._islocal = local
+        # Online values of the CONFIG_MAP keys, by lowercase entry dn
+        self._online_cache = {}
+        # How many searches were made to read online values
+        self.online_lookups = 0
 
     def _get_defaults_loc(self, search_paths):
         ## THIS IS HOW WE HANDLE A PREFIX INSTALL
@@ -158,11 +168,7 @@ class Paths(object):
         # Are we online? Is our key in the config map?
         if name in CONFIG_MAP and self._instance is not None and self._instance.state == DIRSRV_STATE_ONLINE:
             # Get the online value.
-            (dn, attr) = CONFIG_MAP[name]
-            ent = self._instance.getEntry(dn, attrlist=[attr,])
-            # If the server doesn't have it, fall back to our configuration.
-            if attr is not None:
-                v = ensure_str(ent.getValue(attr))
+            v = self._get_online(name)
             # Do we need to post-process the value?
             if name == 'version':
                 # We need to post process this - it's 389-Directory/1.4.2.2.20191031git8166d8345 B2019.304.19
@@ -175,6 +181,39 @@ class Paths(object):
         else:
             return ensure_str(self._config.get(SECTION, name))
 
+    def _get_online(self, name):
+        """Get the value of a CONFIG_MAP key from the online instance. The
+        first key read from an entry reads all the mapped attributes of that
+        entry, and they are cached until invalidate_online() is called.
+        """
+        from lib389.utils import ensure_str
+        (dn, attr) = CONFIG_MAP[name]
+        values = self._online_cache.get(dn.lower())
+        if values is None:
+            attrs = sorted(_CONFIG_MAP_ENTRIES[dn.lower()])
+            ent = self._instance.getEntry(dn, attrlist=attrs)
+            self.online_lookups += 1
+            values = dict((a, ensure_str(ent.getValue(a))) for a in attrs)
+            self._online_cache[dn.lower()] = values
+        return values[attr.lower()]
+
+    def invalidate_online(self, dn=None, attrs=None):
+        """Drop the cached online values, so they are read again on next use
+
+        :param dn: Only drop the values of this entry, if any of attrs is mapped
+        :type dn: str
+        :param attrs: The attributes that changed, or None for any
+        :type attrs: list of str
+        """
+        if dn is None:
+            self._online_cache = {}
+            return
+        mapped = _CONFIG_MAP_ENTRIES.get(dn.lower())
+        if mapped is None:
+            return
+        if attrs is None or any(a.lower() in mapped for a in attrs):
+            self._online_cache.pop(dn.lower(), None)
+
     @property
     def asan_enabled(self):
         if self._defaults_cached is False and self._islocal:
@@ -0,0 +1,187 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+"""Record the results of performance benchmarks with the environment they
+ran in, and compare two sets of results to find the regressions.
+"""
+
+import json
+import os
+import platform
+import socket
+import sys
+from datetime import datetime
+from lib389.backend import DatabaseConfig
+from lib389.utils import get_ds_version, get_total_memory
+
+# The version of the format of the results files
+PERF_RESULTS_VERSION = 1
+# The change, in percent, beyond which a metric is a regression
+PERF_THRESHOLD = 10.0
+# The compared metrics of a run, as a path in its result, and if a higher
+# value is better. The loads of a LoadGenerator have a 'rate' and 'latency',
+# the timed tasks have an 'elapsed' time.
+PERF_METRICS = (
+    ('rate', True),
+    ('latency.p50', False),
+    ('latency.p99', False),
+    ('elapsed', False),
+)
+# The run of a benchmark that does not depend on the worker threads
+PERF_DEFAULT_RUN = 'default'
+
+
+def get_environment(instance):
+    """Return the description of the host and the instance a benchmark runs on
+
+    :param instance: An online local instance
+    :type instance: lib389.DirSrv
+    :returns: A dict
+    """
+
+    return {
+        'date': datetime.utcnow().isoformat(),
+        'hostname': socket.gethostname(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'memory': get_total_memory(),
+        'ds_version': get_ds_version(instance.ds_paths),
+        'db_lib': DatabaseConfig(instance).get_db_lib(),
+    }
+
+
+def _get_metric(result, path):
+    """Return the value of a metric of a run, or None"""
+    value = result
+    for key in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+class BenchmarkResults(object):
+    """The results of a benchmark suite. Each benchmark has runs, one per
+    number of worker threads of the server, or a single PERF_DEFAULT_RUN.
+
+    The results are saved as JSON:
+        - 'version': PERF_RESULTS_VERSION
+        - 'environment': see get_environment()
+        - 'parameters': the settings of the suite, like the size of the data
+        - 'benchmarks': by benchmark name, by run, the result of the run,
+          like a LoadGenerator report or {'elapsed': seconds}
+
+    :param environment: The environment of the benchmarks
+    :type environment: dict
+    :param parameters: The settings of the suite
+    :type parameters: dict
+    """
+
+    def __init__(self, environment=None, parameters=None):
+        self.environment = environment or {}
+        self.parameters = parameters or {}
+        self.benchmarks = {}
+
+    def record(self, name, result, threads=None):
+        """Record the result of a run of a benchmark
+
+        :param name: The name of the benchmark
+        :type name: str
+        :param result: The result of the run
+        :type result: dict
+        :param threads: The worker threads of the server, or None
+        :type threads: int
+        """
+        run = str(threads) if threads is not None else PERF_DEFAULT_RUN
+        self.benchmarks.setdefault(name, {})[run] = result
+
+    def to_dict(self):
+        return {
+            'version': PERF_RESULTS_VERSION,
+            'environment': self.environment,
+            'parameters': self.parameters,
+            'benchmarks': self.benchmarks,
+        }
+
+    def save(self, path):
+        """Write the results to a JSON file"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=4, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read the results of a JSON file written by save()
+
+        :param path: The file of the results
+        :type path: str
+        :returns: BenchmarkResults
+        :raises: ValueError - if the file is not in a known version
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get('version') != PERF_RESULTS_VERSION:
+            raise ValueError("Error %s is not a version %d results file" % (path, PERF_RESULTS_VERSION))
+        results = cls(data['environment'], data['parameters'])
+        results.benchmarks = data['benchmarks']
+        return results
+
+
+def compare_results(baseline, current, threshold=PERF_THRESHOLD):
+    """Compare the metrics of the runs that two results have in common
+
+    A metric regressed when it is worse than in the baseline by more than
+    threshold percent: a rate that is lower, or a latency or elapsed time
+    that is higher.
+
+    :param baseline: The reference results
+    :type baseline: BenchmarkResults
+    :param current: The results to check
+    :type current: BenchmarkResults
+    :param threshold: The change, in percent, beyond which a metric regressed
+    :type threshold: float
+    :returns: A list of dicts with the 'benchmark', 'run' and 'metric', the
+              'baseline' and 'current' values, their 'change' in percent,
+              and if it is a 'regression'
+    """
+
+    comparisons = []
+    for name in sorted(set(baseline.benchmarks) & set(current.benchmarks)):
+        runs = set(baseline.benchmarks[name]) & set(current.benchmarks[name])
+        # The thread counts in numerical order, then the default run
+        for run in sorted(runs, key=lambda r: (not r.isdigit(), int(r) if r.isdigit() else r)):
+            for (metric, higher_is_better) in PERF_METRICS:
+                old = _get_metric(baseline.benchmarks[name][run], metric)
+                new = _get_metric(current.benchmarks[name][run], metric)
+                if old is None or new is None:
+                    continue
+                change = (new - old) * 100.0 / old if old else 0.0
+                worse = -change if higher_is_better else change
+                comparisons.append({
+                    'benchmark': name,
+                    'run': run,
+                    'metric': metric,
+                    'baseline': old,
+                    'current': new,
+                    'change': change,
+                    'regression': worse > threshold,
+                })
+    return comparisons
+
+
+def format_comparison(comparisons, out=sys.stdout):
+    """Write comparisons as a table, marking the regressions"""
+    out.write('%-24s %-8s %-12s %14s %14s %9s\n' %
+              ('benchmark', 'run', 'metric', 'baseline', 'current', 'change'))
+    for c in comparisons:
+        out.write('%-24s %-8s %-12s %14.6g %14.6g %+8.1f%%%s\n' %
+                  (c['benchmark'], c['run'], c['metric'], c['baseline'], c['current'], c['change'],
+                   '  REGRESSION' if c['regression'] else ''))
@@ -16,18 +16,20 @@ import logging
 import uuid
 import json
 import copy
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from operator import itemgetter
-from itertools import permutations
 from lib389._constants import *
 from lib389.properties import *
 from lib389.utils import (normalizeDN, escapeDNValue, ensure_bytes, ensure_str,
                           ensure_list_str, ds_is_older, copy_with_permissions,
-                          ds_supports_new_changelog)
+                          ds_supports_new_changelog, backoff_intervals, ldap_error_desc)
 from lib389 import DirSrv, Entry, NoSuchEntryError, InvalidArgumentError
 from lib389._mapped_object import DSLdapObjects, DSLdapObject
 from lib389.passwd import password_generate
 from lib389.mappingTree import MappingTrees
-from lib389.agreement import Agreements
+from lib389.agreement import Agreements, _find_agmt_maxcsn, _find_consumer_maxcsn
 from lib389.tombstone import Tombstones
 from lib389.tasks import CleanAllRUVTask
 from lib389.idm.domain import Domain
@@ -38,6 +40,13 @@ from lib389.conflicts import ConflictEntries
 from lib389.lint import (DSREPLLE0001, DSREPLLE0002, DSREPLLE0003, DSREPLLE0004,
                          DSREPLLE0005)
 
+# Bounds, in seconds, of the adaptive interval between two polls of a replica
+# that is expected to converge.
+REPL_POLL_MIN = 0.05
+REPL_POLL_MAX = 1
+# Bytes read at once from a changelog LDIF file
+CL_LDIF_CHUNK_SIZE = 4 * 1024 * 1024
+
 
 class ReplicaLegacy(object):
     proxied_methods = 'search_s getEntry'.split()
@@ -911,16 +920,18 @@ class RUV(object):
         result["ruvs"] = ruvs
         return result
 
-    def alloc_rid(self):
+    def alloc_rid(self, exclude=()):
         """Based on the RUV, determine an available RID for the replication
         topology that is unique.
 
+        :param exclude: The RIDs that are taken but not yet in the RUV
+        :type exclude: list of str
         :returns: str
         """
         self._log.debug("Allocated rids: %s" % self._rids)
         for i in range(1, 65534):
             self._log.debug("Testing ... %s" % i)
-            if str(i) not in self._rids:
+            if str(i) not in self._rids and str(i) not in exclude:
                 return str(i)
         raise Exception("Unable to alloc rid!")
 
@@ -928,7 +939,8 @@ class RUV(object):
         """Compare two server ruvs to determine if they are synced. This does not
         mean that replication is in sync (due to things like fractional repl), but
         in some cases can show that "at least some known point" has been achieved in
-        the replication process.
+        the replication process: this ruv has seen at least the max csn of every
+        rid in the other ruv.
 
         :param other_ruv: The other ruv object
         :type other_ruv: RUV object
@@ -942,94 +954,301 @@ class RUV(object):
             self._log.debug("RUV: Incorrect rid lists, is sync working?")
             return False
         for rid in self._rids:
-            my_csn = self._rid_csn.get(rid, '00000000000000000000')
-            other_csn = other_ruv._rid_csn.get(rid, '00000000000000000000')
+            my_csn = self._rid_maxcsn.get(rid, '00000000000000000000')
+            other_csn = other_ruv._rid_maxcsn.get(rid, '00000000000000000000')
             self._log.debug("RUV: Comparing csn %s %s %s" % (rid, my_csn, other_csn))
             if my_csn < other_csn:
                 return False
         return True
 
 
+def _cl_ldif_read(file_path, start=0, end=None, chunk_size=CL_LDIF_CHUNK_SIZE):
+    """Read the records of a changelog LDIF file, or of the part of it
+    between the offsets start and end, in chunks of chunk_size bytes.
+
+    :returns: A generator of the records, as str without the blank line
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        pos = start
+        pending = b''
+        while end is None or pos < end:
+            size = chunk_size if end is None else min(chunk_size, end - pos)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            pos += len(chunk)
+            records = (pending + chunk).split(b'\n\n')
+            pending = records.pop()
+            for record in records:
+                record = record.strip(b'\n')
+                if record:
+                    yield ensure_str(record)
+        record = pending.strip(b'\n')
+        if record:
+            yield ensure_str(record)
+
+
+def _cl_ldif_boundaries(file_path, parts, chunk_size=CL_LDIF_CHUNK_SIZE):
+    """Split a changelog LDIF file in up to parts ranges of about the same
+    size, that start and end on record boundaries.
+
+    :returns: A list of (start, end) offsets
+    """
+    size = os.path.getsize(file_path)
+    offsets = [0]
+    with open(file_path, 'rb') as f:
+        for i in range(1, parts):
+            # Find the first blank line at or after the even split offset
+            pos = max(size * i // parts - 1, offsets[-1])
+            f.seek(pos)
+            tail = b''
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    pos = size
+                    break
+                found = (tail + chunk).find(b'\n\n')
+                if found >= 0:
+                    pos = pos - len(tail) + found + 2
+                    break
+                pos += len(chunk)
+                tail = chunk[-1:]
+            if pos >= size:
+                break
+            if pos > offsets[-1]:
+                offsets.append(pos)
+    offsets.append(size)
+    return [(offsets[i], offsets[i + 1]) for i in range(0, len(offsets) - 1)]
+
+
+def _cl_ldif_attrs(record):
+    """Split a record in its attributes, each one a list of its physical lines"""
+    attrs = []
+    for line in record.split('\n'):
+        if line.startswith(' ') and attrs:
+            attrs[-1].append(line)
+        else:
+            attrs.append([line])
+    return attrs
+
+
+def _cl_ldif_unfold(lines):
+    """Join the physical lines of an attribute"""
+    return ''.join([lines[0]] + [line[1:] for line in lines[1:]])
+
+
+def _cl_ldif_csn(record):
+    """Return the CSN of a change record, or None for the other records"""
+    if record.startswith('csn: '):
+        start = 5
+    else:
+        start = record.find('\ncsn: ')
+        if start < 0:
+            return None
+        start += 6
+    end = record.find('\n', start)
+    return record[start:end if end >= 0 else None].strip()
+
+
+def _cl_ldif_filter(records, min_csn=None, max_csn=None, rids=None):
+    """Keep the change records within the CSN range and from one of the
+    replica ids. The records without a CSN, like the RUVs, are all kept.
+    """
+    if min_csn is None and max_csn is None and not rids:
+        yield from records
+        return
+    min_csn = min_csn.lower() if min_csn else None
+    max_csn = max_csn.lower() if max_csn else None
+    for record in records:
+        csn = _cl_ldif_csn(record)
+        if csn is not None:
+            csn = csn.lower()
+            if min_csn is not None and csn < min_csn:
+                continue
+            if max_csn is not None and csn > max_csn:
+                continue
+            if rids and int(csn[12:16], 16) not in rids:
+                continue
+        yield record
+
+
+def _cl_ldif_grep_csn(record):
+    """Format the CSN and RUV lines of a record with their readable time"""
+    out = []
+    for lines in _cl_ldif_attrs(record):
+        line = _cl_ldif_unfold(lines)
+        (attr, sep, value) = line.partition(': ')
+        if not sep:
+            continue
+        if attr.endswith('ruv'):
+            # {replica 1 ldap://localhost:39001} 5ec68d57000000010000 5ec68d60000100010000
+            pr = value.replace('{', '').replace('}', '').split()
+            (csn, maxcsn, modts) = ('', '', '')
+            if len(pr) > 1 and pr[0] == 'replicageneration':
+                csn = RUV.parse_csn(pr[1])
+            elif len(pr) > 3 and pr[0] == 'replica':
+                csn = RUV.parse_csn(pr[3])
+                if len(pr) > 4:
+                    maxcsn = RUV.parse_csn(pr[4])
+                if len(pr) > 5:
+                    modts = RUV.parse_csn(pr[5])
+            if maxcsn or modts:
+                out.append(f'{line} ({csn}\n')
+                if maxcsn:
+                    out.append(f"; {maxcsn}\n")
+                if modts:
+                    out.append(f"; {modts}\n")
+                out.append(")\n")
+            else:
+                out.append(f"{line} ({csn})\n")
+        elif attr.endswith('csn'):
+            out.append(f"{line} ({RUV.parse_csn(value.strip())})\n")
+    return ''.join(out)
+
+
+def _cl_ldif_decode(record):
+    """Replace the base64 change of a record with its decoded text"""
+    out = []
+    decoded = False
+    for lines in _cl_ldif_attrs(record):
+        if lines[0].startswith('change::') or lines[0].startswith('changes::'):
+            value = _cl_ldif_unfold(lines).split('::', 1)[1]
+            out.append('change::\n' + ensure_str(base64.b64decode(value)))
+            decoded = True
+        else:
+            out.extend(lines)
+            decoded = False
+    # A decoded change already ends with a newline
+    return '\n'.join(out) + ('\n' if decoded else '\n\n')
+
+
+def _cl_ldif_copy(record):
+    return record + '\n\n'
+
+
+# How each mode of ChangelogLDIF formats a record
+_CL_LDIF_FORMATS = {
+    'grep_csn': _cl_ldif_grep_csn,
+    'decode': _cl_ldif_decode,
+    'process': _cl_ldif_copy,
+}
+
+
+def _cl_ldif_pipeline(file_path, mode, start=0, end=None, min_csn=None, max_csn=None, rids=None,
+                      chunk_size=CL_LDIF_CHUNK_SIZE):
+    """Chain the read, filter and format stages over (a part of) a changelog LDIF file
+
+    :returns: A generator of the formatted records
+    """
+    records = _cl_ldif_read(file_path, start, end, chunk_size)
+    records = _cl_ldif_filter(records, min_csn, max_csn, rids)
+    return map(_CL_LDIF_FORMATS[mode], records)
+
+
+def _cl_ldif_process_part(file_path, part_path, mode, start, end, min_csn, max_csn, rids, chunk_size):
+    """Process a part of a changelog LDIF file into part_path, in a worker process"""
+    count = 0
+    with open(part_path, 'w') as out:
+        for text in _cl_ldif_pipeline(file_path, mode, start, end, min_csn, max_csn, rids, chunk_size):
+            out.write(text)
+            count += 1
+    return count
+
+
 class ChangelogLDIF(object):
-    def __init__(self, file_path, output_file):
+    def __init__(self, file_path, output_file, min_csn=None, max_csn=None, rids=None, workers=1,
+                 chunk_size=CL_LDIF_CHUNK_SIZE):
         """A class for working with Changelog LDIF file
 
+        The file is streamed record by record, so its size doesn't matter.
+        With workers above 1 it is split on record boundaries, and the parts
+        are processed by as many processes.
+
         :param file_path: LDIF file path
         :type file_path: str
         :param output_file: LDIF file path
--       :type output_file: str
+        :type output_file: str
+        :param min_csn: Only keep the changes from this CSN
+        :type min_csn: str
+        :param max_csn: Only keep the changes up to this CSN
+        :type max_csn: str
+        :param rids: Only keep the changes made on these replica ids
+        :type rids: list of int
+        :param workers: How many processes to split the work over
+        :type workers: int
+        :param chunk_size: Bytes read at once from the file
+        :type chunk_size: int
         """
         self.file_path = file_path
         self.output_file = output_file
+        self.min_csn = min_csn
+        self.max_csn = max_csn
+        self.rids = set(rids) if rids else None
+        self.workers = workers
+        self.chunk_size = chunk_size
 
-    def grep_csn(self):
-        """Grep and interpret CSNs
+    def records(self, mode='process'):
+        """Iterate over the formatted records that pass the filters, in this process
 
-        :param file: LDIF file path
-        :type file: str
+        :param mode: 'process' for the records as they are, 'decode' or 'grep_csn'
+        :type mode: str
+        :returns: A generator of str
         """
+        return _cl_ldif_pipeline(self.file_path, mode, min_csn=self.min_csn, max_csn=self.max_csn,
+                                 rids=self.rids, chunk_size=self.chunk_size)
+
+    def _run(self, mode):
+        count = 0
         with open(self.output_file, 'w') as LDIF_OUT:
             LDIF_OUT.write(f"# LDIF File: {self.output_file}\n")
-            with open(self.file_path) as LDIF_IN:
-                for line in LDIF_IN.readlines():
-                    if "ruv:" in line or "csn:" in line:
-                        csn = ""
-                        maxcsn = ""
-                        modts = ""
-                        line = line.split("\n")[0]
-                        if "ruv:" in line:
-                            ruv = RUV([line.split("ruv: ")[1]])
-                            ruv_dict = ruv.parse_ruv()
-                            csn = ruv_dict["csn"]
-                            maxcsn = ruv_dict["maxcsn"]
-                            modts = ruv_dict["modts"]
-                        elif "csn:" in line:
-                            csn = RUV().parse_csn(line.split("csn: ")[1])
-                        if maxcsn or modts:
-                            LDIF_OUT.write(f'{line} ({csn}\n')
-                            if maxcsn:
-                                LDIF_OUT.write(f"; {maxcsn}\n")
-                            if modts:
-                                LDIF_OUT.write(f"; {modts}\n")
-                            LDIF_OUT.write(")\n")
-                        else:
-                            LDIF_OUT.write(f"{line} ({csn})\n")
+            parts = []
+            if self.workers > 1:
+                parts = _cl_ldif_boundaries(self.file_path, self.workers, self.chunk_size)
+            if len(parts) < 2:
+                for text in self.records(mode):
+                    LDIF_OUT.write(text)
+                    count += 1
+                return count
+
+            part_paths = [f"{self.output_file}.part{i}" for i in range(0, len(parts))]
+            try:
+                with ProcessPoolExecutor(max_workers=len(parts)) as executor:
+                    futures = [executor.submit(_cl_ldif_process_part, self.file_path, part_path, mode,
+                                               start, end, self.min_csn, self.max_csn, self.rids,
+                                               self.chunk_size)
+                               for (part_path, (start, end)) in zip(part_paths, parts)]
+                    count = sum(f.result() for f in futures)
+                LDIF_OUT.flush()
+                for part_path in part_paths:
+                    with open(part_path, 'r') as part:
+                        shutil.copyfileobj(part, LDIF_OUT)
+            finally:
+                for part_path in part_paths:
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+        return count
+
+    def grep_csn(self):
+        """Grep and interpret CSNs
+
+        :returns: The number of records processed
+        """
+        return self._run('grep_csn')
 
     def decode(self):
         """Decode the changelog
 
-        :param file: LDIF file path
-        :type file: str
+        :returns: The number of records processed
         """
-        with open(self.output_file, 'w') as LDIF_OUT:
-            LDIF_OUT.write(f"# LDIF File: {self.output_file}\n")
-            with open(self.file_path) as LDIF_IN:
-                encoded_str = ""
-                for line in LDIF_IN.readlines():
-                    if line.startswith("change::") or line.startswith("changes::"):
-                        LDIF_OUT.write("change::\n")
-                        try:
-                            encoded_str = line.split("change:: ")[1]
-                        except IndexError:
-                            encoded_str = line.split("changes:: ")[1]
-                        continue
-                    if not encoded_str:
-                        LDIF_OUT.write(line.split('\n')[0] + "\n")
-                        continue
-                    if line == "\n":
-                        decoded_str = ensure_str(base64.b64decode(encoded_str))
-                        LDIF_OUT.write(decoded_str + "\n")
-                        encoded_str = ""
-                        continue
-                    encoded_str += line
+        return self._run('decode')
 
     def process(self):
-        # Process the file as is, just log it into the new custom file
-        with open(self.output_file, 'w') as LDIF_OUT:
-            LDIF_OUT.write(f"# LDIF File: {self.output_file}")
-            with open(self.file_path) as LDIF_IN:
-                for line in LDIF_IN.readlines():
-                    LDIF_OUT.write(line)
+        """Copy the changelog records that pass the filters
+
+        :returns: The number of records processed
+        """
+        return self._run('process')
 
 
 class Changelog(DSLdapObject):
@@ -1212,13 +1431,20 @@ class Replica(DSLdapObject):
     def _lint_agmts_status(self):
         replicas = Replicas(self._instance).list()
         for replica in replicas:
-            agmts = replica.get_agreements().list()
+            agmts = replica.get_agreements().list(snapshot=True)
             suffix = replica.get_suffix()
-            for agmt in agmts:
+            try:
+                maxcsns = replica._get_agmts_maxcsns(agmts)
+            except ldap.LDAPError as e:
+                # Report it on each agreement, like a failure to read one would be
+                maxcsns = [e] * len(agmts)
+            for (agmt, agmt_maxcsns) in zip(agmts, maxcsns):
+                agmt_name = agmt.get_name()
                 try:
-                    status = json.loads(agmt.get_agmt_status(return_json=True))
+                    if isinstance(agmt_maxcsns, ldap.LDAPError):
+                        raise agmt_maxcsns
+                    status = json.loads(agmt._format_agmt_status(*agmt_maxcsns, return_json=True))
                     if "Not in Synchronization" in status['msg'] and not "Replication still in progress" in status['reason']:
-                        agmt_name = agmt.get_name()
                         if status['state'] == 'red':
                             # Serious error
                             if "Consumer can not be contacted" in status['reason']:
@@ -1718,16 +1944,108 @@ class Replica(DSLdapObject):
     def status(self, binddn=None, bindpw=None, winsync=False):
         """Get a list of the status for every agreement
         """
-        agmtList = []
-        agmts = Agreements(self._instance, self.dn, winsync=winsync).list()
-        for agmt in agmts:
-            raw_status = agmt.status(binddn=binddn, bindpw=bindpw, use_json=True, winsync=winsync)
-            agmtList.append(json.loads(raw_status))
+        agmtList = [json.loads(raw_status) for raw_status in
+                    self.get_agmts_status(binddn=binddn, bindpw=bindpw, use_json=True, winsync=winsync)]
 
         # sort the list of agreements by the lag time
         sortedList = sorted(agmtList, key=itemgetter('replication-lag-time'))
         return(sortedList)
 
+    def _get_agmts_maxcsns(self, agmts, binddn=None, bindpw=None, get_credentials=None, conn_pool=None):
+        """Get the agreement and consumer maxcsns of agreements of this replica.
+        The supplier RUV is read once, and the RUV of each consumer once, over
+        a connection of the pool.
+
+        :param agmts: Agreements of this replica
+        :type agmts: list of lib389.agreement.Agreement
+        :param binddn: The bind DN to use for the consumers, by default the one of the instance
+        :type binddn: str
+        :param bindpw: Password for the bind DN
+        :type bindpw: str
+        :param get_credentials: A callback returning the credentials for a consumer host and port,
+                                {"binddn": ..., "bindpw": ...}, instead of binddn and bindpw
+        :type get_credentials: function
+        :param conn_pool: Reuse the consumer connections from this pool
+        :type conn_pool: ReplicationConnectionPool
+        :returns: A list of (agreement maxcsn, consumer maxcsn), one per
+                  agreement, like Agreement._get_maxcsns returns
+        :raises: ldap.LDAPError - if the supplier RUV can't be read, or the bind to a consumer fails
+        """
+        if not agmts:
+            return []
+        rid = self.get_rid()
+        agmt_maxcsns = self.get_ruv_agmt_maxcsns()
+        pool = conn_pool
+        if pool is None:
+            pool = ReplicationConnectionPool(verbose=self._instance.verbose, logger=self._log)
+        # (host, port, binddn) -> the nsds50ruv values of the consumer, or None
+        ruvs = {}
+        maxcsns = []
+        try:
+            for agmt in agmts:
+                agmt_maxcsn = _find_agmt_maxcsn(agmt.get_attr_val_utf8('cn'), agmt_maxcsns)
+                if agmt_maxcsn is None:
+                    maxcsns.append((None, None))
+                    continue
+                host = agmt.get_attr_val_utf8(AGMT_HOST)
+                port = agmt.get_attr_val_utf8(AGMT_PORT)
+                if get_credentials is not None:
+                    credentials = get_credentials(host.lower(), port.lower())
+                    (agmt_binddn, agmt_bindpw) = (credentials["binddn"], credentials["bindpw"])
+                else:
+                    (agmt_binddn, agmt_bindpw) = (binddn, bindpw)
+                if agmt_binddn is None:
+                    agmt_binddn = self._instance.binddn
+                    agmt_bindpw = self._instance.bindpw
+                key = (ensure_str(host).lower(), str(port), agmt_binddn)
+                if key not in ruvs:
+                    ruvs[key] = agmt._read_consumer_ruv(binddn=agmt_binddn, bindpw=agmt_bindpw, conn_pool=pool)
+                if ruvs[key] is None:
+                    maxcsns.append((agmt_maxcsn, "Unavailable"))
+                else:
+                    maxcsns.append((agmt_maxcsn, _find_consumer_maxcsn(rid, ruvs[key])))
+        finally:
+            if conn_pool is None:
+                pool.close()
+        return maxcsns
+
+    def get_agmts_status(self, binddn=None, bindpw=None, use_json=False, winsync=False, get_credentials=None,
+                         conn_pool=None, agmts=None):
+        """Get the status of all the agreements of this replica, with a fixed
+        number of searches: one for the agreements, one for the supplier RUV,
+        and one for the RUV of each consumer.
+
+        :param binddn: The bind DN to use for the consumers, by default the one of the instance
+        :type binddn: str
+        :param bindpw: Password for the bind DN
+        :type bindpw: str
+        :param use_json: Return each status in a JSON object
+        :type use_json: bool
+        :param winsync: Get the winsync agreements instead
+        :type winsync: bool
+        :param get_credentials: A callback returning the credentials for a consumer host and port,
+                                {"binddn": ..., "bindpw": ...}, instead of binddn and bindpw
+        :type get_credentials: function
+        :param conn_pool: Reuse the consumer connections from this pool
+        :type conn_pool: ReplicationConnectionPool
+        :param agmts: The agreements, as listed with snapshot=True, to not list them again
+        :type agmts: list of lib389.agreement.Agreement
+        :returns: A list of status, as Agreement.status returns, in the order of the agreements
+        :raises: ValueError - if the supplier RUV can't be read
+        """
+        if agmts is None:
+            agmts = self.get_agreements(winsync=winsync).list(snapshot=True)
+        if winsync:
+            return [agmt._status(None, winsync=True, use_json=use_json) for agmt in agmts]
+        try:
+            maxcsns = self._get_agmts_maxcsns(agmts, binddn=binddn, bindpw=bindpw,
+                                              get_credentials=get_credentials, conn_pool=conn_pool)
+        except ldap.INVALID_CREDENTIALS as e:
+            raise(e)
+        except ldap.LDAPError as e:
+            raise ValueError("Unable to get lag time: " + str(e))
+        return [agmt._status(agmt_maxcsns, use_json=use_json) for (agmt, agmt_maxcsns) in zip(agmts, maxcsns)]
+
     def get_tombstone_count(self):
         """Get the number of tombstones
         """
@@ -1768,7 +2086,8 @@ class Replicas(DSLdapObjects):
             replica._populate_suffix()
         return replica
 
-    def process_and_dump_changelog(self, replica_root, output_file, csn_only=False, preserve_ldif_done=False, decode=False):
+    def process_and_dump_changelog(self, replica_root, output_file, csn_only=False, preserve_ldif_done=False, decode=False,
+                                   min_csn=None, max_csn=None, rids=None, workers=1):
         """Dump and decode Directory Server replication changelog
 
         :param replica_root: Replica suffix that needs to be processed
@@ -1781,6 +2100,14 @@ class Replicas(DSLdapObjects):
         :type preserve_ldif_done: bool
         :param decode: Decode any base64 values from the changelog
         :type log: bool
+        :param min_csn: Only keep the changes from this CSN
+        :type min_csn: str
+        :param max_csn: Only keep the changes up to this CSN
+        :type max_csn: str
+        :param rids: Only keep the changes made on these replica ids
+        :type rids: list of int
+        :param workers: How many processes to split the processing over
+        :type workers: int
         """
 
         # Dump the changelog for the replica
@@ -1797,7 +2124,8 @@ class Replicas(DSLdapObjects):
             raise ValueError("The changelog to LDIF task (CL2LDIF) did not complete in time")
 
         # Decode the dumped changelog if we are using a non default location
-        cl_ldif = ChangelogLDIF(file_path, output_file=output_file)
+        cl_ldif = ChangelogLDIF(file_path, output_file=output_file, min_csn=min_csn, max_csn=max_csn,
+                                rids=rids, workers=workers)
         if csn_only:
             cl_ldif.grep_csn()
         elif decode:
@@ -2041,6 +2369,15 @@ class ReplicationManager(object):
         Once complete the bootstrap agreement is removed, and the service
         accounts now exist on both ends allowing the join process to continue.
 
+        Internal Only.
+        """
+        (temp_agmt, brm) = self._begin_bootstrap(from_replica, to_replica, to_instance)
+        self._end_bootstrap(to_replica, to_instance, temp_agmt, brm)
+
+    def _begin_bootstrap(self, from_replica, to_replica, to_instance):
+        """Start the bootstrap of _bootstrap_replica, without waiting for
+        its total init to complete, so that several can run at once.
+
         Internal Only.
         """
         repl_manager_password = password_generate()
@@ -2072,6 +2409,14 @@ class ReplicationManager(object):
         })
         # Do a replica refresh.
         temp_agmt.begin_reinit()
+        return (temp_agmt, brm)
+
+    def _end_bootstrap(self, to_replica, to_instance, temp_agmt, brm):
+        """Wait for a bootstrap started by _begin_bootstrap, then remove its
+        temporary agreement and replication manager.
+
+        Internal Only.
+        """
         (done, error) = temp_agmt.wait_reinit()
         assert done is True
         assert error is False
@@ -2094,15 +2439,21 @@ class ReplicationManager(object):
         :param to_instance: An instance to join to the topology.
         :type to_instance: lib389.DirSrv
         """
-        # Is the to_instance already a replica of the suffix?
-        to_replicas = Replicas(to_instance)
-        try:
-            to_r = to_replicas.get(self._suffix)
-            self._log.warning("{} is already a replica for this suffix".format(to_instance.serverid))
-            return
-        except ldap.NO_SUCH_OBJECT:
-            pass
+        self.join_masters(from_instance, [to_instance])
+
+    def join_masters(self, from_instance, to_instances):
+        """Join several new masters in MMR to this instance. This is
+        join_master for each of the to_instances, but the total inits
+        from "from instance" run at once, and the replication is tested
+        once for all of them.
+
+        This can be conducted from any master in the topology as "from" master.
 
+        :param from_instance: An instance already in the topology.
+        :type from_instance: lib389.DirSrv
+        :param to_instances: The instances to join to the topology.
+        :type to_instances: list[lib389.DirSrv]
+        """
         # Make sure we replicate this suffix too ...
         from_replicas = Replicas(from_instance)
         from_r = from_replicas.get(self._suffix)
@@ -2110,47 +2461,67 @@ class ReplicationManager(object):
         # Ensure we have a cl
         # self._ensure_changelog(to_instance)
 
-        # Create our credentials
-        repl_dn = self._create_service_account(from_instance, to_instance)
-
-        # Find the ruv on from_instance
-        ruv = from_r.get_ruv()
+        joining = []
+        # The rids of this batch are not in the ruv until it replicated
+        batch_rids = []
+        for to_instance in to_instances:
+            # Is the to_instance already a replica of the suffix?
+            to_replicas = Replicas(to_instance)
+            try:
+                to_r = to_replicas.get(self._suffix)
+                self._log.warning("{} is already a replica for this suffix".format(to_instance.serverid))
+                continue
+            except ldap.NO_SUCH_OBJECT:
+                pass
 
-        # Get a free rid
-        rid = ruv.alloc_rid()
-        assert rid not in self._alloc_rids
-        self._alloc_rids.append(rid)
+            # Create our credentials
+            repl_dn = self._create_service_account(from_instance, to_instance)
+
+            # Find the ruv on from_instance
+            ruv = from_r.get_ruv()
+
+            # Get a free rid
+            rid = ruv.alloc_rid(exclude=batch_rids)
+            assert rid not in self._alloc_rids
+            self._alloc_rids.append(rid)
+            batch_rids.append(rid)
+
+            self._log.debug("Allocating rid %s" % rid)
+            # Create replica on to_instance, with bootstrap details.
+            to_r = to_replicas.create(properties={
+                'cn': 'replica',
+                'nsDS5ReplicaRoot': self._suffix,
+                'nsDS5ReplicaId': rid,
+                'nsDS5Flags': '1',
+                'nsDS5ReplicaType': '3',
+                'nsds5replicabinddngroupcheckinterval': '0'
+            })
 
-        self._log.debug("Allocating rid %s" % rid)
-        # Create replica on to_instance, with bootstrap details.
-        to_r = to_replicas.create(properties={
-            'cn': 'replica',
-            'nsDS5ReplicaRoot': self._suffix,
-            'nsDS5ReplicaId': rid,
-            'nsDS5Flags': '1',
-            'nsDS5ReplicaType': '3',
-            'nsds5replicabinddngroupcheckinterval': '0'
-        })
+            # WARNING: You need to create passwords and agmts BEFORE you tot_init!
 
-        # WARNING: You need to create passwords and agmts BEFORE you tot_init!
+            # start the _bootstrap. This creates a temporary repl manager
+            # to allow the tot_init to occur.
+            bootstrap = self._begin_bootstrap(from_r, to_r, to_instance)
+            joining.append((to_instance, to_r, repl_dn, bootstrap))
 
-        # perform the _bootstrap. This creates a temporary repl manager
-        # to allow the tot_init to occur.
-        self._bootstrap_replica(from_r, to_r, to_instance)
+        for (to_instance, to_r, repl_dn, (temp_agmt, brm)) in joining:
+            self._end_bootstrap(to_r, to_instance, temp_agmt, brm)
 
-        # Now put in an agreement from to -> from
-        # both ends.
-        self.ensure_agreement(from_instance, to_instance)
-        self.ensure_agreement(to_instance, from_instance, init=True)
+            # Now put in an agreement from to -> from
+            # both ends.
+            self.ensure_agreement(from_instance, to_instance)
+            self.ensure_agreement(to_instance, from_instance, init=True)
 
-        # Now fix our replica credentials from -> to
-        to_r.set('nsDS5ReplicaBindDNGroup', repl_dn)
+            # Now fix our replica credentials from -> to
+            to_r.set('nsDS5ReplicaBindDNGroup', repl_dn)
 
         # Now finally test it ...
-        self.test_replication(from_instance, to_instance)
-        self.test_replication(to_instance, from_instance)
-        # Done!
-        self._log.info("SUCCESS: joined master from %s to %s" % (from_instance.ldapuri, to_instance.ldapuri))
+        joined = [to_instance for (to_instance, _, _, _) in joining]
+        self.wait_for_convergence(from_instance, joined)
+        for to_instance in joined:
+            self.test_replication(to_instance, from_instance)
+            # Done!
+            self._log.info("SUCCESS: joined master from %s to %s" % (from_instance.ldapuri, to_instance.ldapuri))
 
     def join_hub(self, from_instance, to_instance):
         """Join a new hub to this instance. This will complete
@@ -2222,50 +2593,73 @@ class ReplicationManager(object):
         :param to_instance: An instance to join to the topology.
         :type to_instance: lib389.DirSrv
         """
-        to_replicas = Replicas(to_instance)
-        try:
-            to_r = to_replicas.get(self._suffix)
-            self._log.warning("{} is already a replica for this suffix".format(to_instance.serverid))
-            return
-        except ldap.NO_SUCH_OBJECT:
-            pass
+        self.join_consumers(from_instance, [to_instance])
+
+    def join_consumers(self, from_instance, to_instances):
+        """Join several new consumers to this instance. This is
+        join_consumer for each of the to_instances, but the total inits
+        from "from instance" run at once, and the replication is tested
+        once for all of them.
+
+        This can be conducted from any master or hub in the topology as "from" master.
 
+        :param from_instance: An instance already in the topology.
+        :type from_instance: lib389.DirSrv
+        :param to_instances: The instances to join to the topology.
+        :type to_instances: list[lib389.DirSrv]
+        """
         # Make sure we replicate this suffix too ...
         from_replicas = Replicas(from_instance)
         from_r = from_replicas.get(self._suffix)
 
-        # Create replica on to_instance, with bootstrap details.
-        to_r = to_replicas.create(properties={
-            'cn': 'replica',
-            'nsDS5ReplicaRoot': self._suffix,
-            'nsDS5ReplicaId': '65535',
-            'nsDS5Flags': '0',
-            'nsDS5ReplicaType': '2',
-            'nsds5replicabinddngroupcheckinterval': '0'
-        })
+        joining = []
+        for to_instance in to_instances:
+            to_replicas = Replicas(to_instance)
+            try:
+                to_r = to_replicas.get(self._suffix)
+                self._log.warning("{} is already a replica for this suffix".format(to_instance.serverid))
+                continue
+            except ldap.NO_SUCH_OBJECT:
+                pass
 
-        # WARNING: You need to create passwords and agmts BEFORE you tot_init!
-        # If from_instance replica isn't read-write (hub, probably), we just check it is there
-        repl_group = self._create_service_group(from_instance)
+            # Create replica on to_instance, with bootstrap details.
+            to_r = to_replicas.create(properties={
+                'cn': 'replica',
+                'nsDS5ReplicaRoot': self._suffix,
+                'nsDS5ReplicaId': '65535',
+                'nsDS5Flags': '0',
+                'nsDS5ReplicaType': '2',
+                'nsds5replicabinddngroupcheckinterval': '0'
+            })
 
-        # perform the _bootstrap. This creates a temporary repl manager
-        # to allow the tot_init to occur.
-        self._bootstrap_replica(from_r, to_r, to_instance)
+            # WARNING: You need to create passwords and agmts BEFORE you tot_init!
+            # If from_instance replica isn't read-write (hub, probably), we just check it is there
+            repl_group = self._create_service_group(from_instance)
 
-        # Now put in an agreement from to -> from
-        # both ends.
-        self.ensure_agreement(from_instance, to_instance)
+            # start the _bootstrap. This creates a temporary repl manager
+            # to allow the tot_init to occur.
+            bootstrap = self._begin_bootstrap(from_r, to_r, to_instance)
+            joining.append((to_instance, to_r, repl_group, bootstrap))
 
-        # Now fix our replica credentials from -> to
-        to_r.set('nsDS5ReplicaBindDNGroup', repl_group.dn)
+        for (to_instance, to_r, repl_group, (temp_agmt, brm)) in joining:
+            self._end_bootstrap(to_r, to_instance, temp_agmt, brm)
+
+            # Now put in an agreement from to -> from
+            # both ends.
+            self.ensure_agreement(from_instance, to_instance)
+
+            # Now fix our replica credentials from -> to
+            to_r.set('nsDS5ReplicaBindDNGroup', repl_group.dn)
 
         # Now finally test it ...
         # If from_instance replica isn't read-write (hub, probably), we will test it later
+        joined = [to_instance for (to_instance, _, _, _) in joining]
         if from_r.get_attr_val_int('nsDS5ReplicaType') == 3:
-            self.test_replication(from_instance, to_instance)
+            self.wait_for_convergence(from_instance, joined)
 
-        # Done!
-        self._log.info("SUCCESS: joined consumer from %s to %s" % (from_instance.ldapuri, to_instance.ldapuri))
+        for to_instance in joined:
+            # Done!
+            self._log.info("SUCCESS: joined consumer from %s to %s" % (from_instance.ldapuri, to_instance.ldapuri))
 
     def _get_replica_creds(self, from_instance, write_instance):
         """For the master "from_instance" create or derive the credentials
@@ -2436,6 +2830,70 @@ class ReplicationManager(object):
             agmt = agmts.get(agmt_name)
             agmt.resume()
 
+    def _wait_for_all(self, to_instances, check, timeout):
+        """Poll every instance of to_instances concurrently until check
+        returns True for it, backing off from REPL_POLL_MIN to REPL_POLL_MAX
+        seconds between two polls of the same instance.
+
+        :param to_instances: The instances to wait for
+        :type to_instances: list[lib389.DirSrv]
+        :param check: Called with an instance, returns True once it converged
+        :type check: callable
+        :param timeout: Fail after timeout seconds.
+        :type timeout: int
+        :returns: list of the instances that did not converge in time
+        """
+        deadline = time.monotonic() + timeout
+
+        def _wait_one(to_instance):
+            intervals = backoff_intervals(REPL_POLL_MIN, REPL_POLL_MAX)
+            while not check(to_instance):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                time.sleep(min(next(intervals), remaining))
+            return True
+
+        if not to_instances:
+            return []
+        if len(to_instances) == 1:
+            # No need for a thread to wait for a single instance
+            results = [_wait_one(to_instances[0])]
+        else:
+            # Each thread only uses the connection of its own instance.
+            with ThreadPoolExecutor(max_workers=len(to_instances)) as executor:
+                results = list(executor.map(_wait_one, to_instances))
+        return [inst for (inst, ok) in zip(to_instances, results) if not ok]
+
+    def wait_for_ruv_convergence(self, from_instance, to_instances, timeout=20):
+        """Wait for the in-memory ruv of 'from_instance' to be advanced past
+        on all the 'to_instances' at once. See wait_for_ruv.
+
+        :param from_instance: The instance whos state we we want to check from
+        :type from_instance: lib389.DirSrv
+        :param to_instances: The instances whos state we want to check matches from.
+        :type to_instances: list[lib389.DirSrv]
+        :param timeout: Fail after timeout seconds.
+        :type timeout: int
+
+        """
+        from_ruv = Replicas(from_instance).get(self._suffix).get_ruv()
+        to_replicas = dict((inst.ldapuri, Replicas(inst).get(self._suffix)) for inst in to_instances)
+
+        def _check(to_instance):
+            to_ruv = to_replicas[to_instance.ldapuri].get_ruv()
+            if to_ruv.is_synced(from_ruv):
+                self._log.info("SUCCESS: RUV from %s to %s is in sync" % (from_instance.ldapuri, to_instance.ldapuri))
+                return True
+            return False
+
+        failed = self._wait_for_all(to_instances, _check, timeout)
+        if failed:
+            for to_instance in failed:
+                self._log.info("FAIL: RUV from %s to %s is NOT in sync" % (from_instance.ldapuri, to_instance.ldapuri))
+            raise Exception("RUV did not sync in time!")
+        return True
+
     def wait_for_ruv(self, from_instance, to_instance, timeout=20):
         """Wait for the in-memory ruv 'from_instance' to be advanced past on
         'to_instance'. Note this does not mean the ruvs are "exact matches"
@@ -2452,54 +2910,65 @@ class ReplicationManager(object):
         :type to_instance: lib389.DirSrv
 
         """
-        from_replicas = Replicas(from_instance)
-        from_r = from_replicas.get(self._suffix)
-
-        to_replicas = Replicas(to_instance)
-        to_r = to_replicas.get(self._suffix)
+        return self.wait_for_ruv_convergence(from_instance, [to_instance], timeout)
 
-        from_ruv = from_r.get_ruv()
-
-        for i in range(0, timeout):
-            to_ruv = to_r.get_ruv()
-            if to_ruv.is_synced(from_ruv):
-                self._log.info("SUCCESS: RUV from %s to %s is in sync" % (from_instance.ldapuri, to_instance.ldapuri))
-                return True
-            time.sleep(1)
-        raise Exception("RUV did not sync in time!")
-
-    def wait_for_replication(self, from_instance, to_instance, timeout=20):
-        """Wait for a replication event to occur from instance to instance. This
-        shows some point of synchronisation has occured.
+    def wait_for_convergence(self, from_instance, to_instances, timeout=20):
+        """Wait for a replication event to occur from instance to all the
+        to_instances. A single change is made on from_instance, and all the
+        to_instances are then polled at once, so the wait lasts about as
+        long as the slowest replication path rather than the sum of them.
 
         :param from_instance: The instance whos state we we want to check from
         :type from_instance: lib389.DirSrv
-        :param to_instance: The instance whos state we want to check matches from.
-        :type to_instance: lib389.DirSrv
+        :param to_instances: The instances whos state we want to check matches from.
+        :type to_instances: list[lib389.DirSrv]
         :param timeout: Fail after timeout seconds.
         :type timeout: int
 
         """
-        # Touch something then wait_for_replication.
+        if not to_instances:
+            return True
+        # Touch something then wait for it on every instance.
         from_groups = Groups(from_instance, basedn=self._suffix, rdn=None)
-        to_groups = Groups(to_instance, basedn=self._suffix, rdn=None)
         from_group = from_groups.get('replication_managers')
-        to_group = to_groups.get('replication_managers')
+        to_groups = dict((inst.ldapuri, Groups(inst, basedn=self._suffix, rdn=None).get('replication_managers'))
+                         for inst in to_instances)
 
         change = str(uuid.uuid4())
 
         from_group.replace('description', change)
 
-        for i in range(0, timeout):
-            desc = to_group.get_attr_val_utf8('description')
+        last_seen = {}
+
+        def _check(to_instance):
+            desc = to_groups[to_instance.ldapuri].get_attr_val_utf8('description')
+            last_seen[to_instance.ldapuri] = desc
             if change == desc:
                 self._log.info("SUCCESS: Replication from %s to %s is working" % (from_instance.ldapuri, to_instance.ldapuri))
                 return True
-            self._log.info("Retry: Replication from %s to %s is NOT working (expect %s / got description=%s)" % (from_instance.ldapuri, to_instance.ldapuri, change, desc))
-            time.sleep(1)
-        self._log.info("FAIL: Replication from %s to %s is NOT working (expect %s / got description=%s)" % (from_instance.ldapuri, to_instance.ldapuri, change, desc))
-        raise Exception("Replication did not sync in time!")
+            self._log.debug("Retry: Replication from %s to %s is NOT working (expect %s / got description=%s)" % (from_instance.ldapuri, to_instance.ldapuri, change, desc))
+            return False
+
+        failed = self._wait_for_all(to_instances, _check, timeout)
+        if failed:
+            for to_instance in failed:
+                self._log.info("FAIL: Replication from %s to %s is NOT working (expect %s / got description=%s)" % (from_instance.ldapuri, to_instance.ldapuri, change, last_seen.get(to_instance.ldapuri)))
+            raise Exception("Replication did not sync in time!")
+        return True
 
+    def wait_for_replication(self, from_instance, to_instance, timeout=20):
+        """Wait for a replication event to occur from instance to instance. This
+        shows some point of synchronisation has occured.
+
+        :param from_instance: The instance whos state we we want to check from
+        :type from_instance: lib389.DirSrv
+        :param to_instance: The instance whos state we want to check matches from.
+        :type to_instance: lib389.DirSrv
+        :param timeout: Fail after timeout seconds.
+        :type timeout: int
+
+        """
+        return self.wait_for_convergence(from_instance, [to_instance], timeout)
 
     def test_replication(self, from_instance, to_instance, timeout=20):
         """Wait for a replication event to occur from instance to instance. This
@@ -2526,9 +2995,13 @@ class ReplicationManager(object):
         :type timeout: int
 
         """
-        for p in permutations(instances, 2):
-            a, b = p
-            self.test_replication(a, b, timeout)
+        # One change per master, checked on all the other masters at once.
+        # The masters are not touched concurrently, as their changes to the
+        # same marker entry would conflict with each other.
+        for a in instances:
+            others = [b for b in instances if b is not a]
+            if others:
+                self.wait_for_convergence(a, others, timeout)
 
     def get_rid(self, instance):
         """For a given master, retrieve it's RID for this suffix.
@@ -2542,29 +3015,129 @@ class ReplicationManager(object):
         return replica.get_rid()
 
 
+class ReplicationConnectionPool(object):
+    """Keep one bound connection per host, port and bind DN, so that each
+    server of a topology is connected to only once while it is examined, for
+    example during a replication report. Connections are opened on first use
+    and may be shared between threads. A failure to connect is remembered, so
+    an unreachable server is only waited for once.
+
+    :param verbose: Create the connections in verbose mode
+    :type verbose: bool
+    :param timeout: Seconds to wait to connect and for each operation, or None
+    :type timeout: int
+    :param logger: A logging interface
+    :type logger: python logging
+    """
+
+    def __init__(self, verbose=False, timeout=None, logger=None):
+        self._verbose = verbose
+        self._timeout = timeout
+        if logger is not None:
+            self._log = logger
+        else:
+            self._log = logging.getLogger(__name__)
+        # (host, port, binddn) -> DirSrv, or the LDAPError raised opening it
+        self._conns = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get(self, host, port, protocol, binddn, bindpw):
+        """Get a bound connection to a server, opening it if needed
+
+        :param host: The server host name
+        :type host: str
+        :param port: The server port
+        :type port: str
+        :param protocol: The transport, as in nsds5replicatransportinfo (ldap, ssl, ldaps or tls)
+        :type protocol: str
+        :param binddn: The bind DN
+        :type binddn: str
+        :param bindpw: The password of the bind DN
+        :type bindpw: str
+        :returns: DirSrv
+        :raises: ldap.LDAPError - if the server can't be connected to
+        """
+
+        key = (ensure_str(host).lower(), str(port), binddn)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Only the first caller for a server opens it, the others wait for it.
+        with key_lock:
+            conn = self._conns.get(key)
+            if conn is None:
+                conn = DirSrv(verbose=self._verbose)
+                args = args_instance.copy()
+                args[SER_HOST] = host
+                if protocol is not None and protocol.lower() in ("ssl", "ldaps"):
+                    args[SER_SECURE_PORT] = int(port)
+                else:
+                    args[SER_PORT] = int(port)
+                args[SER_ROOT_DN] = binddn
+                args[SER_ROOT_PW] = bindpw
+                conn.allocate(args)
+                try:
+                    conn.open(timeout=self._timeout)
+                except ldap.LDAPError as e:
+                    self._log.debug(f"Connection to {host}:{port} failed, error: {e}")
+                    conn = e
+                self._conns[key] = conn
+        if isinstance(conn, ldap.LDAPError):
+            raise conn
+        return conn
+
+    def close(self):
+        """Close all the connections of the pool"""
+        with self._lock:
+            for conn in self._conns.values():
+                if isinstance(conn, DirSrv):
+                    try:
+                        conn.close()
+                    except Exception as e:
+                        self._log.debug(f"Failed to close connection: {e}")
+            self._conns = {}
+            self._key_locks = {}
+
+
 class ReplicationMonitor(object):
     """The lib389 replication monitor. This is used to check the status
     of many instances at once.
     It also allows to monitor independent topologies and get them into
     the one combined report.
 
+    The servers of the topology are examined concurrently, and each one is
+    connected to only once per report.
+
     :param instance: A supplier or hub for replication topology monitoring
     :type instance: list of DirSrv objects
     :param logger: A logging interface
     :type logger: python logging
+    :param max_workers: The most servers to examine at the same time
+    :type max_workers: int
+    :param timeout: Seconds to wait to connect to a server and for each operation on it, or None
+    :type timeout: int
     """
 
-    def __init__(self, instance, logger=None):
+    def __init__(self, instance, logger=None, max_workers=8, timeout=None):
         self._instance = instance
         if logger is not None:
             self._log = logger
         else:
             self._log = logging.getLogger(__name__)
+        self._max_workers = max_workers
+        self._timeout = timeout
 
-    def _get_replica_status(self, instance, report_data, use_json, get_credentials=None):
+    def _get_replica_status(self, instance, report_data, use_json, get_credentials=None, conn_pool=None):
         """Load all of the status data to report
         and add new hostname:port pairs for future processing
         :type get_credentials: function
+        :type conn_pool: ReplicationConnectionPool
         """
 
         replicas_status = []
@@ -2573,28 +3146,22 @@ class ReplicationMonitor(object):
             replica_id = replica.get_rid()
             replica_root = replica.get_suffix()
             replica_maxcsn = replica.get_maxcsn()
-            agmts_status = []
-            agmts = replica.get_agreements()
-            for agmt in agmts.list():
+            # One search for all the agreements, served from their snapshots from now on
+            agmts = replica.get_agreements().list(snapshot=True)
+            for agmt in agmts:
                 host = agmt.get_attr_val_utf8_l("nsds5replicahost")
                 port = agmt.get_attr_val_utf8_l("nsds5replicaport")
-                if get_credentials is not None:
-                    credentials = get_credentials(host, port)
-                    binddn = credentials["binddn"]
-                    bindpw = credentials["bindpw"]
-                else:
-                    binddn = instance.binddn
-                    bindpw = instance.bindpw
                 protocol = agmt.get_attr_val_utf8_l('nsds5replicatransportinfo')
                 # Supply protocol here because we need it only for connection
                 # and agreement status is already preformatted for the user output
                 consumer = f"{host}:{port}"
                 if consumer not in report_data:
                     report_data[f"{consumer}:{protocol}"] = None
-                if use_json:
-                    agmts_status.append(json.loads(agmt.status(use_json=True, binddn=binddn, bindpw=bindpw)))
-                else:
-                    agmts_status.append(agmt.status(binddn=binddn, bindpw=bindpw))
+            agmts_status = replica.get_agmts_status(use_json=use_json, binddn=instance.binddn,
+                                                    bindpw=instance.bindpw, get_credentials=get_credentials,
+                                                    conn_pool=conn_pool, agmts=agmts)
+            if use_json:
+                agmts_status = [json.loads(status) for status in agmts_status]
             replicas_status.append({"replica_id": replica_id,
                                     "replica_root": replica_root,
                                     "replica_status": "Available",
@@ -2602,10 +3169,44 @@ class ReplicationMonitor(object):
                                     "agmts_status": agmts_status})
         return replicas_status
 
+    def _get_supplier_status(self, supplier, get_credentials, use_json, conn_pool):
+        """Connect to a server found by following the agreements, and load its
+        status data. This runs in a worker thread of generate_report.
+
+        :returns: tuple(status, discovered, connected) - the report data of the
+                  server, the new hostname:port:protocol keys its agreements point
+                  to, and if the server could be examined at all
+        """
+        discovered = {}
+        s_splitted = supplier.split(":")
+        supplier_hostname = s_splitted[0]
+        supplier_port = s_splitted[1]
+        supplier_protocol = s_splitted[2]
+
+        # The function should be defined outside and
+        # it should have all the logic for figuring out the credentials.
+        # It is done for flexibility purpuses between CLI, WebUI and lib389 API applications
+        credentials = get_credentials(supplier_hostname, supplier_port)
+        if not credentials["binddn"]:
+            return ([{"replica_status": "Unavailable - Bind DN was not specified"}], discovered, False)
+
+        # Open a connection to the consumer
+        try:
+            supplier_inst = conn_pool.get(supplier_hostname, supplier_port, supplier_protocol,
+                                          credentials["binddn"], credentials["bindpw"])
+            status = self._get_replica_status(supplier_inst, discovered, use_json, conn_pool=conn_pool)
+        except ldap.LDAPError as e:
+            self._log.debug(f"Connection to consumer ({supplier_hostname}:{supplier_port}) failed, error: {e}")
+            return ([{"replica_status": f"Unavailable - {ldap_error_desc(e)}"}], discovered, False)
+        return (status, discovered, True)
+
     def generate_report(self, get_credentials, use_json=False):
         """Generate a replication report for each supplier or hub and the instances
         that are connected with it by agreements.
 
+        The servers found at the same distance from the initial instance are
+        examined concurrently, up to max_workers at a time.
+
         :param get_credentials: A user-defined callback function with parameters (host, port) which returns
                                 a dictionary with binddn and bindpw keys -
                                 example values "cn=Directory Manager" and "password"
@@ -2614,59 +3215,45 @@ class ReplicationMonitor(object):
         """
         report_data = {}
 
-        initial_inst_key = f"{self._instance.config.get_attr_val_utf8_l('nsslapd-localhost')}:{self._instance.config.get_attr_val_utf8_l('nsslapd-port')}"
-        # Do this on an initial instance to get the agreements to other instances
-        try:
-            report_data[initial_inst_key] = self._get_replica_status(self._instance, report_data, use_json, get_credentials)
-        except ldap.LDAPError as e:
-            self._log.debug(f"Connection to consumer ({supplier_hostname}:{supplier_port}) failed, error: {e}")
-            report_data[initial_inst_key] = [{"replica_status": f"Unavailable - {e.args[0]['desc']}"}]
+        # The callback may prompt the user, so never run it from two threads at once
+        credentials_lock = threading.Lock()
+
+        def get_credentials_locked(host, port):
+            with credentials_lock:
+                return get_credentials(host, port)
 
         # Check if at least some replica report on other instances was generated
         repl_exists = False
 
-        # While we have unprocessed instances - continue
-        while True:
+        with ReplicationConnectionPool(verbose=self._instance.verbose, timeout=self._timeout,
+                                       logger=self._log) as conn_pool, \
+             ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            initial_inst_key = f"{self._instance.config.get_attr_val_utf8_l('nsslapd-localhost')}:{self._instance.config.get_attr_val_utf8_l('nsslapd-port')}"
+            # Do this on an initial instance to get the agreements to other instances
             try:
-                supplier = [host_port for host_port, processed_data in report_data.items() if processed_data is None][0]
-            except IndexError:
-                break
-
-            del report_data[supplier]
-            s_splitted = supplier.split(":")
-            supplier_hostname = s_splitted[0]
-            supplier_port = s_splitted[1]
-            supplier_protocol = s_splitted[2]
-            supplier_hostport_only = ":".join(s_splitted[:2])
-
-            # The function should be defined outside and
-            # it should have all the logic for figuring out the credentials.
-            # It is done for flexibility purpuses between CLI, WebUI and lib389 API applications
-            credentials = get_credentials(supplier_hostname, supplier_port)
-            if not credentials["binddn"]:
-                report_data[supplier_hostport_only] = [{"replica_status": "Unavailable - Bind DN was not specified"}]
-                continue
-
-            # Open a connection to the consumer
-            supplier_inst = DirSrv(verbose=self._instance.verbose)
-            args_instance[SER_HOST] = supplier_hostname
-            if supplier_protocol == "ssl" or supplier_protocol == "ldaps":
-                args_instance[SER_SECURE_PORT] = int(supplier_port)
-            else:
-                args_instance[SER_PORT] = int(supplier_port)
-            args_instance[SER_ROOT_DN] = credentials["binddn"]
-            args_instance[SER_ROOT_PW] = credentials["bindpw"]
-            args_standalone = args_instance.copy()
-            supplier_inst.allocate(args_standalone)
-            try:
-                supplier_inst.open()
+                report_data[initial_inst_key] = self._get_replica_status(self._instance, report_data, use_json,
+                                                                         get_credentials_locked, conn_pool)
             except ldap.LDAPError as e:
-                self._log.debug(f"Connection to consumer ({supplier_hostname}:{supplier_port}) failed, error: {e}")
-                report_data[supplier_hostport_only] = [{"replica_status": f"Unavailable - {e.args[0]['desc']}"}]
-                continue
-
-            report_data[supplier_hostport_only] = self._get_replica_status(supplier_inst, report_data, use_json)
-            repl_exists = True
+                self._log.debug(f"Connection to consumer ({initial_inst_key}) failed, error: {e}")
+                report_data[initial_inst_key] = [{"replica_status": f"Unavailable - {ldap_error_desc(e)}"}]
+
+            # While we have unprocessed instances - continue
+            while True:
+                suppliers = [host_port for host_port, processed_data in report_data.items() if processed_data is None]
+                if len(suppliers) == 0:
+                    break
+                futures = [(supplier, executor.submit(self._get_supplier_status, supplier, get_credentials_locked,
+                                                      use_json, conn_pool))
+                           for supplier in suppliers]
+                # Merge the results in order, so the report reads the same as a serial crawl
+                for (supplier, future) in futures:
+                    (status, discovered, connected) = future.result()
+                    del report_data[supplier]
+                    for consumer in discovered:
+                        if consumer.rsplit(":", 1)[0] not in report_data:
+                            report_data[consumer] = None
+                    report_data[":".join(supplier.split(":")[:2])] = status
+                    repl_exists = repl_exists or connected
 
         # Get rid of the repeated items
         report_data_parsed = {}
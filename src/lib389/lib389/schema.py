@@ -10,6 +10,7 @@
    You will access this from:
    schema = Schema(instance)
 """
+import copy
 import glob
 import ldap
 import ldif
@@ -67,6 +68,167 @@ ATTR_SYNTAXES = {"1.3.6.1.4.1.1466.115.121.1.5": "Binary",
 
 X_ORIGIN_REGEX = r'\'(.*?)\''
 
+SCHEMA_MODELS = (ObjectClass, AttributeType, MatchingRule)
+
+
+class SchemaCache(object):
+    """A parsed copy of the server schema. The definitions are indexed by
+    their lower case names, aliases and OID, and the complete must and may
+    attribute sets of each objectClass, including the ones inherited from its
+    superiors, are computed once. The cache is valid for as long as the schema
+    CSN does not change, see Schema.get_cache.
+
+    :param csn: The nsSchemaCSN of the schema the definitions were read from
+    :type csn: str
+    :param definitions: The definitions by schema attribute name, like 'objectClasses'
+    :type definitions: dict
+    """
+
+    def __init__(self, csn, definitions):
+        self.csn = csn
+        # model -> [(definition, model object)], sorted like Schema lists them
+        self._defs = {}
+        # model -> lower case name or oid -> [(definition, model object)]
+        self._index = {}
+        for object_model in SCHEMA_MODELS:
+            defs = [(d, object_model(d)) for d in definitions.get(object_model.schema_attribute, [])]
+            defs.sort(key=lambda d: d[1].names)
+            index = {}
+            for d in defs:
+                keys = set(name.lower() for name in d[1].names)
+                if d[1].oid:
+                    keys.add(d[1].oid.lower())
+                for key in keys:
+                    index.setdefault(key, []).append(d)
+            self._defs[object_model] = defs
+            self._index[object_model] = index
+
+        # Lower case attribute name, as written in the objectClasses, to the
+        # objectClasses that directly must or may have it.
+        self._oc_by_must = {}
+        self._oc_by_may = {}
+        for (_, oc) in self._defs[ObjectClass]:
+            for name in oc.must:
+                self._oc_by_must.setdefault(name.lower(), []).append(oc)
+            for name in oc.may:
+                self._oc_by_may.setdefault(name.lower(), []).append(oc)
+
+        # id(objectClass) -> (must, may) closures
+        self._closures = {}
+        for (_, oc) in self._defs[ObjectClass]:
+            self._get_closure(oc, set())
+
+    def _get_closure(self, oc, seen):
+        """Return the must and may attribute names of an objectClass and of
+        all its superiors, resolved to the primary attribute names.
+        """
+        closure = self._closures.get(id(oc))
+        if closure is not None:
+            return closure
+        must = set(self.resolve(name) for name in oc.must)
+        may = set(self.resolve(name) for name in oc.may)
+        # seen holds the objectClasses being walked, to break loops of superiors
+        seen.add(id(oc))
+        for sup_name in oc.sup:
+            sup = self.get(sup_name, ObjectClass)
+            if sup is None or id(sup) in seen:
+                continue
+            (sup_must, sup_may) = self._get_closure(sup, seen)
+            must |= sup_must
+            may |= sup_may
+        seen.discard(id(oc))
+        closure = (frozenset(must), frozenset(may - must))
+        self._closures[id(oc)] = closure
+        return closure
+
+    def _lookup(self, name, object_model):
+        """Return the (definition, model object) for a name, alias or oid,
+        or None if there is no such definition or it is ambiguous.
+        """
+        defs = self._index[object_model].get(name.lower(), [])
+        if len(defs) != 1:
+            return None
+        return defs[0]
+
+    def get_definitions(self, object_model):
+        """Return the (definition, model object) tuples of a schema model,
+        sorted by names. The model objects must not be modified.
+        """
+        return self._defs[object_model]
+
+    def get(self, name, object_model):
+        """Return the model object for a name, alias or oid, or None. The
+        model object must not be modified.
+
+        :param name: A name, alias or oid of the definition
+        :type name: str
+        :param object_model: ObjectClass, AttributeType or MatchingRule
+        :type object_model: ldap.schema.models class
+        """
+        found = self._lookup(name, object_model)
+        return found[1] if found is not None else None
+
+    def get_by_oid(self, oid, object_model):
+        """Return all the model objects that have an oid
+
+        :param oid: The oid of the definitions
+        :type oid: str
+        :param object_model: ObjectClass, AttributeType or MatchingRule
+        :type object_model: ldap.schema.models class
+        """
+        if not oid:
+            return []
+        return [obj for (_, obj) in self._index[object_model].get(oid.lower(), []) if obj.oid == oid]
+
+    def resolve(self, name):
+        """Return the primary name of an attribute type from any of its names
+        or its oid. Unknown attributes are returned in lower case.
+
+        :param name: A name, alias or oid of the attribute type
+        :type name: str
+        """
+        attr = self.get(name, AttributeType)
+        if attr is None or not attr.names:
+            return name.lower()
+        return attr.names[0]
+
+    def get_must(self, objectclassname):
+        """Return the primary names of the attributes an objectClass must
+        have, including the ones of its superiors.
+
+        :param objectclassname: A name, alias or oid of the objectClass
+        :type objectclassname: str
+        :returns: frozenset of str, or None if the objectClass does not exist
+        """
+        oc = self.get(objectclassname, ObjectClass)
+        return self._closures[id(oc)][0] if oc is not None else None
+
+    def get_may(self, objectclassname):
+        """Return the primary names of the attributes an objectClass may
+        have, including the ones of its superiors, except the ones it must have.
+
+        :param objectclassname: A name, alias or oid of the objectClass
+        :type objectclassname: str
+        :returns: frozenset of str, or None if the objectClass does not exist
+        """
+        oc = self.get(objectclassname, ObjectClass)
+        return self._closures[id(oc)][1] if oc is not None else None
+
+    def get_objectclasses_with(self, attr):
+        """Return the objectClasses that directly list an attribute type,
+        under any of its names, in their must and may attributes.
+
+        :param attr: The attribute type model object
+        :type attr: ldap.schema.models.AttributeType
+        :returns: (must, may) lists of ldap.schema.models.ObjectClass
+        """
+        must = []
+        may = []
+        for name in attr.names:
+            must.extend(self._oc_by_must.get(name.lower(), []))
+            may.extend(self._oc_by_may.get(name.lower(), []))
+        return must, may
+
 
 class Schema(DSLdapObject):
     """An object that represents the schema entry
@@ -116,71 +278,84 @@ class Schema(DSLdapObject):
             result = ATTR_SYNTAXES
         return result
 
+    def get_cache(self):
+        """Return the parsed and indexed schema of the instance. It is read
+        again from the server only when the schema CSN has changed.
+
+        :returns: SchemaCache
+        """
+        cache = self._instance._schema_cache
+        csn = self.get_schema_csn()
+        if cache is None or csn is None or cache.csn != csn:
+            attrs = ['nsSchemaCSN'] + [m.schema_attribute for m in SCHEMA_MODELS]
+            vals = self.get_attrs_vals_utf8(attrs)
+            csn = vals['nsSchemaCSN'][0] if vals['nsSchemaCSN'] else None
+            cache = SchemaCache(csn, vals)
+            self._instance._schema_cache = cache
+        return cache
+
+    @staticmethod
+    def _schema_object_to_json(definition, schema_object):
+        obj_i = dict(vars(schema_object))
+        if len(obj_i["names"]) == 1:
+            obj_i['name'] = obj_i['names'][0].lower()
+            obj_i['aliases'] = None
+        elif len(obj_i["names"]) > 1:
+            obj_i['name'] = obj_i['names'][0].lower()
+            obj_i['aliases'] = obj_i['names'][1:]
+        else:
+            obj_i['name'] = ""
+
+        # Temporary workaround for X-ORIGIN in ObjectClass objects.
+        # It should be removed after https://github.com/python-ldap/python-ldap/pull/247 is merged
+        if " X-ORIGIN " in definition:
+            remainder = definition.split(" X-ORIGIN ")[1]
+            if remainder[:1] == "(":
+                # Have multiple values
+                end = remainder.rfind(')')
+                vals = remainder[1:end]
+                vals = re.findall(X_ORIGIN_REGEX, vals)
+                # For now use the first value, but this should be a set (another bug in python-ldap)
+                obj_i['x_origin'] = vals[0]
+            else:
+                # Single X-ORIGIN value
+                obj_i['x_origin'] = definition.split(" X-ORIGIN ")[1].split("'")[1]
+
+        # Ensure that the string values are in list so we can use React filter component with it
+        for key, value in obj_i.items():
+            if isinstance(value, str):
+                obj_i[key] = (value, )
+        return obj_i
+
     def _get_schema_objects(self, object_model, json=False):
         """Get all the schema objects for a specific model: Attribute, Objectclass,
         or Matchingreule.
         """
-        attr_name = self._get_attr_name_by_model(object_model)
-        results = self.get_attr_vals_utf8(attr_name)
+        self._get_attr_name_by_model(object_model)
+        definitions = self.get_cache().get_definitions(object_model)
 
         if json:
-            object_insts = []
-            for obj in results:
-                obj_i = vars(object_model(obj))
-                if len(obj_i["names"]) == 1:
-                    obj_i['name'] = obj_i['names'][0].lower()
-                    obj_i['aliases'] = None
-                elif len(obj_i["names"]) > 1:
-                    obj_i['name'] = obj_i['names'][0].lower()
-                    obj_i['aliases'] = obj_i['names'][1:]
-                else:
-                    obj_i['name'] = ""
-
-                # Temporary workaround for X-ORIGIN in ObjectClass objects.
-                # It should be removed after https://github.com/python-ldap/python-ldap/pull/247 is merged
-                if " X-ORIGIN " in obj and obj_i['names'] == vars(object_model(obj))['names']:
-                    remainder = obj.split(" X-ORIGIN ")[1]
-                    if remainder[:1] == "(":
-                        # Have multiple values
-                        end = remainder.rfind(')')
-                        vals = remainder[1:end]
-                        vals = re.findall(X_ORIGIN_REGEX, vals)
-                        # For now use the first value, but this should be a set (another bug in python-ldap)
-                        obj_i['x_origin'] = vals[0]
-                    else:
-                        # Single X-ORIGIN value
-                        obj_i['x_origin'] = obj.split(" X-ORIGIN ")[1].split("'")[1]
-                object_insts.append(obj_i)
-
+            object_insts = [self._schema_object_to_json(d, obj_i) for (d, obj_i) in definitions]
             object_insts = sorted(object_insts, key=itemgetter('name'))
-            # Ensure that the string values are in list so we can use React filter component with it
-            for obj_i in object_insts:
-                for key, value in obj_i.items():
-                    if isinstance(value, str):
-                        obj_i[key] = (value, )
-
             return {'type': 'list', 'items': object_insts}
         else:
-            object_insts = [object_model(obj_i) for obj_i in results]
-            return sorted(object_insts, key=lambda x: x.names, reverse=False)
+            # The cached objects are shared, give the caller its own copies
+            return [copy.copy(obj_i) for (_, obj_i) in definitions]
 
     def _get_schema_object(self, name, object_model, json=False):
-        objects = self._get_schema_objects(object_model, json=json)
-        if json:
-            schema_object = [obj_i for obj_i in objects["items"] if name.lower() in
-                             list(map(str.lower, obj_i["names"]))]
-        else:
-            schema_object = [obj_i for obj_i in objects if name.lower() in
-                             list(map(str.lower, obj_i.names))]
+        self._get_attr_name_by_model(object_model)
+        found = self.get_cache()._lookup(name, object_model)
 
-        if len(schema_object) != 1:
+        if found is None:
             # This is an error.
             if json:
                 raise ValueError('Could not find: %s' % name)
             else:
                 return None
 
-        return schema_object[0]
+        if json:
+            return self._schema_object_to_json(*found)
+        return copy.copy(found[1])
 
     def _add_schema_object(self, parameters, object_model):
         attr_name = self._get_attr_name_by_model(object_model)
@@ -264,6 +439,8 @@ class Schema(DSLdapObject):
             task_properties['schemadir'] = schema_dir
 
         task.create(properties=task_properties)
+        # Reloading the schema files does not always change the schema CSN
+        self._instance._schema_cache = None
 
         return task
 
@@ -462,32 +639,17 @@ class Schema(DSLdapObject):
         """
 
         # First, get the attribute that matches name. We need to consider
-        # alternate names. There is no way to search this, so we have to
-        # filter our set of all attribute types.
+        # alternate names, which the schema cache indexes.
         attributetype = self._get_schema_object(attributetypename, AttributeType, json=json)
-        objectclasses = self.get_objectclasses()
-
-        # Get the primary name of this attribute
-        if json:
-            attributetypenames = attributetype["names"]
-        else:
-            attributetypenames = attributetype.names
-
-        # Build a set if they have may.
-        may = []
-        for attributetypename in attributetypenames:
-            may.extend([oc for oc in objectclasses if attributetypename.lower() in
-                        list(map(str.lower, oc.may))])
-        # Build a set if they have must.
-        must = []
-        for attributetypename in attributetypenames:
-            must.extend([oc for oc in objectclasses if attributetypename.lower() in
-                         list(map(str.lower, oc.must))])
+        if attributetype is None:
+            return None
+        cache = self.get_cache()
+        (must, may) = cache.get_objectclasses_with(cache.get(attributetypename, AttributeType))
 
         if json:
             # convert Objectclass class to dict, then sort each list
-            may = [vars(oc) for oc in may]
-            must = [vars(oc) for oc in must]
+            may = [dict(vars(oc)) for oc in may]
+            must = [dict(vars(oc)) for oc in must]
             # Add normalized 'name' for sorting
             for oc in may:
                 oc['name'] = oc['names'][0]
@@ -501,7 +663,7 @@ class Schema(DSLdapObject):
                       'must': must}
             return result
         else:
-            return str(attributetype), may, must
+            return str(attributetype), [copy.copy(oc) for oc in may], [copy.copy(oc) for oc in must]
 
     def validate_syntax(self, basedn, _filter=None):
         """Create a validate syntax task
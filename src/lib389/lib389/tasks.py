@@ -9,10 +9,12 @@
 import time
 import os.path
 import ldap
+import ldap.dn
+from ldap import filter as ldap_filter
 from datetime import datetime
 from lib389 import Entry
 from lib389._mapped_object import DSLdapObject
-from lib389.utils import ensure_str
+from lib389.utils import ensure_str, normalizeDN, backoff_intervals
 from lib389.exceptions import Error
 from lib389._constants import *
 from lib389.properties import (
@@ -20,6 +22,79 @@ from lib389.properties import (
         TASK_TOMB_STRIP
         )
 
+# Everything needed to know the state of a task, read in a single search
+TASK_STATUS_ATTRS = ['nsTaskStatus', 'nsTaskExitCode', 'nsTaskLog', 'nsTaskWarning']
+# Bounds of the interval between polls when waiting for tasks, in seconds
+TASK_POLL_MIN = 0.05
+TASK_POLL_MAX = 2
+# How many tasks to read in one search when waiting for many tasks
+TASK_POLL_BATCH = 100
+
+
+def _poll_tasks(tasks):
+    """Read the status of the tasks, with one search per batch of tasks on
+    the same instance, and return the ones that have not completed.
+    """
+    pending = []
+    by_instance = {}
+    for task in tasks:
+        rdn = ldap.dn.str2dn(task.dn)[0][0]
+        if rdn[0].lower() == 'cn' and normalizeDN(task.dn).endswith(normalizeDN(DN_TASKS)):
+            by_instance.setdefault(id(task._instance), (task._instance, []))[1].append((rdn[1], task))
+        elif not task.is_complete():
+            pending.append(task)
+
+    for (instance, named_tasks) in by_instance.values():
+        for i in range(0, len(named_tasks), TASK_POLL_BATCH):
+            batch = named_tasks[i:i + TASK_POLL_BATCH]
+            if len(batch) == 1:
+                # A base search is cheaper than searching the tasks tree.
+                if not batch[0][1].is_complete():
+                    pending.append(batch[0][1])
+                continue
+            filterstr = '(|%s)' % ''.join('(cn=%s)' % ldap_filter.escape_filter_chars(cn) for (cn, task) in batch)
+            try:
+                entries = instance.search_ext_s(DN_TASKS, ldap.SCOPE_SUBTREE, filterstr,
+                                                attrlist=TASK_STATUS_ATTRS, escapehatch='i am sure')
+            except ldap.NO_SUCH_OBJECT:
+                entries = []
+            found = dict((normalizeDN(e.dn), e) for e in entries)
+            for (cn, task) in batch:
+                if not task._set_status(found.get(normalizeDN(task.dn))):
+                    pending.append(task)
+    return pending
+
+
+def wait_for_tasks(tasks, timeout=120):
+    """Wait for many tasks at once, without a thread per task. Each poll reads
+    the status of all the outstanding tasks of an instance in one search, and
+    the interval between polls backs off from TASK_POLL_MIN to TASK_POLL_MAX
+    seconds, so short tasks return quickly and long ones are not polled hard.
+
+    :param tasks: The tasks to wait for, possibly on several instances
+    :type tasks: list of Task
+    :param timeout: Seconds to wait, or None to wait forever
+    :type timeout: int
+    :returns: The tasks that did not complete in time
+    """
+
+    pending = list(tasks)
+    deadline = None
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+    intervals = backoff_intervals(TASK_POLL_MIN, TASK_POLL_MAX)
+    while True:
+        pending = _poll_tasks(pending)
+        if len(pending) == 0:
+            return []
+        interval = next(intervals)
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return pending
+            interval = min(interval, remaining)
+        time.sleep(interval)
+
 
 class Task(DSLdapObject):
     """A single instance of a task entry
@@ -39,27 +114,45 @@ class Task(DSLdapObject):
         self._exit_code = None
         self._task_log = ""
         self._task_warn = None
+        self._task_status = None
 
     def status(self):
         """Return the decoded status of the task
         """
         return self.get_attr_val_utf8('nsTaskStatus')
 
-    def is_complete(self):
-        """Return True if task is complete, else False."""
+    def _set_status(self, entry):
+        """Record the task state from an entry read with TASK_STATUS_ATTRS
+
+        :param entry: The task entry, or None if it no longer exists
+        :type entry: lib389._entry.Entry
+        :returns: True if task is complete, else False
+        """
 
-        self._exit_code = self.get_attr_val_utf8("nsTaskExitCode")
-        self._task_log = self.get_attr_val_utf8("nsTaskLog")
-        self._task_warn = self.get_attr_val_utf8("nsTaskWarning")
-        if not self.exists():
+        if entry is None:
             self._log.debug("complete: task has self cleaned ...")
             # The task cleaned it self up.
             return True
-        elif self._exit_code is not None:
-            self._log.debug("complete status: %s -> %s" % (self._exit_code, self.status()))
+        self._task_status = ensure_str(entry.getValue('nsTaskStatus'))
+        self._exit_code = ensure_str(entry.getValue('nsTaskExitCode'))
+        self._task_log = ensure_str(entry.getValue('nsTaskLog'))
+        self._task_warn = ensure_str(entry.getValue('nsTaskWarning'))
+        if self._exit_code is not None:
+            self._log.debug("complete status: %s -> %s" % (self._exit_code, self._task_status))
             return True
         return False
 
+    def is_complete(self):
+        """Return True if task is complete, else False."""
+
+        try:
+            entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
+                                                attrlist=TASK_STATUS_ATTRS, serverctrls=self._server_controls,
+                                                clientctrls=self._client_controls, escapehatch='i am sure')[0]
+        except ldap.NO_SUCH_OBJECT:
+            entry = None
+        return self._set_status(entry)
+
     def get_exit_code(self):
         """Return task's exit code if task is complete, else None."""
 
@@ -89,17 +182,15 @@ class Task(DSLdapObject):
         return None
 
     def wait(self, timeout=120):
-        """Wait until task is complete."""
+        """Wait until task is complete, polling with a backoff (see wait_for_tasks)
+
+        :param timeout: Seconds to wait, or None to wait forever
+        :type timeout: int
+        """
 
-        count = 0
         if timeout is None:
             self._log.debug("No timeout is set, this may take a long time ...")
-
-        while timeout is None or count < timeout:
-            if self.is_complete():
-                break
-            count = count + 1
-            time.sleep(2)
+        wait_for_tasks([self], timeout)
 
     def create(self, rdn=None, properties={}, basedn=None):
         """Create a Task entry
@@ -433,6 +524,7 @@ class Tasks(object):
         exitCode = 0
         warningCode = 0
         dn = entry.dn
+        intervals = backoff_intervals(TASK_POLL_MIN, TASK_POLL_MAX)
         while not done:
             entry = self.conn.getEntry(dn, attrlist=attrlist)
             self.log.debug("task entry %r", entry)
@@ -442,8 +534,8 @@ class Tasks(object):
             if entry.nsTaskExitCode:
                 exitCode = int(entry.nsTaskExitCode)
                 done = True
-            if dowait:
-                time.sleep(1)
+            elif dowait:
+                time.sleep(next(intervals))
             else:
                 break
         return (done, exitCode, warningCode)
@@ -14,7 +14,7 @@ from lib389._constants import *
 from lib389.monitor import MonitorBackend
 from lib389.mappingTree import MappingTrees
 from lib389.index import Indexes
-from lib389.backend import Backends
+from lib389.backend import Backends, SuffixTree
 from lib389.topologies import topology_st
 
 logging.getLogger(__name__).setLevel(logging.DEBUG)
@@ -360,6 +360,49 @@ def test_get_indexes(topology_st, backend):
     assert index_found
 
 
+def test_suffix_tree(topology_st, backend):
+    """Test that the suffix tree finds the sub-suffixes of a backend
+
+    :id: 2f0b8f5e-6a41-4c3d-9e0b-7d1c5a8e4f21
+    :setup: Standalone instance
+    :steps:
+        1. Create a backend, and a second one that is a sub-suffix of it
+        2. Build a suffix tree
+        3. Check the root suffixes and the sub-suffix
+        4. Check get_sub_suffixes returns the sub-suffix backend
+    :expectedresults:
+        1. Operation should be successful
+        2. Operation should be successful
+        3. The sub-suffix is only under the backend suffix
+        4. The sub-suffix backend is returned
+    """
+
+    sub_suffix = "ou=sub,{}".format(NEW_SUFFIX_1_RDN)
+    backends = Backends(topology_st.standalone)
+    sub_backend = backends.create(properties={'nsslapd-suffix': sub_suffix,
+                                              'cn': BACKEND_NAME_2})
+    sub_backend.get_mapping_tree().set_parent(NEW_SUFFIX_1_RDN)
+
+    try:
+        tree = SuffixTree(topology_st.standalone)
+        roots = [node.suffix for node in tree.get_roots()]
+        assert NEW_SUFFIX_1_RDN in roots
+        assert DEFAULT_SUFFIX.lower() in roots
+        assert sub_suffix not in roots
+
+        children = tree.get_children(NEW_SUFFIX_1_RDN.upper())
+        assert [node.suffix for node in children] == [sub_suffix]
+        assert children[0].be_name.lower() == BACKEND_NAME_2
+        assert children[0].backend_dn == sub_backend.dn
+        assert not children[0].link
+        assert tree.get(sub_suffix).parent == NEW_SUFFIX_1_RDN
+        assert [node.suffix for (depth, node) in tree.walk(NEW_SUFFIX_1_RDN)] == [sub_suffix]
+
+        assert [be.dn for be in backend.get_sub_suffixes()] == [sub_backend.dn]
+    finally:
+        sub_backend.delete()
+
+
 if __name__ == "__main__":
     CURRENT_FILE = os.path.realpath(__file__)
     pytest.main("-s -v %s" % CURRENT_FILE)
@@ -0,0 +1,125 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+import ldap
+import pytest
+from lib389.topologies import topology_st
+from lib389.bulkload import LDIFBulkLoader, BulkModifier
+from lib389.idm.organizationalunit import OrganizationalUnits
+from lib389.idm.user import nsUserAccounts
+from lib389._constants import DEFAULT_SUFFIX
+
+USERS = 200
+
+
+def _write_ldif(path, ou, duplicate=False):
+    with open(path, 'w') as f:
+        f.write("dn: ou=%s,%s\nobjectClass: top\nobjectClass: organizationalUnit\nou: %s\n\n" %
+                (ou, DEFAULT_SUFFIX, ou))
+        for i in range(0, USERS):
+            uid = '%s_user_%d' % (ou, i)
+            f.write("dn: uid=%s,ou=%s,%s\nobjectClass: top\nobjectClass: nsPerson\nobjectClass: nsAccount\n"
+                    "objectClass: nsOrgPerson\nobjectClass: posixAccount\nuid: %s\ncn: %s\ndisplayName: %s\n"
+                    "uidNumber: %d\ngidNumber: %d\nhomeDirectory: /home/%s\n\n" %
+                    (uid, ou, DEFAULT_SUFFIX, uid, uid, uid, i, i, uid))
+            if duplicate and i == USERS // 2:
+                f.write("dn: uid=%s,ou=%s,%s\nobjectClass: top\nobjectClass: account\nuid: %s\n\n" %
+                        (uid, ou, DEFAULT_SUFFIX, uid))
+
+
+def test_bulk_load(topology_st, tmpdir):
+    """
+    Assert that an LDIF is loaded over several connections, children after
+    their parent, and that a failed add is reported when continuing.
+    """
+    inst = topology_st.standalone
+    path = str(tmpdir.join('bulk.ldif'))
+    _write_ldif(path, 'bulk', duplicate=True)
+
+    loader = LDIFBulkLoader(inst, window=16, connections=2, cont=True)
+    result = loader.load(path)
+    assert result['added'] == USERS + 1
+    assert result['failed'] == 1
+    dup_dn = 'uid=bulk_user_%d,ou=bulk,%s' % (USERS // 2, DEFAULT_SUFFIX)
+    assert list(result['errors'].keys()) == [dup_dn]
+
+    users = nsUserAccounts(inst, DEFAULT_SUFFIX, rdn='ou=bulk')
+    assert len(users.list()) == USERS
+
+    # The same load is stopped at the first failure without cont
+    path = str(tmpdir.join('bulk_stop.ldif'))
+    _write_ldif(path, 'bulkstop', duplicate=True)
+    with pytest.raises(ldap.ALREADY_EXISTS):
+        LDIFBulkLoader(inst, window=16).load(path)
+
+    for ou in ('bulk', 'bulkstop'):
+        for user in nsUserAccounts(inst, DEFAULT_SUFFIX, rdn='ou=%s' % ou).list():
+            user.delete()
+        OrganizationalUnits(inst, DEFAULT_SUFFIX).get(ou).delete()
+
+
+def test_bulk_add_entries(topology_st):
+    """
+    Assert that generated entries, with str values, can be added.
+    """
+    inst = topology_st.standalone
+
+    def _entries():
+        yield ('ou=bulkgen,%s' % DEFAULT_SUFFIX, {'objectClass': ['top', 'organizationalUnit'], 'ou': ['bulkgen']})
+        for i in range(0, 20):
+            yield ('cn=group_%d,ou=bulkgen,%s' % (i, DEFAULT_SUFFIX),
+                   {'objectClass': ['top', 'groupOfNames'], 'cn': ['group_%d' % i]})
+
+    result = LDIFBulkLoader(inst).add_entries(_entries())
+    assert result['added'] == 21
+    assert result['failed'] == 0
+    inst.delete_branch_s('ou=bulkgen,%s' % DEFAULT_SUFFIX, ldap.SCOPE_SUBTREE)
+
+
+def test_bulk_modify(topology_st, tmpdir):
+    """
+    Assert that the entries of a filter or a dn list are modified, and that
+    a run with the same checkpoint file skips the entries already modified.
+    """
+    inst = topology_st.standalone
+    path = str(tmpdir.join('bulkmod.ldif'))
+    _write_ldif(path, 'bulkmod')
+    LDIFBulkLoader(inst).load(path)
+    users = nsUserAccounts(inst, DEFAULT_SUFFIX, rdn='ou=bulkmod')
+    ou_dn = 'ou=bulkmod,%s' % DEFAULT_SUFFIX
+
+    mods = [(ldap.MOD_REPLACE, 'description', 'bulk modified')]
+    result = BulkModifier(inst, mods, connections=2, window=16).modify_filter(ou_dn, '(uid=*)', page_size=50)
+    assert result['modified'] == USERS
+    assert all(u.get_attr_val_utf8('description') == 'bulk modified' for u in users.list())
+
+    checkpoint = str(tmpdir.join('bulkmod.ckpt'))
+    dns = [u.dn for u in users.list()]
+    mods = [(ldap.MOD_ADD, 'description', 'second')]
+    result = BulkModifier(inst, mods, checkpoint=checkpoint).modify_dns(dns[:USERS // 2])
+    assert result['modified'] == USERS // 2
+    result = BulkModifier(inst, mods, checkpoint=checkpoint).modify_dns(dns)
+    assert result['skipped'] == USERS // 2
+    assert result['modified'] == USERS - USERS // 2
+    assert all(u.present('description', 'second') for u in users.list())
+
+    # Adding the values again fails, unless ensure is set
+    with pytest.raises(ldap.TYPE_OR_VALUE_EXISTS):
+        BulkModifier(inst, mods).modify_dns(dns)
+    result = BulkModifier(inst, mods, ensure=True).modify_dns(dns)
+    assert result['unchanged'] == USERS
+    assert result['failed'] == 0
+
+    # The checkpoint can't be used for other mods
+    with pytest.raises(ValueError):
+        BulkModifier(inst, [(ldap.MOD_DELETE, 'description')], checkpoint=checkpoint).modify_dns(dns)
+
+    for user in users.list():
+        user.delete()
+    OrganizationalUnits(inst, DEFAULT_SUFFIX).get('bulkmod').delete()
@@ -0,0 +1,106 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+import ldap
+from lib389.topologies import topology_st
+from lib389.backend import Backends, DatabaseConfig
+from lib389.bulkload import LDIFBulkLoader
+from lib389.cache_advisor import CacheAdvisor, estimate_cache, scale_caches, CACHE_MIN_SIZE
+from lib389._constants import DEFAULT_BENAME, DEFAULT_SUFFIX
+
+USERS = 2000
+
+
+def test_estimate_cache():
+    """
+    Assert that the caches that are not full, or that have a good hit ratio,
+    are left as they are, and that the others are grown with the ratio.
+    """
+    # Not full
+    estimate = estimate_cache(used=1000000, count=1000, configured=10000000, hits=10, tries=100)
+    assert estimate['avg_size'] == 1000
+    assert estimate['working_set'] == 1000
+    assert estimate['recommended'] == 10000000
+    # Full, with a good hit ratio
+    estimate = estimate_cache(used=10000000, count=10000, configured=10000000, hits=99, tries=100)
+    assert estimate['hit_ratio'] == 99.0
+    assert estimate['recommended'] == 10000000
+    # Full, with half of the reads missing it
+    estimate = estimate_cache(used=10000000, count=10000, configured=10000000, hits=50, tries=100)
+    assert estimate['working_set'] == 20000
+    assert estimate['recommended'] == 25000000
+    # The growth is bound
+    estimate = estimate_cache(used=10000000, count=10000, configured=10000000, hits=1, tries=100)
+    assert estimate['working_set'] == 40000
+    # Nothing read yet
+    estimate = estimate_cache(used=0, count=0, configured=0, hits=0, tries=0)
+    assert estimate['hit_ratio'] is None
+    assert estimate['recommended'] == 0
+    assert CACHE_MIN_SIZE > 0
+
+
+def test_scale_caches():
+    """
+    Assert that only the growth of the caches is scaled to fit in the
+    budget, and that no cache goes below its configured size.
+    """
+    caches = [{'configured': 1000, 'recommended': 1000},
+              {'configured': 1000, 'recommended': 3000},
+              {'configured': 2000, 'recommended': 4000}]
+    assert not scale_caches(caches, 10000)
+    assert [c['recommended'] for c in caches] == [1000, 3000, 4000]
+    # 2000 of growth fits out of 4000
+    assert scale_caches(caches, 6000)
+    assert [c['recommended'] for c in caches] == [1000, 2000, 3000]
+    # Nothing fits above the configured sizes
+    assert scale_caches(caches, 1000)
+    assert [c['recommended'] for c in caches] == [1000, 1000, 2000]
+
+
+def test_cache_advisor(topology_st):
+    """
+    Assert that an entry cache smaller than the entries that are searched
+    is reported, and that the recommended size can be applied.
+    """
+    inst = topology_st.standalone
+    db_config = DatabaseConfig(inst)
+    db_config.set([('nsslapd-cache-autosize', '0')])
+    inst.restart()
+    be = Backends(inst).get(DEFAULT_BENAME)
+    be.replace('nsslapd-cachememsize', str(CACHE_MIN_SIZE))
+
+    def _entries():
+        yield ('ou=cache,%s' % DEFAULT_SUFFIX, {'objectClass': ['top', 'organizationalUnit'], 'ou': ['cache']})
+        for i in range(0, USERS):
+            yield ('uid=cache_user_%d,ou=cache,%s' % (i, DEFAULT_SUFFIX),
+                   {'objectClass': ['top', 'account', 'extensibleObject'], 'uid': ['cache_user_%d' % i],
+                    'description': ['x' * 512]})
+    LDIFBulkLoader(inst).add_entries(_entries())
+    for _ in range(0, 2):
+        for i in range(0, USERS):
+            inst.search_s('uid=cache_user_%d,ou=cache,%s' % (i, DEFAULT_SUFFIX), ldap.SCOPE_BASE)
+
+    advisor = CacheAdvisor(inst)
+    report = advisor.advise()
+    entry = report['backends'][DEFAULT_BENAME]['entry']
+    assert entry['hit_ratio'] < 95
+    assert entry['avg_size'] > 512
+    assert entry['recommended'] > entry['configured']
+    assert report['dbcache'] is not None
+
+    results = list(advisor.lint())
+    assert any(r['dsle'] == 'DSCACHELE0001' and DEFAULT_BENAME in r['items'] for r in results)
+
+    changes = advisor.get_changes(report)
+    assert (be.dn, 'nsslapd-cachememsize', str(entry['recommended'])) in changes
+    assert be.get_attr_val_int('nsslapd-cachememsize') == CACHE_MIN_SIZE
+    advisor.apply(report)
+    assert be.get_attr_val_int('nsslapd-cachememsize') == entry['recommended']
+
+    inst.delete_branch_s('ou=cache,%s' % DEFAULT_SUFFIX, ldap.SCOPE_SUBTREE)
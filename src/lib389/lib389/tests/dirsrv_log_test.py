@@ -9,9 +9,11 @@
 from lib389._constants import *
 from lib389.utils import ensure_bytes, ensure_str
 from lib389 import DirSrv, Entry
+from lib389.dirsrv_log import AccessLogStats
 import pytest
 import time
 import shutil
+import gzip
 import datetime
 from dateutil.tz import tzoffset
 
@@ -101,6 +103,75 @@ def test_access_log(topology):
     )
 
 
+def test_access_log_notes(topology, tmpdir, monkeypatch):
+    """Check the single pass notes=A/notes=F search finder, including gzipped rotated logs"""
+    lpath = str(tmpdir.join('access'))
+    with open(lpath, 'w') as f:
+        f.write('[27/Apr/2016:12:49:49.727235997 +1000] conn=1 op=1 SRCH base="dc=example,dc=com" scope=2 filter="(description=x)" attrs=ALL\n'
+                '[27/Apr/2016:12:49:49.727235998 +1000] conn=1 op=2 SRCH base="dc=example,dc=com" scope=2 filter="(uid=x)" attrs=ALL\n'
+                '[27/Apr/2016:12:49:49.727235999 +1000] conn=1 op=1 RESULT err=0 tag=101 nentries=1 etime=0.500 notes=A\n'
+                '[27/Apr/2016:12:49:49.727236000 +1000] conn=1 op=2 RESULT err=0 tag=101 nentries=1 etime=0.000\n'
+                '[27/Apr/2016:12:49:49.736297002 +1000] conn=1 op=3 fd=64 closed - U1\n')
+    with gzip.open(lpath + '.20160426-104822.gz', 'wt') as f:
+        f.write('[26/Apr/2016:12:49:49.727235997 +1000] conn=5 op=1 SRCH base="o=x" scope=0 filter="(foo=x)" attrs=ALL\n'
+                '[26/Apr/2016:12:49:49.727235998 +1000] conn=5 op=1 RESULT err=0 tag=101 nentries=0 etime=0.100 notes=U,F\n')
+    access_log = topology.standalone.ds_access_log
+    monkeypatch.setattr(access_log, '_get_log_path', lambda: lpath)
+
+    found = list(access_log.find_notes_searches())
+    assert len(found) == 1
+    assert found[0]['note'] == 'A'
+    assert found[0]['conn'] == '1' and found[0]['op'] == '1'
+    assert found[0]['filter'] == '(description=x)'
+    assert found[0]['etime'] == '0.500'
+
+    found = list(access_log.find_notes_searches(archive=True))
+    assert [s['note'] for s in found] == ['F', 'A']
+    assert found[0]['base'] == 'o=x'
+
+    reports = list(access_log._lint_notes())
+    assert len(reports) == 1
+    assert reports[0]['dsle'] == 'DSLOGNOTES0001'
+
+
+def test_access_log_stats(tmpdir):
+    """Check the columnar statistics of the access logs, read by one and two workers"""
+    lpath = str(tmpdir.join('access'))
+    with gzip.open(lpath + '.20160426-104822.gz', 'wt') as f:
+        f.write('[26/Apr/2016:12:49:49.727235997 +1000] conn=5 fd=64 slot=64 connection from 10.0.0.1 to 10.0.0.2\n'
+                '[26/Apr/2016:12:49:49.727235998 +1000] conn=5 op=0 BIND dn="cn=dm" method=128 version=3\n'
+                '[26/Apr/2016:12:49:49.727235999 +1000] conn=5 op=0 RESULT err=49 tag=97 nentries=0 etime=0.001000\n'
+                '[26/Apr/2016:12:49:49.727236000 +1000] conn=5 op=1 fd=64 closed - U1\n')
+    with open(lpath, 'w') as f:
+        f.write('[27/Apr/2016:12:49:49.727235997 +1000] conn=6 fd=64 slot=64 SSL connection from 10.0.0.1 to 10.0.0.2\n'
+                '[27/Apr/2016:12:49:49.727235998 +1000] conn=7 fd=65 slot=65 connection from ::1 to ::1\n')
+        for op in range(1, 5):
+            f.write('[27/Apr/2016:12:49:49.727235999 +1000] conn=6 op=%d SRCH base="dc=example,dc=com" scope=2 filter="(uid=x)" attrs="cn sn"\n'
+                    '[27/Apr/2016:12:49:49.727236000 +1000] conn=6 op=%d RESULT err=0 tag=101 nentries=1 wtime=0.000100 optime=0.000200 etime=0.00%d000\n'
+                    % (op, op, op))
+        f.write('[27/Apr/2016:12:49:49.727236001 +1000] conn=7 op=1 SRCH base="dc=example,dc=com" scope=2 filter="(description=x)" attrs=ALL\n'
+                '[27/Apr/2016:12:49:49.727236002 +1000] conn=7 op=1 RESULT err=0 tag=101 nentries=0 etime=0.500000 notes=A\n'
+                '[27/Apr/2016:12:49:49.736297003 +1000] conn=7 op=2 fd=65 closed - U1\n')
+    paths = [lpath + '.20160426-104822.gz', lpath]
+
+    stats = AccessLogStats(paths).report()
+    assert stats == AccessLogStats(paths, workers=2).report()
+    assert stats['lines'] == 17
+    assert stats['start'] == '26/Apr/2016:12:49:49.727235997 +1000'
+    assert stats['end'] == '27/Apr/2016:12:49:49.736297003 +1000'
+    assert stats['connections'] == 3
+    assert stats['top_ips'] == [('10.0.0.1', 2), ('::1', 1)]
+    assert stats['ops'] == {'BIND': 1, 'SRCH': 5}
+    assert stats['errors'] == {'0': 5, '49': 1}
+    assert stats['etime']['count'] == 6
+    assert stats['etime']['max'] == 0.5
+    assert stats['etime']['p50'] == 0.002
+    assert stats['etime_by_op']['BIND']['count'] == 1
+    assert stats['etime_by_op']['SRCH']['p90'] == 0.5
+    assert stats['top_filters'] == [('(uid=x)', 4), ('(description=x)', 1)]
+    assert stats['unindexed'] == {'count': 1, 'filters': [('(description=x)', 1)]}
+
+
 def test_error_log(topology):
     """Check the parsing of the error log"""
     # No need to sleep, it's not buffered.
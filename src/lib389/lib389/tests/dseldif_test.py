@@ -10,7 +10,7 @@ import logging
 import pytest
 
 from lib389._constants import *
-from lib389.dseldif import DSEldif
+from lib389.dseldif import DSEldif, _parse_dse
 from lib389.topologies import topology_st as topo
 
 DEBUGGING = os.getenv('DEBUGGING', False)
@@ -128,3 +128,47 @@ def test_delete_multivalue(topo):
     dse_ldif.delete(DN_CONFIG, fake_attr)
     assert not dse_ldif.get(DN_CONFIG, fake_attr)
 
+
+def test_batch(topo):
+    """Check that changes made in a batch are written once, at its end"""
+
+    dse_ldif = DSEldif(topo.standalone)
+    fake_attr = "fakeAttr"
+
+    log.info("Add {} twice in a batch".format(fake_attr))
+    with dse_ldif.batch():
+        dse_ldif.add(DN_CONFIG, fake_attr, "fake1")
+        dse_ldif.add(DN_CONFIG, fake_attr, "fake2")
+        # Nothing is written to the file yet
+        assert not DSEldif(topo.standalone).get(DN_CONFIG, fake_attr)
+    assert DSEldif(topo.standalone).get(DN_CONFIG, fake_attr) == ["fake1", "fake2"]
+
+    log.info("Check that a failed batch is dropped")
+    with pytest.raises(ValueError):
+        with dse_ldif.batch():
+            dse_ldif.delete(DN_CONFIG, fake_attr)
+            dse_ldif.delete(DN_CONFIG, "nonexistent")
+    assert dse_ldif.get(DN_CONFIG, fake_attr) == ["fake1", "fake2"]
+    assert DSEldif(topo.standalone).get(DN_CONFIG, fake_attr) == ["fake1", "fake2"]
+
+    log.info("Clean up")
+    dse_ldif.delete(DN_CONFIG, fake_attr)
+    assert not DSEldif(topo.standalone).get(DN_CONFIG, fake_attr)
+
+
+def test_parse_keeps_comments(tmpdir):
+    """Check that the comments of an entry are kept with it"""
+
+    path = tmpdir.join('dse.ldif')
+    path.write('# header\n'
+               'dn: cn=config\n'
+               'cn: config\n'
+               '# a comment\n'
+               'nsslapd-port: 389\n'
+               '\n')
+    (header, entries) = _parse_dse(str(path))
+    assert header == ['# header\n']
+    entry = entries['cn=config']
+    assert entry.lines == ['# a comment\n']
+    assert entry.copy().lines == ['# a comment\n']
+    assert [name for (name, vals) in entry.attrs.values()] == ['cn', 'nsslapd-port']
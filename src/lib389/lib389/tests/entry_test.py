@@ -8,6 +8,7 @@
 #
 import os
 from lib389 import Entry
+from lib389._entry import ReadOnlyEntry
 import lib389
 import pytest
 
@@ -93,6 +94,44 @@ class TestEntry(object):
             uentry, entry)
 
 
+class TestReadOnlyEntry(object):
+    """A ReadOnlyEntry shares the data it is given, and reads like an Entry"""
+    def test_shares_data(self):
+        attrs = {'objectClass': [b'top', b'organization'], 'o': [b'pippo']}
+        e = ReadOnlyEntry(('o=pippo', attrs))
+        assert e.dn == 'o=pippo'
+        assert e.getValues('objectclass') is attrs['objectClass']
+        assert e.hasAttr('OBJECTCLASS')
+        assert not e.hasAttr('cn')
+        assert e.getValue('O') == b'pippo'
+        assert e.o == b'pippo'
+        assert e['o'] == b'pippo'
+        assert e.cn is None
+        assert e.getValues('cn') == []
+        assert e.hasValue('objectclass', 'organization')
+        assert e.hasValueCase('objectclass', b'Organization')
+
+    def test_same_as_entry(self):
+        t = ('o=pippo', {'objectClass': [b'top', b'organization'], 'o': [b'pippo'],
+                         'jpegPhoto': [b'\xff\xd8\xff']})
+        e = Entry((t[0], dict(t[1])))
+        ro = ReadOnlyEntry(t)
+        assert ro == e
+        assert e == ro
+        assert str(ro) == str(e)
+        assert sorted(ro.toTupleList()) == sorted(e.toTupleList())
+        assert ro.toEntry() == e
+        # The JSON conversion leaves the entry as it was
+        assert ro.getJSONEntry()['attrs']['jpegPhoto'] != [b'\xff\xd8\xff']
+        assert ro.getValue('jpegphoto') == b'\xff\xd8\xff'
+
+    def test_empty(self):
+        e = ReadOnlyEntry(None)
+        assert not e
+        assert e.dn is None
+        assert e.getValue('cn') is None
+
+
 if __name__ == "__main__":
     CURRENT_FILE = os.path.realpath(__file__)
     pytest.main("-s -v %s" % CURRENT_FILE)
@@ -0,0 +1,84 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+import os
+import pytest
+import subprocess
+from lib389.topologies import topology_st
+from lib389.index_analysis import IndexAnalyzer, parse_dbscan_line, scan_index
+from lib389.idm.user import nsUserAccounts
+from lib389.properties import TASK_WAIT
+from lib389._constants import DEFAULT_BENAME, DEFAULT_SUFFIX
+
+USERS = 50
+
+
+def test_parse_dbscan_line():
+    """
+    Assert that the keys, with their ID list size, are parsed from the
+    dbscan output, including the truncated and allids ones.
+    """
+    assert parse_dbscan_line('%-40s%d' % ('=person', 1234)) == ('=person', 1234)
+    assert parse_dbscan_line('%-40s%d' % ('*abc', 1)) == ('*abc', 1)
+    assert parse_dbscan_line('%-40s(allids)' % '=top') == ('=top', None)
+    assert parse_dbscan_line('%-40s%d' % ('=a_very_long_value_that_was_trunc ...', 3)) == \
+        ('=a_very_long_value_that_was_trunc ...', 3)
+    assert parse_dbscan_line("Can't open db file 'x.db': No such file") is None
+    assert parse_dbscan_line('') is None
+
+
+def test_scan_index_exit_status(tmpdir):
+    """
+    Assert that a failing dbscan is reported, and that closing the scan
+    early is not reported as a failure.
+    """
+    failing = tmpdir.join('dbscan_failing')
+    failing.write("#!/bin/sh\nprintf '%-40s1\\n' =person\nexit 1\n")
+    failing.chmod(0o755)
+    with pytest.raises(subprocess.CalledProcessError):
+        list(scan_index('uid.db', dbscan=str(failing)))
+
+    endless = tmpdir.join('dbscan_endless')
+    endless.write("#!/bin/sh\nwhile true; do printf '%-40s1\\n' =person; done\n")
+    endless.chmod(0o755)
+    scan = scan_index('uid.db', dbscan=str(endless))
+    assert next(scan) == ('=person', 1)
+    scan.close()
+
+
+def test_index_analysis_backup(topology_st):
+    """
+    Assert that the indexes of a backup are analyzed while the server runs,
+    and that the keys shared by all the users are the heaviest ones.
+    """
+    inst = topology_st.standalone
+    users = nsUserAccounts(inst, DEFAULT_SUFFIX)
+    for i in range(0, USERS):
+        users.create_test_user(uid=5000 + i)
+
+    backup = 'index_analysis'
+    archive = os.path.join(inst.get_bak_dir(), backup)
+    assert inst.tasks.db2bak(backup_dir=archive, args={TASK_WAIT: True}) == 0
+
+    report = IndexAnalyzer(inst, DEFAULT_BENAME, backup=backup, top=5, limit=USERS).analyze()
+    assert inst.status()
+    assert report['indexes']['objectclass']['file_size'] > 0
+    assert report['indexes']['uid']['types']['eq']['keys'] >= USERS
+    assert len(report['top']) == 5
+    top = report['top'][0]
+    assert top['index'] == 'objectclass'
+    assert top['ids'] >= USERS
+    assert any(k['index'] == 'objectclass' and k['key'] == '=nsperson' for k in report['near_limit'])
+
+    # Only some of the indexes can be read
+    report = IndexAnalyzer(inst, DEFAULT_BENAME, backup=backup).analyze(['uid'])
+    assert list(report['indexes'].keys()) == ['uid']
+
+    for user in users.list():
+        user.delete()
@@ -0,0 +1,80 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+import ldap
+import pytest
+from lib389.topologies import topology_st
+from lib389.bulkload import LDIFBulkLoader
+from lib389.loadgen import LatencyHistogram, LoadGenerator
+from lib389._constants import DEFAULT_SUFFIX
+
+USERS = 100
+LOAD_BASEDN = 'ou=load,%s' % DEFAULT_SUFFIX
+
+
+def test_latency_histogram():
+    """
+    Assert that the percentiles are within the precision of the buckets, and
+    that merged histograms have the latencies of both.
+    """
+    hist = LatencyHistogram()
+    assert hist.percentile(50) is None
+    assert hist.summary() == {'count': 0}
+    for i in range(1, 10001):
+        hist.record(i / 1000000.0)
+    summary = hist.summary()
+    assert summary['count'] == 10000
+    assert summary['min'] == 0.000001
+    assert summary['max'] == 0.01
+    for (key, exact) in (('p50', 5000), ('p90', 9000), ('p99', 9900), ('p999', 9990)):
+        assert exact <= summary[key] * 1000000 <= exact * 1.01
+
+    other = LatencyHistogram()
+    other.record(2.0)
+    hist.merge(other)
+    assert hist.count == 10001
+    assert hist.percentile(100) == 2.0
+    assert hist.summary()['max'] == 2.0
+
+
+def test_load_generator(topology_st):
+    """
+    Assert that a load of every operation runs from several workers, and that
+    the failed operations are reported.
+    """
+    inst = topology_st.standalone
+
+    def _entries():
+        yield (LOAD_BASEDN, {'objectClass': ['top', 'organizationalUnit'], 'ou': ['load']})
+        for i in range(1, USERS + 1):
+            uid = 'user%03d' % i
+            yield ('uid=%s,%s' % (uid, LOAD_BASEDN),
+                   {'objectClass': ['top', 'person', 'organizationalPerson', 'inetOrgPerson'],
+                    'uid': [uid], 'cn': [uid], 'sn': [uid], 'userPassword': [uid]})
+    LDIFBulkLoader(inst).add_entries(_entries())
+
+    with pytest.raises(ValueError):
+        LoadGenerator(inst, LOAD_BASEDN, mix={'delete': 1})
+
+    load = LoadGenerator(inst, LOAD_BASEDN, min=1, max=USERS, workers=2, connections=2, seed=1)
+    report = load.run(count=500)
+    assert report['ops'] == 1000
+    assert report['errors'] == 0
+    assert set(report['by_op']) == {'search', 'bind', 'modify', 'add'}
+    for result in report['by_op'].values():
+        assert result['latency']['count'] == result['ops']
+        assert result['latency']['p50'] <= result['latency']['p99'] <= result['latency']['max']
+
+    # The entries above max do not exist
+    load = LoadGenerator(inst, LOAD_BASEDN, min=USERS + 1, max=USERS * 2, mix={'bind': 1})
+    report = load.run(count=10)
+    assert report['by_op']['bind']['errors'] == 10
+    assert report['by_op']['bind']['failures']
+
+    inst.delete_branch_s(LOAD_BASEDN, ldap.SCOPE_SUBTREE)
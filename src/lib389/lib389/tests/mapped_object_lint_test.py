@@ -1,3 +1,4 @@
+import time
 from typing import List
 
 import pytest
@@ -5,7 +6,8 @@ import pytest
 from lib389._mapped_object_lint import (
     DSLint,
     DSLints,
-    DSLintMethodSpec
+    DSLintMethodSpec,
+    DSLintRunner
 )
 
 
@@ -76,3 +78,30 @@ def test_dslint():
         == {f'{m}:nsstate:suffix{s}' for m in ['ma', 'mb'] for s in "AB"}
     assert set(dict(insts.lint_list('mb:nsstate')).keys()) \
         == {f'mb:nsstate:suffix{s}' for s in "AB"}
+
+
+def test_dslint_runner():
+    def _ok():
+        yield 'a result'
+
+    def _fail():
+        raise ValueError('broken check')
+
+    def _slow():
+        time.sleep(5)
+        yield 'too late'
+
+    runner = DSLintRunner(workers=2, timeout=0.5)
+    start = time.monotonic()
+    results = runner.run([('ok', _ok), ('slow', _slow), ('fail', _fail), ('empty', lambda: None)])
+    # The slow check didn't hold the run up
+    assert time.monotonic() - start < 5
+
+    assert [r['check'] for r in results] == ['ok', 'slow', 'fail', 'empty']
+    assert [r['status'] for r in results] == ['ok', 'timeout', 'failed', 'ok']
+    assert results[0]['results'] == ['a result']
+    assert results[1]['results'] == []
+    assert results[2]['error'] == 'broken check'
+    assert results[3]['results'] == []
+    assert all(r['seconds'] >= 0 for r in results)
+    assert results[1]['seconds'] >= 0.5
@@ -9,7 +9,7 @@
 
 from lib389.topologies import topology_st
 from lib389._mapped_object import DSLdapObject
-from lib389.idm.group import Group
+from lib389.idm.group import Group, Groups
 from lib389._constants import DEFAULT_SUFFIX
 
 
@@ -21,3 +21,60 @@ def test_exists(topology_st):
     assert not group.exists()
     group.create(properties={'cn': 'MyTestGroup', 'ou': 'groups'})
     assert group.exists()
+
+
+def test_snapshot(topology_st):
+    """
+    Assert that a snapshot serves getters locally, and is refreshed after a write.
+    """
+    group = Group(topology_st.standalone, dn="cn=MySnapshotGroup,ou=Groups," + DEFAULT_SUFFIX)
+    group.create(properties={'cn': 'MySnapshotGroup', 'description': 'before'})
+    group.snapshot()
+    assert group.get_attr_val_utf8('description') == 'before'
+    # A change made behind our back is not visible until refresh
+    other = Group(topology_st.standalone, dn=group.dn)
+    other.replace('description', 'behind')
+    assert group.get_attr_val_utf8('description') == 'before'
+    group.refresh()
+    assert group.get_attr_val_utf8('description') == 'behind'
+    # A change made through the object invalidates the snapshot
+    group.replace('description', 'after')
+    assert group.get_attr_val_utf8('description') == 'after'
+    assert group.present('cn', 'MySnapshotGroup')
+    group.release_snapshot()
+    other.replace('description', 'live')
+    assert group.get_attr_val_utf8('description') == 'live'
+    group.delete()
+
+
+def test_list_snapshot(topology_st):
+    """
+    Assert that list(snapshot=True) seeds the children with the listed entries.
+    """
+    groups = Groups(topology_st.standalone, DEFAULT_SUFFIX)
+    groups.create(properties={'cn': 'MyListedGroup', 'description': 'listed'})
+    listed = [g for g in groups.list(snapshot=True) if g.rdn == 'MyListedGroup']
+    assert len(listed) == 1
+    assert listed[0]._snapshot_entry is not None
+    assert listed[0].get_attr_val_utf8('description') == 'listed'
+    listed[0].delete()
+
+
+def test_iter(topology_st):
+    """
+    Assert that iter() yields the same children as list(), paged or not.
+    """
+    groups = Groups(topology_st.standalone, DEFAULT_SUFFIX)
+    for i in range(0, 5):
+        groups.create(properties={'cn': 'MyIterGroup%d' % i})
+    listed = sorted(g.dn for g in groups.list())
+    assert sorted(g.dn for g in groups.iter()) == listed
+    assert sorted(g.dn for g in groups.iter(paged_search=2)) == listed
+    assert sorted(g.dn for g in groups.list(paged_search=2)) == listed
+    # Stopping early must not break the connection for the next search
+    for g in groups.iter():
+        break
+    assert len(groups.list()) == len(listed)
+    for g in groups.list():
+        if g.rdn.startswith('MyIterGroup'):
+            g.delete()
@@ -8,6 +8,8 @@
 #
 
 from lib389.paths import Paths
+from lib389.config import Config
+from lib389.topologies import topology_st
 
 # Test that we can retrieve the settings from the paths object
 def test_paths():
@@ -34,3 +36,32 @@ def test_path_exception():
     except IOError:
         assert(True)
 
+
+# Test that the online values are read in one search per entry, and read
+# again after a change of a mapped attribute or a restart
+def test_paths_online_cache(topology_st):
+    inst = topology_st.standalone
+    p = inst.ds_paths
+    p.invalidate_online()
+    lookups = p.online_lookups
+    access_log = p.access_log
+    assert p.error_log
+    assert p.ldif_dir
+    assert p.access_log == access_log
+    assert p.online_lookups == lookups + 1
+
+    config = Config(inst)
+    # An attribute that isn't mapped keeps the cache
+    config.replace('nsslapd-sizelimit', '2000')
+    assert p.ldif_dir
+    assert p.online_lookups == lookups + 1
+    ldif_dir = p.ldif_dir
+    config.replace('nsslapd-ldifdir', '/tmp')
+    assert p.ldif_dir == '/tmp'
+    assert p.online_lookups == lookups + 2
+    config.replace('nsslapd-ldifdir', ldif_dir)
+
+    lookups = p.online_lookups
+    inst.restart()
+    assert p.ldif_dir == ldif_dir
+    assert p.online_lookups > lookups
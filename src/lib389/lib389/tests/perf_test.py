@@ -0,0 +1,65 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+import pytest
+from lib389.perf import BenchmarkResults, PERF_DEFAULT_RUN, compare_results
+
+
+def _results(rate, p99, elapsed):
+    results = BenchmarkResults({'hostname': 'localhost'}, {'users': 10})
+    results.record('search', {'rate': rate, 'latency': {'p50': 0.001, 'p99': p99}}, threads=4)
+    results.record('search', {'rate': rate, 'latency': {'p50': 0.001, 'p99': p99}}, threads=16)
+    results.record('import', {'elapsed': elapsed})
+    return results
+
+
+def test_results_save_load(tmpdir):
+    """
+    Assert that the saved results are loaded back, and that other files are
+    rejected.
+    """
+    path = str(tmpdir.join('results.json'))
+    results = _results(1000, 0.01, 5)
+    results.save(path)
+    loaded = BenchmarkResults.load(path)
+    assert loaded.environment == results.environment
+    assert loaded.parameters == results.parameters
+    assert loaded.benchmarks == results.benchmarks
+    assert set(loaded.benchmarks['search']) == {'4', '16'}
+    assert set(loaded.benchmarks['import']) == {PERF_DEFAULT_RUN}
+
+    other = tmpdir.join('other.json')
+    other.write('{"version": 0}')
+    with pytest.raises(ValueError):
+        BenchmarkResults.load(str(other))
+
+
+def test_compare_results():
+    """
+    Assert that a lower rate, or a higher latency or elapsed time, is a
+    regression beyond the threshold only.
+    """
+    baseline = _results(1000, 0.01, 5)
+    comparisons = compare_results(baseline, _results(1000, 0.01, 5))
+    assert not any(c['regression'] for c in comparisons)
+    assert [(c['benchmark'], c['run'], c['metric']) for c in comparisons] == [
+        ('import', PERF_DEFAULT_RUN, 'elapsed'),
+        ('search', '4', 'rate'), ('search', '4', 'latency.p50'), ('search', '4', 'latency.p99'),
+        ('search', '16', 'rate'), ('search', '16', 'latency.p50'), ('search', '16', 'latency.p99'),
+    ]
+
+    # Better, or within the threshold
+    comparisons = compare_results(baseline, _results(1500, 0.0105, 4))
+    assert not any(c['regression'] for c in comparisons)
+
+    comparisons = compare_results(baseline, _results(800, 0.02, 6), threshold=10)
+    regressions = set((c['benchmark'], c['metric']) for c in comparisons if c['regression'])
+    assert regressions == {('search', 'rate'), ('search', 'latency.p99'), ('import', 'elapsed')}
+    assert [c['change'] for c in comparisons if c['metric'] == 'rate'] == [-20.0, -20.0]
+    assert not any(c['regression'] for c in compare_results(baseline, _results(800, 0.02, 6), threshold=200))
@@ -7,12 +7,13 @@
 # --- END COPYRIGHT BLOCK ---
 #
 import os
+import base64
 import ldap
 import pytest
 import logging
 
 from lib389 import NoSuchEntryError
-from lib389.replica import Replicas
+from lib389.replica import Replicas, RUV, ChangelogLDIF
 from lib389.backend import Backends
 from lib389.idm.domain import Domain
 from lib389._constants import (ReplicaRole, BACKEND_SUFFIX, BACKEND_NAME, REPLICA_RUV_FILTER, CONSUMER_REPLICAID,
@@ -370,6 +371,78 @@ def test_demote_fail(topo, new_suffixes, clean_up, role_from):
             replica.demote(newrole=role_to)
 
 
+def test_ruv_is_synced():
+    """Check that RUV.is_synced compares the max csn of each rid
+
+    :feature: Replication
+    :steps: 1. Build a supplier RUV and a consumer RUV behind it on one rid
+            2. Advance the consumer max csn to the supplier one
+            3. Advance the consumer max csn past the supplier one
+    :expectedresults: 1. The consumer is not synced
+                      2. The consumer is synced
+                      3. The consumer is synced
+    """
+
+    gen = '{replicageneration} 5a2ffd0f000000010000'
+    url = 'ldap://localhost:39001'
+
+    def _ruv(rid1_maxcsn):
+        return RUV([gen,
+                    '{replica 1 %s} 5a2ffd0f000100010000 %s' % (url, rid1_maxcsn),
+                    '{replica 2 %s} 5a2ffd10000100020000 5a2ffd20000000020000' % url])
+
+    supplier = _ruv('5a2ffe00000000010000')
+    # Same min csn as the supplier, but it has not seen its latest change
+    assert not _ruv('5a2ffd30000000010000').is_synced(supplier)
+    assert _ruv('5a2ffe00000000010000').is_synced(supplier)
+    assert _ruv('5a2fff00000000010000').is_synced(supplier)
+
+
+def test_changelog_ldif(tmpdir):
+    """Check that a changelog LDIF is processed the same by one or several
+    workers, and that the CSN and replica id filters select the right changes
+
+    :feature: Replication
+    :steps: 1. Write a changelog LDIF with a RUV and changes from three replica ids
+            2. Decode it with one worker, then with four and a small chunk size
+            3. Export only the changes of one replica id in a CSN range
+    :expectedresults: 1. Success
+                      2. Both outputs are the same, with the changes decoded
+                      3. Only the selected changes, and the RUV, are exported
+    """
+
+    cl_path = str(tmpdir.join('cl.ldif'))
+    with open(cl_path, 'w') as f:
+        f.write('clmaxruv: {replicageneration} 5a2ffd0f000000010000\n'
+                'clmaxruv: {replica 1 ldap://localhost:39001} 5a2ffd0f000100010000 5a2ffe00000000010000\n\n')
+        for i in range(0, 300):
+            change = base64.b64encode(('replace: description\ndescription: change %d\n-\n' % i).encode()).decode()
+            f.write('replgen: 5a2ffd0f000000010000\ncsn: %08x0000%04x0000\nnsuniqueid: %d\n'
+                    'dn: cn=user%d,dc=example,dc=com\nchangetype: modify\nchange:: %s\n %s\n\n' %
+                    (0x5a2ffd10 + i, 1 + i % 3, i, i, change[:20], change[20:]))
+
+    outputs = []
+    for (workers, chunk_size) in ((1, 1024 * 1024), (4, 100)):
+        out_path = str(tmpdir.join('decoded_%d.ldif' % workers))
+        assert ChangelogLDIF(cl_path, out_path, workers=workers, chunk_size=chunk_size).decode() == 301
+        with open(out_path) as f:
+            outputs.append(f.read().split('\n', 1)[1])
+    assert outputs[0] == outputs[1]
+    assert 'description: change 299' in outputs[0]
+
+    out_path = str(tmpdir.join('filtered.ldif'))
+    cl_ldif = ChangelogLDIF(cl_path, out_path, min_csn='%08x' % (0x5a2ffd10 + 100),
+                            max_csn='%08x' % (0x5a2ffd10 + 200), rids=[2], workers=2)
+    assert cl_ldif.process() == 35
+    with open(out_path) as f:
+        content = f.read()
+    assert 'clmaxruv' in content
+    assert 'cn=user100,' in content
+    assert 'cn=user101,' not in content
+    assert 'cn=user199,' in content
+    assert 'cn=user200,' not in content
+
+
 if __name__ == "__main__":
     CURRENT_FILE = os.path.realpath(__file__)
     pytest.main("-s -v %s" % CURRENT_FILE)
@@ -13,6 +13,7 @@ import pytest
 import os
 from lib389._constants import *
 from lib389.schema import Schema
+from ldap.schema.models import AttributeType
 from lib389.topologies import topology_st as topo
 
 DEBUGGING = os.getenv("DEBUGGING", default=False)
@@ -113,6 +114,51 @@ def test_x_origin(topo):
     assert " 'USER_DEFINED' " in str(myschema.query_attributetype("testattrtwo"))
 
 
+def test_schema_cache(topo):
+    """Check the schema cache indexes and objectClass closures
+
+    :id: 4b0c8e2a-7d61-4f3e-9a55-1c2d3e4f5a6b
+    :setup: Standalone Instance
+    :steps:
+        1. Get the schema cache twice
+        2. Look up 'uid' by its name, alias and oid
+        3. Check the must and may closures of inetOrgPerson
+        4. Add an attribute type
+        5. Get the schema cache again
+    :expectedresults:
+        1. The same cache is returned
+        2. The same attribute type is found
+        3. The attributes of the superiors are included
+        4. Success
+        5. A new cache with the attribute type is returned
+    """
+
+    schema = Schema(topo.standalone)
+    cache = schema.get_cache()
+    assert schema.get_cache() is cache
+
+    uid = cache.get('uid', AttributeType)
+    assert uid is not None
+    assert cache.get('USERID', AttributeType) is uid
+    assert cache.get('0.9.2342.19200300.100.1.1', AttributeType) is uid
+    assert cache.resolve('userid') == 'uid'
+
+    must = cache.get_must('inetOrgPerson')
+    may = cache.get_may('inetOrgPerson')
+    # From person and top
+    assert {'cn', 'sn', 'objectClass'} <= must
+    assert {'telephoneNumber', 'uid', 'mail'} <= may
+    assert not must & may
+    assert cache.get_must('nonexistent') is None
+
+    schema.add_attributetype({'names': ('testcacheattr',), 'oid': '8.9.10.11.12.13.18',
+                              'syntax': '1.3.6.1.4.1.1466.115.121.1.15'})
+    new_cache = schema.get_cache()
+    assert new_cache is not cache
+    assert new_cache.get('testcacheattr', AttributeType) is not None
+    schema.remove_attributetype('testcacheattr')
+
+
 if __name__ == '__main__':
     # Run isolated
     # -s for DEBUG mode
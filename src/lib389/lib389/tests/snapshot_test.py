@@ -0,0 +1,77 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+import os
+import pytest
+from lib389 import DirSrv
+from lib389.topologies import topology_st
+from lib389.idm.user import nsUserAccounts
+from lib389.instance.snapshot import read_ds_snapshot, _rewrite_dse
+from lib389._constants import DEFAULT_SUFFIX, DN_CONFIG, SER_PORT, SER_SECURE_PORT, SER_SERVERID_PROP
+
+CLONE_PORT = 38950
+CLONE_SECURE_PORT = 63650
+CLONE_SERVERID = 'clone1'
+
+
+def test_rewrite_dse():
+    """
+    Assert that the paths of the snapshot are renamed, and that the unique
+    id generator state is removed.
+    """
+    contents = ('dn: cn=config\n'
+                'nsslapd-errorlog: /var/log/dirsrv/slapd-golden/errors\n'
+                '\n'
+                'dn: cn=uniqueid generator,cn=config\n'
+                'objectClass: top\n'
+                'nsState:: AAAA\n'
+                '\n'
+                'dn: cn=ldbm database,cn=plugins,cn=config\n'
+                'cn: ldbm database\n'
+                '\n')
+    assert _rewrite_dse(contents, 'golden', 'clone1') == (
+        'dn: cn=config\n'
+        'nsslapd-errorlog: /var/log/dirsrv/slapd-clone1/errors\n'
+        '\n'
+        'dn: cn=ldbm database,cn=plugins,cn=config\n'
+        'cn: ldbm database\n'
+        '\n')
+
+
+def test_snapshot_clone(topology_st, tmpdir):
+    """
+    Assert that an instance cloned from a snapshot has its own name and
+    ports, and the entries of the snapshot.
+    """
+    inst = topology_st.standalone
+    users = nsUserAccounts(inst, DEFAULT_SUFFIX)
+    users.create_test_user(uid=6000)
+
+    path = str(tmpdir.join('snapshot'))
+    inst.snapshot(path)
+    assert inst.status()
+    assert read_ds_snapshot(path)['serverid'] == inst.serverid
+    with pytest.raises(ValueError):
+        inst.snapshot(path)
+
+    clone = DirSrv(verbose=inst.verbose)
+    clone.allocate({SER_PORT: CLONE_PORT, SER_SECURE_PORT: CLONE_SECURE_PORT, SER_SERVERID_PROP: CLONE_SERVERID})
+    if clone.exists():
+        clone.delete()
+    clone.clone_from_snapshot(path)
+    try:
+        clone.start(post_open=False)
+        clone.open()
+        assert clone.config.get_attr_val_int('nsslapd-port') == CLONE_PORT
+        assert clone.config.get_attr_val_int('nsslapd-secureport') == CLONE_SECURE_PORT
+        assert CLONE_SERVERID in clone.getEntry(DN_CONFIG).getValue('nsslapd-errorlog').decode()
+        assert os.path.exists(os.path.join(clone.ds_paths.config_dir, 'dse.ldif'))
+        assert nsUserAccounts(clone, DEFAULT_SUFFIX).get('test_user_6000')
+    finally:
+        clone.delete()
@@ -0,0 +1,46 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+import os
+import time
+from lib389.topologies import topology_st
+from lib389.tasks import ExportTask, wait_for_tasks
+from lib389._constants import DEFAULT_SUFFIX
+
+
+def test_task_wait(topology_st):
+    """
+    Assert that a short task is seen as complete well before the old 2s poll.
+    """
+    inst = topology_st.standalone
+    task = ExportTask(inst)
+    task.export_suffix_to_ldif(os.path.join(inst.get_ldif_dir(), 'task_wait.ldif'), DEFAULT_SUFFIX)
+    start = time.monotonic()
+    task.wait()
+    assert task.is_complete()
+    assert task.get_exit_code() == 0
+    assert time.monotonic() - start < 2
+
+
+def test_wait_for_tasks(topology_st):
+    """
+    Assert that many tasks can be waited for together.
+    """
+    inst = topology_st.standalone
+    tasks = []
+    for i in range(0, 5):
+        task = ExportTask(inst)
+        # Task names are timestamps, make sure they are unique
+        task.cn = '%s_%d' % (task.cn, i)
+        task._dn = 'cn=%s,%s' % (task.cn, task._dn.split(',', 1)[1])
+        task.export_suffix_to_ldif(os.path.join(inst.get_ldif_dir(), 'tasks_wait_%d.ldif' % i), DEFAULT_SUFFIX)
+        tasks.append(task)
+    assert wait_for_tasks(tasks, timeout=60) == []
+    for task in tasks:
+        assert task.get_exit_code() == 0
@@ -9,9 +9,12 @@
 import os
 import logging
 import socket  # For hostname detection for GSSAPI tests
+import shutil
 import pytest
+from concurrent.futures import ProcessPoolExecutor
 from lib389 import DirSrv
-from lib389.utils import generate_ds_params
+from lib389.utils import generate_ds_params, get_ds_version
+from lib389.instance.snapshot import read_ds_snapshot
 from lib389.mit_krb5 import MitKrb5
 from lib389.saslmap import SaslMappings
 from lib389.replica import ReplicationManager, Replicas
@@ -26,6 +29,12 @@ else:
     logging.getLogger(__name__).setLevel(logging.INFO)
 log = logging.getLogger(__name__)
 
+# The number of instances created at once, 1 creates them one after another
+TOPOLOGY_WORKERS = int(os.getenv('TOPOLOGY_WORKERS', default=1))
+# A directory to keep snapshots of new instances in, by suffix. The next
+# instances are cloned from them, rather than created with the setup.
+TOPOLOGY_SNAPSHOT_DIR = os.getenv('TOPOLOGY_SNAPSHOT_DIR')
+
 
 def _remove_ssca_db(topology):
     ssca = NssSsl(dbpath=topology[0].get_ssca_dir())
@@ -35,14 +44,84 @@ def _remove_ssca_db(topology):
         return True
 
 
-def _create_instances(topo_dict, suffix):
+def _create_instance(args_instance):
+    """Create an instance in a worker process of _create_instances. Only the
+    arguments are sent to the worker, as a DirSrv can not be pickled.
+
+    :param args_instance: the arguments to allocate the instance with
+    :type args_instance: dict
+
+    :return - the server root of the instance
+    """
+
+    instance = DirSrv(verbose=bool(DEBUGGING))
+    instance.allocate(args_instance)
+    instance.create()
+    return instance.sroot
+
+
+def _get_snapshot(suffix):
+    """Return the path of the snapshot of the instances with a suffix in
+    TOPOLOGY_SNAPSHOT_DIR, and if it exists. A snapshot of another version
+    of the server is removed.
+
+    :param suffix: a suffix
+    :type suffix: str
+
+    :return - (path, exists), or (None, False) without TOPOLOGY_SNAPSHOT_DIR
+    """
+
+    if not TOPOLOGY_SNAPSHOT_DIR:
+        return (None, False)
+    path = os.path.join(TOPOLOGY_SNAPSHOT_DIR, str(suffix).lower())
+    manifest = read_ds_snapshot(path)
+    if manifest is None:
+        return (path, False)
+    if manifest['version'] != get_ds_version():
+        log.info("Removing the snapshot {} of version {}".format(path, manifest['version']))
+        shutil.rmtree(path, ignore_errors=True)
+        return (path, False)
+    return (path, True)
+
+
+def _save_snapshot(instance, path):
+    """Keep a snapshot of an instance in path. It is made aside first, so
+    that concurrent test runs never see it half made.
+
+    :param instance: an instance
+    :type instance: lib389.DirSrv
+    :param path: the path of the snapshot
+    :type path: str
+    """
+
+    tmp_path = "{}.{}".format(path, os.getpid())
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    instance.snapshot(tmp_path)
+    try:
+        os.rename(tmp_path, path)
+        log.info("Instance {} was saved in the snapshot {}".format(instance.serverid, path))
+    except OSError:
+        # Another run made it first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def _create_instances(topo_dict, suffix, workers=None):
     """Create requested instances without replication or any other modifications
 
+    With more than one worker, the first instance is created alone, as it
+    creates or renews the self signed CA that all the instances share. The
+    others are then created at once by a pool of worker processes, as their
+    ports and server ids are unique. With TOPOLOGY_SNAPSHOT_DIR, they are
+    cloned from the snapshot of the suffix instead, and the snapshot is made
+    from the first instance when there is none.
+
     :param topo_dict: a dictionary {ReplicaRole.STANDALONE: num, ReplicaRole.MASTER: num,
                                     ReplicaRole.HUB: num, ReplicaRole.CONSUMER: num}
     :type topo_dict: dict
     :param suffix: a suffix
     :type suffix: str
+    :param workers: the number of instances created at once, TOPOLOGY_WORKERS by default
+    :type workers: int
 
     :return - TopologyMain object
     """
@@ -52,8 +131,12 @@ def _create_instances(topo_dict, suffix):
     cs = {}
     hs = {}
     ins = {}
+    created = []
 
-    # Create instances
+    if workers is None:
+        workers = TOPOLOGY_WORKERS
+
+    # Allocate instances, and remove the previous ones
     for role in topo_dict.keys():
         for inst_num in range(1, topo_dict[role]+1):
             instance_data = generate_ds_params(inst_num, role)
@@ -85,28 +168,51 @@ def _create_instances(topo_dict, suffix):
             if instance_exists:
                 instance.delete()
 
+            created.append((role, instance, args_instance))
+
+    # Create instances
+    (snapshot, snapshot_exists) = _get_snapshot(suffix)
+    if snapshot_exists:
+        for (_, instance, _) in created:
+            instance.clone_from_snapshot(snapshot)
+            instance.start(post_open=False)
+    elif workers > 1 and len(created) > 2:
+        created[0][1].create()
+        others = created[1:]
+        with ProcessPoolExecutor(max_workers=min(workers, len(others))) as executor:
+            sroots = list(executor.map(_create_instance, [args for (_, _, args) in others]))
+        for ((_, instance, _), sroot) in zip(others, sroots):
+            # As create() does once the instance exists
+            instance.sroot = sroot
+            instance.state = DIRSRV_STATE_OFFLINE
+    else:
+        for (_, instance, _) in created:
             instance.create()
-            # We set a URL here to force ldap:// only. Once we turn on TLS
-            # we'll flick this to ldaps.
-            instance.use_ldap_uri()
-            instance.open()
-            if role == ReplicaRole.STANDALONE:
-                ins[instance.serverid] = instance
-                instances.update(ins)
-            if role == ReplicaRole.MASTER:
-                ms[instance.serverid] = instance
-                instances.update(ms)
-            if role == ReplicaRole.CONSUMER:
-                cs[instance.serverid] = instance
-                instances.update(cs)
-            if role == ReplicaRole.HUB:
-                hs[instance.serverid] = instance
-                instances.update(hs)
-            if DEBUGGING:
-                instance.config.set('nsslapd-accesslog-logbuffering','off')
-                instance.config.set('nsslapd-errorlog-level','8192')
-                instance.config.set('nsslapd-auditlog-logging-enabled','on')
-            log.info("Instance with parameters {} was created.".format(args_instance))
+    if snapshot is not None and not snapshot_exists and created:
+        _save_snapshot(created[0][1], snapshot)
+
+    for (role, instance, args_instance) in created:
+        # We set a URL here to force ldap:// only. Once we turn on TLS
+        # we'll flick this to ldaps.
+        instance.use_ldap_uri()
+        instance.open()
+        if role == ReplicaRole.STANDALONE:
+            ins[instance.serverid] = instance
+            instances.update(ins)
+        if role == ReplicaRole.MASTER:
+            ms[instance.serverid] = instance
+            instances.update(ms)
+        if role == ReplicaRole.CONSUMER:
+            cs[instance.serverid] = instance
+            instances.update(cs)
+        if role == ReplicaRole.HUB:
+            hs[instance.serverid] = instance
+            instances.update(hs)
+        if DEBUGGING:
+            instance.config.set('nsslapd-accesslog-logbuffering','off')
+            instance.config.set('nsslapd-errorlog-level','8192')
+            instance.config.set('nsslapd-auditlog-logging-enabled','on')
+        log.info("Instance with parameters {} was created.".format(args_instance))
 
     if "standalone1" in instances and len(instances) == 1:
         return TopologyMain(standalones=instances["standalone1"])
@@ -114,7 +220,7 @@ def _create_instances(topo_dict, suffix):
         return TopologyMain(standalones=ins, masters=ms, consumers=cs, hubs=hs)
 
 
-def create_topology(topo_dict, suffix=DEFAULT_SUFFIX):
+def create_topology(topo_dict, suffix=DEFAULT_SUFFIX, workers=None):
     """Create a requested topology. Cascading replication scenario isn't supported
 
     :param topo_dict: a dictionary {ReplicaRole.STANDALONE: num, ReplicaRole.MASTER: num,
@@ -122,6 +228,8 @@ def create_topology(topo_dict, suffix=DEFAULT_SUFFIX):
     :type topo_dict: dict
     :param suffix: a suffix for the replication
     :type suffix: str
+    :param workers: the number of instances created at once, TOPOLOGY_WORKERS by default
+    :type workers: int
 
     :return - TopologyMain object
     """
@@ -133,7 +241,7 @@ def create_topology(topo_dict, suffix=DEFAULT_SUFFIX):
         NotImplementedError("Cascading replication scenario isn't supported."
                             "Please, use existing topology or create your own.")
 
-    topo = _create_instances(topo_dict, suffix)
+    topo = _create_instances(topo_dict, suffix, workers)
 
     # Start with a single master, and create it "first".
     first_master = None
@@ -147,14 +255,12 @@ def create_topology(topo_dict, suffix=DEFAULT_SUFFIX):
         pass
 
     # Now init the other masters from this.
-    # This will reinit m, and put a bi-directional agreement
+    # This will reinit them at once, and put bi-directional agreements
     # in place.
-    for m in topo.ms.values():
-        # Skip firstmaster.
-        if m is first_master:
-            continue
-        log.info("Joining master %s to %s ..." % (m.serverid, first_master.serverid))
-        repl.join_master(first_master, m)
+    masters = [m for m in topo.ms.values() if m is not first_master]
+    if masters:
+        log.info("Joining masters %s to %s ..." % (', '.join(m.serverid for m in masters), first_master.serverid))
+        repl.join_masters(first_master, masters)
 
     # Mesh the master agreements.
     for mo in topo.ms.values():
@@ -165,9 +271,10 @@ def create_topology(topo_dict, suffix=DEFAULT_SUFFIX):
             repl.ensure_agreement(mo, mi)
 
     # Add master -> consumer agreements.
-    for c in topo.cs.values():
-        log.info("Joining consumer %s from %s ..." % (c.serverid, first_master.serverid))
-        repl.join_consumer(first_master, c)
+    consumers = list(topo.cs.values())
+    if consumers:
+        log.info("Joining consumers %s from %s ..." % (', '.join(c.serverid for c in consumers), first_master.serverid))
+        repl.join_consumers(first_master, consumers)
 
     for m in topo.ms.values():
         for c in topo.cs.values():
@@ -1063,6 +1063,18 @@ def generate_ds_params(inst_num, role=ReplicaRole.STANDALONE):
     return instance_data
 
 
+def get_total_memory():
+    """Return the RAM of the local host in bytes, or None if it is unknown"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
 def get_ds_version(paths=None):
     """
     Return version of ns-slapd installed on this system. This is determined by the defaults.inf
@@ -1152,6 +1164,20 @@ def getDateTime():
     return time.strftime("%Y-%m-%d %H:%M:%S")
 
 
+def backoff_intervals(poll_min, poll_max):
+    """Yield exponentially growing intervals between polls, capped at poll_max
+
+    :param poll_min: The first interval, in seconds
+    :type poll_min: float
+    :param poll_max: The largest interval, in seconds
+    :type poll_max: float
+    """
+    interval = poll_min
+    while True:
+        yield interval
+        interval = min(interval * 2, poll_max)
+
+
 def socket_check_open(host, port):
     """
     Check if a socket can be opened.  Need to handle cases where IPv6 is completely
@@ -1212,6 +1238,13 @@ def ensure_list_int(val):
     return [ensure_int(v) for v in val]
 
 
+def ldap_error_desc(e):
+    """Get the description of an ldap error for a report"""
+    if e.args and isinstance(e.args[0], dict) and 'desc' in e.args[0]:
+        return e.args[0]['desc']
+    return str(e)
+
+
 def ensure_dict_str(val):
     if MAJOR <= 2:
         return val